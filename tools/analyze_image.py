@@ -3,21 +3,61 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import concurrent.futures
 import logging
 import os
 import sys
 from pathlib import Path
 
+import requests
+
+from analyzer.batch import DEFAULT_POLL_INTERVAL, BatchRunner, create_batch_backend
 from analyzer.client import create_llm_client
 from analyzer.file_io import FileIO
 from analyzer.image_processor import OUTPUT_JSON_DIR, ImageProcessor
+from analyzer.page_classifier import SKIPPABLE_PAGE_TYPES, PageClassifier
+from analyzer.rate_limiter import RateLimiter
+from analyzer.response_cache import DEFAULT_RESPONSE_CACHE_MAX_BYTES, DEFAULT_RESPONSE_CACHE_PATH, ResponseCache
 
 # ロガーの設定
 logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
 logger = logging.getLogger("analyzer")
 
 
+async def analyze_all(
+    image_processor: ImageProcessor,
+    png_files: list[Path],
+    output_dir: Path,
+    max_in_flight: int,
+) -> list[bool]:
+    """
+    全ての画像を1つのイベントループで非同期に解析します。
+
+    APIの呼び出し数はクライアントのRateLimiterが制限します。読み込んだ画像を
+    メモリに溜め込まないよう、同時に処理する画像の数もmax_in_flightまでに抑えます。
+
+    Args:
+        image_processor: 画像プロセッサ
+        png_files: 処理対象のPNGファイルのリスト
+        output_dir: 出力ディレクトリ
+        max_in_flight: 同時に処理する画像の数の上限
+
+    Returns:
+        各ファイルの処理が成功したかどうか(png_filesと同じ順序)
+
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    total_files = len(png_files)
+
+    async def process_with_index(i: int, png_file_path: Path) -> bool:
+        async with semaphore:
+            logger.info("--- Processing file %s/%s ---", i + 1, total_files)
+            return await image_processor.aprocess_single_image(png_file_path, output_dir)
+
+    return await asyncio.gather(*(process_with_index(i, path) for i, path in enumerate(png_files)))
+
+
 def main() -> None:
     """
     スクリプトのエントリーポイント。
@@ -74,8 +114,26 @@ def main() -> None:
         "-w",
         "--workers",
         type=int,
-        default=min(32, os.cpu_count() or 1 * 2),
-        help="並列処理を行うスレッド数。",
+        help=(
+            "同時に送るリクエスト数の上限。デフォルト: 環境変数 MAX_CONCURRENCY または 8"
+            " (--sync の場合は並列処理を行うスレッド数。デフォルト: CPU数)"
+        ),
+    )
+
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        help="1分あたりのリクエスト数の上限。デフォルト: 環境変数 REQUESTS_PER_MINUTE または 60",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        help="1分あたりのトークン数の上限。デフォルト: 環境変数 TOKENS_PER_MINUTE または 1000000",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="非同期のパイプラインではなく、スレッドごとにAPIを呼び出す従来の方法で処理する。",
     )
 
     parser.add_argument(
@@ -93,6 +151,88 @@ def main() -> None:
         help="出力先のJSONファイルが既に存在する場合は処理をスキップする。",
     )
 
+    parser.add_argument(
+        "--skip-pages",
+        nargs="+",
+        choices=[page_type.value for page_type in SKIPPABLE_PAGE_TYPES],
+        help=(
+            "LLMに送る前にページを判定し、指定した種類のページをスキップする"
+            " (empty: 空白, cover: 表紙・送付状, text: 表のない文章)。"
+            "1ページ目と表のページは常に解析し、判定結果は page_classification.json に記録する。"
+        ),
+    )
+
+    parser.add_argument(
+        "--image-max-pixels",
+        type=int,
+        help=(
+            "送信する画像の画素数の上限。超える画像は縦横比を保って縮小し、--image-format で再圧縮する。"
+            "デフォルト: 環境変数 IMAGE_MAX_PIXELS (未設定の場合は縮小しない)"
+        ),
+    )
+    parser.add_argument(
+        "--image-max-kb",
+        type=int,
+        help=(
+            "送信する画像のサイズの上限(KB、base64にする前)。超える画像は品質・サイズを下げて再圧縮する。"
+            "デフォルト: 環境変数 IMAGE_MAX_BYTES (未設定の場合は再圧縮しない)"
+        ),
+    )
+    parser.add_argument(
+        "--image-format",
+        choices=["png", "jpeg", "webp"],
+        help="上限を超えた画像を再圧縮する形式。デフォルト: 環境変数 IMAGE_FORMAT または jpeg",
+    )
+
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help=(
+            "プロバイダーのバッチAPIで全ページをまとめて解析する(料金が安く、結果は通常24時間以内に返る)。"
+            "送信したバッチは出力ディレクトリの batch_jobs.json に記録し、再実行すると結果の取得を再開する。"
+        ),
+    )
+    parser.add_argument(
+        "--batch-id",
+        nargs="+",
+        help="新たに送信せず、指定したIDのバッチの終了を待って結果を保存する(--batch を含む)。",
+    )
+    parser.add_argument(
+        "--batch-no-wait",
+        action="store_true",
+        help="バッチを送信したら終了する。結果は同じコマンドを再実行して取得する。",
+    )
+    parser.add_argument(
+        "--batch-poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"バッチの状態を確認する間隔(秒)。デフォルト: {DEFAULT_POLL_INTERVAL:g}",
+    )
+    parser.add_argument(
+        "--batch-base-url",
+        help="バッチAPIのベースURL(プロキシや検証用の代替サーバーを使う場合)。デフォルト: プロバイダーの公式のURL",
+    )
+
+    parser.add_argument(
+        "--response-cache",
+        default=DEFAULT_RESPONSE_CACHE_PATH,
+        help=(
+            "LLM応答キャッシュのSQLiteファイル。画像の内容とプロンプト・モデルが同じページはAPIを呼び出さない。"
+            f"デフォルト: '{DEFAULT_RESPONSE_CACHE_PATH}'"
+        ),
+    )
+    parser.add_argument(
+        "--response-cache-max-mb",
+        type=int,
+        default=DEFAULT_RESPONSE_CACHE_MAX_BYTES // (1024 * 1024),
+        help="LLM応答キャッシュの上限サイズ(MB)。超えた場合は使用日時が古い応答から削除する。",
+    )
+    parser.add_argument(
+        "--no-response-cache",
+        action="store_true",
+        help="LLM応答キャッシュを使用しない。",
+    )
+
     args = parser.parse_args()
 
     # プロバイダーに応じた環境変数のチェック
@@ -117,16 +257,37 @@ def main() -> None:
     # ファイルI/Oハンドラの作成
     file_io = FileIO()
 
+    # LLM応答キャッシュの作成
+    response_cache = (
+        None
+        if args.no_response_cache
+        else ResponseCache(args.response_cache, max_bytes=args.response_cache_max_mb * 1024 * 1024)
+    )
+
+    # 送信する画像の上限(指定したもののみ環境変数より優先する)
+    image_options = {
+        "image_max_pixels": args.image_max_pixels,
+        "image_max_bytes": args.image_max_kb * 1024 if args.image_max_kb else None,
+        "image_format": args.image_format,
+    }
+
     # LLMクライアントの作成
     llm_client = create_llm_client(
         provider=args.provider,
         image_loader=file_io,
         file_writer=file_io,
+        response_cache=response_cache,
+        config_overrides={key: value for key, value in image_options.items() if value is not None},
     )
     logger.info("LLMモデル: %s", llm_client.config.get_model_name())
 
     # 画像プロセッサの作成
-    image_processor = ImageProcessor(llm_client, skip_if_exists=args.skip_if_exists)
+    page_classifier = PageClassifier(args.skip_pages) if args.skip_pages else None
+    image_processor = ImageProcessor(
+        llm_client,
+        skip_if_exists=args.skip_if_exists,
+        page_classifier=page_classifier,
+    )
 
     output_dir = Path(args.output_dir)
 
@@ -157,31 +318,79 @@ def main() -> None:
 
     logger.info("%s 個のPNGファイルを処理します。", total_files)
 
-    def process_with_index(
-        args_tuple: tuple[int, Path],
-    ) -> tuple[Path, bool]:
-        i, png_file_path = args_tuple
-        logger.info("--- Processing file %s/%s ---", i + 1, total_files)
-        success = image_processor.process_single_image(
-            png_file_path,
-            output_dir,
-        )
-        return png_file_path, success
-
-    max_workers = args.workers
-    logger.info("並列処理を開始します (最大 %s スレッド)", max_workers)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        indexed_files = list(enumerate(png_files))
-        results = list(executor.map(process_with_index, indexed_files))
-
-        success_count = sum(1 for _, success in results if success)
+    if args.batch or args.batch_id:
+        # バッチAPIで送信し、終了を待って結果を保存する(送信したバッチは出力ディレクトリに記録され、再実行で再開できる)
+        backend = create_batch_backend(llm_client.config, base_url=args.batch_base_url)
+        runner = BatchRunner(image_processor, backend, output_dir, poll_interval=args.batch_poll_interval)
+        try:
+            runner.run(png_files, batch_ids=args.batch_id, wait=not args.batch_no_wait)
+        except requests.RequestException:
+            logger.exception(
+                "バッチAPIの呼び出しに失敗しました。同じコマンドを再実行すると、送信済みのバッチから再開します。"
+            )
+            sys.exit(1)
+        success_count = runner.success_count
+        failed_count = runner.failed_count
+    else:
+        if args.sync:
+            max_workers = args.workers or min(32, os.cpu_count() or 1 * 2)
+
+            def process_with_index(
+                args_tuple: tuple[int, Path],
+            ) -> bool:
+                i, png_file_path = args_tuple
+                logger.info("--- Processing file %s/%s ---", i + 1, total_files)
+                return image_processor.process_single_image(
+                    png_file_path,
+                    output_dir,
+                )
+
+            logger.info("並列処理を開始します (最大 %s スレッド)", max_workers)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(process_with_index, enumerate(png_files)))
+        else:
+            max_workers = args.workers or llm_client.config.max_concurrency
+            # 全リクエストでレート制限を共有するため、コマンドラインの上限でクライアントのRateLimiterを作り直す
+            requests_per_minute = args.rpm or llm_client.config.requests_per_minute
+            tokens_per_minute = args.tpm or llm_client.config.tokens_per_minute
+            rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute, max_concurrency=max_workers)
+            llm_client.rate_limiter = rate_limiter
+            logger.info(
+                "非同期処理を開始します (同時リクエスト最大 %s, %s リクエスト/分, %s トークン/分)",
+                max_workers,
+                requests_per_minute,
+                tokens_per_minute,
+            )
+            # 次に送る画像の読み込み・エンコードをAPIの応答待ちと重ねるため、同時実行数の2倍まで先に処理する
+            results = asyncio.run(analyze_all(image_processor, png_files, output_dir, max_in_flight=max_workers * 2))
+            stats = rate_limiter.stats()
+            logger.info(
+                "レート制限: リクエスト %s 件, レート制限エラー %s 件, 待機 %s 秒, 最終的な同時実行数 %s",
+                stats["requests"],
+                stats["rate_limited"],
+                stats["throttled_seconds"],
+                stats["concurrency_limit"],
+            )
+
+        success_count = sum(1 for success in results if success)
         failed_count = total_files - success_count
 
-        llm_client.save_error_log(output_dir)
+    llm_client.save_error_log(output_dir)
+    if page_classifier:
+        page_classifier.save_log(output_dir)
 
     logger.info("--- 全 %s ファイルの処理が完了しました ---", total_files)
     logger.info("成功: %s ファイル, 失敗: %s ファイル", success_count, failed_count)
+    if response_cache:
+        stats = response_cache.stats()
+        logger.info(
+            "LLM応答キャッシュ: ヒット %s 件, ミス %s 件, 削除 %s 件 (保存 %s 件)",
+            stats["hits"],
+            stats["misses"],
+            stats["evictions"],
+            stats["entries"],
+        )
+        response_cache.close()
 
     if failed_count > 0:
         logger.error(
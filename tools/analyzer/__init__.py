@@ -1,9 +1,25 @@
 """LLMを使用して画像の内容を解析するためのモジュール"""
 
+from analyzer.batch import BatchRunner
 from analyzer.client import AnalysisError
 from analyzer.config import LLMConfig, LLMProvider
 from analyzer.file_io import FileIO
 from analyzer.image_processor import ImageProcessor
 from analyzer.llm_client import LangChainLLMClient
+from analyzer.page_classifier import PageClassifier, PageType
+from analyzer.rate_limiter import RateLimiter
+from analyzer.response_cache import ResponseCache
 
-__all__ = ["AnalysisError", "FileIO", "ImageProcessor", "LLMConfig", "LLMProvider", "LangChainLLMClient"]
+__all__ = [
+    "AnalysisError",
+    "BatchRunner",
+    "FileIO",
+    "ImageProcessor",
+    "LLMConfig",
+    "LLMProvider",
+    "LangChainLLMClient",
+    "PageClassifier",
+    "PageType",
+    "RateLimiter",
+    "ResponseCache",
+]
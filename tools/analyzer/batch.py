@@ -0,0 +1,733 @@
+"""
+バッチAPIモジュール
+
+ページの解析リクエストをプロバイダーのバッチAPI(OpenAI Batch API・Anthropic Message Batches・Gemini Batch Mode)に
+まとめて送信し、完了を待って結果を各ページのJSONファイルに保存するクラスを提供します。
+バッチAPIは通常のAPIより料金が安く、レート制限も別枠のため、急がない大量のページの解析に向いています。
+送信したバッチのIDは出力ディレクトリのbatch_jobs.jsonに記録し、中断しても同じコマンドで結果の取得を再開できます。
+"""
+
+from __future__ import annotations
+
+import abc
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import requests
+
+from analyzer.config import LLMProvider
+from analyzer.llm_client import JSON_INSTRUCTION, AnalysisError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from analyzer.config import LLMConfig
+    from analyzer.image_processor import ImageProcessor
+
+# ロガーの設定
+logger = logging.getLogger("analyzer")
+
+# 送信したバッチの記録ファイル名
+BATCH_STATE_FILE = "batch_jobs.json"
+
+# バッチの状態を確認する間隔のデフォルト(秒)
+DEFAULT_POLL_INTERVAL = 60.0
+
+# 1つのバッチに含めるリクエスト数・リクエストの合計サイズ(バイト)の上限(各プロバイダーの上限より小さくする)
+MAX_BATCH_REQUESTS = 10_000
+MAX_BATCH_BYTES = 100 * 1024 * 1024
+
+# HTTPリクエストのタイムアウト(秒、バッチファイルのアップロードを含む)
+REQUEST_TIMEOUT = 300
+
+# 各プロバイダーのAPIのベースURL
+DEFAULT_BASE_URLS = {
+    LLMProvider.OPENAI: "https://api.openai.com/v1",
+    LLMProvider.ANTHROPIC: "https://api.anthropic.com/v1",
+    LLMProvider.GOOGLE: "https://generativelanguage.googleapis.com",
+}
+
+
+def batch_custom_id(image_filename: str) -> str:
+    """
+    ページ画像のファイル名から、バッチ内のリクエストを識別するIDを作成します。
+
+    AnthropicのIDは英数字・ハイフン・アンダースコアの64文字以内に制限されているため、
+    日本語の団体名を含むファイル名はハッシュにします(同じファイル名からは常に同じIDになります)。
+
+    Args:
+        image_filename: ページ画像のファイル名
+
+    Returns:
+        リクエストのID
+
+    """
+    return "page-" + hashlib.sha256(image_filename.encode()).hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class PageRequest:
+    """バッチに含める1ページ分のリクエスト"""
+
+    custom_id: str
+    prompt_text: str
+    media_type: str
+    image_base64: str
+
+
+@dataclass(frozen=True)
+class BatchStatus:
+    """バッチの状態"""
+
+    state: str
+    done: bool
+    counts: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """バッチ内の1リクエストの結果(text・errorのどちらか一方が設定される)"""
+
+    custom_id: str
+    text: str | None = None
+    error: str | None = None
+
+
+def _jsonl(lines: Iterable[dict[str, Any]]) -> bytes:
+    """辞書のリストをJSON Lines形式のバイト列に変換します。"""
+    return b"".join(json.dumps(line, ensure_ascii=False).encode() + b"\n" for line in lines)
+
+
+def _parse_jsonl(text: str) -> Iterator[dict[str, Any]]:
+    """JSON Lines形式の文字列を1行ずつ辞書に変換します。"""
+    for line in text.splitlines():
+        if line.strip():
+            yield json.loads(line)
+
+
+class BatchBackend(abc.ABC):
+    """プロバイダーのバッチAPIの共通処理(リクエストの形式とエンドポイントはサブクラスで実装)"""
+
+    def __init__(
+        self,
+        config: LLMConfig,
+        base_url: str | None = None,
+        session: requests.Session | None = None,
+    ) -> None:
+        """
+        BatchBackendを初期化します。
+
+        Args:
+            config: LLM設定
+            base_url: APIのベースURL(デフォルト: プロバイダーの公式のURL、テスト時は代替サーバーを指定)
+            session: HTTPセッション
+
+        """
+        self.config = config
+        self.model_name = config.get_model_name()
+        self.max_tokens = config.max_tokens
+        self.temperature = config.temperature
+        self.base_url = (base_url or DEFAULT_BASE_URLS[config.provider]).rstrip("/")
+        self.session = session or requests.Session()
+        self.session.headers.update(self._auth_headers(config.get_api_key()))
+
+    @abc.abstractmethod
+    def _auth_headers(self, api_key: str) -> dict[str, str]:
+        """認証ヘッダーを返します。"""
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """HTTPリクエストを送信し、エラーのステータスの場合は例外を送出します。"""
+        response = self.session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+        response.raise_for_status()
+        return response
+
+    @abc.abstractmethod
+    def build_request(self, request: PageRequest) -> dict[str, Any]:
+        """
+        ページのリクエストをバッチファイルの1行の形式に変換します。
+
+        Args:
+            request: ページのリクエスト
+
+        Returns:
+            バッチファイルの1行
+
+        """
+
+    @abc.abstractmethod
+    def submit(self, lines: list[dict[str, Any]]) -> str:
+        """
+        リクエストをバッチとして送信します。
+
+        Args:
+            lines: build_requestで変換したリクエスト
+
+        Returns:
+            バッチのID
+
+        """
+
+    @abc.abstractmethod
+    def status(self, batch_id: str) -> BatchStatus:
+        """
+        バッチの状態を取得します。
+
+        Args:
+            batch_id: バッチのID
+
+        Returns:
+            バッチの状態
+
+        """
+
+    @abc.abstractmethod
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        """
+        完了したバッチの結果を取得します。
+
+        Args:
+            batch_id: バッチのID
+
+        Yields:
+            BatchResult: リクエストごとの結果
+
+        """
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API(JSONLファイルをアップロードし、/v1/chat/completionsのバッチを作成)"""
+
+    TERMINAL_STATES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+    def _auth_headers(self, api_key: str) -> dict[str, str]:
+        return {"Authorization": f"Bearer {api_key}"}
+
+    def build_request(self, request: PageRequest) -> dict[str, Any]:
+        body: dict[str, Any] = {
+            "model": self.model_name,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": request.prompt_text},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{request.media_type};base64,{request.image_base64}",
+                                "detail": "high",
+                            },
+                        },
+                    ],
+                }
+            ],
+            "max_completion_tokens": self.max_tokens,
+        }
+        if self.temperature is not None:
+            body["temperature"] = self.temperature
+        return {"custom_id": request.custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def submit(self, lines: list[dict[str, Any]]) -> str:
+        uploaded = self._request(
+            "POST",
+            f"{self.base_url}/files",
+            data={"purpose": "batch"},
+            files={"file": ("requests.jsonl", _jsonl(lines), "application/jsonl")},
+        ).json()
+        batch = self._request(
+            "POST",
+            f"{self.base_url}/batches",
+            json={"input_file_id": uploaded["id"], "endpoint": "/v1/chat/completions", "completion_window": "24h"},
+        ).json()
+        return batch["id"]
+
+    def status(self, batch_id: str) -> BatchStatus:
+        batch = self._request("GET", f"{self.base_url}/batches/{batch_id}").json()
+        state = batch["status"]
+        return BatchStatus(state, state in self.TERMINAL_STATES, batch.get("request_counts") or {})
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        batch = self._request("GET", f"{self.base_url}/batches/{batch_id}").json()
+        # 成功したリクエストはoutput_file_id、失敗したリクエストはerror_file_idのファイルに含まれる
+        for file_key in ("output_file_id", "error_file_id"):
+            if not batch.get(file_key):
+                continue
+            content = self._request("GET", f"{self.base_url}/files/{batch[file_key]}/content").text
+            for line in _parse_jsonl(content):
+                response = line.get("response") or {}
+                if response.get("status_code") == 200:
+                    choices = response.get("body", {}).get("choices") or [{}]
+                    text = choices[0].get("message", {}).get("content")
+                    if text is not None:
+                        yield BatchResult(line["custom_id"], text=text)
+                        continue
+                error = line.get("error") or response.get("body", {}).get("error") or response
+                yield BatchResult(line["custom_id"], error=json.dumps(error, ensure_ascii=False))
+
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches API(リクエストをJSONで送信し、結果をJSONLで取得)"""
+
+    API_VERSION = "2023-06-01"
+
+    def _auth_headers(self, api_key: str) -> dict[str, str]:
+        return {"x-api-key": api_key, "anthropic-version": self.API_VERSION}
+
+    def build_request(self, request: PageRequest) -> dict[str, Any]:
+        params: dict[str, Any] = {
+            "model": self.model_name,
+            "max_tokens": self.max_tokens,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": request.media_type,
+                                "data": request.image_base64,
+                            },
+                        },
+                        {"type": "text", "text": request.prompt_text},
+                    ],
+                }
+            ],
+        }
+        if self.temperature is not None:
+            params["temperature"] = self.temperature
+        return {"custom_id": request.custom_id, "params": params}
+
+    def submit(self, lines: list[dict[str, Any]]) -> str:
+        batch = self._request("POST", f"{self.base_url}/messages/batches", json={"requests": lines}).json()
+        return batch["id"]
+
+    def status(self, batch_id: str) -> BatchStatus:
+        batch = self._request("GET", f"{self.base_url}/messages/batches/{batch_id}").json()
+        state = batch["processing_status"]
+        return BatchStatus(state, state == "ended", batch.get("request_counts") or {})
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        batch = self._request("GET", f"{self.base_url}/messages/batches/{batch_id}").json()
+        results_url = batch.get("results_url") or f"{self.base_url}/messages/batches/{batch_id}/results"
+        for line in _parse_jsonl(self._request("GET", results_url).text):
+            result = line.get("result") or {}
+            if result.get("type") == "succeeded":
+                blocks = result.get("message", {}).get("content") or []
+                text = "".join(block.get("text", "") for block in blocks if block.get("type") == "text")
+                yield BatchResult(line["custom_id"], text=text)
+            else:
+                error = result.get("error") or {"type": result.get("type")}
+                yield BatchResult(line["custom_id"], error=json.dumps(error, ensure_ascii=False))
+
+
+class GoogleBatchBackend(BatchBackend):
+    """Gemini Batch Mode(JSONLファイルをFile APIでアップロードし、batchGenerateContentでバッチを作成)"""
+
+    TERMINAL_STATE_SUFFIXES = ("SUCCEEDED", "FAILED", "CANCELLED", "EXPIRED")
+
+    def _auth_headers(self, api_key: str) -> dict[str, str]:
+        return {"x-goog-api-key": api_key}
+
+    def build_request(self, request: PageRequest) -> dict[str, Any]:
+        return {
+            "key": request.custom_id,
+            "request": {
+                "contents": [
+                    {
+                        "role": "user",
+                        "parts": [
+                            {"text": request.prompt_text},
+                            {"inline_data": {"mime_type": request.media_type, "data": request.image_base64}},
+                        ],
+                    }
+                ],
+                "generation_config": {
+                    "response_mime_type": "application/json",
+                    "max_output_tokens": self.max_tokens,
+                    "temperature": self.temperature or 0.0,
+                },
+            },
+        }
+
+    def submit(self, lines: list[dict[str, Any]]) -> str:
+        payload = _jsonl(lines)
+        # File APIのresumable uploadで、アップロード先のURLを取得してから本体を送信する
+        started = self._request(
+            "POST",
+            f"{self.base_url}/upload/v1beta/files",
+            headers={
+                "X-Goog-Upload-Protocol": "resumable",
+                "X-Goog-Upload-Command": "start",
+                "X-Goog-Upload-Header-Content-Length": str(len(payload)),
+                "X-Goog-Upload-Header-Content-Type": "application/jsonl",
+            },
+            json={"file": {"display_name": "analyzer-batch"}},
+        )
+        uploaded = self._request(
+            "POST",
+            started.headers["X-Goog-Upload-URL"],
+            headers={"X-Goog-Upload-Offset": "0", "X-Goog-Upload-Command": "upload, finalize"},
+            data=payload,
+        ).json()
+        operation = self._request(
+            "POST",
+            f"{self.base_url}/v1beta/models/{self.model_name}:batchGenerateContent",
+            json={
+                "batch": {
+                    "display_name": "analyzer-batch",
+                    "input_config": {"file_name": uploaded["file"]["name"]},
+                }
+            },
+        ).json()
+        return operation["name"]
+
+    def status(self, batch_id: str) -> BatchStatus:
+        operation = self._request("GET", f"{self.base_url}/v1beta/{batch_id}").json()
+        metadata = operation.get("metadata") or {}
+        state = metadata.get("state", "")
+        done = bool(operation.get("done")) or state.endswith(self.TERMINAL_STATE_SUFFIXES)
+        return BatchStatus(state, done, metadata.get("batchStats") or {})
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        operation = self._request("GET", f"{self.base_url}/v1beta/{batch_id}").json()
+        responses_file = (operation.get("response") or {}).get("responsesFile")
+        if not responses_file:
+            return
+        content = self._request(
+            "GET", f"{self.base_url}/download/v1beta/{responses_file}:download", params={"alt": "media"}
+        ).text
+        for line in _parse_jsonl(content):
+            candidates = (line.get("response") or {}).get("candidates") or []
+            if candidates:
+                parts = candidates[0].get("content", {}).get("parts") or []
+                yield BatchResult(line["key"], text="".join(part.get("text", "") for part in parts))
+            else:
+                error = line.get("error") or line.get("response") or {}
+                yield BatchResult(line["key"], error=json.dumps(error, ensure_ascii=False))
+
+
+# プロバイダーごとのバッチAPIの実装
+BATCH_BACKENDS: dict[LLMProvider, type[BatchBackend]] = {
+    LLMProvider.OPENAI: OpenAIBatchBackend,
+    LLMProvider.ANTHROPIC: AnthropicBatchBackend,
+    LLMProvider.GOOGLE: GoogleBatchBackend,
+}
+
+
+def create_batch_backend(
+    config: LLMConfig,
+    base_url: str | None = None,
+    session: requests.Session | None = None,
+) -> BatchBackend:
+    """
+    設定のプロバイダーに対応するバッチAPIの実装を作成します。
+
+    Args:
+        config: LLM設定
+        base_url: APIのベースURL(デフォルト: プロバイダーの公式のURL)
+        session: HTTPセッション
+
+    Returns:
+        バッチAPIの実装
+
+    """
+    return BATCH_BACKENDS[config.provider](config, base_url=base_url, session=session)
+
+
+class BatchRunner:
+    """ページをバッチAPIで解析し、結果を各ページのJSONファイルに保存するクラス"""
+
+    def __init__(
+        self,
+        image_processor: ImageProcessor,
+        backend: BatchBackend,
+        output_dir: Path,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        sleep_func: Callable[[float], None] = time.sleep,
+        max_batch_requests: int = MAX_BATCH_REQUESTS,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+    ) -> None:
+        """
+        BatchRunnerを初期化します。
+
+        Args:
+            image_processor: 画像プロセッサ(スキップの判定と結果の保存に使用)
+            backend: バッチAPIの実装
+            output_dir: 出力ディレクトリ(バッチの記録もここに保存)
+            poll_interval: バッチの状態を確認する間隔(秒)
+            sleep_func: 待機に使用する関数(テスト時にモック可能)
+            max_batch_requests: 1つのバッチに含めるリクエスト数の上限
+            max_batch_bytes: 1つのバッチに含めるリクエストの合計サイズの上限(バイト)
+
+        """
+        self.image_processor = image_processor
+        self.llm_client = image_processor.llm_client
+        self.backend = backend
+        self.output_dir = output_dir
+        self.poll_interval = poll_interval
+        self.sleep_func = sleep_func
+        self.max_batch_requests = max_batch_requests
+        self.max_batch_bytes = max_batch_bytes
+        self.state_path = output_dir / BATCH_STATE_FILE
+        self.jobs: dict[str, dict[str, Any]] = self._load_jobs()
+        self.success_count = 0
+        self.failed_count = 0
+
+    def _load_jobs(self) -> dict[str, dict[str, Any]]:
+        """送信済みのバッチの記録を読み込みます。"""
+        if not self.state_path.exists():
+            return {}
+        with self.state_path.open(encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_jobs(self) -> None:
+        """送信済みのバッチの記録を保存します(中断しても壊れないよう一時ファイルから置き換える)。"""
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(self.state_path)
+
+    def _is_current(self, job: dict[str, Any]) -> bool:
+        """同じプロバイダー・モデルで送信したバッチかどうかを判定します。"""
+        return job["provider"] == self.llm_client.config.provider.value and job["model"] == self.backend.model_name
+
+    def pending_batch_ids(self) -> list[str]:
+        """
+        送信済みで、結果をまだ保存していないバッチのIDを取得します。
+
+        Returns:
+            バッチのIDのリスト(送信順)
+
+        """
+        return [batch_id for batch_id, job in self.jobs.items() if self._is_current(job) and not job["collected"]]
+
+    def _page_request(self, image_path: Path) -> PageRequest | None:
+        """
+        ページのリクエストを作成します。
+
+        スキップの対象のページと、応答キャッシュに結果があるページはその場で処理し、Noneを返します。
+
+        Args:
+            image_path: ページ画像のパス
+
+        Returns:
+            ページのリクエスト、送信が不要な場合はNone
+
+        """
+        output_filename = self.output_dir / f"{image_path.stem}.json"
+        if self.image_processor.should_skip(image_path, output_filename):
+            self.success_count += 1
+            return None
+
+        page = self.llm_client.prepare_page(image_path)
+        if isinstance(page, str):
+            self._count(self.image_processor.save_result(image_path, output_filename, page))
+            return None
+
+        return PageRequest(
+            batch_custom_id(image_path.name),
+            page.prompt_text + JSON_INSTRUCTION,
+            page.payload.media_type,
+            page.payload.data,
+        )
+
+    def submit(self, png_files: list[Path]) -> list[str]:
+        """
+        未送信のページをバッチに分けて送信し、記録します。
+
+        Args:
+            png_files: 処理対象のPNGファイルのリスト
+
+        Returns:
+            送信したバッチのIDのリスト
+
+        """
+        submitted = {page for batch_id in self.pending_batch_ids() for page in self.jobs[batch_id]["pages"].values()}
+        batch_ids: list[str] = []
+        lines: list[dict[str, Any]] = []
+        pages: dict[str, str] = {}
+        size = 0
+
+        for image_path in png_files:
+            # 前回の実行で送信済みのページは、そのバッチの結果を待つ
+            if str(image_path) in submitted:
+                continue
+            try:
+                request = self._page_request(image_path)
+            except OSError as e:
+                self._count(self._record_error(image_path.name, type(e).__name__, f"画像の読み込みに失敗しました: {e}"))
+                continue
+            if request is None:
+                continue
+
+            request_size = len(request.image_base64) + len(request.prompt_text)
+            if lines and (len(lines) >= self.max_batch_requests or size + request_size > self.max_batch_bytes):
+                batch_ids.append(self._submit_batch(lines, pages))
+                lines, pages, size = [], {}, 0
+            lines.append(self.backend.build_request(request))
+            pages[request.custom_id] = str(image_path)
+            size += request_size
+
+        if lines:
+            batch_ids.append(self._submit_batch(lines, pages))
+        return batch_ids
+
+    def _submit_batch(self, lines: list[dict[str, Any]], pages: dict[str, str]) -> str:
+        """1つのバッチを送信し、リクエストのIDとページ画像のパスの対応を記録します。"""
+        batch_id = self.backend.submit(lines)
+        self.jobs[batch_id] = {
+            "provider": self.llm_client.config.provider.value,
+            "model": self.backend.model_name,
+            "submitted_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "state": "submitted",
+            "collected": False,
+            "pages": pages,
+        }
+        self._save_jobs()
+        logger.info("バッチを送信しました: %s (%s ページ)", batch_id, len(pages))
+        return batch_id
+
+    def adopt(self, batch_id: str, png_files: list[Path]) -> None:
+        """
+        記録にないバッチのIDを、処理対象のページのバッチとして記録します(別の環境で送信したバッチの結果の取得用)。
+
+        Args:
+            batch_id: バッチのID
+            png_files: バッチに含まれる可能性のあるPNGファイルのリスト
+
+        """
+        if batch_id in self.jobs:
+            return
+        self.jobs[batch_id] = {
+            "provider": self.llm_client.config.provider.value,
+            "model": self.backend.model_name,
+            "submitted_at": None,
+            "state": "adopted",
+            "collected": False,
+            "adopted": True,
+            "pages": {batch_custom_id(path.name): str(path) for path in png_files},
+        }
+        self._save_jobs()
+
+    def wait(self, batch_id: str) -> BatchStatus:
+        """
+        バッチが終了するまで、一定の間隔で状態を確認します。
+
+        Args:
+            batch_id: バッチのID
+
+        Returns:
+            終了したバッチの状態
+
+        """
+        while True:
+            try:
+                status = self.backend.status(batch_id)
+            except requests.RequestException as e:
+                # 一時的な通信エラーの場合は、次の確認まで待って再試行する
+                logger.warning("バッチの状態の取得に失敗しました: %s: %s", batch_id, e)
+            else:
+                if status.state != self.jobs[batch_id]["state"]:
+                    self.jobs[batch_id]["state"] = status.state
+                    self._save_jobs()
+                if status.done:
+                    logger.info("バッチが終了しました: %s (%s) %s", batch_id, status.state, status.counts)
+                    return status
+                logger.info("バッチの処理中: %s (%s) %s", batch_id, status.state, status.counts)
+            self.sleep_func(self.poll_interval)
+
+    def collect(self, batch_id: str) -> None:
+        """
+        終了したバッチの結果を、通常のAPIの応答と同じように処理して各ページのJSONファイルに保存します。
+
+        Args:
+            batch_id: バッチのID
+
+        """
+        job = self.jobs[batch_id]
+        pages: dict[str, str] = job["pages"]
+        received: set[str] = set()
+
+        for result in self.backend.results(batch_id):
+            if result.custom_id not in pages:
+                logger.warning("バッチの結果に不明なリクエストが含まれています: %s", result.custom_id)
+                continue
+            received.add(result.custom_id)
+            self._count(self._save_page(Path(pages[result.custom_id]), result))
+
+        # 別の環境で送信したバッチは、対象のページの一部しか含まないため結果の欠落を確認しない
+        if not job.get("adopted"):
+            for custom_id, image_path in pages.items():
+                if custom_id not in received:
+                    message = f"バッチの結果に含まれていません (バッチ {batch_id}: {job['state']})"
+                    self._count(self._record_error(Path(image_path).name, "BatchResultMissing", message))
+
+        job["collected"] = True
+        self._save_jobs()
+
+    def _save_page(self, image_path: Path, result: BatchResult) -> bool:
+        """1ページ分の結果を処理して保存し、成功した場合はTrueを返します。"""
+        image_filename = image_path.name
+        if result.error is not None:
+            return self._record_error(
+                image_filename, "BatchRequestError", f"バッチのリクエストが失敗しました: {result.error}"
+            )
+        try:
+            response = self.llm_client.save_response(image_path, result.text or "")
+        except AnalysisError as e:
+            logger.error("エラー: %s", e.message)
+            return False
+        return self.image_processor.save_result(image_path, self.output_dir / f"{image_path.stem}.json", response)
+
+    def _record_error(self, image_filename: str, error_type: str, message: str) -> bool:
+        """エラーをクライアントのエラーログに記録し、Falseを返します。"""
+        self.llm_client.record_error(image_filename, error_type, message)
+        logger.error("エラー: %s (%s): %s", error_type, image_filename, message)
+        return False
+
+    def _count(self, success: bool) -> None:
+        """ページの処理結果を集計します。"""
+        if success:
+            self.success_count += 1
+        else:
+            self.failed_count += 1
+
+    def run(self, png_files: list[Path], batch_ids: list[str] | None = None, wait: bool = True) -> list[str]:
+        """
+        ページをバッチで解析します。
+
+        batch_idsを指定した場合は、新たに送信せずにそのバッチの結果を取得します。
+        指定しない場合は、前回の実行で結果を取得していないバッチを再開し、残りのページを新しいバッチで送信します。
+
+        Args:
+            png_files: 処理対象のPNGファイルのリスト
+            batch_ids: 結果を取得するバッチのID(オプション)
+            wait: バッチの終了を待って結果を保存するかどうか(Falseの場合は送信のみ)
+
+        Returns:
+            対象のバッチのIDのリスト
+
+        """
+        if batch_ids:
+            for batch_id in batch_ids:
+                self.adopt(batch_id, png_files)
+            targets = list(batch_ids)
+        else:
+            resumed = self.pending_batch_ids()
+            if resumed:
+                logger.info("結果を取得していないバッチを再開します: %s", ", ".join(resumed))
+            targets = resumed + self.submit(png_files)
+
+        if not wait:
+            logger.info("バッチを送信しました。結果は同じコマンドを再実行して取得します: %s", ", ".join(targets))
+            return targets
+
+        for batch_id in targets:
+            self.wait(batch_id)
+            self.collect(batch_id)
+        return targets
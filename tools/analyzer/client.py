@@ -20,10 +20,11 @@ from typing import TYPE_CHECKING, Any
 
 from analyzer.config import LLMConfig
 from analyzer.file_io import FileWriter, ImageLoader
-from analyzer.llm_client import LangChainLLMClient
+from analyzer.llm_client import AnalysisError, LangChainLLMClient  # noqa: F401 (AnalysisErrorは再エクスポート)
 
 if TYPE_CHECKING:
-    pass
+    from analyzer.rate_limiter import RateLimiter
+    from analyzer.response_cache import ResponseCache
 
 # 出力ディレクトリ名を定数化
 ERROR_LOG_FILE = "error_log.json"
@@ -32,31 +33,13 @@ ERROR_LOG_FILE = "error_log.json"
 logger = logging.getLogger("analyzer")
 
 
-class AnalysisError(Exception):
-    """分析エラーを表す例外。"""
-
-    def __init__(self, message: str, details: dict[str, Any]) -> None:
-        """
-        AnalysisErrorを初期化します。
-
-        Args:
-            message: エラーメッセージ。
-            details: エラーの詳細情報。
-
-        """
-        self.message = message
-        self.details = details
-        super().__init__(self.message)
-
-    def __str__(self) -> str:
-        """エラーメッセージと詳細を文字列として返します。"""
-        return f"{self.message}: {self.details}"
-
-
 def create_llm_client(
     provider: str = "google",
     image_loader: ImageLoader | None = None,
     file_writer: FileWriter | None = None,
+    response_cache: ResponseCache | None = None,
+    rate_limiter: RateLimiter | None = None,
+    config_overrides: dict[str, Any] | None = None,
 ) -> LangChainLLMClient:
     """LLMクライアントを作成するファクトリー関数。
 
@@ -64,6 +47,9 @@ def create_llm_client(
         provider: プロバイダー名 ("google", "anthropic", "openai")
         image_loader: 画像読み込みのためのローダー
         file_writer: ファイル書き込みのためのライター
+        response_cache: LLM応答のキャッシュ
+        rate_limiter: 非同期の解析で使用するレート制限(デフォルト: 設定の上限から作成)
+        config_overrides: 環境変数より優先するLLM設定の値(コマンドライン引数など)
 
     Returns:
         LLMクライアントのインスタンス
@@ -71,5 +57,5 @@ def create_llm_client(
     # 新しいLangChainベースのクライアントを使用
     from analyzer.config import LLMProvider
 
-    config = LLMConfig(provider=LLMProvider(provider))
-    return LangChainLLMClient(config, image_loader, file_writer)
+    config = LLMConfig(provider=LLMProvider(provider), **(config_overrides or {}))
+    return LangChainLLMClient(config, image_loader, file_writer, response_cache, rate_limiter)
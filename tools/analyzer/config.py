@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -75,6 +75,45 @@ class LLMConfig(BaseSettings):
         description="Maximum tokens for generation",
     )
 
+    # Rate limits (asynchronous pipeline)
+    requests_per_minute: int = Field(
+        default=60,
+        gt=0,
+        description="Maximum requests per minute for the provider",
+    )
+    tokens_per_minute: int = Field(
+        default=1_000_000,
+        gt=0,
+        description="Maximum input and output tokens per minute for the provider",
+    )
+    max_concurrency: int = Field(
+        default=8,
+        gt=0,
+        description="Maximum number of requests in flight",
+    )
+
+    # Image payload
+    image_max_pixels: int | None = Field(
+        default=None,
+        gt=0,
+        description="Downscale page images with more pixels than this before sending",
+    )
+    image_max_bytes: int | None = Field(
+        default=None,
+        gt=0,
+        description="Recompress page images larger than this many bytes (before base64) before sending",
+    )
+    image_format: Literal["png", "jpeg", "webp"] = Field(
+        default="jpeg",
+        description="Format used when a page image is downscaled or recompressed",
+    )
+    image_quality: int = Field(
+        default=90,
+        ge=1,
+        le=100,
+        description="JPEG/WebP quality used when a page image is recompressed",
+    )
+
     @field_validator("provider")
     @classmethod
     def validate_provider(cls, v: str) -> str:
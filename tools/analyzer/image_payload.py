@@ -0,0 +1,202 @@
+"""
+画像ペイロードモジュール
+
+LLMに送る画像をbase64にエンコードする関数を提供します。
+ファイルから読み込んだ画像が全プロバイダーで使える形式(PNG・JPEG・WebP)であれば、デコードしてPNGに再エンコードせずに
+元のファイルのバイト列をそのまま送ります。画素数・バイト数の上限を設定した場合は、上限を超える画像のみ縮小・再圧縮します。
+"""
+
+from __future__ import annotations
+
+import base64
+import logging
+import math
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+
+import PIL.Image
+
+# ロガーの設定
+logger = logging.getLogger("analyzer")
+
+# 元のファイルのまま送る形式(OpenAI・Anthropic・Geminiの全てが受け付ける形式)
+PASSTHROUGH_FORMATS = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+# 再圧縮に使用できる形式
+RECOMPRESS_FORMATS = ("png", "jpeg", "webp")
+
+# バイト数の上限に収まらない場合に品質を下げる幅と、品質の下限
+QUALITY_STEP = 10
+MIN_QUALITY = 50
+
+# 品質を下限まで下げても収まらない場合に縮小する倍率と、縮小の最大回数
+DOWNSCALE_FACTOR = 0.8
+MAX_DOWNSCALE_STEPS = 8
+
+
+@dataclass(frozen=True)
+class ImagePayload:
+    """エンコード済みの画像(リトライ時に再エンコードせずに再利用する)"""
+
+    media_type: str
+    data: str
+    width: int
+    height: int
+    byte_size: int
+    passthrough: bool
+
+    @property
+    def data_url(self) -> str:
+        """data URL形式の文字列"""
+        return f"data:{self.media_type};base64,{self.data}"
+
+
+def _original_bytes(image: PIL.Image.Image) -> bytes | None:
+    """
+    画像の元のファイルのバイト列を読み込みます。
+
+    ファイルから開いたままの画像(formatが設定されている)で、形式がPASSTHROUGH_FORMATSの場合のみ読み込みます。
+    変換や加工をした画像はformatがNoneになるため対象外です。
+
+    Args:
+        image: 画像
+
+    Returns:
+        元のファイルのバイト列、対象外の場合はNone
+
+    """
+    filename = getattr(image, "filename", "")
+    if image.format not in PASSTHROUGH_FORMATS or not filename:
+        return None
+    try:
+        return Path(filename).read_bytes()
+    except OSError:
+        return None
+
+
+def _encode(image: PIL.Image.Image, image_format: str, quality: int) -> bytes:
+    """画像を指定した形式でエンコードします(JPEG・WebPは形式が扱えるモードに変換)。"""
+    if image_format == "jpeg" and image.mode not in ("L", "RGB"):
+        image = image.convert("L" if image.mode in ("1", "LA") else "RGB")
+    elif image_format == "webp" and image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.mode else "RGB")
+    buffered = BytesIO()
+    if image_format == "png":
+        image.save(buffered, format="PNG")
+    else:
+        image.save(buffered, format=image_format.upper(), quality=quality)
+    return buffered.getvalue()
+
+
+def _fit_pixels(image: PIL.Image.Image, max_pixels: int | None) -> PIL.Image.Image:
+    """画素数が上限を超える場合は、縦横比を保って上限以下に縮小します。"""
+    pixels = image.width * image.height
+    if not max_pixels or pixels <= max_pixels:
+        return image
+    scale = math.sqrt(max_pixels / pixels)
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    return image.resize(size, PIL.Image.Resampling.LANCZOS)
+
+
+def _recompress(
+    image: PIL.Image.Image,
+    max_pixels: int | None,
+    max_bytes: int | None,
+    image_format: str,
+    quality: int,
+) -> tuple[bytes, PIL.Image.Image]:
+    """
+    画素数の上限まで縮小し、バイト数の上限に収まるまで品質・サイズを下げて再圧縮します。
+
+    Args:
+        image: 画像
+        max_pixels: 画素数の上限(Noneの場合は制限なし)
+        max_bytes: エンコード後のバイト数の上限(Noneの場合は制限なし)
+        image_format: 再圧縮の形式
+        quality: JPEG・WebPの品質の初期値
+
+    Returns:
+        エンコード後のバイト列と、エンコードした画像
+
+    """
+    resized = _fit_pixels(image, max_pixels)
+    encoded = _encode(resized, image_format, quality)
+    if not max_bytes or len(encoded) <= max_bytes:
+        return encoded, resized
+
+    # 品質を下げ、それでも収まらない場合は縮小する(文字が読めなくなるよりは品質を先に下げる)
+    if image_format != "png":
+        while quality - QUALITY_STEP >= MIN_QUALITY and len(encoded) > max_bytes:
+            quality -= QUALITY_STEP
+            encoded = _encode(resized, image_format, quality)
+    for _ in range(MAX_DOWNSCALE_STEPS):
+        if len(encoded) <= max_bytes:
+            break
+        size = (max(1, int(resized.width * DOWNSCALE_FACTOR)), max(1, int(resized.height * DOWNSCALE_FACTOR)))
+        resized = resized.resize(size, PIL.Image.Resampling.LANCZOS)
+        encoded = _encode(resized, image_format, quality)
+    if len(encoded) > max_bytes:
+        logger.warning("画像を上限の %s バイト以下に圧縮できませんでした (%s バイト)", max_bytes, len(encoded))
+    return encoded, resized
+
+
+def encode_image_payload(
+    image: PIL.Image.Image,
+    max_pixels: int | None = None,
+    max_bytes: int | None = None,
+    image_format: str = "jpeg",
+    quality: int = 90,
+) -> ImagePayload:
+    """
+    LLMに送る画像をbase64にエンコードします。
+
+    元のファイルが使える形式で、画素数・バイト数が上限以下であれば元のファイルのバイト列をそのまま使用します。
+    上限を超える場合はimage_formatで再圧縮し、元のファイルが使えない場合(メモリ上の画像など)はPNGにエンコードします。
+
+    Args:
+        image: 画像
+        max_pixels: 画素数の上限(Noneの場合は縮小しない)
+        max_bytes: エンコード後のバイト数の上限(base64にする前、Noneの場合は再圧縮しない)
+        image_format: 上限を超えた場合に再圧縮する形式("png"・"jpeg"・"webp")
+        quality: JPEG・WebPの品質
+
+    Returns:
+        エンコード済みの画像
+
+    Raises:
+        ValueError: 再圧縮の形式が不明な場合
+
+    """
+    if image_format not in RECOMPRESS_FORMATS:
+        msg = f"不明な画像形式です: {image_format} (選択肢: {', '.join(RECOMPRESS_FORMATS)})"
+        raise ValueError(msg)
+
+    within_pixels = not max_pixels or image.width * image.height <= max_pixels
+    original = _original_bytes(image) if within_pixels else None
+    # 元のファイルが読めた場合、formatはPASSTHROUGH_FORMATSのいずれか
+    source_format = image.format
+    if original is not None and source_format is not None and (not max_bytes or len(original) <= max_bytes):
+        return ImagePayload(
+            media_type=PASSTHROUGH_FORMATS[source_format],
+            data=base64.b64encode(original).decode(),
+            width=image.width,
+            height=image.height,
+            byte_size=len(original),
+            passthrough=True,
+        )
+
+    if within_pixels and not max_bytes:
+        # 上限の指定がなく、元のファイルが使えない場合は従来どおり可逆圧縮のPNGにする
+        encoded, encoded_image, media_type = _encode(image, "png", quality), image, "image/png"
+    else:
+        encoded, encoded_image = _recompress(image, max_pixels, max_bytes, image_format, quality)
+        media_type = f"image/{image_format}"
+    return ImagePayload(
+        media_type=media_type,
+        data=base64.b64encode(encoded).decode(),
+        width=encoded_image.width,
+        height=encoded_image.height,
+        byte_size=len(encoded),
+        passthrough=False,
+    )
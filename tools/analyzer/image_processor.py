@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import time
@@ -13,6 +14,8 @@ from analyzer.llm_client import LangChainLLMClient
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from analyzer.page_classifier import PageClassifier
+
 # ロガーの設定
 logger = logging.getLogger("analyzer")
 
@@ -23,49 +26,44 @@ OUTPUT_JSON_DIR = "output_json"
 class ImageProcessor:
     """画像処理と解析を行うクラス"""
 
-    def __init__(self, llm_client: LangChainLLMClient, skip_if_exists: bool = False) -> None:
+    def __init__(
+        self,
+        llm_client: LangChainLLMClient,
+        skip_if_exists: bool = False,
+        page_classifier: PageClassifier | None = None,
+    ) -> None:
         """
         ImageProcessorを初期化します。
 
         Args:
             llm_client: LLMクライアント
             skip_if_exists: 既存のJSONファイルをスキップするかどうか
+            page_classifier: LLMに送る前にページを判定し、表を含まないページをスキップする分類器(オプション)
 
         """
         self.llm_client = llm_client
         self.skip_if_exists = skip_if_exists
+        self.page_classifier = page_classifier
 
-    def process_single_image(
-        self,
-        image_path: Path,
-        output_dir: Path,
-    ) -> bool:
-        """
-        単一の画像ファイルを処理し、結果をJSONファイルに保存します。
-
-        Args:
-            image_path: 処理する画像ファイルのパス
-            output_dir: 出力ディレクトリのパス
-
-        Returns:
-            処理が成功した場合はTrue、失敗した場合はFalse
-
-        """
+    def should_skip(self, image_path: Path, output_filename: Path) -> bool:
+        """既存の出力ファイルやページの種類から、LLMに送らずにスキップするかどうかを判定します。"""
         image_filename = image_path.name
-        output_filename = output_dir / f"{image_path.stem}.json"
 
         # skip_if_existsが有効で、出力ファイルが既に存在する場合はスキップ
         if self.skip_if_exists and output_filename.exists():
             logger.info("スキップ: %s (出力ファイルが既に存在します)", image_filename)
             return True
 
-        logger.info("画像を解析中: %s", image_filename)
-        try:
-            # クライアントの種類に応じて適切なメソッドを呼び出す
-            result = self.llm_client.analyze_image_with_llm(image_path)
-        except AnalysisError as e:
-            logger.exception("エラー: %s", e.message)
-            return False
+        # 分類器が有効で、スキップ対象の種類のページの場合はLLMに送らない
+        if self.page_classifier and self.page_classifier.should_skip(image_path):
+            logger.info("スキップ: %s (表を含まないページ)", image_filename)
+            return True
+
+        return False
+
+    def save_result(self, image_path: Path, output_filename: Path, result: str) -> bool:
+        """解析結果をJSONファイルに保存し、成功した場合はTrueを返します。"""
+        image_filename = image_path.name
 
         try:
             json.loads(result)
@@ -98,6 +96,66 @@ class ImageProcessor:
             logger.info("解析結果を保存しました: %s", output_filename)
             return True  # 処理成功を示す
 
+    def process_single_image(
+        self,
+        image_path: Path,
+        output_dir: Path,
+    ) -> bool:
+        """
+        単一の画像ファイルを処理し、結果をJSONファイルに保存します。
+
+        Args:
+            image_path: 処理する画像ファイルのパス
+            output_dir: 出力ディレクトリのパス
+
+        Returns:
+            処理が成功した場合はTrue、失敗した場合はFalse
+
+        """
+        output_filename = output_dir / f"{image_path.stem}.json"
+        if self.should_skip(image_path, output_filename):
+            return True
+
+        logger.info("画像を解析中: %s", image_path.name)
+        try:
+            # クライアントの種類に応じて適切なメソッドを呼び出す
+            result = self.llm_client.analyze_image_with_llm(image_path)
+        except AnalysisError as e:
+            logger.exception("エラー: %s", e.message)
+            return False
+
+        return self.save_result(image_path, output_filename, result)
+
+    async def aprocess_single_image(
+        self,
+        image_path: Path,
+        output_dir: Path,
+    ) -> bool:
+        """
+        process_single_imageの非同期版。LLM APIの呼び出しはクライアントのレート制限の範囲内で行います。
+
+        Args:
+            image_path: 処理する画像ファイルのパス
+            output_dir: 出力ディレクトリのパス
+
+        Returns:
+            処理が成功した場合はTrue、失敗した場合はFalse
+
+        """
+        output_filename = output_dir / f"{image_path.stem}.json"
+        # ページの判定は画像全体を読み込むため、イベントループを止めないよう別スレッドで行う
+        if await asyncio.to_thread(self.should_skip, image_path, output_filename):
+            return True
+
+        logger.info("画像を解析中: %s", image_path.name)
+        try:
+            result = await self.llm_client.aanalyze_image_with_llm(image_path)
+        except AnalysisError as e:
+            logger.exception("エラー: %s", e.message)
+            return False
+
+        return self.save_result(image_path, output_filename, result)
+
     @staticmethod
     def get_png_files_to_process(directory: Path | None = None, image_file: Path | None = None) -> list[Path]:
         """
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 import logging
 import re
 import time
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, NoReturn
 
 import PIL.Image
@@ -21,15 +24,22 @@ from tenacity import (
     retry_if_exception_type,
     stop_after_attempt,
     wait_exponential,
+    wait_random_exponential,
 )
 
 from analyzer.config import LLMConfig, LLMProvider
 from analyzer.file_io import FileWriter, ImageLoader
+from analyzer.image_payload import ImagePayload, encode_image_payload
 from analyzer.prompt import prompt, prompt_first_page
+from analyzer.rate_limiter import RateLimiter, is_rate_limit_error
+from analyzer.response_cache import cache_key, image_content_hash
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
     from pathlib import Path
 
+    from analyzer.response_cache import ResponseCache
+
 # ロガーの設定
 logger = logging.getLogger("analyzer")
 
@@ -41,6 +51,33 @@ RETRYABLE_EXCEPTIONS = (
     Exception,  # 一般的な例外をリトライ対象にする
 )
 
+# プロンプトに追加するJSON出力の指示
+JSON_INSTRUCTION = (
+    "\n\nIMPORTANT: You must respond with valid JSON only. Do not include any text outside of the JSON structure."
+)
+
+# 1枚の画像の入力トークン数の見積もりの上限(各プロバイダーは大きな画像を縮小してから処理する)
+MAX_IMAGE_TOKENS = 1600
+
+# 応答のトークン数の見積もり(実際のトークン数は応答後に補正する)
+EXPECTED_OUTPUT_TOKENS = 2048
+
+
+def estimate_tokens(prompt_text: str, image: PIL.Image.Image | ImagePayload) -> int:
+    """
+    リクエストのトークン数を見積もります(トークン数のレート制限の事前確保用)。
+
+    Args:
+        prompt_text: プロンプト
+        image: 画像(エンコード済みの画像も可)
+
+    Returns:
+        プロンプト・画像・応答の見積もりトークン数の合計
+
+    """
+    image_tokens = min(image.width * image.height // 750, MAX_IMAGE_TOKENS)
+    return len(prompt_text) + image_tokens + EXPECTED_OUTPUT_TOKENS
+
 
 class AnalysisError(Exception):
     """分析エラーを表す例外。"""
@@ -63,6 +100,16 @@ class AnalysisError(Exception):
         return f"{self.message}: {self.details}"
 
 
+@dataclass(frozen=True)
+class PreparedPage:
+    """LLMに送る準備をした1ページ分のリクエスト"""
+
+    prompt_text: str
+    payload: ImagePayload
+    # 応答キャッシュのキー(キャッシュを使用しない場合は空文字列)
+    cache_key: str
+
+
 class ImageAnalysisResult(BaseModel):
     """画像分析結果のスキーマ。"""
 
@@ -80,6 +127,8 @@ class LangChainLLMClient:
         config: LLMConfig,
         image_loader: ImageLoader | None = None,
         file_writer: FileWriter | None = None,
+        response_cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
         """
         LangChainLLMClientを初期化します。
@@ -88,6 +137,8 @@ class LangChainLLMClient:
             config: LLM設定
             image_loader: 画像読み込みのためのローダー(テスト用)
             file_writer: ファイル書き込みのためのライター（テスト用）
+            response_cache: 画像とプロンプトが同じ場合に応答を再利用するキャッシュ(オプション)
+            rate_limiter: 非同期の解析で使用するレート制限(デフォルト: 設定の上限から作成)
 
         """
         self.config = config
@@ -95,6 +146,12 @@ class LangChainLLMClient:
         self.error_items: list[dict[str, Any]] = []
         self.image_loader = image_loader
         self.file_writer = file_writer
+        self.response_cache = response_cache
+        self.rate_limiter = rate_limiter or RateLimiter(
+            config.requests_per_minute,
+            config.tokens_per_minute,
+            config.max_concurrency,
+        )
         self.rate_limit_error_additional_wait_time = 30
 
     def _create_model(self) -> BaseChatModel:
@@ -141,13 +198,7 @@ class LangChainLLMClient:
         original_exception: Exception | None = None,
     ) -> NoReturn:
         """エラー情報を記録し、AnalysisErrorを送出するヘルパーメソッド。"""
-        error_info = {
-            "file": image_filename,
-            "error_type": error_type,
-            "error_message": error_message_detail,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-        }
-        self.error_items.append(error_info)
+        error_info = self.record_error(image_filename, error_type, error_message_detail)
         log_message = f"{error_type} ({image_filename}): {error_message_detail}"
         if original_exception:
             logger.exception(log_message, exc_info=original_exception)
@@ -156,6 +207,28 @@ class LangChainLLMClient:
         logger.error(log_message)
         raise AnalysisError(log_message, error_info)
 
+    def record_error(self, image_filename: str, error_type: str, error_message_detail: str) -> dict[str, Any]:
+        """
+        エラー情報をエラーログに記録します(例外は送出しません)。
+
+        Args:
+            image_filename: 画像ファイル名
+            error_type: エラーの種類
+            error_message_detail: エラーの詳細
+
+        Returns:
+            記録したエラー情報
+
+        """
+        error_info = {
+            "file": image_filename,
+            "error_type": error_type,
+            "error_message": error_message_detail,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.error_items.append(error_info)
+        return error_info
+
     def clean_response(self, text: str) -> str:
         """LLM応答からマークダウンコードブロック指示子を削除する。"""
         text = text.strip()
@@ -169,23 +242,69 @@ class LangChainLLMClient:
 
         return text
 
-    def _create_message_with_image(self, prompt_text: str, image: PIL.Image.Image) -> list[BaseMessage]:
-        """画像付きのメッセージを作成します。"""
-        import base64
-        from io import BytesIO
+    def _encode_image(self, image: PIL.Image.Image) -> ImagePayload:
+        """
+        画像を設定の上限に従ってbase64にエンコードします。
+
+        ファイルから読み込んだPNG・JPEG・WebPの画像は、上限以下であれば元のファイルのバイト列をそのまま使用します。
+
+        Args:
+            image: 画像
+
+        Returns:
+            エンコード済みの画像
+
+        """
+        return encode_image_payload(
+            image,
+            max_pixels=self.config.image_max_pixels,
+            max_bytes=self.config.image_max_bytes,
+            image_format=self.config.image_format,
+            quality=self.config.image_quality,
+        )
 
-        # 画像をbase64にエンコード
-        buffered = BytesIO()
-        image.save(buffered, format="PNG")
-        img_base64 = base64.b64encode(buffered.getvalue()).decode()
+    def _create_message_with_image(self, prompt_text: str, image: PIL.Image.Image | ImagePayload) -> list[BaseMessage]:
+        """画像付きのメッセージを作成します(エンコード済みの画像はそのまま使用)。"""
+        payload = image if isinstance(image, ImagePayload) else self._encode_image(image)
 
         # すべてのプロバイダーで同じ形式を使用
         content = [
             {"type": "text", "text": prompt_text},
-            {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{img_base64}", "detail": "high"}},
+            {"type": "image_url", "image_url": {"url": payload.data_url, "detail": "high"}},
         ]
         return [HumanMessage(content=content)]
 
+    def _prepare_messages(self, prompt_text: str, img: PIL.Image.Image | ImagePayload) -> list[BaseMessage]:
+        """画像付きのメッセージを作成し、プロンプトにJSON出力の指示を追加します。"""
+        messages = self._create_message_with_image(prompt_text, img)
+
+        # 最初のメッセージのテキストに指示を追加
+        if messages and isinstance(messages[0], HumanMessage):
+            if isinstance(messages[0].content, list):
+                for item in messages[0].content:
+                    if isinstance(item, dict) and item.get("type") == "text":
+                        item["text"] += JSON_INSTRUCTION
+                        break
+            elif isinstance(messages[0].content, str):
+                messages[0].content += JSON_INSTRUCTION
+        return messages
+
+    @staticmethod
+    def _response_text(response: BaseMessage) -> str:
+        """LLMの応答の内容を文字列に変換します。"""
+        if isinstance(response.content, str):
+            return response.content
+        if isinstance(response.content, list):
+            # リストの場合、テキスト部分を結合
+            text_parts = []
+            for part in response.content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    text_parts.append(part.get("text", ""))
+                elif isinstance(part, str):
+                    text_parts.append(part)
+            return "".join(text_parts)
+        return str(response.content)
+
     @retry(
         retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS),
         stop=stop_after_attempt(5),  # 最大5回リトライ
@@ -199,56 +318,25 @@ class LangChainLLMClient:
     def _generate_content_with_retry(
         self,
         prompt_text: str,
-        img: PIL.Image.Image,
+        img: PIL.Image.Image | ImagePayload,
     ) -> str:
         """
         リトライロジックを実装したLLM API呼び出し。
 
         Args:
             prompt_text: プロンプト。
-            img: 画像。
+            img: 画像(リトライ時に再エンコードしないよう、エンコード済みの画像を渡す)。
 
         Returns:
             LLM APIからのレスポンス。
 
         """
         try:
-            messages = self._create_message_with_image(prompt_text, img)
-
-            # プロンプトにJSON出力の指示を追加
-            json_instruction = (
-                "\n\nIMPORTANT: You must respond with valid JSON only. "
-                "Do not include any text outside of the JSON structure."
-            )
-
-            # 最初のメッセージのテキストに指示を追加
-            if messages and isinstance(messages[0], HumanMessage):
-                if isinstance(messages[0].content, list):
-                    for item in messages[0].content:
-                        if isinstance(item, dict) and item.get("type") == "text":
-                            item["text"] += json_instruction
-                            break
-                elif isinstance(messages[0].content, str):
-                    messages[0].content += json_instruction
-
+            messages = self._prepare_messages(prompt_text, img)
             response = self.model.invoke(
                 messages,
             )
-
-            # response.contentを文字列に変換
-            if isinstance(response.content, str):
-                return response.content
-            elif isinstance(response.content, list):
-                # リストの場合、テキスト部分を結合
-                text_parts = []
-                for part in response.content:
-                    if isinstance(part, dict) and part.get("type") == "text":
-                        text_parts.append(part.get("text", ""))
-                    elif isinstance(part, str):
-                        text_parts.append(part)
-                return "".join(text_parts)
-            else:
-                return str(response.content)
+            return self._response_text(response)
         except Exception as e:
             logger.warning(
                 "API呼び出しエラー: %s: %s. リトライします...",
@@ -256,10 +344,50 @@ class LangChainLLMClient:
                 e,
             )
             # レート制限エラーの場合は追加の待機時間
-            if "rate_limit" in str(e).lower() or "429" in str(e):
+            if is_rate_limit_error(e):
                 time.sleep(self.rate_limit_error_additional_wait_time)
             raise
 
+    @retry(
+        retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS),
+        stop=stop_after_attempt(5),  # 最大5回リトライ
+        wait=wait_random_exponential(multiplier=1, min=2, max=60),  # リトライが重ならないよう待機時間をずらす
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+    )
+    async def _agenerate_content_with_retry(
+        self,
+        prompt_text: str,
+        img: PIL.Image.Image | ImagePayload,
+    ) -> str:
+        """
+        レート制限の範囲内で非同期にLLM APIを呼び出します(リトライあり)。
+
+        レート制限エラーを受けた場合はスレッドごとに待機せず、RateLimiterが全リクエスト共通の待機を開始します。
+
+        Args:
+            prompt_text: プロンプト。
+            img: 画像(リトライ時に再エンコードしないよう、エンコード済みの画像を渡す)。
+
+        Returns:
+            LLM APIからのレスポンス。
+
+        """
+        try:
+            messages = self._prepare_messages(prompt_text, img)
+            async with self.rate_limiter.request(estimate_tokens(prompt_text, img)) as permit:
+                response = await self.model.ainvoke(messages)
+                usage = getattr(response, "usage_metadata", None)
+                if usage:
+                    permit.actual_tokens = usage.get("total_tokens")
+            return self._response_text(response)
+        except Exception as e:
+            logger.warning(
+                "API呼び出しエラー: %s: %s. リトライします...",
+                type(e).__name__,
+                e,
+            )
+            raise
+
     def _process_llm_response(
         self,
         response: str,
@@ -285,6 +413,137 @@ class LangChainLLMClient:
         )
         return ""  # この行は実際には実行されません
 
+    def _response_cache_key(self, img: PIL.Image.Image, prompt_text: str) -> str:
+        """画像の内容・プロンプト・プロバイダー・モデル名・temperature・画像の送り方から応答キャッシュのキーを作成します。"""
+        # 縮小・再圧縮の上限を指定した場合は、設定によって送る画像が変わるためキーに含める
+        encoding = (
+            {
+                "max_pixels": self.config.image_max_pixels,
+                "max_bytes": self.config.image_max_bytes,
+                "format": self.config.image_format,
+                "quality": self.config.image_quality,
+            }
+            if self.config.image_max_pixels or self.config.image_max_bytes
+            else None
+        )
+        return cache_key(
+            image_content_hash(img),
+            prompt_text,
+            self.config.provider.value,
+            self.config.get_model_name(),
+            self.config.get_model_config()["temperature"],
+            encoding,
+        )
+
+    def _store_cached_response(self, key: str, result: str) -> None:
+        """有効なJSONの応答のみをキャッシュに保存します(無効な応答は次回の実行で再解析するため)。"""
+        if not self.response_cache:
+            return
+        try:
+            json.loads(result)
+        except json.JSONDecodeError:
+            return
+        self.response_cache.put(key, result)
+
+    def _load_image(self, image_path: Path) -> PIL.Image.Image:
+        """画像を読み込みます(依存性注入されたimage_loaderがあれば使用)。"""
+        return self.image_loader.load_image(image_path) if self.image_loader else PIL.Image.open(image_path)
+
+    @staticmethod
+    def _select_prompt(image_filename: str) -> str:
+        """ページ番号に応じたプロンプトを選択します。"""
+        # 1ページ目の場合はprompt_first_pageを使用
+        if image_filename.endswith("_page_01.png"):
+            return prompt_first_page
+
+        # idの重複を防ぐため、ページ数に応じたidを生成
+        page_match = re.search(r"_page_(\d+)\.png$", image_filename)
+        page_number = int(page_match.group(1)) if page_match else 0
+        return prompt.replace("__num__", str(page_number * 1000))
+
+    def _lookup_cached_response(
+        self, img: PIL.Image.Image, prompt_text: str, image_filename: str
+    ) -> tuple[str, str | None]:
+        """応答キャッシュのキーと、キャッシュ済みの応答(なければNone)を返します。"""
+        if not self.response_cache:
+            return "", None
+        key = self._response_cache_key(img, prompt_text)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            logger.info("キャッシュ済みの応答を使用します: %s", image_filename)
+        return key, cached
+
+    def prepare_page(self, image_path: Path) -> PreparedPage | str:
+        """
+        ページ画像を読み込み、プロンプトの選択・応答キャッシュの確認・画像のエンコードを行います。
+
+        同じ画像とプロンプトの応答がキャッシュにある場合は、画像をエンコードせずにその応答を返します。
+
+        Args:
+            image_path: ページ画像のパス
+
+        Returns:
+            LLMに送るリクエスト、またはキャッシュ済みの応答
+
+        Raises:
+            OSError: 画像の読み込みに失敗した場合
+
+        """
+        image_filename = image_path.name
+        img = self._load_image(image_path)
+        selected_prompt = self._select_prompt(image_filename)
+        key, cached = self._lookup_cached_response(img, selected_prompt, image_filename)
+        if cached is not None:
+            return cached
+        # 画像のエンコードは1回だけ行い、リトライ時は同じペイロードを再利用する
+        return PreparedPage(selected_prompt, self._encode_image(img), key)
+
+    def save_response(self, image_path: Path, response: str, cache_key: str | None = None) -> str:
+        """
+        LLMの応答を処理し、有効なJSONの応答を応答キャッシュに保存します。
+
+        Args:
+            image_path: ページ画像のパス
+            response: LLMの応答
+            cache_key: 応答キャッシュのキー(省略時はページ画像から作成し、画像がない場合は保存しない)
+
+        Returns:
+            処理した応答
+
+        Raises:
+            AnalysisError: 有効な応答がない場合
+
+        """
+        image_filename = image_path.name
+        result = self._process_llm_response(response, image_filename)
+        if cache_key is None and self.response_cache and image_path.exists():
+            cache_key = self._response_cache_key(self._load_image(image_path), self._select_prompt(image_filename))
+        if cache_key:
+            self._store_cached_response(cache_key, result)
+        return result
+
+    @contextlib.contextmanager
+    def _analysis_errors(self, image_path: Path) -> Iterator[None]:
+        """画像の読み込みなどで発生した例外を記録し、AnalysisErrorに変換します。"""
+        try:
+            yield
+        except AnalysisError:  # _handle_analysis_error で処理済のため再raise
+            raise
+        except FileNotFoundError as e:
+            self._handle_analysis_error(
+                image_path.name,
+                "FileNotFoundError",
+                f"画像ファイルが見つかりません: {image_path}",
+                original_exception=e,
+            )
+        except (PIL.UnidentifiedImageError, OSError, RuntimeError) as e:
+            self._handle_analysis_error(
+                image_path.name,
+                type(e).__name__,
+                f"予期せぬエラー発生 ({type(e).__name__}): {e}",
+                original_exception=e,
+            )
+
     def analyze_image_with_llm(self, image_path: Path) -> str:
         """
         指定した画像ファイルをLLM APIで解析し、JSON形式でテキスト情報を返します。
@@ -302,27 +561,50 @@ class LangChainLLMClient:
         """
         image_filename = image_path.name
 
-        # ページ番号を特定
-        page_match = re.search(r"_page_(\d+)\.png$", image_filename)
-        page_number_str = page_match.group(1) if page_match else "0"
+        with self._analysis_errors(image_path):
+            # 同じ画像とプロンプトの応答がキャッシュにあれば、APIを呼び出さずに返す
+            page = self.prepare_page(image_path)
+            if isinstance(page, str):
+                return page
 
-        # int型に変換
-        page_number = int(page_number_str)
+            try:
+                response = self._generate_content_with_retry(page.prompt_text, page.payload)
+                return self.save_response(image_path, response, page.cache_key)
+            except Exception as e:
+                self._handle_analysis_error(
+                    image_filename,
+                    type(e).__name__,
+                    f"最大リトライ回数を超えました: {e}",
+                    original_exception=e,
+                )
 
-        try:
-            # 依存性注入されたimage_loaderがあれば使用、なければデフォルトの動作
-            img = self.image_loader.load_image(image_path) if self.image_loader else PIL.Image.open(image_path)
+        return ""  # この行は実際には実行されません
 
-            # 1ページ目の場合はprompt_first_pageを使用
-            if image_path.name.endswith("_page_01.png"):
-                selected_prompt = prompt_first_page
-            # idの重複を防ぐため、ページ数に応じたidを生成
-            else:
-                selected_prompt = prompt.replace("__num__", str(page_number * 1000))
+    async def aanalyze_image_with_llm(self, image_path: Path) -> str:
+        """
+        analyze_image_with_llmの非同期版。レート制限の範囲内でLLM APIを呼び出します。
+
+        Args:
+            image_path: 解析対象の画像ファイルのパス。
+
+        Returns:
+            LLMからの解析結果 (JSON文字列を想定)。
+
+        Raises:
+            AnalysisError: 解析エラーが発生した場合。
+
+        """
+        image_filename = image_path.name
+
+        with self._analysis_errors(image_path):
+            # 画像の読み込み・キャッシュの確認・エンコードは、イベントループを止めないよう別スレッドで行う
+            page = await asyncio.to_thread(self.prepare_page, image_path)
+            if isinstance(page, str):
+                return page
 
             try:
-                response = self._generate_content_with_retry(selected_prompt, img)
-                return self._process_llm_response(response, image_filename)
+                response = await self._agenerate_content_with_retry(page.prompt_text, page.payload)
+                return await asyncio.to_thread(self.save_response, image_path, response, page.cache_key)
             except Exception as e:
                 self._handle_analysis_error(
                     image_filename,
@@ -331,23 +613,6 @@ class LangChainLLMClient:
                     original_exception=e,
                 )
 
-        except AnalysisError:  # _handle_analysis_error で処理済のため再raise
-            raise
-        except FileNotFoundError as e:
-            self._handle_analysis_error(
-                image_filename,
-                "FileNotFoundError",
-                f"画像ファイルが見つかりません: {image_path}",
-                original_exception=e,
-            )
-        except (PIL.UnidentifiedImageError, OSError, RuntimeError) as e:
-            self._handle_analysis_error(
-                image_filename,
-                type(e).__name__,
-                f"予期せぬエラー発生 ({type(e).__name__}): {e}",
-                original_exception=e,
-            )
-
         return ""  # この行は実際には実行されません
 
     def save_error_log(self, output_dir: Path) -> None:
@@ -0,0 +1,228 @@
+"""
+ページ分類モジュール
+
+LLMに送る前に、ページ画像のインク密度と罫線の本数から、空白ページ・表紙(送付状など)・表・文章のページを
+手元で判定するクラスを提供します。表を含まないページをスキップすることで、APIの呼び出し回数と待ち時間を削減します。
+判定結果はpage_classification.jsonに記録され、後から確認できます。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import PIL.Image
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+# ロガーの設定
+logger = logging.getLogger("analyzer")
+
+# 判定結果のログファイル名
+CLASSIFICATION_LOG_FILE = "page_classification.json"
+
+# インクとみなす輝度の上限(0-255)
+INK_LUMINANCE = 160
+
+# 空白ページとみなすインク密度(インクの画素の割合)の上限
+EMPTY_INK_RATIO = 0.002
+
+# 罫線とみなす行(列)のインクの割合の下限(横罫線はページの幅、縦罫線は表の高さに対する割合)
+RULED_LINE_COVERAGE = 0.5
+
+# 罫線の検出で許容する傾き(隣接する行・列をまとめる幅のピクセル数)
+RULED_LINE_TOLERANCE = 3
+
+# 表とみなす横罫線・縦罫線の最小本数
+MIN_TABLE_HORIZONTAL_LINES = 3
+MIN_TABLE_VERTICAL_LINES = 2
+
+# 表紙(送付状など)とみなすテキスト行数の上限
+MAX_COVER_TEXT_ROWS = 15
+
+
+class PageType(StrEnum):
+    """ページの種類"""
+
+    EMPTY = "empty"
+    COVER = "cover"
+    TABLE = "table"
+    TEXT = "text"
+
+
+# スキップの対象にできるページの種類(表のページは常に解析する)
+SKIPPABLE_PAGE_TYPES = (PageType.EMPTY, PageType.COVER, PageType.TEXT)
+
+
+@dataclass(frozen=True)
+class PageClassification:
+    """ページの判定結果"""
+
+    file: str
+    page_type: PageType
+    ink_ratio: float
+    horizontal_lines: int
+    vertical_lines: int
+    text_rows: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """辞書に変換"""
+        return {
+            "file": self.file,
+            "page_type": self.page_type.value,
+            "ink_ratio": round(self.ink_ratio, 5),
+            "horizontal_lines": self.horizontal_lines,
+            "vertical_lines": self.vertical_lines,
+            "text_rows": self.text_rows,
+        }
+
+
+def _count_runs(mask: np.ndarray) -> int:
+    """真の値が連続する区間の数を数えます。"""
+    if mask.size == 0:
+        return 0
+    return int(mask[0]) + int(np.count_nonzero(mask[1:] & ~mask[:-1]))
+
+
+def _ruled_lines(ink: np.ndarray, axis: int) -> np.ndarray:
+    """
+    罫線を含む行(axis=1)または列(axis=0)を判定します。
+
+    わずかに傾いた罫線も検出できるよう、隣接するRULED_LINE_TOLERANCE本の行(列)をまとめてから
+    インクの割合を計算します。
+
+    Args:
+        ink: インクの画素を真とする2次元配列
+        axis: インクの割合を計算する軸
+
+    Returns:
+        罫線を含む行(列)を真とする1次元配列
+
+    """
+    lines = ink if axis == 1 else ink.T
+    merged = lines.copy()
+    for offset in range(1, RULED_LINE_TOLERANCE):
+        merged[:-offset] |= lines[offset:]
+    return merged.mean(axis=1) >= RULED_LINE_COVERAGE
+
+
+class PageClassifier:
+    """インク密度と罫線でページの種類を判定するクラス"""
+
+    def __init__(self, skip_types: Iterable[PageType | str] = (PageType.EMPTY,)) -> None:
+        """
+        PageClassifierを初期化します。
+
+        Args:
+            skip_types: LLMに送らずにスキップするページの種類(表のページは指定できません)
+
+        Raises:
+            ValueError: 表のページまたは不明な種類を指定した場合
+
+        """
+        self.skip_types = {PageType(page_type) for page_type in skip_types}
+        if PageType.TABLE in self.skip_types:
+            msg = "表のページはスキップの対象にできません"
+            raise ValueError(msg)
+        self.decisions: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def classify(self, image: PIL.Image.Image, file: str = "") -> PageClassification:
+        """
+        ページ画像の種類を判定します。
+
+        Args:
+            image: ページ画像
+            file: ログに記録するファイル名
+
+        Returns:
+            判定結果
+
+        """
+        ink = np.asarray(image.convert("L")) < INK_LUMINANCE
+        ink_ratio = float(ink.mean()) if ink.size else 0.0
+
+        horizontal = _ruled_lines(ink, axis=1)
+        horizontal_lines = _count_runs(horizontal)
+        # 表がページの一部のみの場合も縦罫線を検出できるよう、最初と最後の横罫線の間の高さに対する割合で判定する
+        table_rows = np.flatnonzero(horizontal)
+        table = ink[table_rows[0] : table_rows[-1] + 1] if horizontal_lines >= MIN_TABLE_HORIZONTAL_LINES else ink
+        vertical_lines = _count_runs(_ruled_lines(table, axis=0))
+        # 罫線を除いた、インクを含む行のまとまりをテキスト行とみなす
+        text_rows = _count_runs(ink.any(axis=1) & ~horizontal)
+
+        if ink_ratio < EMPTY_INK_RATIO:
+            page_type = PageType.EMPTY
+        elif horizontal_lines >= MIN_TABLE_HORIZONTAL_LINES and vertical_lines >= MIN_TABLE_VERTICAL_LINES:
+            page_type = PageType.TABLE
+        elif text_rows <= MAX_COVER_TEXT_ROWS:
+            page_type = PageType.COVER
+        else:
+            page_type = PageType.TEXT
+
+        return PageClassification(
+            file=file,
+            page_type=page_type,
+            ink_ratio=ink_ratio,
+            horizontal_lines=horizontal_lines,
+            vertical_lines=vertical_lines,
+            text_rows=text_rows,
+        )
+
+    def should_skip(self, image_path: Path) -> bool:
+        """
+        画像を判定し、LLMに送らずにスキップするかどうかを返します。
+
+        1ページ目は団体の基本情報を抽出するため、判定結果にかかわらず常に解析します。
+        判定結果はdecisionsに記録されます。
+
+        Args:
+            image_path: ページ画像のパス
+
+        Returns:
+            スキップする場合はTrue
+
+        """
+        try:
+            with PIL.Image.open(image_path) as image:
+                classification = self.classify(image, image_path.name)
+        except OSError:
+            logger.warning("ページの判定に失敗したため解析します: %s", image_path.name, exc_info=True)
+            return False
+
+        first_page = re.search(r"_page_0*1\.png$", image_path.name) is not None
+        skipped = classification.page_type in self.skip_types and not first_page
+        with self._lock:
+            self.decisions.append({**classification.to_dict(), "skipped": skipped})
+        return skipped
+
+    def save_log(self, output_dir: Path) -> None:
+        """
+        判定結果をJSONファイルとして保存します。
+
+        Args:
+            output_dir: 出力ディレクトリ
+
+        """
+        with self._lock:
+            pages = sorted(self.decisions, key=lambda decision: decision["file"])
+        log = {
+            "skip_types": sorted(page_type.value for page_type in self.skip_types),
+            "skipped": sum(1 for page in pages if page["skipped"]),
+            "pages": pages,
+        }
+        log_path = output_dir / CLASSIFICATION_LOG_FILE
+        try:
+            with log_path.open("w", encoding="utf-8") as f:
+                json.dump(log, f, ensure_ascii=False, indent=2)
+            logger.info("ページの判定結果を保存しました: %s", log_path)
+        except OSError:
+            logger.exception("ページの判定結果の保存に失敗しました:")
@@ -0,0 +1,302 @@
+"""
+レート制限モジュール
+
+非同期の解析パイプラインで、プロバイダーごとの1分あたりのリクエスト数・トークン数の上限(トークンバケット)、
+レート制限エラー(429)を受けた場合の全リクエスト共通の待機、観測したレイテンシに応じた同時実行数の調整を行うクラスを提供します。
+スレッドごとに待機・リトライするとレート制限の解除と同時に全リクエストが再送されるため、待機と同時実行数を全体で共有します。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
+# ロガーの設定
+logger = logging.getLogger("analyzer")
+
+# レート制限エラーを受けた場合の最初の待機時間(秒、連続するごとに倍にする)
+RATE_LIMIT_BASE_BACKOFF = 5.0
+
+# レート制限エラーを受けた場合の最大の待機時間(秒)
+RATE_LIMIT_MAX_BACKOFF = 120.0
+
+# 待機の解除時にリクエストごとにずらす時間の上限(待機時間に対する割合)
+RATE_LIMIT_JITTER = 0.25
+
+# 同時実行数を増やし続ける、最小のトークンあたりレイテンシに対する倍率の上限
+LATENCY_TOLERANCE = 2.0
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    レート制限エラー(HTTP 429やクォータ超過)かどうかを判定します。
+
+    Args:
+        error: API呼び出しで発生した例外
+
+    Returns:
+        レート制限エラーの場合はTrue
+
+    """
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ("rate_limit", "ratelimit", "429", "resourceexhausted", "quota"))
+
+
+class TokenBucket:
+    """一定の速度で補充されるトークンバケット(1つのイベントループ内で使用)"""
+
+    def __init__(
+        self,
+        rate: float,
+        period: float = 60.0,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        TokenBucketを初期化します。
+
+        Args:
+            rate: period秒あたりに補充する量
+            period: 補充の単位時間(秒)
+            capacity: バケットの容量(デフォルト: rate)
+            clock: 時刻の取得に使用する関数(テスト時にモック可能)
+
+        """
+        self.rate_per_second = rate / period
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """経過時間に応じてトークンを補充します。"""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        トークンを消費します。不足している場合は補充されるまで待機します(先着順)。
+
+        Args:
+            amount: 消費する量(容量を超える場合は容量まで)
+
+        Returns:
+            待機した時間(秒)
+
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate_per_second
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def adjust(self, amount: float) -> None:
+        """
+        消費量を補正します(見積もりとの差分、正の値は追加の消費、負の値は返却)。
+
+        Args:
+            amount: 補正する量
+
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveConcurrency:
+    """観測したレイテンシとレート制限エラーに応じて上限を変える同時実行数の制御(AIMD)"""
+
+    def __init__(self, max_limit: int, initial_limit: int | None = None, min_limit: int = 1) -> None:
+        """
+        AdaptiveConcurrencyを初期化します。
+
+        Args:
+            max_limit: 同時実行数の最大値
+            initial_limit: 同時実行数の初期値(デフォルト: 最大値と4の小さい方)
+            min_limit: 同時実行数の最小値
+
+        """
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = max(min(min_limit, self.max_limit), 1)
+        self.limit = float(min(initial_limit or 4, self.max_limit))
+        self.in_flight = 0
+        self.min_latency_per_token: float | None = None
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """空きができるまで待機し、実行枠を確保します。"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        """実行枠を解放し、待機中のリクエストに通知します。"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float, tokens: int) -> None:
+        """
+        成功したリクエストのレイテンシから同時実行数を調整します。
+
+        応答が長いほどレイテンシも長くなるため、トークンあたりのレイテンシで比較します。
+        最小値のLATENCY_TOLERANCE倍以内であれば上限を少しずつ増やし、超えた場合はサーバー側で待たされているとみなして減らします。
+
+        Args:
+            latency: レイテンシ(秒)
+            tokens: リクエストのトークン数
+
+        """
+        latency_per_token = latency / max(tokens, 1)
+        if self.min_latency_per_token is None or latency_per_token < self.min_latency_per_token:
+            self.min_latency_per_token = latency_per_token
+
+        if latency_per_token <= self.min_latency_per_token * LATENCY_TOLERANCE:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        else:
+            self.limit = max(float(self.min_limit), self.limit - 1 / self.limit)
+
+    def on_rate_limit(self) -> None:
+        """レート制限エラーを受けた場合に同時実行数を半分にします。"""
+        self.limit = max(float(self.min_limit), self.limit / 2)
+
+
+@dataclass
+class RequestPermit:
+    """レート制限の許可を得たリクエスト(応答後に実際のトークン数を設定する)"""
+
+    estimated_tokens: int
+    actual_tokens: int | None = None
+
+
+class RateLimiter:
+    """1つのプロバイダーに対するリクエスト数・トークン数・同時実行数の制限と、レート制限エラー時の共通の待機"""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        *,
+        period: float = 60.0,
+        base_backoff: float = RATE_LIMIT_BASE_BACKOFF,
+        max_backoff: float = RATE_LIMIT_MAX_BACKOFF,
+    ) -> None:
+        """
+        RateLimiterを初期化します。
+
+        Args:
+            requests_per_minute: 1分あたりのリクエスト数の上限
+            tokens_per_minute: 1分あたりのトークン数の上限
+            max_concurrency: 同時実行数の最大値
+            period: 上限の単位時間(秒、テスト用)
+            base_backoff: レート制限エラーを受けた場合の最初の待機時間(秒)
+            max_backoff: レート制限エラーを受けた場合の最大の待機時間(秒)
+
+        """
+        self.requests = TokenBucket(requests_per_minute, period)
+        self.tokens = TokenBucket(tokens_per_minute, period)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.throttled_seconds = 0.0
+        self._resume_at = 0.0
+        self._backoff = 0.0
+        self._consecutive_rate_limits = 0
+
+    @contextlib.asynccontextmanager
+    async def request(self, estimated_tokens: int) -> AsyncIterator[RequestPermit]:
+        """
+        レート制限の範囲内でリクエストを1件実行します。
+
+        実行枠を確保し、共通の待機中であれば解除まで待ってから、リクエスト数・トークン数を確保して制御を返します。
+        ブロック内でレート制限エラーが発生した場合は共通の待機を開始し、同時実行数を半分にします。
+
+        Args:
+            estimated_tokens: リクエストの見積もりトークン数(応答後にpermit.actual_tokensで補正)
+
+        Yields:
+            RequestPermit: リクエストの許可
+
+        """
+        await self.concurrency.acquire()
+        try:
+            # 実行枠を待つ間に始まった共通の待機も守るため、枠を確保してから確認する
+            await self._wait_for_backoff()
+            self.throttled_seconds += await self.requests.acquire(1)
+            self.throttled_seconds += await self.tokens.acquire(estimated_tokens)
+            permit = RequestPermit(estimated_tokens)
+            started_at = time.monotonic()
+            self.request_count += 1
+            try:
+                yield permit
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    self.report_rate_limit()
+                raise
+            tokens = permit.actual_tokens if permit.actual_tokens is not None else estimated_tokens
+            self.tokens.adjust(tokens - estimated_tokens)
+            self.concurrency.on_success(time.monotonic() - started_at, tokens)
+            self._consecutive_rate_limits = 0
+        finally:
+            await self.concurrency.release()
+
+    async def _wait_for_backoff(self) -> None:
+        """レート制限エラーによる共通の待機が終わるまで待ちます。"""
+        while (delay := self._resume_at - time.monotonic()) > 0:
+            # 待機の解除と同時に全リクエストが再送されないよう、待っているリクエストごとに解除の時刻をずらす
+            delay += random.uniform(0.0, self._backoff * RATE_LIMIT_JITTER)
+            self.throttled_seconds += delay
+            await asyncio.sleep(delay)
+
+    def report_rate_limit(self) -> None:
+        """
+        レート制限エラーを記録し、全リクエスト共通の待機を開始します。
+
+        待機中に届いた他のリクエストのエラーは同じレート制限によるものとみなし、待機時間を延ばしません。
+        """
+        self.rate_limited_count += 1
+        now = time.monotonic()
+        if now < self._resume_at:
+            return
+        self._consecutive_rate_limits += 1
+        self._backoff = min(self.max_backoff, self.base_backoff * 2 ** (self._consecutive_rate_limits - 1))
+        self._resume_at = now + self._backoff
+        self.concurrency.on_rate_limit()
+        logger.warning(
+            "レート制限エラーを受けました。%.1f秒間全てのリクエストを停止し、同時実行数を%dにします。",
+            self._backoff,
+            int(self.concurrency.limit),
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """
+        レート制限の統計を取得します。
+
+        Returns:
+            リクエスト数・レート制限エラーの数・待機時間(秒)・現在の同時実行数の上限
+
+        """
+        return {
+            "requests": self.request_count,
+            "rate_limited": self.rate_limited_count,
+            "throttled_seconds": round(self.throttled_seconds, 1),
+            "concurrency_limit": int(self.concurrency.limit),
+        }
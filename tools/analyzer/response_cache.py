@@ -0,0 +1,192 @@
+"""
+LLM応答キャッシュモジュール
+
+画像の内容のハッシュ・プロンプトのハッシュ・プロバイダー・モデル名・temperature・画像の縮小と再圧縮の設定をキーとして、
+LLMの応答をSQLiteに保存するクラスを提供します。
+同じページを別のディレクトリに変換し直した場合や、プロンプトを変えずに再実行した場合にAPIを呼び出さずに済みます。
+保存量が上限を超えた場合は、最後に使用した日時が古い応答から削除します(LRU)。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import PIL.Image
+
+# ロガーの設定
+logger = logging.getLogger("analyzer")
+
+# キャッシュファイルのデフォルトのパス
+DEFAULT_RESPONSE_CACHE_PATH = ".cache/llm_responses.sqlite3"
+
+# キャッシュに保存する応答の合計サイズのデフォルトの上限(バイト)
+DEFAULT_RESPONSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def image_content_hash(image: PIL.Image.Image) -> str:
+    """
+    画像の画素のハッシュを計算します。
+
+    ファイルのバイト列ではなく画素から計算するため、PNGの圧縮レベルが異なるだけの画像は同じハッシュになります。
+
+    Args:
+        image: 画像
+
+    Returns:
+        SHA-256のハッシュ(16進数)
+
+    """
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(
+    image_hash: str,
+    prompt_text: str,
+    provider: str,
+    model_name: str,
+    temperature: float | None,
+    encoding: dict[str, Any] | None = None,
+) -> str:
+    """
+    キャッシュのキーを作成します。
+
+    Args:
+        image_hash: 画像の内容のハッシュ
+        prompt_text: プロンプト
+        provider: LLMプロバイダー
+        model_name: モデル名
+        temperature: temperature(未指定の場合はNone)
+        encoding: LLMに送る画像の縮小・再圧縮の設定(上限を指定せず元の画像を送る場合はNone)
+
+    Returns:
+        キャッシュのキー
+
+    """
+    prompt_hash = hashlib.sha256(prompt_text.encode()).hexdigest()
+    components: list[Any] = [image_hash, prompt_hash, provider, model_name, temperature]
+    # 上限を指定しない場合は従来と同じキーにし、保存済みの応答を引き続き使用する
+    if encoding is not None:
+        components.append(encoding)
+    return hashlib.sha256(json.dumps(components).encode()).hexdigest()
+
+
+class ResponseCache:
+    """SQLiteに保存するLRUのLLM応答キャッシュ(スレッドセーフ)"""
+
+    def __init__(self, path: str | Path, max_bytes: int = DEFAULT_RESPONSE_CACHE_MAX_BYTES) -> None:
+        """
+        ResponseCacheを初期化します。
+
+        Args:
+            path: SQLiteファイルのパス(":memory:"の場合はメモリ上に作成)
+            max_bytes: 保存する応答の合計サイズの上限(バイト)
+
+        """
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def get(self, key: str) -> str | None:
+        """
+        キャッシュから応答を取得します。
+
+        Args:
+            key: キャッシュのキー
+
+        Returns:
+            保存済みの応答、存在しない場合はNone
+
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._connection:
+                self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """
+        応答をキャッシュに保存し、上限を超えた分を古い順に削除します。
+
+        Args:
+            key: キャッシュのキー
+            response: LLMの応答
+
+        """
+        size = len(response.encode())
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """合計サイズが上限以下になるまで、最後に使用した日時が古い応答を削除します(ロック取得済みで呼び出すこと)。"""
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._connection.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict[str, Any]:
+        """
+        キャッシュの統計を取得します。
+
+        Returns:
+            ヒット数・ミス数・削除数・保存件数・合計サイズ
+
+        """
+        with self._lock:
+            entries, total = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": total,
+            }
+
+    def close(self) -> None:
+        """データベースを閉じます。"""
+        with self._lock:
+            self._connection.close()
@@ -4,21 +4,31 @@
 総務省のウェブサイトから政治資金収支報告書のPDFファイルを自動的にダウンロードするためのパッケージです。
 """
 
-from .config import DEFAULT_DELAY, DEFAULT_OUTPUT_DIR, FULL_USER_AGENT, MIN_DELAY
+from .async_engine import AsyncPageParser, AsyncPDFDownloader, HostRateLimiter, TokenBucket
+from .config import DEFAULT_DELAY, DEFAULT_OUTPUT_DIR, DEFAULT_WORKERS, FULL_USER_AGENT, MIN_DELAY
 from .downloader import SeijishikinDownloader
+from .http_cache import HTTPValidatorCache
 from .metadata import MetadataManager
 from .page_parser import PageParser
 from .pdf_downloader import PDFDownloader
 from .robotparser import RobotsChecker
+from .scheduler import PoliteScheduler
 
 __all__ = [
+    "AsyncPDFDownloader",
+    "AsyncPageParser",
     "DEFAULT_DELAY",
     "DEFAULT_OUTPUT_DIR",
+    "DEFAULT_WORKERS",
     "FULL_USER_AGENT",
+    "HTTPValidatorCache",
+    "HostRateLimiter",
     "MIN_DELAY",
     "MetadataManager",
     "PDFDownloader",
     "PageParser",
+    "PoliteScheduler",
     "RobotsChecker",
     "SeijishikinDownloader",
+    "TokenBucket",
 ]
@@ -0,0 +1,216 @@
+"""
+取得済みファイルのインデックスモジュール
+
+取得済みのPDFのURL → (ファイル名, サイズ, SHA-256) をディスク(acquired_index.tsv)に記録し、
+起動時に1度だけ読み込んでメモリ上のソート済み配列で検索するクラスを提供します。
+既存ファイルのスキップ判定でファイルシステムへの問い合わせ(exists/stat)を行わずに済むため、
+ネットワークファイルシステム上の大規模なミラーでも2回目以降の実行が高速になります。
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+import threading
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from .config import ACQUIRED_INDEX_FILENAME
+from .utils import create_directory
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# インデックスファイルの1行の項目数(URL, ファイル名, サイズ, SHA-256)
+_FIELD_COUNT = 4
+
+
+def _key(value: str) -> int:
+    """文字列の64ビットハッシュ値を計算(プロセスによらず同じ値)"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@dataclass(frozen=True)
+class AcquiredFile:
+    """取得済みファイルの記録"""
+
+    url: str
+    filename: str
+    size: int
+    sha256: str | None = None
+
+    def to_line(self) -> str:
+        """インデックスファイルの1行に変換"""
+        return f"{self.url}\t{self.filename}\t{self.size}\t{self.sha256 or '-'}\n"
+
+
+class AcquiredIndex:
+    """
+    取得済みファイルのインデックスクラス
+
+    メモリ上では、URLとファイル名の64ビットハッシュ値およびサイズを
+    URLのハッシュ値でソートした配列(array)として保持し、二分探索で検索します。
+    文字列を保持しないため、数十万件でも数MB程度のメモリで済みます。
+    """
+
+    def __init__(self, output_dir: str, segment: str | None = None) -> None:
+        """
+        初期化(インデックスファイルを読み込む)
+
+        Args:
+            output_dir: 出力ディレクトリ
+            segment: セグメント名(シャードごとに別のファイルに追記する場合に指定)
+
+        """
+        self.output_dir = output_dir
+        self.index_path = Path(output_dir) / ACQUIRED_INDEX_FILENAME
+        self.segment_path = self.index_path.with_suffix(f".{segment}.tsv") if segment else None
+
+        self._url_keys = array("Q")
+        self._filename_keys = array("Q")
+        self._sizes = array("Q")
+        # 読み込み後に追加された記録(保存時にソート済み配列へ統合する)
+        self._added: dict[int, AcquiredFile] = {}
+        self._lock = threading.Lock()
+
+        self.load()
+
+    def __len__(self) -> int:
+        """記録されているファイルの数"""
+        return len(self._url_keys) + len(self._added)
+
+    def load(self) -> None:
+        """インデックスファイル(と各シャードのセグメント)を読み込む"""
+        records: dict[int, AcquiredFile] = {}
+        for path in self._paths():
+            for record in self._read(path):
+                records[_key(record.url)] = record
+        self._build(records)
+        logger.debug("取得済みファイルのインデックスを読み込みました: %d件", len(self._url_keys))
+
+    def get_size(self, url: str, filename: str) -> int | None:
+        """
+        URLのファイルが指定のファイル名で取得済みかどうかを確認
+
+        Args:
+            url: PDFファイルのURL
+            filename: 保存先のファイル名(出力ディレクトリからの相対パス)
+
+        Returns:
+            int | None: 取得済みの場合はファイルサイズ、そうでない場合はNone
+
+        """
+        url_key = _key(url)
+        with self._lock:
+            added = self._added.get(url_key)
+        if added is not None:
+            return added.size if added.filename == filename else None
+
+        index = bisect.bisect_left(self._url_keys, url_key)
+        if index == len(self._url_keys) or self._url_keys[index] != url_key:
+            return None
+        # URLとファイル名の両方のハッシュ値が一致した場合のみ取得済みとみなす
+        return self._sizes[index] if self._filename_keys[index] == _key(filename) else None
+
+    def add(self, record: AcquiredFile) -> None:
+        """
+        取得済みファイルを記録(インデックスファイルにも追記)
+
+        Args:
+            record: 取得済みファイルの記録
+
+        """
+        with self._lock:
+            self._added[_key(record.url)] = record
+            if not create_directory(self.output_dir):
+                return
+            try:
+                with (self.segment_path or self.index_path).open("a", encoding="utf-8") as f:
+                    f.write(record.to_line())
+            except OSError:
+                logger.exception("取得済みファイルのインデックスへの追記に失敗しました")
+
+    def compact(self) -> bool:
+        """
+        インデックスファイルを圧縮(重複した記録を削除し、各シャードのセグメントを統合)
+
+        セグメントを指定している場合は、他のシャードと競合しないよう何もしません。
+
+        Returns:
+            bool: 圧縮した場合はTrue
+
+        """
+        if self.segment_path is not None:
+            return False
+
+        with self._lock:
+            records: dict[int, AcquiredFile] = {}
+            paths = self._paths()
+            for path in paths:
+                for record in self._read(path):
+                    records[_key(record.url)] = record
+            records.update(self._added)
+
+            tmp_path = self.index_path.with_suffix(".tmp")
+            try:
+                with tmp_path.open("w", encoding="utf-8") as f:
+                    f.writelines(record.to_line() for record in records.values())
+                tmp_path.replace(self.index_path)
+            except OSError:
+                logger.exception("取得済みファイルのインデックスの圧縮に失敗しました")
+                return False
+
+            for path in paths:
+                if path != self.index_path:
+                    path.unlink(missing_ok=True)
+            self._added = {}
+            self._build(records)
+        return True
+
+    def _paths(self) -> list[Path]:
+        """読み込むファイルのリスト(共有のインデックスと全シャードのセグメント)"""
+        segments = sorted(self.index_path.parent.glob(f"{self.index_path.stem}.*.tsv"))
+        return [self.index_path, *segments]
+
+    @staticmethod
+    def _read(path: Path) -> list[AcquiredFile]:
+        """
+        インデックスファイルを読み込む(書き込み途中で中断された行は無視)
+
+        Args:
+            path: インデックスファイルのパス
+
+        Returns:
+            list[AcquiredFile]: 記録のリスト
+
+        """
+        if not path.exists():
+            return []
+
+        records: list[AcquiredFile] = []
+        try:
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    fields = line.rstrip("\n").split("\t")
+                    if len(fields) != _FIELD_COUNT or not fields[2].isdigit():
+                        continue
+                    url, filename, size, sha256 = fields
+                    records.append(AcquiredFile(url, filename, int(size), None if sha256 == "-" else sha256))
+        except OSError:
+            logger.exception("取得済みファイルのインデックスの読み込みに失敗しました: %s", path)
+        return records
+
+    def _build(self, records: dict[int, AcquiredFile]) -> None:
+        """
+        記録からソート済み配列を構築
+
+        Args:
+            records: URLのハッシュ値をキーとする記録
+
+        """
+        url_keys = sorted(records)
+        self._url_keys = array("Q", url_keys)
+        self._filename_keys = array("Q", (_key(records[key].filename) for key in url_keys))
+        self._sizes = array("Q", (records[key].size for key in url_keys))
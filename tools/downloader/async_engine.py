@@ -0,0 +1,246 @@
+"""
+非同期クロールエンジンモジュール
+
+asyncioを使用して年度ページ・報告書一覧ページの解析とPDFのダウンロードを並行して行うクラスを提供します。
+HTTP通信は接続プールを持つrequests.Sessionをワーカースレッドで実行し、
+リクエスト間隔はホストごとのトークンバケットで管理します。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from .metrics import Metrics
+from .scheduler import host_key
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from .metadata import FileMetadata
+    from .page_parser import PageParser, PdfLink, ReportListPageLink, YearPageLink
+    from .pdf_downloader import PDFDownloader
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    トークンバケット
+
+    rate(トークン/秒)でトークンが補充され、最大capacity個まで蓄積されます。
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: int = 1,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep_func: Callable[[float], Awaitable[object]] = asyncio.sleep,
+    ) -> None:
+        """
+        初期化
+
+        Args:
+            rate: 1秒あたりに補充されるトークン数(0以下の場合は制限なし)
+            capacity: 蓄積できるトークンの最大数
+            clock: 現在時刻を返す関数(テスト時にモック可能)
+            sleep_func: 待機処理を行うコルーチン関数(テスト時にモック可能)
+
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep_func = sleep_func
+        self.tokens = float(capacity)
+        self.updated_at = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """
+        トークンを1つ取得する(不足している場合は補充されるまで待機)
+
+        Returns:
+            float: 待機した秒数
+
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        # 取得順を保証するため、待機中もロックを保持する
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                wait_time = (1 - self.tokens) / self.rate
+                await self.sleep_func(wait_time)
+                waited += wait_time
+
+
+class HostRateLimiter:
+    """ホストごとのトークンバケットを管理するクラス"""
+
+    def __init__(
+        self,
+        interval_func: Callable[[str], float],
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep_func: Callable[[float], Awaitable[object]] = asyncio.sleep,
+        metrics: Metrics | None = None,
+    ) -> None:
+        """
+        初期化
+
+        Args:
+            interval_func: ホストのURLを受け取り、リクエスト間の待機時間(秒)を返す関数
+            clock: 現在時刻を返す関数(テスト時にモック可能)
+            sleep_func: 待機処理を行うコルーチン関数(テスト時にモック可能)
+            metrics: 待機時間を記録するメトリクス(省略時は新規作成)
+
+        """
+        self.interval_func = interval_func
+        self.clock = clock
+        self.sleep_func = sleep_func
+        self.metrics = metrics or Metrics()
+        self.buckets: dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str) -> float:
+        """
+        URLのホストのトークンを取得する
+
+        Args:
+            url: リクエスト先のURL
+
+        Returns:
+            float: 待機した秒数
+
+        """
+        host = host_key(url)
+        if host not in self.buckets:
+            # robots.txtの取得を伴う場合があるため、ワーカースレッドで計算する
+            interval = await asyncio.to_thread(self.interval_func, url)
+            if host not in self.buckets:
+                rate = 1 / interval if interval > 0 else 0.0
+                self.buckets[host] = TokenBucket(rate, clock=self.clock, sleep_func=self.sleep_func)
+                logger.debug("ホストのリクエスト間隔: %s (%s秒)", host, interval)
+        waited = await self.buckets[host].acquire()
+        self.metrics.add_sleep(host, waited)
+        return waited
+
+
+class AsyncPageParser:
+    """PageParserの非同期版(解析処理はPageParserと共通)"""
+
+    def __init__(self, parser: PageParser, limiter: HostRateLimiter) -> None:
+        """
+        初期化
+
+        Args:
+            parser: 解析処理とHTTPセッションを提供するPageParser
+            limiter: ホストごとのレートリミッタ
+
+        """
+        self.parser = parser
+        self.limiter = limiter
+
+    async def fetch_html(self, url: str) -> str | None:
+        """
+        トークンを取得してからURLのHTMLを取得
+
+        Args:
+            url: 取得するURL
+
+        Returns:
+            str | None: 取得したHTML、失敗した場合はNone
+
+        """
+        await self.limiter.acquire(url)
+        return await asyncio.to_thread(self.parser.fetch_html, url)
+
+    async def get_year_and_report_urls(self, base_url: str) -> list[YearPageLink | ReportListPageLink]:
+        """
+        公表年ごとのURLを取得
+
+        Args:
+            base_url: トップページのURL
+
+        Returns:
+            list[YearPageLink | ReportListPageLink]: 年度URLのリスト
+
+        """
+        logger.info("公表年ごとのURLを取得しています")
+        html = await self.fetch_html(base_url)
+        return self.parser.parse_top_page_html(html) if html else []
+
+    async def parse_year_page(self, link: YearPageLink) -> list[ReportListPageLink]:
+        """
+        年度ページを解析し、報告書一覧リンクを取得
+
+        Args:
+            link: 年度ページのリンク
+
+        Returns:
+            list[ReportListPageLink]: 報告書一覧リンクのリスト
+
+        """
+        logger.info("年度ページを解析しています: %s", link.text)
+        html = await self.fetch_html(link.url)
+        return self.parser.parse_year_page_html(html, link) if html else []
+
+    async def parse_report_list_page(self, link: ReportListPageLink) -> list[PdfLink] | None:
+        """
+        報告書一覧ページを解析し、PDFリンクを取得
+
+        Args:
+            link: 報告書一覧ページのリンク
+
+        Returns:
+            list[PdfLink] | None: PDFリンクのリスト、ページの取得に失敗した場合はNone
+
+        """
+        logger.info("報告書一覧ページを解析しています: %s", link.url)
+        html = await self.fetch_html(link.url)
+        return self.parser.parse_report_list_page_html(html, link) if html is not None else None
+
+
+class AsyncPDFDownloader:
+    """PDFDownloaderの非同期版(ダウンロード処理はPDFDownloaderと共通)"""
+
+    def __init__(self, downloader: PDFDownloader, limiter: HostRateLimiter) -> None:
+        """
+        初期化
+
+        Args:
+            downloader: ダウンロード処理を提供するPDFDownloader
+            limiter: ホストごとのレートリミッタ
+
+        """
+        self.downloader = downloader
+        self.limiter = limiter
+
+    async def download_pdf(self, pdf_url: str, save_path: str, metadata: FileMetadata) -> FileMetadata:
+        """
+        トークンを取得してからPDFファイルをダウンロード
+
+        Args:
+            pdf_url: PDFファイルのURL
+            save_path: 保存先パス
+            metadata: ファイルメタデータ
+
+        Returns:
+            FileMetadata: 更新されたファイルメタデータ
+
+        """
+        if not (self.downloader.dry_run or self.downloader.metadata_only):
+            await self.limiter.acquire(pdf_url)
+        return await asyncio.to_thread(self.downloader.download_pdf, pdf_url, save_path, metadata)
@@ -0,0 +1,180 @@
+"""
+ダウンロード処理のベンチマーク
+
+カセットディレクトリ(replayモジュール)をローカルのHTTPサーバーから配信し、
+待機時間を0にしてSeijishikinDownloader.download_allを最初から最後まで実行します。
+実際のサイトにアクセスせずに、解析処理・スケジューラ・メタデータ管理の変更の効果を計測できます。
+
+使用方法:
+    python -m downloader.benchmark [--cassette DIR] [--workers N] [--async] [--json]
+
+カセットを省略した場合は、合成カセットを一時ディレクトリに作成して計測します。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import TYPE_CHECKING, Any
+
+from . import replay
+from .downloader import SeijishikinDownloader
+from .main import parse_arguments
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+try:
+    import resource
+except ImportError:  # Windowsではピークメモリを計測しない
+    resource = None  # type: ignore[assignment]
+
+
+@dataclass
+class BenchmarkResult:
+    """ベンチマーク結果"""
+
+    elapsed: float
+    pages: int
+    pdfs: int
+    pdf_bytes: int
+    parse_cpu: float
+    peak_rss_mib: float | None
+    downloaded_files: int
+    failed_files: int
+
+    @property
+    def pages_per_sec(self) -> float:
+        """1秒あたりに取得したページ数"""
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        """1秒あたりに取得したPDFのメガバイト数"""
+        return self.pdf_bytes / 1_000_000 / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """辞書に変換"""
+        return {**asdict(self), "pages_per_sec": self.pages_per_sec, "mb_per_sec": self.mb_per_sec}
+
+
+def peak_rss_mib() -> float | None:
+    """
+    プロセスのピークメモリ使用量(RSS)を取得
+
+    Returns:
+        float | None: ピークRSS(MiB)、計測できない場合はNone
+
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOSはバイト単位、Linuxはキロバイト単位
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+class _ParseTimer:
+    """解析処理のCPU時間を集計するラッパー"""
+
+    def __init__(self) -> None:
+        self.cpu = 0.0
+        self._lock = threading.Lock()
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.thread_time() - start
+                with self._lock:
+                    self.cpu += elapsed
+
+        return wrapper
+
+
+def run_benchmark(cassette_dir: str, *, workers: int = 4, use_async: bool = False) -> BenchmarkResult:
+    """
+    カセットを配信してダウンロード処理全体を実行し、計測結果を取得
+
+    Args:
+        cassette_dir: カセットディレクトリ
+        workers: 並列ダウンロードのワーカー数
+        use_async: asyncioベースのクロールエンジンを使用するかどうか
+
+    Returns:
+        BenchmarkResult: ベンチマーク結果
+
+    """
+    with tempfile.TemporaryDirectory() as output_dir, replay.CassetteServer(cassette_dir) as server:
+        argv = ["-o", output_dir, "-w", str(workers)] + (["--async"] if use_async else [])
+        downloader = SeijishikinDownloader(parse_arguments(argv))
+        replay.install(downloader.session, server)
+
+        # 通信待ちではなく処理自体の速度を計測するため、待機時間を0にする
+        downloader.delay = 0
+        downloader.page_parser.delay = 0
+        downloader.pdf_downloader.delay = 0
+
+        timer = _ParseTimer()
+        parser = downloader.page_parser
+        parser.parse_top_page_html = timer.wrap(parser.parse_top_page_html)
+        parser.parse_year_page_html = timer.wrap(parser.parse_year_page_html)
+        parser.parse_report_list_page_html = timer.wrap(parser.parse_report_list_page_html)
+
+        start = time.perf_counter()
+        downloader.download_all()
+        elapsed = time.perf_counter() - start
+
+        stats = downloader.metadata_manager.get_statistics()
+        return BenchmarkResult(
+            elapsed=elapsed,
+            # 存在しないrobots.txtなどのエラー応答はページとして数えない
+            pages=server.requests.get("html_200", 0) + server.requests.get("html_304", 0),
+            pdfs=sum(count for key, count in server.requests.items() if key.startswith("pdf_2")),
+            pdf_bytes=server.bytes_sent.get("pdf", 0),
+            parse_cpu=timer.cpu,
+            peak_rss_mib=peak_rss_mib(),
+            downloaded_files=stats.downloaded_files,
+            failed_files=stats.failed_files,
+        )
+
+
+def main() -> None:
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="オフラインでダウンロード処理全体のベンチマークを実行します。")
+    parser.add_argument("--cassette", help="カセットディレクトリ(省略時は合成カセットを使用)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="並列ダウンロードのワーカー数")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="asyncioベースのエンジンを使用")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cassette_dir = args.cassette
+        if cassette_dir is None:
+            cassette_dir = tmp_dir
+            replay.generate_cassette(cassette_dir)
+        result = run_benchmark(cassette_dir, workers=args.workers, use_async=args.use_async)
+
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+        return
+
+    rss = f"{result.peak_rss_mib:.1f} MiB" if result.peak_rss_mib is not None else "-"
+    print(f"経過時間        {result.elapsed:8.2f} s")
+    print(f"ページ          {result.pages:8d}   ({result.pages_per_sec:.1f} pages/s)")
+    print(f"PDF             {result.pdfs:8d}   ({result.mb_per_sec:.2f} MB/s)")
+    print(f"解析CPU時間     {result.parse_cpu:8.3f} s")
+    print(f"ピークRSS       {rss}")
+    print(f"成功/失敗       {result.downloaded_files}/{result.failed_files}")
+
+
+if __name__ == "__main__":
+    main()
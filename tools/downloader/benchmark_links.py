@@ -0,0 +1,92 @@
+"""
+リンク抽出ベンチマーク
+
+リンク抽出バックエンド(BeautifulSoup / ストリーミング)の処理時間を比較します。
+
+使用方法:
+    python -m downloader.benchmark_links [HTMLファイル ...] [--repeat N]
+
+HTMLファイルを省略した場合は、<a>要素を多数含む報告書一覧ページ相当のHTMLを生成して計測します。
+保存済みのページ(出力ディレクトリの .http_cache/ 以下)を指定すると実際のページで比較できます。
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from bs4 import BeautifulSoup
+
+from .link_extractor import SoupLinkExtractor, StreamingLinkExtractor
+
+if TYPE_CHECKING:
+    from .link_extractor import LinkExtractor
+
+
+def generate_report_list_html(num_links: int = 5000) -> str:
+    """
+    報告書一覧ページ相当のHTMLを生成
+
+    Args:
+        num_links: PDFリンクの数
+
+    Returns:
+        str: HTML文字列
+
+    """
+    rows = "\n".join(
+        f'<tr><td><a href="{i:06d}.pdf">政治団体&amp;{i}</a></td><td>東京都</td><td><span>{i}</span></td></tr>'
+        for i in range(num_links)
+    )
+    return f"<html><head><title>報告書一覧</title></head><body><table>{rows}</table></body></html>"
+
+
+def measure(extractor: LinkExtractor, documents: list[str], repeat: int) -> tuple[float, int]:
+    """
+    リンク抽出の処理時間を計測
+
+    Args:
+        extractor: リンク抽出バックエンド
+        documents: HTML文字列のリスト
+        repeat: 繰り返し回数
+
+    Returns:
+        tuple[float, int]: 1回あたりの最短処理時間(秒)と抽出したリンク数
+
+    """
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(len(extractor.extract(html)) for html in documents)
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main() -> None:
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="リンク抽出バックエンドのベンチマーク")
+    parser.add_argument("files", nargs="*", help="計測に使用するHTMLファイル(Shift_JIS)")
+    parser.add_argument("--repeat", type=int, default=5, help="繰り返し回数")
+    args = parser.parse_args()
+
+    if args.files:
+        documents = [Path(file).read_bytes().decode("shift_jis", errors="replace") for file in args.files]
+    else:
+        documents = [generate_report_list_html()]
+
+    backends: dict[str, LinkExtractor] = {
+        "BeautifulSoup": SoupLinkExtractor(BeautifulSoup),
+        "Streaming": StreamingLinkExtractor(),
+    }
+    results = {name: measure(extractor, documents, args.repeat) for name, extractor in backends.items()}
+
+    baseline, _ = results["BeautifulSoup"]
+    for name, (elapsed, count) in results.items():
+        print(f"{name:<14} {elapsed * 1000:9.1f} ms  {count:7d} links  x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,35 @@ from typing import Final
 DEFAULT_OUTPUT_DIR: Final[str] = "downloaded_pdfs"
 DEFAULT_DELAY: Final[int] = 5
 MIN_DELAY: Final[int] = 3
+DEFAULT_WORKERS: Final[int] = 4
+
+# PDFダウンロードの読み込みサイズ(Content-Lengthに応じて範囲内で調整)
+MIN_CHUNK_SIZE: Final[int] = 256 * 1024
+MAX_CHUNK_SIZE: Final[int] = 4 * 1024 * 1024
+DEFAULT_CHUNK_SIZE: Final[int] = 1024 * 1024
+# 進捗バーを再描画する最小間隔(秒)
+PROGRESS_INTERVAL: Final[float] = 0.5
+
+# HTTPキャッシュ設定(出力ディレクトリ内に保存)
+HTTP_CACHE_FILENAME: Final[str] = "http_cache.json"
+HTTP_CACHE_BODY_DIR: Final[str] = ".http_cache"
+# robots.txtのキャッシュ(同じ出力ディレクトリを使用するプロセス間で共有)
+ROBOTS_CACHE_DIR: Final[str] = ".robots_cache"
+
+# 取得済みファイルのインデックス(URL・ファイル名・サイズ・SHA-256をタブ区切りで記録)
+ACQUIRED_INDEX_FILENAME: Final[str] = "acquired_index.tsv"
+
+# コンテンツアドレス方式のPDFストア(出力ディレクトリ内に保存)
+OBJECT_STORE_DIR: Final[str] = "objects"
+
+# クロール計画(リンク構造とページのハッシュ値)と、前回の計画からの差分
+CRAWL_PLAN_FILENAME: Final[str] = "crawl_plan.json"
+CRAWL_DIFF_FILENAME: Final[str] = "crawl_diff.json"
+
+# 団体名インデックス(--planで作成し、--from-indexで検索に使用)
+NAME_INDEX_FILENAME: Final[str] = "name_index.json"
+# あいまい検索で一致とみなす一致率(0から1)
+FUZZY_MATCH_THRESHOLD: Final[float] = 0.6
 
 # URL設定
 BASE_URL: Final[str] = "https://www.soumu.go.jp/senkyo/seiji_s/seijishikin/"
@@ -0,0 +1,365 @@
+"""
+クロール計画モジュール
+
+トップページ → 年度ページ → 報告書一覧ページ → PDFリンクのリンク構造を、
+各ページのハッシュ値とともに保存(crawl_plan.json)するクラスを提供します。
+保存した計画と比較することで、各ページを条件付きGETで再検証してHTMLが変わったページだけを解析し直し、
+新規または変更されたPDFリンクだけを抽出できます。
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .config import BASE_URL, CRAWL_PLAN_FILENAME
+from .page_parser import PdfLink, ReportListPageLink, YearPageLink
+from .utils import create_directory
+
+if TYPE_CHECKING:
+    from .page_parser import PageParser
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+def page_hash(html: str) -> str:
+    """
+    ページのハッシュ値を計算
+
+    Args:
+        html: ページのHTML
+
+    Returns:
+        str: SHA-256の16進文字列
+
+    """
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PlannedReportListPage:
+    """計画に含まれる報告書一覧ページ"""
+
+    url: str
+    text: str
+    year: str
+    sha256: str
+    pdf_links: list[PdfLink] = field(default_factory=list)
+
+    def link(self) -> ReportListPageLink:
+        """報告書一覧ページのリンクに変換"""
+        return ReportListPageLink(url=self.url, text=self.text, year=self.year)
+
+
+@dataclass
+class PlannedYearPage:
+    """計画に含まれる年度ページ"""
+
+    url: str
+    text: str
+    year: str
+    sha256: str
+    report_list_urls: list[str] = field(default_factory=list)
+
+
+@dataclass
+class PlanChange:
+    """前回の計画からの変更(新規または変更されたPDFリンク)"""
+
+    pdf_link: PdfLink
+    year: str
+    change: str  # "new" または "changed"
+
+    def to_dict(self) -> dict[str, Any]:
+        """辞書に変換"""
+        return {"change": self.change, "year": self.year, **asdict(self.pdf_link)}
+
+
+@dataclass
+class CrawlPlan:
+    """クロール計画(発見したリンク構造とページのハッシュ値)"""
+
+    created_at: str
+    parameters: dict[str, Any]
+    top_sha256: str
+    # トップページに掲載された順序を保持する
+    top_links: list[str] = field(default_factory=list)
+    year_pages: dict[str, PlannedYearPage] = field(default_factory=dict)
+    report_list_pages: dict[str, PlannedReportListPage] = field(default_factory=dict)
+
+    def pdf_links(self) -> list[tuple[PdfLink, str]]:
+        """計画に含まれる全てのPDFリンクと公表年の組を取得"""
+        return [(pdf_link, page.year) for page in self.report_list_pages.values() for pdf_link in page.pdf_links]
+
+    def discard_pdf_links(self, urls: set[str]) -> None:
+        """
+        指定したPDFリンクを計画から除く
+
+        除いたPDFリンクを含む報告書一覧ページはハッシュ値を消去し、次回の差分抽出時に解析し直して
+        新規のPDFとして検出されるようにします(ダウンロードに失敗したPDFを次回も差分として扱うため)。
+
+        Args:
+            urls: 除くPDFリンクのURL
+
+        """
+        for url, page in self.report_list_pages.items():
+            pdf_links = [pdf_link for pdf_link in page.pdf_links if pdf_link.url not in urls]
+            if len(pdf_links) != len(page.pdf_links):
+                # 前回の計画から引き継いだページを書き換えないよう、新しいオブジェクトに置き換える
+                self.report_list_pages[url] = replace(page, sha256="", pdf_links=pdf_links)
+
+    def to_dict(self) -> dict[str, Any]:
+        """辞書に変換"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> CrawlPlan:
+        """
+        辞書から生成
+
+        Args:
+            data: to_dict()で生成した辞書
+
+        Returns:
+            CrawlPlan: クロール計画
+
+        """
+        return cls(
+            created_at=data["created_at"],
+            parameters=data["parameters"],
+            top_sha256=data["top_sha256"],
+            top_links=data.get("top_links", []),
+            year_pages={url: PlannedYearPage(**page) for url, page in data["year_pages"].items()},
+            report_list_pages={
+                url: PlannedReportListPage(
+                    **{**page, "pdf_links": [PdfLink(**pdf_link) for pdf_link in page["pdf_links"]]},
+                )
+                for url, page in data["report_list_pages"].items()
+            },
+        )
+
+    def save(self, output_dir: str) -> bool:
+        """
+        計画をJSONファイルとして保存
+
+        Args:
+            output_dir: 出力ディレクトリ
+
+        Returns:
+            bool: 保存成功時はTrue、失敗時はFalse
+
+        """
+        if not create_directory(output_dir):
+            logger.error("出力ディレクトリの作成に失敗しました")
+            return False
+
+        path = Path(output_dir) / CRAWL_PLAN_FILENAME
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            tmp_path.replace(path)
+        except OSError:
+            logger.exception("クロール計画の保存に失敗しました")
+            return False
+        return True
+
+    @classmethod
+    def load(cls, output_dir: str) -> CrawlPlan | None:
+        """
+        保存済みの計画を読み込む
+
+        Args:
+            output_dir: 出力ディレクトリ
+
+        Returns:
+            CrawlPlan | None: クロール計画、存在しないか読み込めない場合はNone
+
+        """
+        path = Path(output_dir) / CRAWL_PLAN_FILENAME
+        if not path.exists():
+            return None
+
+        try:
+            with path.open(encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            logger.exception("クロール計画の読み込みに失敗しました: %s", path)
+            return None
+
+
+class CrawlPlanner:
+    """クロール計画の作成と、前回の計画との差分抽出を行うクラス"""
+
+    def __init__(self, parser: PageParser, parameters: dict[str, Any]) -> None:
+        """
+        初期化
+
+        Args:
+            parser: ページの取得と解析に使用するPageParser
+            parameters: 計画に記録する検索条件(差分抽出時に一致を確認)
+
+        """
+        self.parser = parser
+        self.parameters = parameters
+        self.fetched_pages = 0
+
+    def build(self, previous: CrawlPlan | None = None) -> tuple[CrawlPlan | None, list[PlanChange]]:
+        """
+        リンク構造をたどって計画を作成
+
+        前回の計画を指定した場合も全てのページを取得しますが、HTTP検証子キャッシュによる条件付きGETのため
+        変わっていないページは304応答のみで済みます。HTMLが変わっていないページは前回の計画を引き継ぎます。
+
+        Args:
+            previous: 前回の計画(省略時は全てのページを取得)
+
+        Returns:
+            tuple[CrawlPlan | None, list[PlanChange]]: 新しい計画(トップページを取得できない場合はNone)と、
+                前回の計画から新規または変更されたPDFリンクのリスト
+
+        """
+        if previous is not None and previous.parameters != self.parameters:
+            logger.warning("前回の計画と検索条件が異なるため、全てのページを取得します")
+            previous = None
+
+        html = self._fetch(BASE_URL)
+        if html is None:
+            return None, []
+
+        plan = CrawlPlan(
+            created_at=datetime.datetime.now(tz=datetime.UTC).isoformat(),
+            parameters=self.parameters,
+            top_sha256=page_hash(html),
+        )
+        for link in self.parser.parse_top_page_html(html):
+            plan.top_links.append(link.url)
+            if isinstance(link, YearPageLink):
+                self._plan_year_page(plan, previous, link)
+            else:
+                self._plan_report_list_page(plan, previous, link)
+
+        changes = self._diff(previous, plan) if previous is not None else []
+        logger.info(
+            "クロール計画を作成しました: 年度ページ=%d件, 報告書一覧ページ=%d件, PDF=%d件, 取得したページ=%d件",
+            len(plan.year_pages),
+            len(plan.report_list_pages),
+            len(plan.pdf_links()),
+            self.fetched_pages,
+        )
+        return plan, changes
+
+    def _plan_year_page(self, plan: CrawlPlan, previous: CrawlPlan | None, link: YearPageLink) -> None:
+        """
+        年度ページを取得して計画に追加
+
+        Args:
+            plan: 作成中の計画
+            previous: 前回の計画
+            link: 年度ページのリンク
+
+        """
+        html = self._fetch(link.url)
+        if html is None:
+            # 取得できない場合は前回の内容を引き継ぐ
+            if previous is not None and link.url in previous.year_pages:
+                old_page = previous.year_pages[link.url]
+                plan.year_pages[link.url] = old_page
+                for url in old_page.report_list_urls:
+                    if url in previous.report_list_pages:
+                        plan.report_list_pages[url] = previous.report_list_pages[url]
+            return
+
+        report_list_links = self.parser.parse_year_page_html(html, link)
+        plan.year_pages[link.url] = PlannedYearPage(
+            url=link.url,
+            text=link.text,
+            year=link.year,
+            sha256=page_hash(html),
+            report_list_urls=[report.url for report in report_list_links],
+        )
+        for report in report_list_links:
+            self._plan_report_list_page(plan, previous, report)
+
+    def _plan_report_list_page(
+        self,
+        plan: CrawlPlan,
+        previous: CrawlPlan | None,
+        link: ReportListPageLink,
+    ) -> None:
+        """
+        報告書一覧ページを再検証して計画に追加(HTMLが変わっていなければ前回の内容を引き継ぐ)
+
+        親ページが変わっていなくても一覧ページにPDFが追加される場合があるため、全ての一覧ページを取得します。
+
+        Args:
+            plan: 作成中の計画
+            previous: 前回の計画
+            link: 報告書一覧ページのリンク
+
+        """
+        old = previous.report_list_pages.get(link.url) if previous is not None else None
+        html = self._fetch(link.url)
+        if html is None:
+            if old is not None:
+                plan.report_list_pages[link.url] = old
+            return
+
+        sha256 = page_hash(html)
+        if old is not None and old.sha256 == sha256:
+            plan.report_list_pages[link.url] = old
+            return
+
+        plan.report_list_pages[link.url] = PlannedReportListPage(
+            url=link.url,
+            text=link.text,
+            year=link.year,
+            sha256=sha256,
+            pdf_links=self.parser.parse_report_list_page_html(html, link),
+        )
+
+    @staticmethod
+    def _diff(previous: CrawlPlan, plan: CrawlPlan) -> list[PlanChange]:
+        """
+        前回の計画から新規または変更されたPDFリンクを抽出
+
+        Args:
+            previous: 前回の計画
+            plan: 新しい計画
+
+        Returns:
+            list[PlanChange]: 新規または変更されたPDFリンクのリスト
+
+        """
+        old_links = {pdf_link.url: pdf_link for pdf_link, _ in previous.pdf_links()}
+        changes: list[PlanChange] = []
+        for pdf_link, year in plan.pdf_links():
+            old_link = old_links.get(pdf_link.url)
+            if old_link is None:
+                changes.append(PlanChange(pdf_link=pdf_link, year=year, change="new"))
+            elif old_link != pdf_link:
+                changes.append(PlanChange(pdf_link=pdf_link, year=year, change="changed"))
+        return changes
+
+    def _fetch(self, url: str) -> str | None:
+        """
+        ページを取得し、取得後にインターバルを設ける
+
+        Args:
+            url: 取得するURL
+
+        Returns:
+            str | None: 取得したHTML、失敗した場合はNone
+
+        """
+        html = self.parser.fetch_html(url)
+        if html is not None:
+            self.fetched_pages += 1
+            self.parser.wait(url)
+        return html
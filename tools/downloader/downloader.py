@@ -4,14 +4,26 @@
 総務省のウェブサイトから政治資金収支報告書のPDFファイルを自動的にダウンロードするクラスを提供します。
 """
 
+import asyncio
+import json
 import logging
-import time
+import threading
 from argparse import Namespace
+from concurrent.futures import Future
+from pathlib import Path
 
 import requests
-
-from .config import FULL_USER_AGENT, MIN_DELAY
-from .metadata import MetadataManager
+from requests.adapters import HTTPAdapter
+
+from .acquired_index import AcquiredIndex
+from .async_engine import AsyncPageParser, AsyncPDFDownloader, HostRateLimiter
+from .config import BASE_URL, CRAWL_DIFF_FILENAME, FULL_USER_AGENT, MIN_DELAY
+from .crawl_plan import CrawlPlan, CrawlPlanner, PlanChange
+from .http_cache import HTTPValidatorCache
+from .metadata import FileMetadata, MetadataManager
+from .metrics import Metrics
+from .name_index import NameIndex
+from .object_store import ObjectStore
 from .page_parser import (
     NameFilter,
     PageParser,
@@ -19,8 +31,10 @@ from .page_parser import (
     ReportListPageLink,
     YearPageLink,
 )
-from .pdf_downloader import PDFDownloader
+from .pdf_downloader import DownloadPrepareResult, PDFDownloader
 from .robotparser import RobotsChecker
+from .scheduler import PoliteScheduler
+from .shard import ShardSpec
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
@@ -46,13 +60,41 @@ class SeijishikinDownloader:
         self.force: bool = args.force
         self.dry_run: bool = args.dry_run
         self.metadata_only: bool = args.metadata_only
+        self.workers: int = max(args.workers, 1)
+        self.use_async: bool = args.use_async
+        self.content_addressed: bool = args.content_addressed
+        # シャードを指定した場合は、担当する報告書一覧ページまたはPDFのみを処理する
+        self.shard: ShardSpec | None = (
+            ShardSpec(args.shards, args.shard_index, args.shard_by) if args.shards > 1 else None
+        )
+
+        # 取得・解析・待機時間などのメトリクス(全コンポーネントで共有し、終了時に出力)
+        self.metrics = Metrics()
+        self.metrics_path: str | None = args.metrics
 
-        # セッションの初期化
+        # セッションの初期化(並列ダウンロードに合わせて接続プールを拡張)
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": FULL_USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # robots.txtチェッカーの初期化(取得結果は出力ディレクトリにキャッシュし、他のプロセスと共有する)
+        self.robots_checker = RobotsChecker(FULL_USER_AGENT, session=self.session, cache_dir=self.output_dir)
+
+        # 条件付きGETのためのHTTP検証子キャッシュ(metadata.jsonと同じ場所に保存)
+        self.http_cache = HTTPValidatorCache(self.output_dir, segment=self.shard.name if self.shard else None)
+
+        # コンテンツアドレス方式のPDFストア(重複検出にHTTPキャッシュのETag・サイズ・SHA-256を使用)
+        self.object_store = ObjectStore(self.output_dir, self.http_cache) if self.content_addressed else None
 
-        # robots.txtチェッカーの初期化
-        self.robots_checker = RobotsChecker(FULL_USER_AGENT)
+        # 取得済みファイルのインデックス(起動時に1度だけ読み込み、既存ファイルの確認に使用)
+        # ドライランではファイルを取得しないため使用しない
+        self.acquired_index = (
+            AcquiredIndex(self.output_dir, segment=self.shard.name if self.shard else None)
+            if not self.dry_run
+            else None
+        )
 
         # 各コンポーネントの初期化
         self.page_parser = PageParser(
@@ -61,6 +103,8 @@ class SeijishikinDownloader:
             years=self.years,
             delay=self.delay,
             robots_checker=self.robots_checker,
+            http_cache=self.http_cache,
+            metrics=self.metrics,
         )
 
         self.pdf_downloader = PDFDownloader(
@@ -71,6 +115,10 @@ class SeijishikinDownloader:
             metadata_only=self.metadata_only,
             delay=self.delay,
             robots_checker=self.robots_checker,
+            http_cache=self.http_cache,
+            object_store=self.object_store,
+            acquired_index=self.acquired_index,
+            metrics=self.metrics,
         )
 
         self.metadata_manager = MetadataManager(
@@ -79,11 +127,20 @@ class SeijishikinDownloader:
             categories=self.categories,
             name_filter=self.name_filter.name if self.name_filter else None,
             exact_match=self.name_filter.exact_match if self.name_filter else False,
+            # 中断後に再開できるよう、実際にダウンロードする場合はジャーナルに逐次記録する
+            journal=not (self.dry_run or self.metadata_only),
+            shard=self.shard,
         )
+        # メタデータはワーカースレッドからも追加されるためロックで保護する
+        self.metadata_lock = threading.Lock()
+
+        # ホストごとの待機時間を守るダウンロードスケジューラ(download_allで生成)
+        self.scheduler: PoliteScheduler | None = None
 
         logger.debug(
             "設定: 出力先=%s, 年度=%s, カテゴリ=%s, 名前フィルタ=%s, "
-            "待機時間=%s秒, 強制上書き=%s, ドライラン=%s, メタデータのみ=%s",
+            "待機時間=%s秒, 強制上書き=%s, ドライラン=%s, メタデータのみ=%s, ワーカー数=%s, 非同期=%s, シャード=%s, "
+            "コンテンツアドレス=%s",
             self.output_dir,
             self.years,
             self.categories,
@@ -92,8 +149,28 @@ class SeijishikinDownloader:
             self.force,
             self.dry_run,
             self.metadata_only,
+            self.workers,
+            self.use_async,
+            self.shard,
+            self.content_addressed,
         )
 
+    def get_host_interval(self, url: str) -> float:
+        """
+        ホストごとのリクエスト間隔を取得
+
+        robots.txtのCrawl-delayと--delayの大きい方を使用します。
+
+        Args:
+            url: ホストに属するURL
+
+        Returns:
+            float: リクエスト間の待機時間(秒)
+
+        """
+        crawl_delay = self.robots_checker.get_crawl_delay(url)
+        return max(float(self.delay), crawl_delay or 0.0)
+
     def download_all(self) -> bool:
         """
         指定された条件に基づいて全てのファイルをダウンロード
@@ -104,6 +181,203 @@ class SeijishikinDownloader:
         """
         logger.info("ダウンロード処理を開始します")
 
+        # 中断されたクロールがあれば、処理済みの報告書一覧ページを引き継ぐ
+        self.metadata_manager.resume()
+
+        crawled = asyncio.run(self._crawl_async()) if self.use_async else self._crawl()
+        self.pdf_downloader.progress.close()
+        if not crawled:
+            return False
+
+        # メタデータとHTTPキャッシュを保存
+        self.metadata_manager.save()
+        if not self.dry_run:
+            self.http_cache.save()
+        if self.acquired_index is not None:
+            self.acquired_index.compact()
+
+        # 統計情報を表示
+        stats = self.metadata_manager.get_statistics()
+        logger.info(
+            "ダウンロード完了: 合計=%d, ダウンロード=%d,スキップ=%d, 失敗=%d, 合計サイズ=%d バイト",
+            stats.total_files,
+            stats.downloaded_files,
+            stats.skipped_files,
+            stats.failed_files,
+            stats.total_size,
+        )
+
+        return True
+
+    def report_metrics(self) -> bool:
+        """
+        メトリクスの要約をログに出力し、--metricsが指定されていればファイルに保存
+
+        Returns:
+            bool: 保存に失敗した場合はFalse、それ以外はTrue
+
+        """
+        logger.info("処理時間の内訳: %s", self.metrics.summary())
+        if self.metrics_path is None:
+            return True
+        saved = self.metrics.save(self.metrics_path)
+        if saved:
+            logger.info("メトリクスを保存しました: %s", self.metrics_path)
+        return saved
+
+    def build_plan(self) -> bool:
+        """
+        リンク構造をたどってクロール計画を作成し、crawl_plan.jsonに保存(PDFはダウンロードしない)
+
+        Returns:
+            bool: 計画を保存した場合はTrue、失敗した場合はFalse
+
+        """
+        logger.info("クロール計画を作成します")
+        planner = CrawlPlanner(self.page_parser, self.metadata_manager.parameters.to_dict())
+        plan, _ = planner.build()
+        if plan is None:
+            logger.error("トップページを取得できませんでした")
+            return False
+
+        saved = plan.save(self.output_dir) and NameIndex.from_plan(plan).save(self.output_dir)
+        if saved and not self.dry_run:
+            self.http_cache.save()
+        return saved
+
+    def download_changes(self) -> bool:
+        """
+        前回のクロール計画から変わったページだけを取得し直し、新規または変更されたPDFをダウンロード
+
+        変更の一覧はcrawl_diff.jsonに保存し、計画は最新の内容に更新します。
+        ダウンロードに失敗したPDFは計画から除くため、次回も差分として検出されます。
+
+        Returns:
+            bool: 処理成功時はTrue、失敗時(ダウンロードに失敗したPDFがある場合を含む)はFalse
+
+        """
+        previous = CrawlPlan.load(self.output_dir)
+        if previous is None:
+            logger.error("クロール計画がありません。先に --plan で作成してください")
+            return False
+
+        planner = CrawlPlanner(self.page_parser, self.metadata_manager.parameters.to_dict())
+        plan, changes = planner.build(previous)
+        if plan is None:
+            logger.error("トップページを取得できませんでした")
+            return False
+
+        logger.info("前回の計画から %d 件のPDFが新規または変更されました", len(changes))
+        if not self._save_changes(changes):
+            return False
+
+        for change in changes:
+            logger.info("%s: %s (%s)", change.change, change.pdf_link.text, change.pdf_link.url)
+        failed = self._download_pdf_links([(change.pdf_link, change.year) for change in changes])
+
+        # ダウンロードの完了後に計画を更新する(失敗したPDFは計画から除き、次回も差分として検出する)
+        if not self.dry_run:
+            NameIndex.from_plan(plan).save(self.output_dir)
+            plan.discard_pdf_links({pdf_link.url for pdf_link in failed})
+            plan.save(self.output_dir)
+        if failed:
+            logger.error("%d 件のPDFのダウンロードに失敗しました", len(failed))
+            return False
+        return True
+
+    def download_from_index(self, *, fuzzy: bool = False) -> bool:
+        """
+        団体名インデックスから団体名で検索し、一致したPDFのみをダウンロード(ページは取得しない)
+
+        Args:
+            fuzzy: 表記の揺れを許容するあいまい検索を行うかどうか
+
+        Returns:
+            bool: 処理成功時はTrue、失敗時はFalse
+
+        """
+        if self.name_filter is None:
+            logger.error("団体名インデックスから検索するには --name を指定してください")
+            return False
+
+        index = NameIndex.load(self.output_dir)
+        if index is None:
+            logger.error("団体名インデックスがありません。先に --plan で作成してください")
+            return False
+        if index.parameters.get("name_filter") or index.parameters.get("years"):
+            logger.warning("団体名インデックスは検索条件を指定して作成されているため、一部の報告書のみを含みます")
+
+        matches = index.search(self.name_filter.name, exact=self.name_filter.exact_match, fuzzy=fuzzy)
+        if self.years:
+            matches = [match for match in matches if match.year in self.years]
+        logger.info("団体名インデックスから %d 件のPDFが見つかりました", len(matches))
+        for match in matches:
+            logger.info("%s: %s %s (%s)", match.year, match.category, match.text, match.url)
+
+        self._download_pdf_links([(match.pdf_link(), match.year) for match in matches])
+        return True
+
+    def _download_pdf_links(self, pdf_links: list[tuple[PdfLink, str]]) -> list[PdfLink]:
+        """
+        PDFリンクのリストをダウンロードし、メタデータとキャッシュを保存
+
+        Args:
+            pdf_links: PDFリンクと公表年の組のリスト
+
+        Returns:
+            list[PdfLink]: ダウンロードに失敗したPDFリンクのリスト
+
+        """
+        futures: list[tuple[PdfLink, Future[FileMetadata]]] = []
+        with PoliteScheduler(self.workers, self.get_host_interval, metrics=self.metrics) as scheduler:
+            self.scheduler = scheduler
+            for pdf_link, year in pdf_links:
+                future = self.process_pdf_link(pdf_link, year)
+                if future is not None:
+                    futures.append((pdf_link, future))
+        self.scheduler = None
+        self.pdf_downloader.progress.close()
+
+        self.metadata_manager.save()
+        if not self.dry_run:
+            self.http_cache.save()
+        if self.acquired_index is not None:
+            self.acquired_index.compact()
+
+        return [
+            pdf_link
+            for pdf_link, future in futures
+            if future.exception() is not None or future.result().download_status == "failed"
+        ]
+
+    def _save_changes(self, changes: list[PlanChange]) -> bool:
+        """
+        変更の一覧をcrawl_diff.jsonに保存
+
+        Args:
+            changes: 新規または変更されたPDFリンクのリスト
+
+        Returns:
+            bool: 保存成功時はTrue、失敗時はFalse
+
+        """
+        path = Path(self.output_dir) / CRAWL_DIFF_FILENAME
+        try:
+            with path.open("w", encoding="utf-8") as f:
+                json.dump([change.to_dict() for change in changes], f, ensure_ascii=False, indent=2)
+        except OSError:
+            logger.exception("差分の保存に失敗しました")
+            return False
+        return True
+
+    def _crawl(self) -> bool:
+        """
+        スレッドベースのスケジューラでクロールとダウンロードを実行
+
+        Returns:
+            bool: 年度URLが見つかった場合はTrue、見つからなかった場合はFalse
+
+        """
         # 年度ごとのURLを取得
         links = self.page_parser.get_year_and_report_urls()
         if not links:
@@ -112,7 +386,91 @@ class SeijishikinDownloader:
 
         logger.info("%d 件の年度URLを取得しました", len(links))
 
-        # 各年度のページを処理
+        with PoliteScheduler(self.workers, self.get_host_interval, metrics=self.metrics) as scheduler:
+            self.scheduler = scheduler
+            # ページの取得もダウンロードと同じホストごとの待機時間に従わせる
+            self.page_parser.scheduler = scheduler
+            try:
+                self._process_links(links)
+            finally:
+                self.page_parser.scheduler = None
+                # 登録済みのダウンロードが全て完了するまで待機
+                remaining = scheduler.pending_count()
+                if remaining:
+                    logger.info("残り %d 件のダウンロードの完了を待っています", remaining)
+        self.scheduler = None
+        return True
+
+    async def _crawl_async(self) -> bool:
+        """
+        asyncioでクロールとダウンロードを実行
+
+        報告書一覧ページを解析した時点で、そのページのPDFのダウンロードを開始します。
+        ページの取得とダウンロードはホストごとのトークンバケットを共有します。
+
+        Returns:
+            bool: 年度URLが見つかった場合はTrue、見つからなかった場合はFalse
+
+        """
+        limiter = HostRateLimiter(self.get_host_interval, metrics=self.metrics)
+        page_parser = AsyncPageParser(self.page_parser, limiter)
+        pdf_downloader = AsyncPDFDownloader(self.pdf_downloader, limiter)
+        # ダウンロードの同時実行数と、先読みする一覧ページ数を制限する
+        download_slots = asyncio.Semaphore(self.workers)
+        page_slots = asyncio.Semaphore(1)
+
+        async def download(pdf_link: PdfLink, year: str) -> FileMetadata | None:
+            result = self._prepare_pdf_link(pdf_link, year)
+            if result is None:
+                return None
+            async with download_slots:
+                metadata = await pdf_downloader.download_pdf(pdf_link.url, result.save_path, result.metadata)
+            self._add_metadata(metadata)
+            return metadata
+
+        async def process_report_list_page(link: ReportListPageLink) -> None:
+            if not self._owns_page(link.url):
+                return
+            if self.metadata_manager.is_page_completed(link.url):
+                logger.info("処理済みの報告書一覧ページをスキップします: %s", link.url)
+                return
+            async with page_slots:
+                pdf_links = await page_parser.parse_report_list_page(link)
+            # 取得に失敗したページは、再開時に取得し直すため処理済みとして記録しない
+            if pdf_links is None:
+                return
+            results = await asyncio.gather(*(download(pdf_link, link.year) for pdf_link in pdf_links))
+            if all(result is None or result.download_status != "failed" for result in results):
+                with self.metadata_lock:
+                    self.metadata_manager.mark_page_completed(link.url)
+
+        async def process_year_page(link: YearPageLink) -> None:
+            async with page_slots:
+                report_list_links = await page_parser.parse_year_page(link)
+            await asyncio.gather(*(process_report_list_page(report) for report in report_list_links))
+
+        links = await page_parser.get_year_and_report_urls(BASE_URL)
+        if not links:
+            logger.error("ダウンロード対象の年度URLが見つかりませんでした")
+            return False
+
+        logger.info("%d 件の年度URLを取得しました", len(links))
+        await asyncio.gather(
+            *(
+                process_year_page(link) if isinstance(link, YearPageLink) else process_report_list_page(link)
+                for link in links
+            ),
+        )
+        return True
+
+    def _process_links(self, links: list[YearPageLink | ReportListPageLink]) -> None:
+        """
+        年度URLのリストを順に処理
+
+        Args:
+            links: 年度ページまたは報告書一覧ページのリンクのリスト
+
+        """
         for link in links:
             if isinstance(link, ReportListPageLink):
                 logger.info(
@@ -132,25 +490,9 @@ class SeijishikinDownloader:
                 error_message = f"想定外のリンクタイプ: {type(link)}"
                 raise TypeError(error_message)
 
-            # 年度ページ処理後にインターバルを設ける
-            if not self.dry_run:
-                time.sleep(self.delay)
-
-        # メタデータを保存
-        self.metadata_manager.save()
-
-        # 統計情報を表示
-        stats = self.metadata_manager.get_statistics()
-        logger.info(
-            "ダウンロード完了: 合計=%d, ダウンロード=%d,スキップ=%d, 失敗=%d, 合計サイズ=%d バイト",
-            stats.total_files,
-            stats.downloaded_files,
-            stats.skipped_files,
-            stats.failed_files,
-            stats.total_size,
-        )
-
-        return True
+            # 年度ページ処理後にインターバルを設ける(スケジューラ経由の場合はスケジューラが管理する)
+            if not self.dry_run and self.page_parser.scheduler is None:
+                self.page_parser.wait(link.url)
 
     def process_year_page(self, year_link: YearPageLink) -> None:
         """
@@ -180,23 +522,34 @@ class SeijishikinDownloader:
             year: 公表年
 
         """
+        # 他のシャードの担当ページは取得しない
+        if not self._owns_page(report_list_link.url):
+            return
+
+        # 前回中断したクロールで処理済みの場合は取得しない
+        if self.metadata_manager.is_page_completed(report_list_link.url):
+            logger.info("処理済みの報告書一覧ページをスキップします: %s", report_list_link.url)
+            return
+
         # 報告書一覧ページを解析してリンクを取得
         pdf_links = self.page_parser.parse_report_list_page(report_list_link)
+        # 取得に失敗したページは、再開時に取得し直すため処理済みとして記録しない
+        if pdf_links is None:
+            return
 
-        # 各リンクを処理
+        # 各リンクを処理(ダウンロード間隔はスケジューラがホストごとに管理する)
+        futures: list[Future[FileMetadata]] = []
         for pdf_link in pdf_links:
-            if isinstance(pdf_link, PdfLink) and self.process_pdf_link(
-                pdf_link,
-                report_list_link.year,
-            ):
-                # インターバルを設ける
-                if not self.dry_run:
-                    time.sleep(self.delay)
-            elif not isinstance(pdf_link, PdfLink):
+            if not isinstance(pdf_link, PdfLink):
                 msg = f"想定外のリンク: {pdf_link.url}"
                 raise ValueError(msg)
+            future = self.process_pdf_link(pdf_link, report_list_link.year)
+            if future is not None:
+                futures.append(future)
+
+        self._mark_page_completed_when_done(report_list_link.url, futures)
 
-    def process_pdf_link(self, pdf_link: PdfLink, year: str) -> bool:
+    def process_pdf_link(self, pdf_link: PdfLink, year: str) -> Future[FileMetadata] | None:
         """
         PDFリンクを処理
 
@@ -204,12 +557,56 @@ class SeijishikinDownloader:
             pdf_link: PDFファイルのURL
             year: 公表年
 
+        Returns:
+            Future[FileMetadata] | None: ダウンロード結果、
+                カテゴリ対象外または既存ファイルのためスキップした場合はNone
+
+        """
+        result = self._prepare_pdf_link(pdf_link, year)
+        if result is None:
+            return None
+
+        def download() -> FileMetadata:
+            return self.pdf_downloader.download_pdf(
+                pdf_link.url,
+                result.save_path,
+                result.metadata,
+            )
+
+        # ドライランやメタデータのみの場合は通信しないため、その場で処理する
+        if self.scheduler is None or self.dry_run or self.metadata_only:
+            future: Future[FileMetadata] = Future()
+            future.set_result(download())
+        else:
+            # PDFのダウンロードをスケジューラに登録
+            future = self.scheduler.submit(pdf_link.url, download)
+
+        # 完了時にメタデータを追加
+        future.add_done_callback(self._on_download_done)
+        return future
+
+    def _prepare_pdf_link(self, pdf_link: PdfLink, year: str) -> DownloadPrepareResult | None:
         """
+        カテゴリのフィルタリングと既存ファイルのチェックを行い、ダウンロードを準備
+
+        Args:
+            pdf_link: PDFファイルのURL
+            year: 公表年
+
+        Returns:
+            DownloadPrepareResult | None: ダウンロード準備結果、
+                カテゴリ対象外または既存ファイルのためスキップする場合はNone
+
+        """
+        # 他のシャードの担当PDFはスキップ
+        if self.shard and self.shard.key == "pdf" and not self.shard.owns(pdf_link.url):
+            return None
+
         # カテゴリフィルタリング
         category_name = pdf_link.category_name()
         if self.categories and category_name not in self.categories:
             logger.debug("カテゴリをスキップ: %s", pdf_link.category_name())
-            return False
+            return None
 
         # ダウンロードの準備
         result = self.pdf_downloader.prepare_download(pdf_link, year)
@@ -220,17 +617,81 @@ class SeijishikinDownloader:
             result.metadata,
         )
         if existing_metadata:
-            self.metadata_manager.add_file(existing_metadata)
-            return False
+            self._add_metadata(existing_metadata)
+            return None
 
-        # PDFをダウンロード
-        updated_metadata = self.pdf_downloader.download_pdf(
-            pdf_link.url,
-            result.save_path,
-            result.metadata,
-        )
+        return result
 
-        # メタデータを追加
-        self.metadata_manager.add_file(updated_metadata)
+    def _owns_page(self, url: str) -> bool:
+        """
+        報告書一覧ページがこのシャードの担当かどうかを判定
+
+        Args:
+            url: 報告書一覧ページのURL
 
+        Returns:
+            bool: 担当の場合(シャードを指定していない場合を含む)はTrue
+
+        """
+        if self.shard is None or self.shard.key != "page":
+            return True
+        if not self.shard.owns(url):
+            logger.debug("他のシャードの担当ページをスキップします: %s", url)
+            return False
         return True
+
+    def _mark_page_completed_when_done(self, url: str, futures: list[Future[FileMetadata]]) -> None:
+        """
+        報告書一覧ページの全てのダウンロードが成功した時点で処理済みとして記録
+
+        失敗したダウンロードがある場合は、再開時にページを取得し直すため記録しません。
+
+        Args:
+            url: 報告書一覧ページのURL
+            futures: ページ内のダウンロード結果
+
+        """
+        remaining = len(futures)
+        failed = False
+
+        def on_done(future: Future[FileMetadata]) -> None:
+            nonlocal remaining, failed
+            with self.metadata_lock:
+                remaining -= 1
+                if future.exception() is not None or future.result().download_status == "failed":
+                    failed = True
+                if remaining == 0 and not failed:
+                    self.metadata_manager.mark_page_completed(url)
+
+        if not futures:
+            with self.metadata_lock:
+                self.metadata_manager.mark_page_completed(url)
+            return
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def _on_download_done(self, future: Future[FileMetadata]) -> None:
+        """
+        ダウンロード完了時のコールバック
+
+        Args:
+            future: ダウンロード結果
+
+        """
+        exception = future.exception()
+        if exception is not None:
+            logger.error("ダウンロード処理中に予期しないエラーが発生しました: %s", exception)
+            return
+        self._add_metadata(future.result())
+
+    def _add_metadata(self, metadata: FileMetadata) -> None:
+        """
+        メタデータをスレッドセーフに追加
+
+        Args:
+            metadata: ファイルメタデータ
+
+        """
+        with self.metadata_lock:
+            self.metadata_manager.add_file(metadata)
@@ -0,0 +1,263 @@
+"""
+HTTPキャッシュモジュール
+
+ETagやLast-Modifiedなどの検証子をURLごとに保存し、条件付きGETによる再検証を行うためのクラスを提供します。
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .config import HTTP_CACHE_BODY_DIR, HTTP_CACHE_FILENAME
+from .utils import create_directory
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """URLごとのキャッシュエントリ"""
+
+    url: str
+    etag: str | None = None
+    last_modified: str | None = None
+    content_length: int | None = None
+    sha256: str | None = None
+    checked_at: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """辞書に変換"""
+        return asdict(self)
+
+    def conditional_headers(self) -> dict[str, str]:
+        """
+        条件付きGET用のリクエストヘッダーを生成
+
+        Returns:
+            dict[str, str]: If-None-Match / If-Modified-Sinceヘッダー
+
+        """
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPValidatorCache:
+    """HTTP検証子キャッシュクラス"""
+
+    def __init__(self, output_dir: str, segment: str | None = None) -> None:
+        """
+        初期化
+
+        Args:
+            output_dir: 出力ディレクトリ(metadata.jsonと同じ場所にキャッシュを保存)
+            segment: セグメント名(シャードごとに別のファイルに保存する場合に指定)
+
+        """
+        self.output_dir = output_dir
+        self.cache_path = Path(output_dir) / HTTP_CACHE_FILENAME
+        # セグメントを指定した場合は、共有のキャッシュを読み込んだ上でセグメントに保存する
+        self.segment_path = self.cache_path.with_suffix(f".{segment}.json") if segment else None
+        self.body_dir = Path(output_dir) / HTTP_CACHE_BODY_DIR
+        self.entries: dict[str, CacheEntry] = {}
+        # 並列ダウンロードから更新されるためロックで保護する
+        self._lock = threading.Lock()
+
+        self.load()
+
+    def load(self) -> None:
+        """キャッシュファイルを読み込む(存在しない場合は空のキャッシュ)"""
+        self.entries = self._read_entries(self.cache_path)
+        if self.segment_path:
+            self.entries.update(self._read_entries(self.segment_path))
+        logger.debug("HTTPキャッシュを読み込みました: %d件", len(self.entries))
+
+    def save(self) -> bool:
+        """
+        キャッシュをJSONファイルとして保存
+
+        Returns:
+            bool: 保存成功時はTrue、失敗時はFalse
+
+        """
+        if not create_directory(self.output_dir):
+            logger.error("出力ディレクトリの作成に失敗しました")
+            return False
+
+        with self._lock:
+            data = {"entries": {url: entry.to_dict() for url, entry in self.entries.items()}}
+
+        # 中断時に壊れたキャッシュが残らないよう、一時ファイルに書き込んでから置き換える
+        path = self.segment_path or self.cache_path
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(path)
+        except OSError:
+            logger.exception("HTTPキャッシュの保存に失敗しました")
+            return False
+        return True
+
+    def merge_segments(self) -> int:
+        """
+        各シャードのセグメントを共有のキャッシュに統合し、セグメントを削除
+
+        Returns:
+            int: 統合したエントリの数
+
+        """
+        segment_paths = sorted(self.cache_path.parent.glob(f"{self.cache_path.stem}.shard-*.json"))
+        merged = 0
+        for path in segment_paths:
+            entries = self._read_entries(path)
+            with self._lock:
+                self.entries.update(entries)
+            merged += len(entries)
+
+        if segment_paths and self.segment_path is None and self.save():
+            for path in segment_paths:
+                path.unlink(missing_ok=True)
+        return merged
+
+    def get(self, url: str) -> CacheEntry | None:
+        """
+        キャッシュエントリを取得
+
+        Args:
+            url: URL
+
+        Returns:
+            CacheEntry | None: キャッシュエントリ、存在しない場合はNone
+
+        """
+        with self._lock:
+            return self.entries.get(url)
+
+    def update(
+        self,
+        url: str,
+        headers: Mapping[str, str],
+        *,
+        content_length: int | None = None,
+        sha256: str | None = None,
+    ) -> CacheEntry:
+        """
+        レスポンスヘッダーからキャッシュエントリを更新
+
+        Args:
+            url: URL
+            headers: レスポンスヘッダー
+            content_length: 本文のバイト数
+            sha256: 本文のSHA-256
+
+        Returns:
+            CacheEntry: 更新されたキャッシュエントリ
+
+        """
+        entry = CacheEntry(
+            url=url,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            content_length=content_length,
+            sha256=sha256,
+            checked_at=datetime.datetime.now(tz=datetime.UTC).isoformat(),
+        )
+        with self._lock:
+            self.entries[url] = entry
+        return entry
+
+    def touch(self, url: str) -> None:
+        """
+        304応答を受けたエントリの確認日時を更新
+
+        Args:
+            url: URL
+
+        """
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry:
+                entry.checked_at = datetime.datetime.now(tz=datetime.UTC).isoformat()
+
+    def store_body(self, url: str, body: bytes) -> None:
+        """
+        304応答時に再利用するため本文を保存(HTMLページ用)
+
+        Args:
+            url: URL
+            body: レスポンス本文
+
+        """
+        if not create_directory(self.body_dir):
+            return
+        # 年度ページは全てのシャードが取得するため、一時ファイルに書き込んでから置き換える
+        path = self._body_path(url)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(body)
+            tmp_path.replace(path)
+        except OSError:
+            logger.exception("キャッシュ本文の保存に失敗しました: %s", url)
+
+    def load_body(self, url: str) -> bytes | None:
+        """
+        保存済みの本文を読み込む
+
+        Args:
+            url: URL
+
+        Returns:
+            bytes | None: 本文、存在しない場合はNone
+
+        """
+        path = self._body_path(url)
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.exception("キャッシュ本文の読み込みに失敗しました: %s", url)
+            return None
+
+    @staticmethod
+    def _read_entries(path: Path) -> dict[str, CacheEntry]:
+        """
+        キャッシュファイルからエントリを読み込む(壊れている場合は破棄)
+
+        Args:
+            path: キャッシュファイルのパス
+
+        Returns:
+            dict[str, CacheEntry]: URLごとのエントリ
+
+        """
+        if not path.exists():
+            return {}
+
+        try:
+            with path.open(encoding="utf-8") as f:
+                data = json.load(f)
+            return {url: CacheEntry(**entry) for url, entry in data.get("entries", {}).items()}
+        except (OSError, json.JSONDecodeError, TypeError):
+            logger.exception("HTTPキャッシュの読み込みに失敗したため破棄します: %s", path)
+            return {}
+
+    def _body_path(self, url: str) -> Path:
+        """URLに対応する本文の保存先パスを取得"""
+        return self.body_dir / hashlib.sha256(url.encode("utf-8")).hexdigest()
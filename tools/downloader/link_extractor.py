@@ -0,0 +1,138 @@
+"""
+リンク抽出モジュール
+
+HTMLから<a href>要素のURLとテキストを抽出するバックエンドを提供します。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Protocol, cast
+
+from .config import YEAR_PATTERNS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from bs4 import BeautifulSoup, Tag
+
+# 年度パターンを1つの正規表現にまとめたもの(リンクテキストの判定用)
+YEAR_PATTERN_REGEX = re.compile("|".join(f"(?:{pattern})" for pattern in YEAR_PATTERNS))
+
+
+@dataclass(frozen=True)
+class Anchor:
+    """<a href>要素"""
+
+    href: str
+    text: str
+
+
+class LinkExtractor(Protocol):
+    """リンク抽出バックエンドのプロトコル"""
+
+    def extract(self, html: str) -> list[Anchor]:
+        """HTMLからhref属性を持つ<a>要素を文書順に抽出する"""
+        ...
+
+
+class SoupLinkExtractor:
+    """BeautifulSoupで文書全体を解析してリンクを抽出するバックエンド"""
+
+    def __init__(self, soup_factory: Callable[[str, str], BeautifulSoup]) -> None:
+        """
+        初期化
+
+        Args:
+            soup_factory: BeautifulSoupオブジェクトを生成する関数
+
+        """
+        self.soup_factory = soup_factory
+
+    def extract(self, html: str) -> list[Anchor]:
+        """
+        HTMLからリンクを抽出
+
+        Args:
+            html: HTML文字列
+
+        Returns:
+            list[Anchor]: リンクのリスト
+
+        """
+        soup = self.soup_factory(html, "html.parser")
+        anchors: list[Anchor] = []
+        for link in soup.find_all("a"):
+            link_tag = cast("Tag", link)
+            href = link_tag.get("href")
+            if href:
+                anchors.append(Anchor(href=str(href), text=link_tag.get_text()))
+        return anchors
+
+
+class _AnchorCollector(HTMLParser):
+    """<a>要素のhrefとテキストだけを収集するパーサー"""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        # 開始タグの順に並べるため、終了タグを待つ間は位置だけ確保しておく
+        self._slots: list[Anchor | None] = []
+        # 開いている<a>要素(スロット位置、href、テキスト)。BeautifulSoupと同様に入れ子を許す
+        self._open: list[tuple[int, str | None, list[str]]] = []
+
+    @property
+    def anchors(self) -> list[Anchor]:
+        """href属性を持つ<a>要素のリスト"""
+        return [anchor for anchor in self._slots if anchor is not None]
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag != "a":
+            return
+        href = next((value for name, value in attrs if name == "href"), None)
+        self._open.append((len(self._slots), href, []))
+        self._slots.append(None)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "a" and self._open:
+            self._close_anchor()
+
+    def handle_data(self, data: str) -> None:
+        for _, _, text in self._open:
+            text.append(data)
+
+    def close(self) -> None:
+        super().close()
+        while self._open:
+            self._close_anchor()
+
+    def _close_anchor(self) -> None:
+        index, href, text = self._open.pop()
+        if href:
+            self._slots[index] = Anchor(href=href, text="".join(text))
+
+
+class StreamingLinkExtractor:
+    """
+    文書ツリーを構築せずに1回の走査でリンクを抽出するバックエンド
+
+    標準ライブラリのhtml.parserのイベントから<a>要素だけを拾うため、
+    BeautifulSoupで木を構築してfind_allするよりも高速です。
+    """
+
+    def extract(self, html: str) -> list[Anchor]:
+        """
+        HTMLからリンクを抽出
+
+        Args:
+            html: HTML文字列
+
+        Returns:
+            list[Anchor]: リンクのリスト
+
+        """
+        collector = _AnchorCollector()
+        collector.feed(html)
+        collector.close()
+        return collector.anchors
@@ -17,6 +17,19 @@
     -n, --name NAME           団体名(部分一致で検索)
     -e, --exact-match         団体名の完全一致で検索
     -d, --delay SECONDS       リクエスト間の待機時間(秒、デフォルト: 5、最小: 3)
+    -w, --workers N           並列ダウンロードのワーカー数(デフォルト: 4)
+    --async                   asyncioベースのクロールエンジンを使用
+    --shards N                クロールをN個のシャードに分割(デフォルト: 1)
+    --shard-index K           このプロセスが担当するシャード番号(0からN-1)
+    --shard-by {page,pdf}     分割の単位(報告書一覧ページまたはPDFのURL、デフォルト: page)
+    --merge-shards            各シャードのメタデータを統合してmetadata.jsonを作成(クロールは行わない)
+    --plan                    リンク構造とページのハッシュ値をcrawl_plan.jsonに保存(PDFはダウンロードしない)
+    --diff                    前回の計画から変わったページだけを取得し直し、新規または変更されたPDFのみをダウンロード
+    --from-index              --planで作成した団体名インデックスから--nameで検索し、一致したPDFのみをダウンロード
+    --fuzzy                   --from-index指定時に、表記の揺れを許容するあいまい検索を行う
+    --content-addressed       PDFの本体をSHA-256で命名してobjects/に保存し、同じ内容のファイルを重複して保存しない
+    --metrics FILE            処理段階ごとの所要時間・転送量・リトライ回数・待機時間をFILEに出力
+                              (拡張子が.promまたは.txtの場合はPrometheus形式、それ以外はJSON)
     -f, --force               既存ファイルを上書き
     -l, --log-level LEVEL     ログレベル(DEBUG, INFO, WARNING, ERROR、デフォルト: INFO)
     -v, --verbose             詳細な出力を表示(--log-level DEBUGと同等)
@@ -29,18 +42,22 @@ import logging
 import sys
 from argparse import Namespace
 
-from .config import DEFAULT_DELAY, DEFAULT_OUTPUT_DIR, MIN_DELAY
+from .config import DEFAULT_DELAY, DEFAULT_OUTPUT_DIR, DEFAULT_WORKERS, MIN_DELAY
 from .downloader import SeijishikinDownloader
+from .shard import SHARD_KEYS, merge_shards
 from .utils import setup_logger
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
 
-def parse_arguments() -> Namespace:
+def parse_arguments(argv: list[str] | None = None) -> Namespace:
     """
     コマンドライン引数を解析する
 
+    Args:
+        argv: 解析する引数のリスト(省略時はsys.argv)
+
     Returns:
         Namespace: 解析された引数
 
@@ -86,6 +103,83 @@ def parse_arguments() -> Namespace:
         help=f"リクエスト間の待機時間(秒、最小: {MIN_DELAY})",
     )
 
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="並列ダウンロードのワーカー数(待機時間はホストごとに守られます)",
+    )
+
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="asyncioベースのクロールエンジンを使用(一覧ページの解析と並行してダウンロードを開始)",
+    )
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="クロールを分割するシャード数(各シャードを別のプロセスやマシンで実行)",
+    )
+
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=0,
+        help="このプロセスが担当するシャード番号(0からシャード数-1)",
+    )
+
+    parser.add_argument(
+        "--shard-by",
+        choices=SHARD_KEYS,
+        default="page",
+        help="分割の単位(page: 報告書一覧ページのURL、pdf: PDFのURL)",
+    )
+
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="各シャードのメタデータを統合してmetadata.jsonを作成(クロールは行わない)",
+    )
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--plan",
+        action="store_true",
+        help="リンク構造とページのハッシュ値をcrawl_plan.jsonに保存(PDFはダウンロードしない)",
+    )
+    mode.add_argument(
+        "--diff",
+        action="store_true",
+        help="前回の計画から変わったページだけを取得し直し、新規または変更されたPDFのみをダウンロード",
+    )
+    mode.add_argument(
+        "--from-index",
+        action="store_true",
+        help="--planで作成した団体名インデックス(name_index.json)から--nameで検索し、一致したPDFのみをダウンロード",
+    )
+
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="--from-index指定時に、表記の揺れを許容するあいまい検索を行う",
+    )
+
+    parser.add_argument(
+        "--content-addressed",
+        action="store_true",
+        help="PDFの本体をSHA-256で命名してobjects/に保存し、ファイル名はハードリンクとして作成(重複を保存しない)",
+    )
+
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="処理段階ごとの所要時間・転送量・リトライ回数・待機時間をFILEに出力(.prom/.txtはPrometheus形式、それ以外はJSON)",
+    )
+
     parser.add_argument(
         "-f",
         "--force",
@@ -120,7 +214,7 @@ def parse_arguments() -> Namespace:
         help="PDFをダウンロードせずメタデータのみ収集",
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # verboseフラグが指定された場合はログレベルをDEBUGに設定
     if args.verbose:
@@ -130,6 +224,24 @@ def parse_arguments() -> Namespace:
     if args.delay < MIN_DELAY:
         parser.error(f"待機時間は {MIN_DELAY} 秒以上である必要があります")
 
+    if args.workers < 1:
+        parser.error("ワーカー数は1以上である必要があります")
+
+    if args.shards < 1:
+        parser.error("シャード数は1以上である必要があります")
+
+    if not 0 <= args.shard_index < args.shards:
+        parser.error(f"シャード番号は0以上{args.shards}未満である必要があります")
+
+    if args.from_index and not args.name:
+        parser.error("--from-index には --name の指定が必要です")
+
+    if args.fuzzy and not args.from_index:
+        parser.error("--fuzzy は --from-index と同時に指定する必要があります")
+
+    if args.fuzzy and args.exact_match:
+        parser.error("--fuzzy と --exact-match は同時に指定できません")
+
     return args
 
 
@@ -152,13 +264,39 @@ def main() -> int:
     # ロガーを設定
     setup_logger(args.log_level)
 
+    # シャードの統合のみを行う
+    if args.merge_shards:
+        stats = merge_shards(args.output_dir)
+        if stats is None:
+            return 1
+        logger.info(
+            "統合完了: 合計=%d, ダウンロード=%d,スキップ=%d, 失敗=%d, 合計サイズ=%d バイト",
+            stats.total_files,
+            stats.downloaded_files,
+            stats.skipped_files,
+            stats.failed_files,
+            stats.total_size,
+        )
+        return 0
+
     logger.info("政治資金収支報告書ダウンロードスクリプトを開始します")
 
     # ダウンローダーを初期化
     downloader = SeijishikinDownloader(args)
 
-    # ダウンロード実行
-    success = downloader.download_all()
+    # ダウンロード実行(計画の作成、前回の計画からの差分のみ、または団体名インデックスで検索したPDFのみのダウンロード)
+    if args.plan:
+        success = downloader.build_plan()
+    elif args.diff:
+        success = downloader.download_changes()
+    elif args.from_index:
+        success = downloader.download_from_index(fuzzy=args.fuzzy)
+    else:
+        success = downloader.download_all()
+
+    # メトリクスを出力(失敗した場合もボトルネックの確認に使えるよう出力する)
+    if not downloader.report_metrics():
+        success = False
 
     # 終了コードを設定
     return 0 if success else 1
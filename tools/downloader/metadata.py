@@ -9,12 +9,16 @@ from __future__ import annotations
 import datetime
 import json
 import logging
+import threading
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, TextIO
 
 from .utils import create_directory
 
+if TYPE_CHECKING:
+    from .shard import ShardSpec
+
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
@@ -32,6 +36,7 @@ class FileMetadata:
     download_status: str = "pending"
     download_date: str | None = None
     error: str | None = None
+    sha256: str | None = None
 
     def to_dict(self) -> dict[str, Any]:
         """辞書に変換"""
@@ -68,9 +73,19 @@ class Parameters:
 
 
 class MetadataManager:
-    """メタデータ管理クラス"""
+    """
+    メタデータ管理クラス
+
+    journalを有効にすると、ファイルのメタデータと処理済みの報告書一覧ページを
+    追記型のジャーナル(metadata.journal.jsonl)に逐次書き込みます。
+    クロールが中断された場合でも、resume()でジャーナルから状態を復元して再開できます。
+    save()でmetadata.jsonにまとめた後、ジャーナルは削除されます。
+
+    shardを指定した場合は、シャードごとのセグメント(metadata.shard-0-of-4.jsonなど)に保存します。
+    セグメントはshard.merge_shards()でmetadata.jsonに統合します。
+    """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         output_dir: str,
         years: list[str],
@@ -78,6 +93,8 @@ class MetadataManager:
         name_filter: str | None,
         *,
         exact_match: bool,
+        journal: bool = False,
+        shard: ShardSpec | None = None,
     ) -> None:
         """
         初期化
@@ -88,11 +105,17 @@ class MetadataManager:
             categories: 対象カテゴリのリスト
             name_filter: 団体名フィルタ
             exact_match: 完全一致フラグ
+            journal: ジャーナルへの逐次書き込みを行うかどうか
+            shard: 担当するシャード(省略時は分割しない)
 
         """
         self.output_dir = output_dir
-        # Pathオブジェクトを使用
-        self.metadata_path = Path(output_dir) / "metadata.json"
+        self.shard = shard
+        # Pathオブジェクトを使用(シャードごとに別のファイルに保存する)
+        stem = f"metadata.{shard.name}" if shard else "metadata"
+        self.metadata_path = Path(output_dir) / f"{stem}.json"
+        self.journal_path = Path(output_dir) / f"{stem}.journal.jsonl"
+        self.journal_enabled = journal
 
         # パラメータの初期化
         self.parameters = Parameters(
@@ -105,18 +128,77 @@ class MetadataManager:
         # 統計情報の初期化
         self.statistics = Statistics()
 
-        # ファイルリストの初期化
+        # ファイルリストの初期化(同じURLのファイルは最新の記録のみを保持する)
         self.files: list[FileMetadata] = []
+        self._file_index: dict[str, int] = {}
+
+        # 処理済みの報告書一覧ページ
+        self.completed_pages: set[str] = set()
+
+        self.download_date = datetime.datetime.now(
+            tz=datetime.timezone.utc,
+        ).isoformat()
+
+        self._journal_file: TextIO | None = None
+        self._journal_lock = threading.Lock()
 
-        # メタデータの初期化
-        self.metadata: dict[str, Any] = {
-            "download_date": datetime.datetime.now(
-                tz=datetime.timezone.utc,
-            ).isoformat(),
+    @property
+    def metadata(self) -> dict[str, Any]:
+        """metadata.jsonに書き込む内容(ファイル一覧は保存時に生成し、二重に保持しない)"""
+        metadata: dict[str, Any] = {
+            "download_date": self.download_date,
             "parameters": self.parameters.to_dict(),
-            "files": [],
+            "files": [file.to_dict() for file in self.files],
             "statistics": self.statistics.to_dict(),
         }
+        if self.shard:
+            metadata["shard"] = self.shard.to_dict()
+        return metadata
+
+    def resume(self) -> bool:
+        """
+        中断されたクロールのジャーナルから状態を復元
+
+        パラメータが一致しない場合は復元せず、新しいジャーナルで上書きします。
+
+        Returns:
+            bool: 復元した場合はTrue、そうでない場合はFalse
+
+        """
+        if not self.journal_enabled or not self.journal_path.exists():
+            return False
+
+        try:
+            records = self._read_journal()
+        except (OSError, json.JSONDecodeError):
+            logger.exception("ジャーナルの読み込みに失敗しました: %s", self.journal_path)
+            return False
+
+        if not records or records[0].get("type") != "start":
+            logger.warning("ジャーナルの形式が不正なため再開しません: %s", self.journal_path)
+            return False
+
+        start = self._start_record()
+        if records[0].get("parameters") != start["parameters"] or records[0].get("shard") != start.get("shard"):
+            logger.warning("前回とパラメータが異なるため、中断されたクロールを再開しません")
+            return False
+
+        self.download_date = records[0].get("download_date", self.download_date)
+        for record in records[1:]:
+            if record.get("type") == "file":
+                self._append_file(FileMetadata(**record["file"]))
+            elif record.get("type") == "page":
+                self.completed_pages.add(record["url"])
+
+        # 重複した記録を圧縮し、以降の書き込みは圧縮後のジャーナルに追記する
+        self.compact()
+
+        logger.info(
+            "中断されたクロールを再開します: ファイル=%d件, 処理済み一覧ページ=%d件",
+            len(self.files),
+            len(self.completed_pages),
+        )
+        return True
 
     def add_file(self, metadata: FileMetadata) -> None:
         """
@@ -126,27 +208,93 @@ class MetadataManager:
             metadata: ファイルメタデータ
 
         """
-        self.files.append(metadata)
-        self.metadata["files"].append(metadata.to_dict())
+        self._append_file(metadata)
+        self._write_journal({"type": "file", "file": metadata.to_dict()})
 
-        # 統計情報を更新
-        self.statistics.total_files += 1
+    def mark_page_completed(self, url: str) -> None:
+        """
+        報告書一覧ページを処理済みとして記録
 
-        if metadata.download_status == "success":
-            self.statistics.downloaded_files += 1
-            self.statistics.total_size += metadata.file_size
-        elif metadata.download_status == "skipped":
-            self.statistics.skipped_files += 1
-        elif metadata.download_status == "failed":
-            self.statistics.failed_files += 1
+        Args:
+            url: 報告書一覧ページのURL
+
+        """
+        self.completed_pages.add(url)
+        self._write_journal({"type": "page", "url": url})
+
+    def is_page_completed(self, url: str) -> bool:
+        """
+        報告書一覧ページが処理済みかどうかを確認
+
+        Args:
+            url: 報告書一覧ページのURL
 
-        # メタデータの統計情報を更新
-        self.metadata["statistics"] = self.statistics.to_dict()
+        Returns:
+            bool: 処理済みの場合はTrue
+
+        """
+        return url in self.completed_pages
+
+    def query(
+        self,
+        *,
+        year: str | None = None,
+        category: str | None = None,
+        status: str | None = None,
+    ) -> list[FileMetadata]:
+        """
+        条件に一致するファイルメタデータを取得
+
+        Args:
+            year: 公表年
+            category: カテゴリ名
+            status: ダウンロードステータス
+
+        Returns:
+            list[FileMetadata]: 条件に一致するファイルメタデータのリスト
+
+        """
+        return [
+            file
+            for file in self.files
+            if (year is None or file.year == year)
+            and (category is None or file.category == category)
+            and (status is None or file.download_status == status)
+        ]
+
+    def compact(self) -> bool:
+        """
+        ジャーナルを圧縮(同じファイルの古い記録を削除)
+
+        一時ファイルに書き出してから置き換えるため、途中で中断されても元のジャーナルは失われません。
+
+        Returns:
+            bool: 圧縮成功時はTrue、失敗時はFalse
+
+        """
+        if not self.journal_enabled:
+            return False
+
+        tmp_path = self.journal_path.with_suffix(".tmp")
+        with self._journal_lock:
+            try:
+                self._close_journal()
+                with tmp_path.open("w", encoding="utf-8") as f:
+                    for record in self._journal_records():
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                tmp_path.replace(self.journal_path)
+                self._journal_file = self.journal_path.open("a", encoding="utf-8")
+            except OSError:
+                logger.exception("ジャーナルの圧縮に失敗しました")
+                return False
+        return True
 
     def save(self) -> bool:
         """
         メタデータをJSONファイルとして保存
 
+        保存に成功した場合、ジャーナルは不要になるため削除します。
+
         Returns:
             bool: 保存成功時はTrue、失敗時はFalse
 
@@ -160,7 +308,6 @@ class MetadataManager:
             # JSONファイルに書き込み
             with self.metadata_path.open("w", encoding="utf-8") as f:
                 json.dump(self.metadata, f, ensure_ascii=False, indent=2)
-                return True
         except OSError:
             logger.exception("メタデータの保存に失敗しました")
             return False
@@ -168,6 +315,12 @@ class MetadataManager:
             logger.exception("JSONのエンコードに失敗しました")
             return False
 
+        if self.journal_enabled:
+            with self._journal_lock:
+                self._close_journal()
+                self.journal_path.unlink(missing_ok=True)
+        return True
+
     def get_statistics(self) -> Statistics:
         """
         統計情報を取得
@@ -177,3 +330,107 @@ class MetadataManager:
 
         """
         return self.statistics
+
+    def _append_file(self, metadata: FileMetadata) -> None:
+        """
+        ファイルメタデータをメモリ上に追加し、統計情報を更新
+
+        同じURLのファイルが記録済みの場合(再開後に未完了の一覧ページを取得し直した場合など)は、
+        compact()と同様に最新の記録で置き換え、統計情報から古い記録の分を差し引きます。
+
+        Args:
+            metadata: ファイルメタデータ
+
+        """
+        index = self._file_index.get(metadata.original_url)
+        if index is None:
+            self._file_index[metadata.original_url] = len(self.files)
+            self.files.append(metadata)
+            self.statistics.total_files += 1
+        else:
+            self._count_status(self.files[index], -1)
+            self.files[index] = metadata
+        self._count_status(metadata, 1)
+
+    def _count_status(self, metadata: FileMetadata, sign: int) -> None:
+        """
+        ダウンロードステータスごとの統計情報を加算(signが-1の場合は減算)
+
+        Args:
+            metadata: ファイルメタデータ
+            sign: 1または-1
+
+        """
+        if metadata.download_status == "success":
+            self.statistics.downloaded_files += sign
+            self.statistics.total_size += sign * metadata.file_size
+        elif metadata.download_status == "skipped":
+            self.statistics.skipped_files += sign
+        elif metadata.download_status == "failed":
+            self.statistics.failed_files += sign
+
+    def _start_record(self) -> dict[str, Any]:
+        """ジャーナル先頭の記録(クロールの開始日時とパラメータ)を生成"""
+        record = {"type": "start", "download_date": self.download_date, "parameters": self.parameters.to_dict()}
+        if self.shard:
+            record["shard"] = self.shard.to_dict()
+        return record
+
+    def _journal_records(self) -> list[dict[str, Any]]:
+        """現在の状態を表すジャーナルの記録を生成"""
+        records: list[dict[str, Any]] = [self._start_record()]
+        records.extend({"type": "file", "file": file.to_dict()} for file in self.files)
+        records.extend({"type": "page", "url": url} for url in sorted(self.completed_pages))
+        return records
+
+    def _write_journal(self, record: dict[str, Any]) -> None:
+        """
+        ジャーナルに1件追記(初回は新しいジャーナルを作成)
+
+        Args:
+            record: 記録
+
+        """
+        if not self.journal_enabled:
+            return
+
+        with self._journal_lock:
+            try:
+                if self._journal_file is None:
+                    if not create_directory(self.output_dir):
+                        return
+                    self._journal_file = self.journal_path.open("w", encoding="utf-8")
+                    self._journal_file.write(json.dumps(self._start_record(), ensure_ascii=False) + "\n")
+                self._journal_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._journal_file.flush()
+            except OSError:
+                logger.exception("ジャーナルへの書き込みに失敗しました")
+
+    def _read_journal(self) -> list[dict[str, Any]]:
+        """
+        ジャーナルを読み込む(書き込み途中で中断された最終行は無視)
+
+        Returns:
+            list[dict[str, Any]]: 記録のリスト
+
+        """
+        records: list[dict[str, Any]] = []
+        with self.journal_path.open(encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        for index, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                if index == len(lines) - 1:
+                    logger.warning("ジャーナルの最終行が不完全なため無視します")
+                    break
+                raise
+        return records
+
+    def _close_journal(self) -> None:
+        """ジャーナルを閉じる(ロック取得済みで呼び出すこと)"""
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
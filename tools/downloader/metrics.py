@@ -0,0 +1,309 @@
+"""
+計測モジュール
+
+ダウンロード処理の各段階(取得・解析・robots.txtの確認・書き込みなど)の所要時間、転送量、
+リトライ回数、待機時間、キューの長さをホストごとに集計し、Prometheusのテキスト形式またはJSONで出力するクラスを提供します。
+クロールが遅い原因が通信・待機時間(サーバーへの配慮)・CPUのいずれにあるかを、プロファイラなしで確認できます。
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# Prometheusのメトリクス名の接頭辞
+METRIC_PREFIX = "seijishikin_downloader_"
+
+# メトリクスの種類と説明(Prometheusの# TYPE・# HELP行に出力)
+METRIC_TYPES: dict[str, tuple[str, str]] = {
+    "phase_seconds_total": ("counter", "処理段階ごとの所要時間(秒)"),
+    "phase_calls_total": ("counter", "処理段階ごとの実行回数"),
+    "bytes_total": ("counter", "受信したPDFのバイト数"),
+    "bytes_per_second": ("gauge", "PDFの本文の受信速度(バイト/秒、download段階の所要時間あたり)"),
+    "retries_total": ("counter", "例外の種類ごとのリトライ回数"),
+    "sleep_seconds_total": ("counter", "理由ごとの待機時間(秒、politeness: リクエスト間隔、backoff: リトライ前)"),
+    "queue_wait_seconds_total": ("counter", "待機時間の経過後、空きワーカーを待った時間(秒)"),
+    "queue_depth": ("gauge", "スケジューラの待ち行列の長さ(最新値)"),
+    "queue_depth_max": ("gauge", "スケジューラの待ち行列の長さ(最大値)"),
+    "elapsed_seconds": ("gauge", "計測開始からの経過時間(秒)"),
+    "cpu_seconds_total": ("counter", "プロセスのCPU時間(秒)"),
+}
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+def _host(url: str | None) -> str:
+    """URLからホストのラベル値を取得(scheduler.host_keyと同じ形式、URLがない場合は空文字列)"""
+    if not url:
+        return ""
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+def _escape(value: str) -> str:
+    """Prometheusのラベル値をエスケープ"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """スレッドセーフなメトリクスの集計クラス"""
+
+    def __init__(
+        self,
+        *,
+        clock: Callable[[], float] = time.perf_counter,
+        cpu_clock: Callable[[], float] = time.process_time,
+    ) -> None:
+        """
+        初期化
+
+        Args:
+            clock: 経過時間の計測に使用する関数(テスト時にモック可能)
+            cpu_clock: CPU時間の計測に使用する関数(テスト時にモック可能)
+
+        """
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.started_at = clock()
+        self.started_cpu = cpu_clock()
+        self._values: dict[str, dict[_Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def time(self, phase: str, url: str | None = None) -> Iterator[None]:
+        """
+        処理段階の所要時間を計測
+
+        Args:
+            phase: 処理段階の名前(fetch, parse, robots, download, write, hashなど)
+            url: 処理対象のURL(ホストごとに集計する場合に指定)
+
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(phase, self.clock() - start, url)
+
+    def observe(self, phase: str, seconds: float, url: str | None = None) -> None:
+        """
+        処理段階の所要時間を記録
+
+        Args:
+            phase: 処理段階の名前
+            seconds: 所要時間(秒)
+            url: 処理対象のURL
+
+        """
+        labels = (("phase", phase), ("host", _host(url)))
+        with self._lock:
+            self._add("phase_seconds_total", labels, seconds)
+            self._add("phase_calls_total", labels, 1)
+
+    def add_bytes(self, url: str, size: int) -> None:
+        """
+        受信したバイト数を記録
+
+        Args:
+            url: 取得したURL
+            size: バイト数
+
+        """
+        with self._lock:
+            self._add("bytes_total", (("host", _host(url)),), size)
+
+    def count_retry(self, url: str, error: BaseException) -> None:
+        """
+        リトライを記録
+
+        Args:
+            url: リトライするURL
+            error: リトライの原因となった例外
+
+        """
+        with self._lock:
+            self._add("retries_total", (("host", _host(url)), ("exception", type(error).__name__)), 1)
+
+    def add_sleep(self, url: str | None, seconds: float, reason: str = "politeness") -> None:
+        """
+        待機時間を記録
+
+        Args:
+            url: 待機の対象となるホストのURL
+            seconds: 待機時間(秒)
+            reason: 待機の理由(politeness: リクエスト間隔、backoff: リトライ前)
+
+        """
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._add("sleep_seconds_total", (("host", _host(url)), ("reason", reason)), seconds)
+
+    def add_queue_wait(self, url: str, seconds: float) -> None:
+        """
+        空きワーカーを待った時間を記録
+
+        Args:
+            url: タスクのURL
+            seconds: 待った時間(秒)
+
+        """
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._add("queue_wait_seconds_total", (("host", _host(url)),), seconds)
+
+    def set_queue_depth(self, url: str, depth: int) -> None:
+        """
+        待ち行列の長さを記録
+
+        Args:
+            url: ホストのURL
+            depth: 待ち行列の長さ
+
+        """
+        labels = (("host", _host(url)),)
+        with self._lock:
+            self._values.setdefault("queue_depth", {})[labels] = depth
+            maximums = self._values.setdefault("queue_depth_max", {})
+            maximums[labels] = max(maximums.get(labels, 0), depth)
+
+    def value(self, name: str, **labels: str) -> float:
+        """
+        メトリクスの値を取得(指定したラベルに一致する値の合計)
+
+        Args:
+            name: メトリクス名(接頭辞なし)
+            **labels: 絞り込むラベル
+
+        Returns:
+            float: 値の合計
+
+        """
+        with self._lock:
+            series = dict(self._values.get(name, {}))
+        return sum(value for key, value in series.items() if all(dict(key).get(k) == v for k, v in labels.items()))
+
+    def snapshot(self) -> dict[str, dict[_Labels, float]]:
+        """
+        経過時間・CPU時間・受信速度を含む全てのメトリクスを取得
+
+        Returns:
+            dict[str, dict[tuple, float]]: メトリクス名 → ラベル → 値
+
+        """
+        with self._lock:
+            values = {name: dict(series) for name, series in self._values.items()}
+
+        values["elapsed_seconds"] = {(): self.clock() - self.started_at}
+        values["cpu_seconds_total"] = {(): self.cpu_clock() - self.started_cpu}
+
+        download_seconds = {
+            dict(labels)["host"]: seconds
+            for labels, seconds in values.get("phase_seconds_total", {}).items()
+            if dict(labels)["phase"] == "download"
+        }
+        rates = {
+            labels: size / download_seconds[dict(labels)["host"]]
+            for labels, size in values.get("bytes_total", {}).items()
+            if download_seconds.get(dict(labels)["host"])
+        }
+        if rates:
+            values["bytes_per_second"] = rates
+        return values
+
+    def to_dict(self) -> dict[str, Any]:
+        """辞書に変換(JSON出力用)"""
+        return {
+            name: [{"labels": dict(labels), "value": value} for labels, value in sorted(series.items())]
+            for name, series in sorted(self.snapshot().items())
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheusのテキスト形式に変換
+
+        Returns:
+            str: Prometheusのテキスト形式の文字列
+
+        """
+        lines: list[str] = []
+        for name, series in sorted(self.snapshot().items()):
+            metric_type, description = METRIC_TYPES.get(name, ("untyped", name))
+            lines.append(f"# HELP {METRIC_PREFIX}{name} {description}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+            for labels, value in sorted(series.items()):
+                label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels if label)
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{METRIC_PREFIX}{name}{suffix} {value:.6g}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """
+        ボトルネックの確認用の要約を取得
+
+        Returns:
+            str: 主な処理段階の所要時間・待機時間・CPU時間を並べた文字列
+
+        """
+        snapshot = self.snapshot()
+        phases: dict[str, float] = {}
+        for labels, seconds in snapshot.get("phase_seconds_total", {}).items():
+            phase = dict(labels)["phase"]
+            phases[phase] = phases.get(phase, 0.0) + seconds
+        parts = [f"{phase}={seconds:.2f}秒" for phase, seconds in sorted(phases.items())]
+        sleep = sum(snapshot.get("sleep_seconds_total", {}).values())
+        queue_wait = sum(snapshot.get("queue_wait_seconds_total", {}).values())
+        retries = sum(snapshot.get("retries_total", {}).values())
+        parts += [
+            f"待機={sleep:.2f}秒",
+            f"ワーカー待ち={queue_wait:.2f}秒",
+            f"リトライ={int(retries)}回",
+            f"CPU={snapshot['cpu_seconds_total'][()]:.2f}秒",
+            f"経過={snapshot['elapsed_seconds'][()]:.2f}秒",
+        ]
+        return ", ".join(parts)
+
+    def save(self, path: str) -> bool:
+        """
+        メトリクスをファイルに保存(拡張子が.promまたは.txtの場合はPrometheus形式、それ以外はJSON)
+
+        Args:
+            path: 保存先のパス
+
+        Returns:
+            bool: 保存成功時はTrue、失敗時はFalse
+
+        """
+        file_path = Path(path)
+        if file_path.suffix in {".prom", ".txt"}:
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+        tmp_path = file_path.with_name(f"{file_path.name}.tmp")
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(text, encoding="utf-8")
+            tmp_path.replace(file_path)
+        except OSError:
+            logger.exception("メトリクスの保存に失敗しました: %s", path)
+            return False
+        return True
+
+    def _add(self, name: str, labels: _Labels, value: float) -> None:
+        """値を加算(ロック取得済みで呼び出すこと)"""
+        series = self._values.setdefault(name, {})
+        series[labels] = series.get(labels, 0.0) + value
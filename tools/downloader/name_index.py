@@ -0,0 +1,284 @@
+"""
+団体名インデックスモジュール
+
+クロール計画に含まれる全てのPDFリンクを、正規化した団体名のバイグラム(2文字のn-gram)で索引付けし、
+name_index.jsonとして保存するクラスを提供します。
+全ての報告書一覧ページを取得し直さずに、全年度から団体名の部分一致・あいまい一致で報告書を検索できます。
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import unicodedata
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .config import FUZZY_MATCH_THRESHOLD, NAME_INDEX_FILENAME
+from .page_parser import PdfLink
+from .utils import create_directory
+
+if TYPE_CHECKING:
+    from .crawl_plan import CrawlPlan
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# カタカナをひらがなに変換する表(ァ〜ヶ → ぁ〜ゖ)
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+# 正規化で取り除く区切り文字
+_SEPARATORS = str.maketrans("", "", "・･")
+
+
+def normalize_name(text: str) -> str:
+    """
+    団体名を検索用に正規化
+
+    NFKC正規化(全角英数字・半角カナの統一)、カタカナのひらがなへの変換、
+    空白と中黒の除去、英字の小文字化を行います。
+
+    Args:
+        text: 団体名
+
+    Returns:
+        str: 正規化した団体名
+
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_KATAKANA_TO_HIRAGANA).translate(_SEPARATORS)
+    return "".join(text.split()).casefold()
+
+
+def bigrams(text: str) -> set[str]:
+    """
+    文字列のバイグラムの集合を取得(1文字の場合はその文字のみ)
+
+    Args:
+        text: 正規化した文字列
+
+    Returns:
+        set[str]: バイグラムの集合
+
+    """
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+@dataclass(frozen=True)
+class IndexedPdf:
+    """インデックスに含まれるPDFリンク"""
+
+    url: str
+    text: str
+    report_list_url: str
+    year: str
+    category: str
+
+    def pdf_link(self) -> PdfLink:
+        """PDFリンクに変換"""
+        return PdfLink(url=self.url, text=self.text, report_list_url=self.report_list_url)
+
+
+class NameIndex:
+    """団体名 → PDFリンクのインデックスクラス"""
+
+    def __init__(self, entries: list[IndexedPdf], created_at: str, parameters: dict[str, Any]) -> None:
+        """
+        初期化(バイグラムの転置インデックスを構築)
+
+        Args:
+            entries: PDFリンクのリスト
+            created_at: 作成日時(ISO 8601形式)
+            parameters: 元になったクロール計画の検索条件
+
+        """
+        self.entries = entries
+        self.created_at = created_at
+        self.parameters = parameters
+
+        # 正規化した団体名ごとにPDFリンクをまとめ、団体名の番号でバイグラムを索引付けする
+        self._names: list[str] = []
+        self._name_ids: dict[str, int] = {}
+        self._entries_by_name: list[list[int]] = []
+        self._postings: dict[str, list[int]] = {}
+        for entry_id, entry in enumerate(entries):
+            name = normalize_name(entry.text)
+            name_id = self._name_ids.get(name)
+            if name_id is None:
+                name_id = len(self._names)
+                self._name_ids[name] = name_id
+                self._names.append(name)
+                self._entries_by_name.append([])
+                for gram in bigrams(name):
+                    self._postings.setdefault(gram, []).append(name_id)
+            self._entries_by_name[name_id].append(entry_id)
+
+    def __len__(self) -> int:
+        """インデックスに含まれるPDFリンクの数"""
+        return len(self.entries)
+
+    @classmethod
+    def from_plan(cls, plan: CrawlPlan) -> NameIndex:
+        """
+        クロール計画からインデックスを作成
+
+        Args:
+            plan: クロール計画
+
+        Returns:
+            NameIndex: 団体名インデックス
+
+        """
+        entries = [
+            IndexedPdf(
+                url=pdf_link.url,
+                text=pdf_link.text,
+                report_list_url=pdf_link.report_list_url,
+                year=year,
+                category=pdf_link.category_name(),
+            )
+            for pdf_link, year in plan.pdf_links()
+        ]
+        return cls(entries, datetime.datetime.now(tz=datetime.UTC).isoformat(), plan.parameters)
+
+    def search(self, query: str, *, exact: bool = False, fuzzy: bool = False) -> list[IndexedPdf]:
+        """
+        団体名でPDFリンクを検索
+
+        Args:
+            query: 検索する団体名
+            exact: 正規化した団体名の完全一致で検索するかどうか
+            fuzzy: 表記の揺れを許容するあいまい検索を行うかどうか(バイグラムの一致率で判定)
+
+        Returns:
+            list[IndexedPdf]: 一致したPDFリンク(あいまい検索の場合は一致率の高い順)
+
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+
+        if exact:
+            name_id = self._name_ids.get(normalized)
+            name_ids = [name_id] if name_id is not None else []
+        elif fuzzy:
+            name_ids = self._fuzzy_name_ids(normalized)
+        else:
+            name_ids = [name_id for name_id in self._candidates(normalized) if normalized in self._names[name_id]]
+
+        return [self.entries[entry_id] for name_id in name_ids for entry_id in self._entries_by_name[name_id]]
+
+    def _candidates(self, normalized: str) -> list[int]:
+        """
+        部分一致の候補となる団体名の番号を取得(全てのバイグラムを含む団体名)
+
+        Args:
+            normalized: 正規化した検索語
+
+        Returns:
+            list[int]: 団体名の番号(昇順)
+
+        """
+        if len(normalized) < 2:
+            # 1文字の検索語はバイグラムで絞り込めないため全ての団体名を候補とする
+            return list(range(len(self._names)))
+
+        postings = sorted((self._postings.get(gram, []) for gram in bigrams(normalized)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def _fuzzy_name_ids(self, normalized: str) -> list[int]:
+        """
+        あいまい検索で一致する団体名の番号を取得
+
+        検索語と団体名のバイグラムのDice係数と、検索語のバイグラムのうち団体名に含まれる割合の平均を一致率とし、
+        一致率がFUZZY_MATCH_THRESHOLD以上の場合に一致とみなします。
+
+        Args:
+            normalized: 正規化した検索語
+
+        Returns:
+            list[int]: 団体名の番号(一致率の高い順)
+
+        """
+        query_grams = bigrams(normalized)
+        shared: Counter[int] = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, []))
+
+        scores: dict[int, float] = {}
+        for name_id, count in shared.items():
+            dice = 2 * count / (len(query_grams) + len(bigrams(self._names[name_id])))
+            coverage = count / len(query_grams)
+            score = (dice + coverage) / 2
+            if score >= FUZZY_MATCH_THRESHOLD:
+                scores[name_id] = score
+        return sorted(scores, key=lambda name_id: (-scores[name_id], name_id))
+
+    def to_dict(self) -> dict[str, Any]:
+        """辞書に変換"""
+        return {
+            "created_at": self.created_at,
+            "parameters": self.parameters,
+            "entries": [asdict(entry) for entry in self.entries],
+        }
+
+    def save(self, output_dir: str) -> bool:
+        """
+        インデックスをJSONファイルとして保存
+
+        Args:
+            output_dir: 出力ディレクトリ
+
+        Returns:
+            bool: 保存成功時はTrue、失敗時はFalse
+
+        """
+        if not create_directory(output_dir):
+            logger.error("出力ディレクトリの作成に失敗しました")
+            return False
+
+        path = Path(output_dir) / NAME_INDEX_FILENAME
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+            tmp_path.replace(path)
+        except OSError:
+            logger.exception("団体名インデックスの保存に失敗しました")
+            return False
+        logger.info("団体名インデックスを保存しました: %d件 (%s)", len(self.entries), path)
+        return True
+
+    @classmethod
+    def load(cls, output_dir: str) -> NameIndex | None:
+        """
+        保存済みのインデックスを読み込む
+
+        Args:
+            output_dir: 出力ディレクトリ
+
+        Returns:
+            NameIndex | None: 団体名インデックス、存在しないか読み込めない場合はNone
+
+        """
+        path = Path(output_dir) / NAME_INDEX_FILENAME
+        if not path.exists():
+            return None
+
+        try:
+            with path.open(encoding="utf-8") as f:
+                data = json.load(f)
+            entries = [IndexedPdf(**entry) for entry in data["entries"]]
+            return cls(entries, data["created_at"], data["parameters"])
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            logger.exception("団体名インデックスの読み込みに失敗しました: %s", path)
+            return None
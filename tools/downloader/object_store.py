@@ -0,0 +1,133 @@
+"""
+コンテンツアドレス方式のPDFストアモジュール
+
+PDFの本体をSHA-256で命名したファイル(objects/ab/cdef....pdf)として1つだけ保存し、
+人が読めるファイル名({年度}_{種別}_{団体名}.pdf)はハードリンクとして作成するクラスを提供します。
+追加分・解散分のページで再掲載された報告書や、年度をまたいで同じ内容のファイルを重複して保存しません。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .config import OBJECT_STORE_DIR
+
+if TYPE_CHECKING:
+    from .http_cache import HTTPValidatorCache
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class ObjectStore:
+    """コンテンツアドレス方式のPDFストアクラス"""
+
+    def __init__(self, output_dir: str, http_cache: HTTPValidatorCache | None = None) -> None:
+        """
+        初期化
+
+        Args:
+            output_dir: 出力ディレクトリ
+            http_cache: 重複検出に使用するHTTP検証子キャッシュ(ETag・サイズ・SHA-256の記録)
+
+        """
+        self.objects_dir = Path(output_dir) / OBJECT_STORE_DIR
+        # (ETag, サイズ) → SHA-256 の索引(ダウンロード前の重複検出用)
+        self.validators: dict[tuple[str, int], str] = {}
+        self._lock = threading.Lock()
+
+        if http_cache is not None:
+            for entry in http_cache.entries.values():
+                if entry.etag and entry.content_length is not None and entry.sha256:
+                    self.register(entry.etag, entry.content_length, entry.sha256)
+
+    def object_path(self, sha256: str) -> Path:
+        """
+        SHA-256に対応するオブジェクトのパスを取得
+
+        Args:
+            sha256: SHA-256の16進文字列
+
+        Returns:
+            Path: オブジェクトのパス(例: objects/ab/cdef....pdf)
+
+        """
+        return self.objects_dir / sha256[:2] / f"{sha256[2:]}.pdf"
+
+    def register(self, etag: str, size: int, sha256: str) -> None:
+        """
+        ETagとサイズの組をオブジェクトの索引に登録(弱いETagは内容の一致を保証しないため登録しない)
+
+        Args:
+            etag: ETag
+            size: バイト数
+            sha256: SHA-256の16進文字列
+
+        """
+        if etag.startswith("W/"):
+            return
+        with self._lock:
+            self.validators[(etag, size)] = sha256
+
+    def find(self, etag: str | None, size: int | None) -> str | None:
+        """
+        ETagとサイズが一致する保存済みオブジェクトを検索
+
+        Args:
+            etag: レスポンスのETag
+            size: レスポンスのバイト数
+
+        Returns:
+            str | None: 一致したオブジェクトのSHA-256、存在しない場合はNone
+
+        """
+        if not etag or size is None:
+            return None
+        with self._lock:
+            sha256 = self.validators.get((etag, size))
+        if sha256 is None or not self.object_path(sha256).exists():
+            return None
+        return sha256
+
+    def add(self, path: Path, sha256: str) -> Path:
+        """
+        ファイルをオブジェクトとして格納(同じ内容のオブジェクトがある場合は元のファイルを削除)
+
+        Args:
+            path: 格納するファイルのパス(ダウンロード済みの一時ファイル)
+            sha256: ファイルのSHA-256
+
+        Returns:
+            Path: オブジェクトのパス
+
+        """
+        object_path = self.object_path(sha256)
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        if object_path.exists():
+            logger.info("同じ内容のファイルが既に保存されています: %s", object_path.name)
+            path.unlink()
+        else:
+            path.replace(object_path)
+        return object_path
+
+    def link(self, sha256: str, save_path: str) -> None:
+        """
+        オブジェクトへのハードリンクを人が読めるファイル名で作成(既存のファイルは置き換える)
+
+        Args:
+            sha256: オブジェクトのSHA-256
+            save_path: リンクの作成先パス
+
+        Raises:
+            OSError: ハードリンクを作成できない場合
+
+        """
+        object_path = self.object_path(sha256)
+        tmp_path = Path(f"{save_path}.{os.getpid()}.link")
+        tmp_path.unlink(missing_ok=True)
+        os.link(object_path, tmp_path)
+        tmp_path.replace(save_path)
@@ -6,23 +6,39 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import re
 import time
 from dataclasses import dataclass
 from enum import Enum
-from typing import Callable, Protocol, cast
+from typing import TYPE_CHECKING, Callable, Protocol
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup, Tag
-
-from .config import BASE_URL, YEAR_PATTERNS
+from bs4 import BeautifulSoup
+
+from .config import BASE_URL
+from .link_extractor import (
+    YEAR_PATTERN_REGEX,
+    Anchor,
+    LinkExtractor,
+    SoupLinkExtractor,
+    StreamingLinkExtractor,
+)
+from .metrics import Metrics
 from .utils import extract_year_from_url
 
+if TYPE_CHECKING:
+    from .http_cache import HTTPValidatorCache
+    from .scheduler import PoliteScheduler
+
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+# 報告書一覧ページへのリンクのパターン
+REPORT_LINK_REGEX = re.compile(r".*/reports/[A-Z]+[0-9]+/[A-Z]+/[a-zA-Z0-9]+\.html$")
+
 
 class RobotsCheckerProtocol(Protocol):
     """robots.txtチェッカープロトコル"""
@@ -139,6 +155,9 @@ class PageParser:
         robots_checker: RobotsCheckerProtocol | None = None,
         sleep_func: Callable[[int], None] = time.sleep,
         soup_factory: Callable[[str, str], BeautifulSoup] | None = None,
+        http_cache: HTTPValidatorCache | None = None,
+        link_extractor: LinkExtractor | None = None,
+        metrics: Metrics | None = None,
     ) -> None:
         """
         初期化
@@ -151,6 +170,10 @@ class PageParser:
             robots_checker: robots.txtチェッカー
             sleep_func: 待機処理を行う関数(テスト時にモック可能)
             soup_factory: BeautifulSoupオブジェクトを生成する関数(テスト時にモック可能)
+            http_cache: 条件付きGETに使用するHTTP検証子キャッシュ
+            link_extractor: リンク抽出バックエンド(省略時はsoup_factoryが指定されていれば
+                BeautifulSoup、そうでなければ1回の走査で<a>要素だけを拾うストリーミング方式)
+            metrics: 取得・解析・待機時間を記録するメトリクス(省略時は新規作成)
 
         """
         self.session = session
@@ -159,6 +182,10 @@ class PageParser:
         self.delay = delay
         self.robots_checker = robots_checker
         self.sleep_func = sleep_func
+        self.http_cache = http_cache
+        self.metrics = metrics or Metrics()
+        # 設定した場合は、ページの取得をPDFのダウンロードと同じホストごとの待機時間で実行する
+        self.scheduler: PoliteScheduler | None = None
 
         # デフォルトのsoup_factoryを設定
         if soup_factory is None:
@@ -170,6 +197,14 @@ class PageParser:
         else:
             self.soup_factory = soup_factory
 
+        # リンク抽出バックエンドを設定
+        if link_extractor is not None:
+            self.link_extractor: LinkExtractor = link_extractor
+        elif soup_factory is not None:
+            self.link_extractor = SoupLinkExtractor(self.soup_factory)
+        else:
+            self.link_extractor = StreamingLinkExtractor()
+
     def _ensure_url_ends_with_slash(self, url: str) -> str:
         """
         URLの末尾にスラッシュがない場合は追加する
@@ -187,7 +222,44 @@ class PageParser:
 
     def _fetch_url(self, url: str) -> str | None:
         """
-        URLからHTMLを取得
+        URLからHTMLを取得し、取得後にインターバルを設ける
+
+        スケジューラが設定されている場合は、同じホストへのダウンロードと合わせて
+        スケジューラがリクエスト間隔を管理するため、取得をスケジューラに登録して完了を待ちます。
+
+        Args:
+            url: 取得するURL
+
+        Returns:
+            str | None: 取得したHTML、失敗した場合はNone
+
+        """
+        if self.scheduler is not None:
+            return self.scheduler.submit(url, lambda: self.fetch_html(url)).result()
+
+        html = self.fetch_html(url)
+        if html is not None:
+            # インターバルを設ける
+            self.wait(url)
+        return html
+
+    def wait(self, url: str) -> None:
+        """
+        リクエスト間のインターバルを設け、待機した時間をメトリクスに記録
+
+        Args:
+            url: 直前に取得したURL
+
+        """
+        start = self.metrics.clock()
+        self.sleep_func(self.delay)
+        self.metrics.add_sleep(url, self.metrics.clock() - start)
+
+    def fetch_html(self, url: str) -> str | None:
+        """
+        URLからHTMLを取得(待機は行わない)
+
+        リクエスト間隔は呼び出し側で管理します(同期APIでは_fetch_url、非同期エンジンではトークンバケット)。
 
         Args:
             url: 取得するURL
@@ -198,37 +270,62 @@ class PageParser:
         """
         try:
             # robots.txtを確認
-            if self.robots_checker and not self.robots_checker.can_fetch(url):
-                logger.warning("robots.txtによりアクセスが禁止されています: %s", url)
-                return None
+            if self.robots_checker:
+                with self.metrics.time("robots", url):
+                    allowed = self.robots_checker.can_fetch(url)
+                if not allowed:
+                    logger.warning("robots.txtによりアクセスが禁止されています: %s", url)
+                    return None
+
+            # 前回取得した本文がある場合は条件付きGETで再検証する
+            cached_body = self.http_cache.load_body(url) if self.http_cache else None
+            entry = self.http_cache.get(url) if self.http_cache else None
+            headers = entry.conditional_headers() if entry and cached_body is not None else {}
 
             # ページを取得
-            response = self.session.get(url)
+            with self.metrics.time("fetch", url):
+                response = self.session.get(url, headers=headers) if headers else self.session.get(url)
             response.raise_for_status()
 
-            # インターバルを設ける
-            self.sleep_func(self.delay)
+            if headers and cached_body is not None and response.status_code == requests.codes.not_modified:
+                logger.debug("ページは更新されていないためキャッシュを使用します: %s", url)
+                if self.http_cache:
+                    self.http_cache.touch(url)
+                return cached_body.decode("shift_jis", errors="replace")
 
             # 文字コードを設定
             response.encoding = "shift_jis"
+            self._store_in_cache(url, response)
         except requests.RequestException as e:
             logger.exception("ページの取得に失敗しました: %s", url, exc_info=e)
             return None
 
         return response.text
 
-    def _create_soup(self, html: str) -> BeautifulSoup:
+    def _store_in_cache(self, url: str, response: requests.Response) -> None:
         """
-        HTMLからBeautifulSoupオブジェクトを生成
+        取得したページの検証子と本文をキャッシュに保存
 
         Args:
-            html: HTML文字列
-
-        Returns:
-            BeautifulSoup: 生成したBeautifulSoupオブジェクト
+            url: 取得したURL
+            response: レスポンス
 
         """
-        return self.soup_factory(html, "html.parser")
+        if not self.http_cache:
+            return
+
+        headers = response.headers
+        if not headers.get("ETag") and not headers.get("Last-Modified"):
+            return
+
+        body = response.content
+        self.http_cache.update(
+            url,
+            headers,
+            content_length=len(body),
+            sha256=hashlib.sha256(body).hexdigest(),
+        )
+        self.http_cache.store_body(url, body)
 
     def _should_include_year(self, year: str) -> bool:
         """
@@ -243,18 +340,18 @@ class PageParser:
         """
         return not self.years or year in self.years
 
-    def _extract_year_urls_from_soup(
+    def _extract_year_urls(
         self,
-        soup: BeautifulSoup,
+        anchors: list[Anchor],
         base_url: str,
         *,
         seasonal_report_only: bool = False,
     ) -> list[YearPageLink | ReportListPageLink]:
         """
-        BeautifulSoupオブジェクトから年度URLを抽出
+        リンクのリストから年度URLを抽出
 
         Args:
-            soup: BeautifulSoupオブジェクト
+            anchors: リンクのリスト
             base_url: ベースURL
             seasonal_report_only: 定期公表のみをチェックするかどうか
 
@@ -265,23 +362,15 @@ class PageParser:
         year_urls: list[YearPageLink | ReportListPageLink] = []
 
         # 「令和X年分」などのパターンを含むリンクを探す
-        for link in soup.find_all("a"):
-            # Tagにキャスト
-            link_tag = cast("Tag", link)
-            href = link_tag.get("href")
-            text = link_tag.get_text()
-
-            if not href:
-                continue
-
-            # 文字列に変換
-            href_str = str(href)
+        for anchor in anchors:
+            href_str = anchor.href
+            text = anchor.text
 
             # リンクとテキストをデバッグログに出力
             logger.debug("リンク: %s, テキスト: %s", href_str, text)
 
             # 特定のURLパターンを直接チェック
-            if "/reports/" in href_str and any(re.search(pattern, text) for pattern in YEAR_PATTERNS):
+            if "/reports/" in href_str and YEAR_PATTERN_REGEX.search(text):
                 if seasonal_report_only and "/reports/SS" not in href_str:
                     continue
 
@@ -322,24 +411,37 @@ class PageParser:
         if not html:
             return []
 
-        soup = self._create_soup(html)
-        return self._extract_year_urls_from_soup(
-            soup,
-            BASE_URL,
-            seasonal_report_only=True,
-        )
+        return self.parse_top_page_html(html)
+
+    def parse_top_page_html(self, html: str) -> list[YearPageLink | ReportListPageLink]:
+        """
+        トップページのHTMLから公表年ごとのURLを抽出
+
+        Args:
+            html: トップページのHTML
+
+        Returns:
+            list[YearPageUrl | ReportListPageUrl]: 年度URLのリスト
+
+        """
+        with self.metrics.time("parse"):
+            return self._extract_year_urls(
+                self.link_extractor.extract(html),
+                BASE_URL,
+                seasonal_report_only=True,
+            )
 
     def _extract_report_list_links(
         self,
-        soup: BeautifulSoup,
+        anchors: list[Anchor],
         base_url: str,
         year: str,
     ) -> list[ReportListPageLink]:
         """
-        BeautifulSoupオブジェクトから報告書一覧リンクを抽出
+        リンクのリストから報告書一覧リンクを抽出
 
         Args:
-            soup: BeautifulSoupオブジェクト
+            anchors: リンクのリスト
             base_url: ベースURL
             year: 年度
 
@@ -351,38 +453,28 @@ class PageParser:
         base_url = self._ensure_url_ends_with_slash(base_url)
         links: list[ReportListPageLink] = []
 
-        report_link_regex = re.compile(
-            r".*/reports/[A-Z]+[0-9]+/[A-Z]+/[a-zA-Z0-9]+\.html$",
-        )
-        for link in soup.find_all("a"):
-            # Tagにキャスト
-            link_tag = cast("Tag", link)
-            href = link_tag.get("href")
-            text = link_tag.get_text().strip()
-
-            if not href or not text:
+        for anchor in anchors:
+            text = anchor.text.strip()
+            if not text:
                 continue
 
-            # 文字列に変換
-            href_str = str(href)
-
-            if report_link_regex.match(href_str):
-                report_url = urljoin(base_url, href_str)
+            if REPORT_LINK_REGEX.match(anchor.href):
+                report_url = urljoin(base_url, anchor.href)
                 links.append(ReportListPageLink(url=report_url, text=text, year=year))
 
         return links
 
     def _extract_direct_pdf_links(
         self,
-        soup: BeautifulSoup,
+        anchors: list[Anchor],
         report_list_url: str,
     ) -> list[PdfLink]:
         """
-        BeautifulSoupオブジェクトから直接PDFリンクを抽出
+        リンクのリストから直接PDFリンクを抽出
 
         Args:
-            soup: BeautifulSoupオブジェクト
-            base_url: ベースURL
+            anchors: リンクのリスト
+            report_list_url: 報告書一覧ページのURL
 
         Returns:
             list[PdfLink]: PDFリンクのリスト
@@ -392,21 +484,14 @@ class PageParser:
         report_list_url_with_slash = self._ensure_url_ends_with_slash(report_list_url)
         links: list[PdfLink] = []
 
-        for link in soup.find_all("a"):
-            # Tagにキャスト
-            link_tag = cast("Tag", link)
-            href = link_tag.get("href")
-            text = link_tag.get_text().strip()
-
-            if not href or not text:
+        for anchor in anchors:
+            text = anchor.text.strip()
+            if not text:
                 continue
 
-            # 文字列に変換
-            href_str = str(href)
-
             # PDFへの直接リンクかどうかを確認
-            if href_str.lower().endswith(".pdf"):
-                pdf_url = urljoin(report_list_url_with_slash, href_str)
+            if anchor.href.lower().endswith(".pdf"):
+                pdf_url = urljoin(report_list_url_with_slash, anchor.href)
                 links.append(
                     PdfLink(url=pdf_url, text=text, report_list_url=report_list_url),
                 )
@@ -475,9 +560,23 @@ class PageParser:
         if not html:
             return []
 
-        soup = self._create_soup(html)
+        return self.parse_year_page_html(html, link)
+
+    def parse_year_page_html(self, html: str, link: YearPageLink) -> list[ReportListPageLink]:
+        """
+        年度ページのHTMLから報告書一覧リンクを抽出
+
+        Args:
+            html: 年度ページのHTML
+            link: 年度ページのリンク
+
+        Returns:
+            list[ReportListPageLink]: 報告書一覧リンクのリスト
 
-        report_list_links = self._extract_report_list_links(soup, link.url, link.year)
+        """
+        with self.metrics.time("parse"):
+            anchors = self.link_extractor.extract(html)
+            report_list_links = self._extract_report_list_links(anchors, link.url, link.year)
         if report_list_links:
             logger.info("報告書一覧リンクを見つけました: %d件", len(report_list_links))
             return report_list_links
@@ -488,7 +587,7 @@ class PageParser:
     def parse_report_list_page(
         self,
         report_list_url: ReportListPageLink,
-    ) -> list[PdfLink]:
+    ) -> list[PdfLink] | None:
         """
         報告書一覧ページを解析し、PDFリンクを取得
 
@@ -496,22 +595,41 @@ class PageParser:
             report_list_url: 報告書一覧ページのURL
 
         Returns:
-            list[PdfLink]: PDFリンクのリスト
+            list[PdfLink] | None: PDFリンクのリスト、ページの取得に失敗した場合はNone
 
         """
         logger.info("報告書一覧ページを解析しています: %s", report_list_url.url)
 
         html = self._fetch_url(report_list_url.url)
-        if not html:
-            return []
+        if html is None:
+            return None
 
-        soup = self._create_soup(html)
+        return self.parse_report_list_page_html(html, report_list_url)
 
-        pdf_links = self._extract_direct_pdf_links(soup, report_list_url.url)
-        if self.name_filter:
-            if self.name_filter.exact_match:
-                pdf_links = [link for link in pdf_links if self.name_filter.name == link.text]
-            else:
-                pdf_links = [link for link in pdf_links if self.name_filter.name in link.text]
+    def parse_report_list_page_html(
+        self,
+        html: str,
+        report_list_url: ReportListPageLink,
+    ) -> list[PdfLink]:
+        """
+        報告書一覧ページのHTMLからPDFリンクを抽出し、団体名フィルタを適用
+
+        Args:
+            html: 報告書一覧ページのHTML
+            report_list_url: 報告書一覧ページのURL
+
+        Returns:
+            list[PdfLink]: PDFリンクのリスト
+
+        """
+        with self.metrics.time("parse"):
+            anchors = self.link_extractor.extract(html)
+
+            pdf_links = self._extract_direct_pdf_links(anchors, report_list_url.url)
+            if self.name_filter:
+                if self.name_filter.exact_match:
+                    pdf_links = [link for link in pdf_links if self.name_filter.name == link.text]
+                else:
+                    pdf_links = [link for link in pdf_links if self.name_filter.name in link.text]
 
         return pdf_links
@@ -6,20 +6,31 @@ PDFダウンロードモジュール
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING, Protocol
 
 import requests
-from tqdm import tqdm
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
 
+from .acquired_index import AcquiredFile
+from .config import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, MIN_CHUNK_SIZE
 from .metadata import FileMetadata
+from .metrics import Metrics
+from .progress import TransferProgress
 from .utils import create_directory, sanitize_filename
 
 # 型チェック用のインポート
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    from .acquired_index import AcquiredIndex
+    from .http_cache import HTTPValidatorCache
+    from .object_store import ObjectStore
     from .page_parser import PdfLink
 
 # ロガーの設定
@@ -34,6 +45,32 @@ class RobotsChecker(Protocol):
         ...
 
 
+class SupportsWrite(Protocol):
+    """stream_to_fileの書き込み先のプロトコル"""
+
+    def write(self, data: bytes | memoryview, /) -> int:
+        """データ(再利用する読み込みバッファのmemoryviewを含む)を書き込み、書き込んだバイト数を返す"""
+        ...
+
+
+class _TimedWriter:
+    """書き込みに要した時間を計測するファイルのラッパー"""
+
+    __slots__ = ("clock", "file", "seconds")
+
+    def __init__(self, file: SupportsWrite, clock: Callable[[], float]) -> None:
+        self.file = file
+        self.clock = clock
+        self.seconds = 0.0
+
+    def write(self, data: bytes | memoryview, /) -> int:
+        start = self.clock()
+        try:
+            return self.file.write(data)
+        finally:
+            self.seconds += self.clock() - start
+
+
 @dataclass
 class DownloadPrepareResult:
     """ダウンロード準備結果"""
@@ -51,6 +88,199 @@ class DownloaderConfig:
     metadata_only: bool = False
     delay: int = 5
     robots_checker: RobotsChecker | None = None
+    http_cache: HTTPValidatorCache | None = None
+    object_store: ObjectStore | None = None
+    acquired_index: AcquiredIndex | None = None
+    metrics: Metrics | None = None
+
+
+class IncompleteDownloadError(requests.RequestException):
+    """ダウンロードが途中で終了したことを表す例外(リトライ対象)"""
+
+
+@dataclass
+class PartialDownload:
+    """ダウンロード途中の状態"""
+
+    part_path: Path
+    validator: str | None = None
+
+
+def part_path_for(save_path: str) -> Path:
+    """
+    ダウンロード中の一時ファイルのパスを取得
+
+    Args:
+        save_path: 保存先パス
+
+    Returns:
+        Path: 一時ファイルのパス(保存先パス + .part)
+
+    """
+    return Path(f"{save_path}.part")
+
+
+def _expected_total_size(response: requests.Response, offset: int) -> int | None:
+    """
+    レスポンスから完了時のファイルサイズを求める
+
+    Args:
+        response: レスポンス
+        offset: 再開位置(先頭から取得する場合は0)
+
+    Returns:
+        int | None: 完了時のファイルサイズ、不明な場合はNone
+
+    """
+    content_range = response.headers.get("content-range", "")
+    if offset and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        if total.isdigit():
+            return int(total)
+
+    content_length = response.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+
+def _is_content_encoded(response: requests.Response) -> bool:
+    """
+    本文がContent-Encoding(gzipなど)で圧縮されて送られているかどうかを判定
+
+    圧縮されている場合、Content-LengthとRangeは圧縮後のバイト数を表すため、
+    展開して保存したファイルのサイズの検証や続きからの再開には使用できません。
+
+    Args:
+        response: レスポンス
+
+    Returns:
+        bool: 圧縮されている場合はTrue
+
+    """
+    encoding = response.headers.get("content-encoding", "").strip().lower()
+    return encoding not in ("", "identity")
+
+
+def _range_validator(response: requests.Response) -> str | None:
+    """
+    If-Rangeに使用できる検証子を取得(弱いETagは使用できない)
+
+    Args:
+        response: レスポンス
+
+    Returns:
+        str | None: 検証子、存在しない場合はNone
+
+    """
+    etag = response.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("last-modified")
+
+
+def chunk_size_for(content_length: int | None) -> int:
+    """
+    Content-Lengthに応じた読み込みサイズを決定
+
+    ファイルを16回程度で読み終わる大きさを、MIN_CHUNK_SIZEからMAX_CHUNK_SIZEまでの2の累乗で選びます。
+
+    Args:
+        content_length: 受信する本文のバイト数(不明な場合はNone)
+
+    Returns:
+        int: 読み込みサイズ(バイト)
+
+    """
+    if content_length is None:
+        return DEFAULT_CHUNK_SIZE
+
+    size = MIN_CHUNK_SIZE
+    while size < MAX_CHUNK_SIZE and size * 16 < content_length:
+        size *= 2
+    return size
+
+
+# ワーカースレッドごとに再利用する読み込みバッファ
+_buffers = threading.local()
+
+
+def _read_buffer(size: int) -> memoryview:
+    """
+    ワーカースレッドで再利用する読み込みバッファを取得
+
+    Args:
+        size: 必要なバイト数
+
+    Returns:
+        memoryview: 指定サイズのバッファ
+
+    """
+    buffer: bytearray | None = getattr(_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = bytearray(size)
+        _buffers.buffer = buffer
+    return memoryview(buffer)[:size]
+
+
+def stream_to_file(response: requests.Response, file: SupportsWrite, chunk_size: int) -> Iterator[int]:
+    """
+    レスポンスの本文をファイルに書き込む
+
+    urllib3のレスポンスから再利用するバッファへ直接読み込み(readinto)、チャンクごとのbytesの生成を避けます。
+    readintoに対応しないレスポンスではiter_contentを使用します。
+
+    Args:
+        response: ストリーミングのレスポンス
+        file: 書き込み先のファイル
+        chunk_size: 読み込みサイズ
+
+    Yields:
+        int: 書き込んだバイト数
+
+    Raises:
+        requests.RequestException: 受信中に通信エラーが発生した場合
+
+    """
+    raw = getattr(response, "raw", None)
+    if raw is None or not hasattr(raw, "readinto"):
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                file.write(chunk)
+                yield len(chunk)
+        return
+
+    # iter_contentと同様にContent-Encodingを展開し、urllib3の例外をrequestsの例外に変換する
+    raw.decode_content = True
+    view = _read_buffer(chunk_size)
+    try:
+        while size := raw.readinto(view):
+            file.write(view[:size])
+            yield size
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e) from e
+    except DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e) from e
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e) from e
+
+
+def _file_sha256(path: Path) -> str:
+    """
+    ファイルのSHA-256を計算
+
+    Args:
+        path: ファイルのパス
+
+    Returns:
+        str: SHA-256の16進文字列
+
+    """
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 class PDFDownloader:
@@ -67,6 +297,11 @@ class PDFDownloader:
         metadata_only: bool = False,
         delay: int = 5,
         robots_checker: RobotsChecker | None = None,
+        http_cache: HTTPValidatorCache | None = None,
+        object_store: ObjectStore | None = None,
+        acquired_index: AcquiredIndex | None = None,
+        progress: TransferProgress | None = None,
+        metrics: Metrics | None = None,
     ) -> None:
         """
         初期化
@@ -80,10 +315,17 @@ class PDFDownloader:
             metadata_only: メタデータのみフラグ
             delay: リクエスト間の待機時間(秒)
             robots_checker: robots.txtチェッカー
+            http_cache: 条件付きGETに使用するHTTP検証子キャッシュ
+            object_store: コンテンツアドレス方式のPDFストア(指定時はPDFの本体を重複なく保存)
+            acquired_index: 取得済みファイルのインデックス(指定時は既存ファイルの確認にファイルシステムを使用しない)
+            progress: 全ワーカーで共有する進捗表示(省略時は新規作成)
+            metrics: 取得・書き込み・リトライ・待機時間を記録するメトリクス(省略時は新規作成)
 
         """
         self.session = session
         self.output_dir = output_dir
+        self.progress = progress or TransferProgress()
+        self.metrics = metrics or Metrics()
 
         if config is not None:
             self.force = config.force
@@ -91,6 +333,10 @@ class PDFDownloader:
             self.metadata_only = config.metadata_only
             self.delay = config.delay
             self.robots_checker = config.robots_checker
+            self.http_cache = config.http_cache
+            self.object_store = config.object_store
+            self.acquired_index = config.acquired_index
+            self.metrics = config.metrics or self.metrics
         else:
             # 個別のパラメータを使用
             self.force = force
@@ -98,6 +344,9 @@ class PDFDownloader:
             self.metadata_only = metadata_only
             self.delay = delay
             self.robots_checker = robots_checker
+            self.http_cache = http_cache
+            self.object_store = object_store
+            self.acquired_index = acquired_index
 
     def prepare_download(self, pdf_link: PdfLink, year: str) -> DownloadPrepareResult:
         """
@@ -140,6 +389,8 @@ class PDFDownloader:
         """
         既存ファイルをチェック
 
+        取得済みファイルのインデックスに記録がある場合は、ファイルシステムに問い合わせずにスキップします。
+
         Args:
             save_path: 保存先パス
             metadata: ファイルメタデータ
@@ -149,16 +400,45 @@ class PDFDownloader:
                 ない場合はNone
 
         """
+        if self.force:
+            return None
+
+        # 取得済みファイルのインデックスのチェック
+        if self.acquired_index is not None:
+            size = self.acquired_index.get_size(metadata.original_url, metadata.filename)
+            if size is not None:
+                logger.info("取得済みのためスキップします: %s", save_path)
+                metadata.download_status = "skipped"
+                metadata.file_size = size
+                return metadata
+
         # 既存ファイルのチェック
         path_obj = Path(save_path)
-        if path_obj.exists() and not self.force:
+        if path_obj.exists():
             logger.info("ファイルが既に存在するためスキップします: %s", save_path)
             metadata.download_status = "skipped"
             metadata.file_size = path_obj.stat().st_size
+            self._record_acquired(metadata)
             return metadata
 
         return None
 
+    def _record_acquired(self, metadata: FileMetadata) -> None:
+        """
+        取得済みファイルをインデックスに記録(次回以降の実行でファイルシステムを確認せずにスキップするため)
+
+        Args:
+            metadata: ファイルメタデータ
+
+        """
+        if self.acquired_index is None:
+            return
+        if self.acquired_index.get_size(metadata.original_url, metadata.filename) == metadata.file_size:
+            return
+        self.acquired_index.add(
+            AcquiredFile(metadata.original_url, metadata.filename, metadata.file_size, metadata.sha256)
+        )
+
     def _handle_dry_run_metadata_only(
         self,
         save_path: str,
@@ -189,30 +469,191 @@ class PDFDownloader:
 
         return None
 
+    def _conditional_headers(self, pdf_url: str, save_path: str) -> dict[str, str]:
+        """
+        条件付きGET用のヘッダーを取得
+
+        既存ファイルのサイズがキャッシュの記録と一致する場合のみ検証子を送信します。
+
+        Args:
+            pdf_url: PDFファイルのURL
+            save_path: 保存先パス
+
+        Returns:
+            dict[str, str]: リクエストヘッダー(条件付きGETを行わない場合は空)
+
+        """
+        if not self.http_cache:
+            return {}
+
+        entry = self.http_cache.get(pdf_url)
+        if entry is None or entry.content_length is None:
+            return {}
+
+        path_obj = Path(save_path)
+        if not path_obj.exists() or path_obj.stat().st_size != entry.content_length:
+            return {}
+
+        return entry.conditional_headers()
+
+    def _cached_sha256(self, pdf_url: str) -> str | None:
+        """
+        HTTP検証子キャッシュに記録されたSHA-256を取得
+
+        Args:
+            pdf_url: PDFファイルのURL
+
+        Returns:
+            str | None: SHA-256の16進文字列、記録がない場合はNone
+
+        """
+        entry = self.http_cache.get(pdf_url) if self.http_cache else None
+        return entry.sha256 if entry else None
+
+    def _resume_headers(self, partial: PartialDownload) -> dict[str, str]:
+        """
+        中断したダウンロードを再開するためのRangeヘッダーを取得
+
+        Args:
+            partial: ダウンロード途中の状態
+
+        Returns:
+            dict[str, str]: リクエストヘッダー(再開できない場合は空)
+
+        """
+        if not partial.validator or not partial.part_path.exists():
+            return {}
+
+        offset = partial.part_path.stat().st_size
+        if offset == 0:
+            return {}
+
+        # If-Rangeにより、サーバー上のファイルが変わっていれば先頭から送り直される
+        # 続きのバイト位置は展開後のファイルのサイズのため、圧縮せずに送るよう指定する
+        return {"Range": f"bytes={offset}-", "If-Range": partial.validator, "Accept-Encoding": "identity"}
+
     def _download_with_progress(
         self,
         pdf_url: str,
         save_path: str,
-    ) -> None:
-        """単一のダウンロード試行を実行"""
-        response = self.session.get(pdf_url, stream=True)
-        response.raise_for_status()
+        headers: dict[str, str] | None = None,
+        partial: PartialDownload | None = None,
+    ) -> bool:
+        """
+        単一のダウンロード試行を実行
 
-        total_size = int(response.headers.get("content-length", 0))
-        progress_bar = tqdm(
-            total=total_size,
-            unit="B",
-            unit_scale=True,
-            desc=Path(save_path).name,
-        )
+        一時ファイル(.part)に書き込み、サイズを検証してから保存先へ置き換えます。
+        前回の試行で途中まで取得できている場合はRangeリクエストで続きから再開します。
 
-        with Path(save_path).open("wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    progress_bar.update(len(chunk))
+        Args:
+            pdf_url: PDFファイルのURL
+            save_path: 保存先パス
+            headers: 条件付きGET用のリクエストヘッダー
+            partial: ダウンロード途中の状態(リトライ間で共有)
+
+        Returns:
+            bool: 本文を保存した場合はTrue、
+                304(未更新)または同じ内容のオブジェクトが保存済みで本文を取得しなかった場合はFalse
+
+        Raises:
+            IncompleteDownloadError: 取得したサイズが期待値と一致しない場合
+
+        """
+        if partial is None:
+            partial = PartialDownload(part_path=part_path_for(save_path))
+
+        resume_headers = self._resume_headers(partial)
+        # 再開時は条件付きGETを行わない(304では続きが取得できないため)
+        request_headers = resume_headers or headers or {}
+        with self.metrics.time("fetch", pdf_url):
+            if request_headers:
+                response = self.session.get(pdf_url, stream=True, headers=request_headers)
+            else:
+                response = self.session.get(pdf_url, stream=True)
+
+        if resume_headers and response.status_code == requests.codes.requested_range_not_satisfiable:
+            response.close()
+            partial.validator = None
+            msg = f"再開位置が不正なため先頭から再取得します: {pdf_url}"
+            raise IncompleteDownloadError(msg)
+        response.raise_for_status()
+
+        # 304は条件付きGETを送信した場合にのみ返される
+        if headers and not resume_headers and response.status_code == requests.codes.not_modified:
+            response.close()
+            if self.http_cache:
+                self.http_cache.touch(pdf_url)
+            return False
+
+        encoded = _is_content_encoded(response)
+        if resume_headers and encoded and response.status_code == requests.codes.partial_content:
+            # 圧縮された本文の一部は展開済みの一時ファイルに継ぎ足せないため、先頭から取得し直す
+            response.close()
+            partial.validator = None
+            msg = f"圧縮された応答は再開できないため先頭から再取得します: {pdf_url}"
+            raise IncompleteDownloadError(msg)
+
+        resuming = bool(resume_headers) and response.status_code == requests.codes.partial_content
+        offset = partial.part_path.stat().st_size if resuming else 0
+        # 圧縮されている場合はContent-Lengthが展開後のサイズと一致しないため、サイズの検証と再開を行わない
+        expected_size = None if encoded else _expected_total_size(response, offset)
+        partial.validator = None if encoded else _range_validator(response)
+
+        # ETagとサイズが一致するオブジェクトが保存済みであれば、本文を取得せずにリンクする
+        if self.object_store and not resuming:
+            sha256 = self.object_store.find(response.headers.get("etag"), expected_size)
+            if sha256 is not None:
+                response.close()
+                self.object_store.link(sha256, save_path)
+                logger.info("同じ内容のファイルが保存済みのため本文を取得せずにリンクしました: %s", save_path)
+                if self.http_cache:
+                    self.http_cache.update(pdf_url, response.headers, content_length=expected_size, sha256=sha256)
+                return False
+
+        chunk_size = chunk_size_for(expected_size - offset if expected_size is not None else None)
+        received = 0
+        with (
+            self.metrics.time("download", pdf_url),
+            self.progress.track(expected_size, initial=offset) as update_progress,
+            partial.part_path.open("ab" if resuming else "wb") as f,
+        ):
+            writer = _TimedWriter(f, self.metrics.clock)
+            try:
+                for size in stream_to_file(response, writer, chunk_size):
+                    received += size
+                    update_progress(size)
+            finally:
+                # 書き込み時間はdownloadの所要時間の内数として記録する
+                self.metrics.observe("write", writer.seconds, pdf_url)
+                self.metrics.add_bytes(pdf_url, received)
+
+        # サイズを検証してから保存先へアトミックに置き換える
+        actual_size = partial.part_path.stat().st_size
+        if expected_size is not None and actual_size != expected_size:
+            msg = f"ダウンロードが途中で終了しました({actual_size}/{expected_size}バイト): {pdf_url}"
+            raise IncompleteDownloadError(msg)
+
+        sha256 = None
+        if self.http_cache or self.object_store:
+            with self.metrics.time("hash", pdf_url):
+                sha256 = _file_sha256(partial.part_path)
+        if self.object_store and sha256:
+            self.object_store.add(partial.part_path, sha256)
+            self.object_store.link(sha256, save_path)
+            etag = response.headers.get("etag")
+            if etag:
+                self.object_store.register(etag, actual_size, sha256)
+        else:
+            partial.part_path.replace(save_path)
 
-        progress_bar.close()
+        if self.http_cache:
+            self.http_cache.update(
+                pdf_url,
+                response.headers,
+                content_length=actual_size,
+                sha256=sha256,
+            )
+        return True
 
     def download_pdf(
         self,
@@ -248,30 +689,43 @@ class PDFDownloader:
             return metadata
 
         # robots.txtを確認
-        if self.robots_checker and not self.robots_checker.can_fetch(pdf_url):
-            logger.warning(
-                "robots.txtによりアクセスが禁止されています: %s",
-                pdf_url,
-            )
-            metadata.download_status = "failed"
-            metadata.error = "robots.txtによりアクセスが禁止されています"
-            return metadata
+        if self.robots_checker:
+            with self.metrics.time("robots", pdf_url):
+                allowed = self.robots_checker.can_fetch(pdf_url)
+            if not allowed:
+                logger.warning(
+                    "robots.txtによりアクセスが禁止されています: %s",
+                    pdf_url,
+                )
+                metadata.download_status = "failed"
+                metadata.error = "robots.txtによりアクセスが禁止されています"
+                return metadata
 
         max_retries = 3
         success = False
+        headers = self._conditional_headers(pdf_url, save_path)
+        partial = PartialDownload(part_path=part_path_for(save_path))
         try:
             for retry_count in range(max_retries):
                 try:
                     logger.info("PDFをダウンロードしています: %s", pdf_url)
-                    self._download_with_progress(pdf_url, save_path)
+                    if not self._download_with_progress(pdf_url, save_path, headers, partial):
+                        # サーバー上のファイルが更新されていないか、同じ内容のファイルがある場合は既存ファイルを使用
+                        logger.info("ファイルは更新されていないためスキップします: %s", save_path)
+                        metadata.download_status = "skipped"
+                        metadata.file_size = Path(save_path).stat().st_size
+                        metadata.sha256 = self._cached_sha256(pdf_url)
+                        self._record_acquired(metadata)
+                        return metadata
 
                     # メタデータを更新
                     metadata.download_status = "success"
                     metadata.file_size = Path(save_path).stat().st_size
                     metadata.download_date = time.strftime("%Y-%m-%dT%H:%M:%S")
+                    metadata.sha256 = self._cached_sha256(pdf_url)
+                    self._record_acquired(metadata)
 
                     logger.info("ダウンロード完了: %s", save_path)
-                    time.sleep(self.delay)
                     success = True
                     break
                 except requests.RequestException as e:
@@ -286,13 +740,17 @@ class PDFDownloader:
                     if retry_count >= max_retries - 1:
                         logger.exception("最大リトライ回数に達しました: %s", pdf_url)
                         raise  # 最後のリトライでも失敗した場合は例外を再スロー
-                    time.sleep(self.delay * (2**retry_count))
+                    self.metrics.count_retry(pdf_url, e)
+                    backoff = self.delay * (2**retry_count)
+                    time.sleep(backoff)
+                    self.metrics.add_sleep(pdf_url, backoff, reason="backoff")
             if success:
                 return metadata
         except requests.RequestException as e:
             # 最大リトライ回数に達した場合の処理
             metadata.download_status = "failed"
             metadata.error = str(e)
+            partial.part_path.unlink(missing_ok=True)
         except OSError as e:
             logger.exception(
                 "ファイルの保存中にエラーが発生しました: %s",
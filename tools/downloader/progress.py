@@ -0,0 +1,118 @@
+"""
+進捗表示モジュール
+
+並列に実行される全てのダウンロードの転送量を1本の進捗バーに集約し、
+一定間隔でのみ再描画するクラスを提供します。
+"""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from tqdm import tqdm
+
+from .config import PROGRESS_INTERVAL
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+class TransferProgress:
+    """全ワーカーの転送量を集約した進捗表示クラス"""
+
+    def __init__(
+        self,
+        *,
+        interval: float = PROGRESS_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+        bar_factory: Callable[..., Any] = tqdm,
+    ) -> None:
+        """
+        初期化
+
+        Args:
+            interval: 進捗バーを再描画する最小間隔(秒)
+            clock: 現在時刻を返す関数(テスト時にモック可能)
+            bar_factory: 進捗バーを生成する関数(テスト時にモック可能)
+
+        """
+        self.interval = interval
+        self.clock = clock
+        self.bar_factory = bar_factory
+        self.total = 0
+        self.transferred = 0
+        self.started_files = 0
+        self.finished_files = 0
+        self._pending = 0
+        self._last_refresh = 0.0
+        self._bar: Any = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def track(self, size: int | None, initial: int = 0) -> Iterator[Callable[[int], None]]:
+        """
+        1ファイルの転送を進捗に登録
+
+        転送が途中で終わった場合は、受信しなかった分を合計から差し引きます。
+
+        Args:
+            size: ファイル全体のバイト数(不明な場合はNone)
+            initial: 転送開始時点で受信済みのバイト数(再開時)
+
+        Yields:
+            Callable[[int], None]: 受信したバイト数を通知する関数
+
+        """
+        remaining = (size - initial) if size is not None else 0
+        received = 0
+
+        def update(n: int) -> None:
+            nonlocal received
+            received += n
+            self._update(n)
+
+        with self._lock:
+            self.total += remaining
+            self.started_files += 1
+        try:
+            yield update
+        finally:
+            with self._lock:
+                if size is None:
+                    self.total += received
+                elif received < remaining:
+                    self.total -= remaining - received
+                self.finished_files += 1
+                self._refresh(force=True)
+
+    def close(self) -> None:
+        """進捗バーを閉じる"""
+        with self._lock:
+            if self._bar is not None:
+                self._refresh(force=True)
+                self._bar.close()
+                self._bar = None
+
+    def _update(self, n: int) -> None:
+        """受信したバイト数を加算(一定間隔でのみ再描画)"""
+        with self._lock:
+            self.transferred += n
+            self._pending += n
+            self._refresh(force=False)
+
+    def _refresh(self, *, force: bool) -> None:
+        """進捗バーを再描画(ロック取得済みで呼び出すこと)"""
+        now = self.clock()
+        if not force and now - self._last_refresh < self.interval:
+            return
+        self._last_refresh = now
+
+        if self._bar is None:
+            self._bar = self.bar_factory(total=0, unit="B", unit_scale=True, desc="PDF", mininterval=self.interval)
+        self._bar.total = self.total
+        self._bar.set_postfix_str(f"{self.finished_files}/{self.started_files}ファイル", refresh=False)
+        self._bar.update(self._pending)
+        self._pending = 0
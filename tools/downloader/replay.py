@@ -0,0 +1,385 @@
+"""
+オフライン再生モジュール
+
+保存済みの総務省サイトのHTMLとPDF(カセットディレクトリ)をローカルのHTTPサーバーから配信し、
+実際のサイトにアクセスせずにダウンロード処理全体を実行するためのクラスを提供します。
+
+カセットディレクトリはURLのホスト名とパスをそのままディレクトリ構造にしたものです。
+末尾がスラッシュのURLは index.html に対応します。
+
+    cassette/www.soumu.go.jp/senkyo/seiji_s/seijishikin/index.html
+    cassette/www.soumu.go.jp/senkyo/seiji_s/seijishikin/reports/SS20241129/index.html
+    cassette/www.soumu.go.jp/senkyo/seiji_s/seijishikin/reports/SS20241129/SL/a00001.html
+    cassette/www.soumu.go.jp/senkyo/seiji_s/seijishikin/reports/SS20241129/SL/000001.pdf
+
+使用方法:
+    # 実際のクロールの出力ディレクトリ(http_cache.json, .http_cache/, metadata.json)からカセットを作成
+    python -m downloader.replay import downloaded_pdfs cassette
+    # ベンチマーク用の合成カセットを作成
+    python -m downloader.replay generate cassette --years 2 --pages 20 --pdfs 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import shutil
+import threading
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import unquote, urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+
+from .config import BASE_URL
+from .http_cache import HTTPValidatorCache
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    import requests
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+def cassette_path(cassette_dir: Path, url: str) -> Path:
+    """
+    URLに対応するカセット内のファイルパスを取得
+
+    Args:
+        cassette_dir: カセットディレクトリ
+        url: URL
+
+    Returns:
+        Path: ファイルパス
+
+    """
+    parts = urlsplit(url)
+    path = unquote(parts.path)
+    if path.endswith("/"):
+        path += "index.html"
+    return cassette_dir / parts.netloc / path.lstrip("/")
+
+
+class _CassetteRequestHandler(BaseHTTPRequestHandler):
+    """カセットのファイルを配信するリクエストハンドラ"""
+
+    server: CassetteServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        # パスの先頭はリクエスト先のホスト名(ReplayAdapterが付与する)
+        host, _, path = urlsplit(self.path).path.lstrip("/").partition("/")
+        file_path = cassette_path(self.server.cassette_dir, f"http://{host}/{path}")
+        resolved = file_path.resolve()
+        if not resolved.is_relative_to(self.server.cassette_dir.resolve()) or not resolved.is_file():
+            self.server.record(self.path, HTTPStatus.NOT_FOUND, 0)
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        body = resolved.read_bytes()
+        stat = resolved.stat()
+        etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+        if self.headers.get("If-None-Match") == etag:
+            self.server.record(self.path, HTTPStatus.NOT_MODIFIED, 0)
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        status = HTTPStatus.OK
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes=") and self.headers.get("If-Range", etag) == etag:
+            start = int(range_header.removeprefix("bytes=").split("-")[0])
+            if start >= len(body):
+                self.server.record(self.path, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, 0)
+                self.send_error(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                return
+            status = HTTPStatus.PARTIAL_CONTENT
+            total = len(body)
+            body = body[start:]
+
+        self.server.record(self.path, status, len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/pdf" if resolved.suffix == ".pdf" else "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{total - 1}/{total}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        logger.debug("カセットサーバー: " + format, *args)
+
+
+class CassetteServer(ThreadingHTTPServer):
+    """
+    カセットディレクトリのファイルを配信するローカルHTTPサーバー
+
+    ETag・If-None-Match(304)・Range(206)に対応し、配信したリクエスト数とバイト数を記録します。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, cassette_dir: str | Path) -> None:
+        """
+        初期化(127.0.0.1の空いているポートで待ち受け)
+
+        Args:
+            cassette_dir: カセットディレクトリ
+
+        """
+        super().__init__(("127.0.0.1", 0), _CassetteRequestHandler)
+        self.cassette_dir = Path(cassette_dir)
+        self.requests: dict[str, int] = {}
+        self.bytes_sent: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        """サーバーのURL"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path: str, status: int, size: int) -> None:
+        """
+        配信結果を記録
+
+        Args:
+            path: リクエストのパス
+            status: ステータスコード
+            size: 送信した本文のバイト数
+
+        """
+        kind = "pdf" if path.endswith(".pdf") else "html"
+        key = f"{kind}_{status}"
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_sent[kind] = self.bytes_sent.get(kind, 0) + size
+
+    def start(self) -> CassetteServer:
+        """バックグラウンドスレッドで配信を開始"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """配信を停止"""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> CassetteServer:
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """全てのリクエストをカセットサーバーに転送するトランスポートアダプタ"""
+
+    def __init__(self, server_url: str, **kwargs: object) -> None:
+        """
+        初期化
+
+        Args:
+            server_url: カセットサーバーのURL
+            **kwargs: HTTPAdapterに渡す引数
+
+        """
+        super().__init__(**kwargs)  # type: ignore[arg-type]
+        self.server_url = server_url
+
+    def send(self, request: requests.PreparedRequest, *args: object, **kwargs: object) -> requests.Response:
+        """
+        リクエスト先をカセットサーバーに書き換えて送信(レスポンスのURLは元のURLに戻す)
+
+        Args:
+            request: リクエスト
+            *args: HTTPAdapter.sendに渡す引数
+            **kwargs: HTTPAdapter.sendに渡す引数
+
+        Returns:
+            requests.Response: レスポンス
+
+        """
+        original_url = request.url or ""
+        parts = urlsplit(original_url)
+        server = urlsplit(self.server_url)
+        request.url = urlunsplit((server.scheme, server.netloc, f"/{parts.netloc}{parts.path or '/'}", parts.query, ""))
+        response = super().send(request, *args, **kwargs)  # type: ignore[arg-type]
+        request.url = original_url
+        response.url = original_url
+        return response
+
+
+def install(session: requests.Session, server: CassetteServer) -> None:
+    """
+    セッションの全てのリクエストをカセットサーバーに転送するよう設定
+
+    Args:
+        session: HTTPセッション
+        server: カセットサーバー
+
+    """
+    adapter = ReplayAdapter(server.base_url, pool_connections=16, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def import_output_dir(output_dir: str, cassette_dir: str) -> int:
+    """
+    実際のクロールの出力ディレクトリからカセットを作成
+
+    年度ページ・一覧ページはhttp_cache.jsonと.http_cache/から、PDFはmetadata.jsonから取得します。
+
+    Args:
+        output_dir: 出力ディレクトリ
+        cassette_dir: 作成するカセットディレクトリ
+
+    Returns:
+        int: カセットに追加したファイル数
+
+    """
+    cassette = Path(cassette_dir)
+    count = 0
+
+    cache = HTTPValidatorCache(output_dir)
+    for url in cache.entries:
+        body = cache.load_body(url)
+        if body is not None:
+            _write(cassette_path(cassette, url), body)
+            count += 1
+
+    metadata_path = Path(output_dir) / "metadata.json"
+    if metadata_path.exists():
+        with metadata_path.open(encoding="utf-8") as f:
+            files = json.load(f).get("files", [])
+        for file in files:
+            source = Path(output_dir) / file["filename"]
+            if source.is_file():
+                destination = cassette_path(cassette, file["original_url"])
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(source, destination)
+                count += 1
+    return count
+
+
+def generate_cassette(
+    cassette_dir: str,
+    *,
+    years: int = 2,
+    pages_per_year: int = 10,
+    pdfs_per_page: int = 20,
+    pdf_size: int = 64 * 1024,
+) -> int:
+    """
+    ベンチマーク用の合成カセットを作成(実際のサイトと同じリンク構造)
+
+    Args:
+        cassette_dir: 作成するカセットディレクトリ
+        years: 年度ページの数
+        pages_per_year: 年度ページあたりの報告書一覧ページの数
+        pdfs_per_page: 報告書一覧ページあたりのPDFの数
+        pdf_size: PDFのバイト数
+
+    Returns:
+        int: 作成したPDFの数
+
+    """
+    cassette = Path(cassette_dir)
+    base_path = urlsplit(BASE_URL).path
+    top_links: list[str] = []
+    count = 0
+
+    for year_index in range(years):
+        reiwa = 5 - year_index
+        year_path = f"{base_path}reports/SS{2019 + reiwa}1129/"
+        top_links.append(f'<li><a href="{year_path}">令和{reiwa}年分 定期公表</a></li>')
+
+        list_links: list[str] = []
+        for page_index in range(pages_per_year):
+            list_path = f"{year_path}SL/{page_index:06d}.html"
+            list_links.append(f'<li><a href="{list_path}">政党支部 {page_index}</a></li>')
+
+            rows: list[str] = []
+            for pdf_index in range(pdfs_per_page):
+                pdf_path = f"{year_path}SL/001{page_index:04d}_{pdf_index:04d}.pdf"
+                rows.append(f'<tr><td><a href="{pdf_path}">政治団体{page_index}-{pdf_index}</a></td></tr>')
+                seed = hashlib.sha256(pdf_path.encode("utf-8")).digest()
+                body = b"%PDF-1.4\n" + seed * (pdf_size // len(seed) + 1)
+                _write(cassette_path(cassette, _site_url(pdf_path)), body[:pdf_size])
+                count += 1
+
+            _write_html(cassette, list_path, "<table>" + "".join(rows) + "</table>")
+        _write_html(cassette, year_path, "<ul>" + "".join(list_links) + "</ul>")
+    _write_html(cassette, base_path, "<ul>" + "".join(top_links) + "</ul>")
+    return count
+
+
+def _write_html(cassette: Path, path: str, body: str) -> None:
+    """合成したHTMLをShift_JISでカセットに書き込む"""
+    html = f"<html><head><title>政治資金収支報告書</title></head><body>{body}</body></html>"
+    _write(cassette_path(cassette, _site_url(path)), html.encode("shift_jis"))
+
+
+def _site_url(path: str) -> str:
+    """総務省サイトのパスをURLに変換"""
+    parts = urlsplit(BASE_URL)
+    return urlunsplit((parts.scheme, parts.netloc, path, "", ""))
+
+
+def _write(path: Path, body: bytes) -> None:
+    """カセットにファイルを書き込む"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+
+
+def main() -> None:
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="オフライン再生用のカセットを作成します。")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="出力ディレクトリからカセットを作成")
+    import_parser.add_argument("output_dir", help="実際のクロールの出力ディレクトリ")
+    import_parser.add_argument("cassette_dir", help="作成するカセットディレクトリ")
+
+    generate_parser = subparsers.add_parser("generate", help="合成カセットを作成")
+    generate_parser.add_argument("cassette_dir", help="作成するカセットディレクトリ")
+    generate_parser.add_argument("--years", type=int, default=2, help="年度ページの数")
+    generate_parser.add_argument("--pages", type=int, default=10, help="年度ページあたりの報告書一覧ページの数")
+    generate_parser.add_argument("--pdfs", type=int, default=20, help="報告書一覧ページあたりのPDFの数")
+    generate_parser.add_argument("--pdf-size", type=int, default=64 * 1024, help="PDFのバイト数")
+
+    args = parser.parse_args()
+    if args.command == "import":
+        count = import_output_dir(args.output_dir, args.cassette_dir)
+    else:
+        count = generate_cassette(
+            args.cassette_dir,
+            years=args.years,
+            pages_per_year=args.pages,
+            pdfs_per_page=args.pdfs,
+            pdf_size=args.pdf_size,
+        )
+    print(f"{count} 件のファイルを {args.cassette_dir} に書き込みました")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,35 @@
 robots.txtパーサーモジュール
 
 Webサイトのrobots.txtファイルを解析し、アクセス可能かどうかを判断するクラスを提供します。
+取得したrobots.txtはディスクにキャッシュされ、同じ出力ディレクトリを使用する複数のプロセスで共有されます。
 """
 
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import json
 import logging
+import os
+import threading
 import time
 import urllib.robotparser
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 from urllib.parse import urlparse
 
+import requests
+
+from .config import ROBOTS_CACHE_DIR
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windowsではプロセス間ロックを行わない
+    fcntl = None  # type: ignore[assignment]
+
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
@@ -18,18 +38,36 @@ logger = logging.getLogger(__name__)
 class RobotsChecker:
     """robots.txtチェッカークラス"""
 
-    def __init__(self, user_agent: str) -> None:
+    def __init__(
+        self,
+        user_agent: str,
+        session: requests.Session | None = None,
+        cache_dir: str | None = None,
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
         """
         初期化
 
         Args:
             user_agent: ユーザーエージェント
+            session: robots.txtの取得に使用するHTTPセッション(省略時は新規作成)
+            cache_dir: robots.txtのキャッシュを保存するディレクトリ(省略時はメモリ上のみ)
+            clock: 現在時刻(UNIX時間)を返す関数(テスト時にモック可能)
 
         """
         self.user_agent = user_agent
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"User-Agent": user_agent})
+        self.session = session
+        self.cache_dir = Path(cache_dir) / ROBOTS_CACHE_DIR if cache_dir else None
+        self.clock = clock
         self.parsers: dict[str, urllib.robotparser.RobotFileParser] = {}
         self.last_checked: dict[str, float] = {}
         self.check_interval = 86400  # 1日(秒)
+        # 並列ダウンロードのワーカーから同時に呼ばれるためロックで保護する
+        self._lock = threading.Lock()
 
     def can_fetch(self, url: str) -> bool:
         """
@@ -42,17 +80,11 @@ class RobotsChecker:
             bool: アクセス可能な場合はTrue、そうでない場合はFalse
 
         """
-        # URLからドメイン部分を抽出
-        parsed_url = urlparse(url)
-        domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
-
-        # ドメインごとにRobotFileParserを管理
-        if domain not in self.parsers or self._should_refresh(domain):
-            self._init_parser(domain)
+        parser = self._get_parser(url)
 
         # アクセス可能かどうかを確認
         try:
-            can_fetch = self.parsers[domain].can_fetch(self.user_agent, url)
+            can_fetch = parser.can_fetch(self.user_agent, url)
             if not can_fetch:
                 logger.warning("robots.txtによりアクセスが禁止されています: %s", url)
         except OSError:
@@ -74,18 +106,12 @@ class RobotsChecker:
             float | None: クロール遅延(秒)、設定されていない場合はNone
 
         """
-        # URLからドメイン部分を抽出
-        parsed_url = urlparse(url)
-        domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
-
-        # ドメインごとにRobotFileParserを管理
-        if domain not in self.parsers or self._should_refresh(domain):
-            self._init_parser(domain)
+        parser = self._get_parser(url)
 
         # クロール遅延を取得
         delay = None
         try:
-            crawl_delay = self.parsers[domain].crawl_delay(self.user_agent)
+            crawl_delay = parser.crawl_delay(self.user_agent)
             if crawl_delay is not None:
                 # 文字列の場合はfloatに変換
                 delay = float(crawl_delay)
@@ -97,28 +123,192 @@ class RobotsChecker:
             )
         return delay
 
+    def _get_parser(self, url: str) -> urllib.robotparser.RobotFileParser:
+        """
+        URLのドメインに対応するパーサーを取得(期限切れの場合は更新)
+
+        Args:
+            url: 確認するURL
+
+        Returns:
+            urllib.robotparser.RobotFileParser: パーサー
+
+        """
+        # URLからドメイン部分を抽出
+        parsed_url = urlparse(url)
+        domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+        # ドメインごとにRobotFileParserを管理
+        with self._lock:
+            if domain not in self.parsers or self._should_refresh(domain):
+                self._init_parser(domain)
+            return self.parsers[domain]
+
     def _init_parser(self, domain: str) -> None:
         """
         パーサーを初期化
 
+        有効期限内のキャッシュがあればそれを使用し、なければHTTPセッションで取得します。
+        複数のプロセスが同時に取得しないよう、ドメインごとのロックファイルで排他制御します。
+
         Args:
             domain: ドメイン
 
         """
+        with self._cache_lock(domain):
+            # 他のプロセスが取得済みであればそのキャッシュを使用する
+            record = self._load_cache(domain)
+            if record is None:
+                record = self._fetch(domain)
+                if record is None:
+                    # エラーの場合は空のパーサーを設定(キャッシュには保存しない)
+                    self.parsers[domain] = urllib.robotparser.RobotFileParser()
+                    self.last_checked[domain] = self.clock()
+                    return
+                self._save_cache(domain, record)
+
+        self.parsers[domain] = self._build_parser(domain, record)
+        self.last_checked[domain] = record["fetched_at"]
+
+    def _fetch(self, domain: str) -> dict[str, Any] | None:
+        """
+        robots.txtを取得
+
+        Args:
+            domain: ドメイン
+
+        Returns:
+            dict[str, Any] | None: キャッシュレコード、取得に失敗した場合はNone
+
+        """
+        robots_url = f"{domain}/robots.txt"
+        logger.info("robots.txtを取得しています: %s", robots_url)
         try:
-            parser = urllib.robotparser.RobotFileParser()
-            robots_url = f"{domain}/robots.txt"
-            parser.set_url(robots_url)
-            logger.info("robots.txtを取得しています: %s", robots_url)
-            parser.read()
-            self.parsers[domain] = parser
-            self.last_checked[domain] = time.time()
-            logger.debug("robots.txtを解析しました: %s", robots_url)
-        except OSError:
+            response = self.session.get(robots_url)
+        except requests.RequestException:
             logger.exception("robots.txtの取得に失敗しました: %s", domain)
-            # エラーの場合は空のパーサーを設定
-            self.parsers[domain] = urllib.robotparser.RobotFileParser()
-            self.last_checked[domain] = time.time()
+            return None
+
+        if response.status_code >= 500:
+            logger.error("robots.txtの取得に失敗しました: %s (%s)", domain, response.status_code)
+            return None
+
+        logger.debug("robots.txtを解析しました: %s", robots_url)
+        return {
+            "domain": domain,
+            "status": response.status_code,
+            "body": response.text if response.ok else "",
+            "fetched_at": self.clock(),
+        }
+
+    @staticmethod
+    def _build_parser(domain: str, record: dict[str, Any]) -> urllib.robotparser.RobotFileParser:
+        """
+        キャッシュレコードからパーサーを生成(urllib.robotparserと同じステータスの扱い)
+
+        Args:
+            domain: ドメイン
+            record: キャッシュレコード
+
+        Returns:
+            urllib.robotparser.RobotFileParser: パーサー
+
+        """
+        parser = urllib.robotparser.RobotFileParser(f"{domain}/robots.txt")
+        status = record["status"]
+        if status in (401, 403):
+            # 全てのパスを禁止
+            parser.parse(["User-agent: *", "Disallow: /"])
+        elif status >= 400:
+            # 規則なし(全てのパスを許可)
+            parser.parse([])
+        else:
+            parser.parse(record["body"].splitlines())
+        return parser
+
+    def _cache_path(self, domain: str) -> Path | None:
+        """ドメインに対応するキャッシュファイルのパスを取得"""
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{hashlib.sha256(domain.encode('utf-8')).hexdigest()[:16]}.json"
+
+    def _load_cache(self, domain: str) -> dict[str, Any] | None:
+        """
+        有効期限内のキャッシュを読み込む
+
+        Args:
+            domain: ドメイン
+
+        Returns:
+            dict[str, Any] | None: キャッシュレコード、存在しないか期限切れの場合はNone
+
+        """
+        path = self._cache_path(domain)
+        if path is None or not path.exists():
+            return None
+
+        try:
+            with path.open(encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            logger.warning("robots.txtのキャッシュを読み込めませんでした: %s", path)
+            return None
+
+        if record.get("domain") != domain or self.clock() - record.get("fetched_at", 0) > self.check_interval:
+            return None
+
+        logger.debug("robots.txtのキャッシュを使用します: %s", domain)
+        return record
+
+    def _save_cache(self, domain: str, record: dict[str, Any]) -> None:
+        """
+        キャッシュを保存(一時ファイルに書き込んでから置き換える)
+
+        Args:
+            domain: ドメイン
+            record: キャッシュレコード
+
+        """
+        path = self._cache_path(domain)
+        if path is None:
+            return
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            tmp_path.replace(path)
+        except OSError:
+            logger.exception("robots.txtのキャッシュの保存に失敗しました: %s", domain)
+
+    @contextlib.contextmanager
+    def _cache_lock(self, domain: str) -> Iterator[None]:
+        """
+        ドメインごとのプロセス間ロックを取得
+
+        Args:
+            domain: ドメイン
+
+        """
+        path = self._cache_path(domain)
+        if path is None or fcntl is None:
+            yield
+            return
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = path.with_suffix(".lock").open("a")
+        except OSError:
+            logger.exception("robots.txtのキャッシュのロックに失敗しました: %s", domain)
+            yield
+            return
+
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
     def _should_refresh(self, domain: str) -> bool:
         """
@@ -134,5 +324,5 @@ class RobotsChecker:
         if domain not in self.last_checked:
             return True
 
-        current_time = time.time()
+        current_time = self.clock()
         return (current_time - self.last_checked[domain]) > self.check_interval
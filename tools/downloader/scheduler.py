@@ -0,0 +1,259 @@
+"""
+ダウンロードスケジューラモジュール
+
+ホストごとの待機時間を守りながら、複数のダウンロードを並行して実行するスケジューラを提供します。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlparse
+
+from .metrics import Metrics
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+def host_key(url: str) -> str:
+    """
+    URLからホスト単位のキーを取得する
+
+    Args:
+        url: URL
+
+    Returns:
+        str: スキームとホストからなるキー(例: https://www.soumu.go.jp)
+
+    """
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+@dataclass
+class _ScheduledTask:
+    """スケジュールされたタスク"""
+
+    url: str
+    func: Callable[[], Any]
+    enqueued_at: float
+    future: Future[Any] = field(default_factory=Future)
+
+
+class PoliteScheduler:
+    """
+    ホストごとの待機時間を守る並列実行スケジューラ
+
+    同一ホストに対しては同時に1件だけ実行し、前のリクエストの完了から
+    ホストごとの待機時間が経過するまで次のリクエストを開始しません。
+    待機中のホストがあっても、他のホストのタスクは空いているワーカーで実行されます。
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        interval_func: Callable[[str], float],
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: Metrics | None = None,
+    ) -> None:
+        """
+        初期化
+
+        Args:
+            max_workers: 同時に実行するワーカー数の上限
+            interval_func: ホストのURLを受け取り、リクエスト間の待機時間(秒)を返す関数
+            clock: 現在時刻を返す関数(テスト時にモック可能)
+            metrics: 待機時間・ワーカー待ち時間・待ち行列の長さを記録するメトリクス(省略時は新規作成)
+
+        """
+        if max_workers < 1:
+            msg = f"ワーカー数は1以上である必要があります: {max_workers}"
+            raise ValueError(msg)
+
+        self.max_workers = max_workers
+        self.interval_func = interval_func
+        self.clock = clock
+        self.metrics = metrics or Metrics()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._condition = threading.Condition()
+        self._queues: dict[str, deque[_ScheduledTask]] = {}
+        self._intervals: dict[str, float] = {}
+        self._next_ready: dict[str, float] = {}
+        self._finished_at: dict[str, float] = {}
+        self._busy_hosts: set[str] = set()
+        self._in_flight = 0
+        self._closed = False
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop,
+            name="PoliteSchedulerDispatcher",
+            daemon=True,
+        )
+        self._dispatcher.start()
+
+    def __enter__(self) -> PoliteScheduler:
+        """コンテキストマネージャの開始"""
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """コンテキストマネージャの終了"""
+        self.close()
+
+    def get_interval(self, url: str) -> float:
+        """
+        ホストのリクエスト間隔を取得する(ホストごとに1回だけ計算)
+
+        Args:
+            url: URL
+
+        Returns:
+            float: リクエスト間の待機時間(秒)
+
+        """
+        host = host_key(url)
+        if host not in self._intervals:
+            # robots.txtの取得を伴う場合があるため、ロックの外で計算する
+            interval = max(float(self.interval_func(url)), 0.0)
+            with self._condition:
+                self._intervals.setdefault(host, interval)
+            logger.debug("ホストのリクエスト間隔: %s (%s秒)", host, interval)
+        return self._intervals[host]
+
+    def submit(self, url: str, func: Callable[[], Any]) -> Future[Any]:
+        """
+        タスクを登録する
+
+        Args:
+            url: リクエスト先のURL(ホストの判定に使用)
+            func: 実行する関数
+
+        Returns:
+            Future: タスクの実行結果
+
+        """
+        self.get_interval(url)
+        task = _ScheduledTask(url=url, func=func, enqueued_at=self.clock())
+        with self._condition:
+            if self._closed:
+                msg = "スケジューラは既に終了しています"
+                raise RuntimeError(msg)
+            queue = self._queues.setdefault(host_key(url), deque())
+            queue.append(task)
+            self.metrics.set_queue_depth(url, len(queue))
+            self._condition.notify_all()
+        return task.future
+
+    def pending_count(self) -> int:
+        """
+        未完了のタスク数を取得する
+
+        Returns:
+            int: 待機中と実行中のタスク数の合計
+
+        """
+        with self._condition:
+            return self._in_flight + sum(len(queue) for queue in self._queues.values())
+
+    def close(self) -> None:
+        """登録済みのタスクが全て完了するまで待機し、スケジューラを終了する"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _dispatch_loop(self) -> None:
+        """実行可能になったホストのタスクをワーカーに割り当てる"""
+        with self._condition:
+            while True:
+                wait_time = self._dispatch_ready_tasks()
+
+                has_queued = any(self._queues.values())
+                if self._closed and not has_queued and self._in_flight == 0:
+                    return
+
+                self._condition.wait(timeout=wait_time)
+
+    def _dispatch_ready_tasks(self) -> float | None:
+        """
+        実行可能なタスクを割り当てる(ロック取得済みで呼び出すこと)
+
+        Returns:
+            float | None: 次にタスクが実行可能になるまでの秒数、不明な場合はNone
+
+        """
+        now = self.clock()
+        wait_time: float | None = None
+
+        for host, queue in self._queues.items():
+            if self._in_flight >= self.max_workers:
+                break
+            # キャンセル済みのタスクは待機せずに破棄する
+            while queue and queue[0].future.cancelled():
+                queue.popleft()
+            if not queue or host in self._busy_hosts:
+                continue
+
+            ready_at = self._next_ready.get(host, 0.0)
+            if ready_at > now:
+                remaining = ready_at - now
+                wait_time = remaining if wait_time is None else min(wait_time, remaining)
+                continue
+
+            task = queue.popleft()
+            self._record_wait(host, task, now, ready_at)
+            self.metrics.set_queue_depth(host, len(queue))
+            self._busy_hosts.add(host)
+            self._in_flight += 1
+            self._executor.submit(self._run_task, host, task)
+
+        return wait_time
+
+    def _record_wait(self, host: str, task: _ScheduledTask, now: float, ready_at: float) -> None:
+        """
+        タスクが実行されるまでの待ち時間を、ホストの待機時間とワーカー待ちに分けて記録
+
+        Args:
+            host: ホストのキー
+            task: 実行するタスク
+            now: 現在時刻
+            ready_at: ホストが実行可能になった時刻
+
+        """
+        # 登録時または同じホストの前のタスクの完了時から待ち始める
+        waiting_since = max(task.enqueued_at, self._finished_at.get(host, task.enqueued_at))
+        self.metrics.add_sleep(host, min(now, ready_at) - waiting_since)
+        self.metrics.add_queue_wait(host, now - max(waiting_since, ready_at))
+
+    def _run_task(self, host: str, task: _ScheduledTask) -> None:
+        """
+        タスクを実行し、完了後にホストの次回実行可能時刻を設定する
+
+        Args:
+            host: ホストのキー
+            task: 実行するタスク
+
+        """
+        try:
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    task.future.set_result(task.func())
+                except Exception as e:  # noqa: BLE001
+                    task.future.set_exception(e)
+        finally:
+            with self._condition:
+                self._busy_hosts.discard(host)
+                self._in_flight -= 1
+                self._finished_at[host] = self.clock()
+                self._next_ready[host] = self._finished_at[host] + self._intervals[host]
+                self._condition.notify_all()
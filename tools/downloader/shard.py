@@ -0,0 +1,150 @@
+"""
+シャード分割モジュール
+
+クロール対象を複数のプロセス(マシン)に決定的に分割するためのクラスと、
+各シャードが出力したメタデータのセグメントを統合する関数を提供します。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .acquired_index import AcquiredIndex
+from .http_cache import HTTPValidatorCache
+from .metadata import FileMetadata, MetadataManager
+
+if TYPE_CHECKING:
+    from .metadata import Statistics
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 分割の単位(報告書一覧ページのURL、またはPDFのURL)
+SHARD_KEYS = ("page", "pdf")
+
+# シャードのメタデータセグメントのファイル名(例: metadata.shard-0-of-4.json)
+SEGMENT_PATTERN = re.compile(r"^metadata\.shard-(\d+)-of-(\d+)\.json$")
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """シャードの指定"""
+
+    count: int
+    index: int
+    key: str = "page"
+
+    def __post_init__(self) -> None:
+        """値の検証"""
+        if self.count < 1:
+            msg = f"シャード数は1以上である必要があります: {self.count}"
+            raise ValueError(msg)
+        if not 0 <= self.index < self.count:
+            msg = f"シャード番号は0以上{self.count}未満である必要があります: {self.index}"
+            raise ValueError(msg)
+        if self.key not in SHARD_KEYS:
+            msg = f"想定外の分割単位: {self.key}"
+            raise ValueError(msg)
+
+    @property
+    def name(self) -> str:
+        """ファイル名に使用するシャード名(例: shard-0-of-4)"""
+        return f"shard-{self.index}-of-{self.count}"
+
+    def owns(self, key: str) -> bool:
+        """
+        キー(URL)がこのシャードの担当かどうかを判定
+
+        プロセスやマシンによらず同じ結果になるよう、組み込みのhash()ではなくSHA-1を使用します。
+
+        Args:
+            key: 分割に使用するキー
+
+        Returns:
+            bool: このシャードの担当の場合はTrue
+
+        """
+        digest = hashlib.sha1(key.encode("utf-8"), usedforsecurity=False).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index
+
+    def to_dict(self) -> dict[str, int | str]:
+        """辞書に変換"""
+        return {"count": self.count, "index": self.index, "key": self.key}
+
+
+def merge_shards(output_dir: str) -> Statistics | None:
+    """
+    各シャードのメタデータセグメントを統合してmetadata.jsonを作成
+
+    HTTPキャッシュのセグメントもhttp_cache.jsonに統合します。
+
+    Args:
+        output_dir: 出力ディレクトリ
+
+    Returns:
+        Statistics | None: 統合後の統計情報、セグメントが見つからない場合はNone
+
+    """
+    segments: dict[int, dict] = {}
+    counts: set[int] = set()
+    for path in sorted(Path(output_dir).glob("metadata.shard-*-of-*.json")):
+        match = SEGMENT_PATTERN.match(path.name)
+        if not match:
+            continue
+        try:
+            with path.open(encoding="utf-8") as f:
+                segments[int(match.group(1))] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            logger.exception("メタデータセグメントの読み込みに失敗しました: %s", path)
+            return None
+        counts.add(int(match.group(2)))
+
+    if not segments:
+        logger.error("メタデータセグメントが見つかりませんでした: %s", output_dir)
+        return None
+
+    if len(counts) > 1:
+        logger.error("シャード数の異なるセグメントが混在しています: %s", sorted(counts))
+        return None
+
+    count = counts.pop()
+    missing = sorted(set(range(count)) - set(segments))
+    if missing:
+        logger.warning("未完了のシャードがあります: %s", missing)
+
+    first = segments[min(segments)]
+    parameters = first["parameters"]
+    if any(segment["parameters"] != parameters for segment in segments.values()):
+        logger.error("パラメータの異なるセグメントが混在しています")
+        return None
+
+    manager = MetadataManager(
+        output_dir=output_dir,
+        years=parameters["years"],
+        categories=parameters["categories"],
+        name_filter=parameters["name_filter"],
+        exact_match=parameters["exact_match"],
+    )
+    manager.download_date = min(segment["download_date"] for segment in segments.values())
+
+    # 分割単位がページの場合でも、同じPDFが複数の一覧ページに掲載されていれば重複しうる
+    files: dict[str, FileMetadata] = {}
+    for index in sorted(segments):
+        for file in segments[index]["files"]:
+            files[file["original_url"]] = FileMetadata(**file)
+    for file in files.values():
+        manager.add_file(file)
+
+    if not manager.save():
+        return None
+
+    merged = HTTPValidatorCache(output_dir).merge_segments()
+    AcquiredIndex(output_dir).compact()
+    logger.info("%d 件のセグメントを統合しました(HTTPキャッシュ: %d 件)", len(segments), merged)
+    return manager.get_statistics()
@@ -2,14 +2,183 @@
 """PDFを画像に変換するスクリプト"""
 
 import argparse
+import json
 import os
 import math  # 桁数計算のため
+import tempfile
+import time
+from collections.abc import Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
 
 from preprocess import ImagePreprocessor, save_log
 
+# バッチモードで1タスクに割り当てる最大ページ数(大きなPDFはページ範囲に分割して並列に変換する)
+DEFAULT_PAGES_PER_TASK = 8
+
+# ダウンローダーのmetadata.jsonのうち、PDFが手元にあるダウンロード状態
+DOWNLOADED_STATUSES = {"success", "skipped"}
+
+# ダウンローダーの--content-addressedで作成されるオブジェクトストアのディレクトリ(downloader.config.OBJECT_STORE_DIR)
+# 中のPDFは出力ディレクトリ直下のPDFの実体のため、ディレクトリから探す場合は対象外にする
+OBJECT_STORE_DIR = "objects"
+
+# 出力画像の色形式(rgb: フルカラー、gray: 8bitグレースケール、palette: 8bitパレット、1bit: 白黒2値)
+COLOR_MODES = ("rgb", "gray", "palette", "1bit")
+
+# pdftoppmの段階でグレースケールで描画する色形式
+GRAYSCALE_RENDER_MODES = {"gray", "1bit"}
+
+# 出力オプションの比較(--compare-options)で1つのPDFから変換する最大ページ数
+DEFAULT_SAMPLE_PAGES = 3
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """Resolution, color mode and PNG compression of the rendered pages."""
+
+    dpi: int = 200
+    color_mode: str = "rgb"
+    compress_level: int = 6
+
+    def __post_init__(self) -> None:
+        if self.color_mode not in COLOR_MODES:
+            raise ValueError(f"Unknown color mode: {self.color_mode} (choose from {', '.join(COLOR_MODES)})")
+        if not 0 <= self.compress_level <= 9:
+            raise ValueError(f"PNG compression level must be between 0 and 9: {self.compress_level}")
+        if self.dpi <= 0:
+            raise ValueError(f"DPI must be positive: {self.dpi}")
+
+    @property
+    def label(self) -> str:
+        return f"{self.dpi}dpi {self.color_mode} level={self.compress_level}"
+
+    def convert_kwargs(self) -> dict:
+        """Returns the rendering arguments for convert_from_path (grayscale is rendered by pdftoppm itself)."""
+        return {"dpi": self.dpi, "grayscale": self.color_mode in GRAYSCALE_RENDER_MODES}
+
+    def encode(self, image: Image.Image) -> Image.Image:
+        """Converts a rendered page to the output color mode."""
+        if self.color_mode == "palette":
+            return image.convert("RGB").quantize(colors=256)
+        if self.color_mode == "1bit":
+            # 文字の輪郭を保つため、ディザリングせずに閾値で2値化する
+            return image.convert("L").convert("1", dither=Image.Dither.NONE)
+        if self.color_mode == "gray":
+            return image.convert("L")
+        return image
+
+    def save(self, image: Image.Image, output_filename: str) -> None:
+        """Saves a rendered page as PNG with the configured color mode and compression level."""
+        encoded = self.encode(image)
+        try:
+            encoded.save(output_filename, "PNG", compress_level=self.compress_level)
+        finally:
+            if encoded is not image:
+                encoded.close()
+
+
+# 出力オプションの比較(--compare-options)で試す組み合わせ(先頭が既定値)
+COMPARISON_OPTIONS = (
+    RenderOptions(),
+    RenderOptions(compress_level=1),
+    RenderOptions(compress_level=9),
+    RenderOptions(dpi=150),
+    RenderOptions(color_mode="gray"),
+    RenderOptions(dpi=150, color_mode="gray"),
+    RenderOptions(color_mode="palette"),
+    RenderOptions(color_mode="1bit"),
+    RenderOptions(dpi=300, color_mode="1bit"),
+)
+
+
+def page_output_path(output_dir: str, pdf_path: str, page_num: int, total_pages: int) -> str:
+    """
+    Returns the PNG path for a page, using the same zero-padded naming as pdf_to_png.
+
+    Args:
+        output_dir (str): Directory for the output PNG images.
+        pdf_path (str): Path to the source PDF file.
+        page_num (int): 1-based page number.
+        total_pages (int): Number of pages in the PDF (decides the padding width).
+    """
+    base_filename = os.path.splitext(os.path.basename(pdf_path))[0]
+    num_digits = math.ceil(math.log10(total_pages + 1)) if total_pages > 0 else 1
+    return os.path.join(output_dir, f"{base_filename}_page_{page_num:0{num_digits}d}.png")
+
+
+def iter_pages(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    options: RenderOptions | None = None,
+) -> Iterator[tuple[int, Image.Image]]:
+    """
+    Renders a page range one page at a time.
+
+    Each page is rendered by its own pdftoppm call and closed once the caller moves on,
+    so only a single page image is held in memory regardless of the page count.
+
+    Args:
+        pdf_path (str): Path to the input PDF file.
+        first_page (int): First page to render (1-based).
+        last_page (int): Last page to render (inclusive).
+        options (RenderOptions | None): DPI and color mode (default: 200 DPI RGB).
+
+    Yields:
+        tuple[int, Image.Image]: The page number and its rendered image.
+    """
+    for page_num in range(first_page, last_page + 1):
+        images = convert_from_path(
+            pdf_path, first_page=page_num, last_page=page_num, **(options or RenderOptions()).convert_kwargs()
+        )
+        for image in images:
+            try:
+                yield page_num, image
+            finally:
+                image.close()
+
+
+def save_page(
+    image: Image.Image,
+    output_filename: str,
+    processor: ImagePreprocessor | None,
+    processed_dir: Path,
+    options: RenderOptions | None = None,
+    save_raw: bool = True,
+) -> dict | None:
+    """
+    Saves a rendered page as PNG and applies the preprocessing steps if requested.
+
+    The preprocessing runs on the rendered image in memory, so the page is encoded once per requested
+    output and never decoded again from disk.
+
+    Args:
+        save_raw (bool): Whether to save the unprocessed page (only the processed page is saved if False).
+
+    Returns:
+        dict | None: The preprocessing log entry, or None without preprocessing.
+    """
+    options = options or RenderOptions()
+    encoded = options.encode(image)
+    try:
+        if save_raw or not processor:
+            encoded.save(output_filename, "PNG", compress_level=options.compress_level)
+        if not processor:
+            return None
+        processed_path = processor.process_image(
+            encoded, processed_dir / os.path.basename(output_filename), compress_level=options.compress_level
+        )
+    finally:
+        if encoded is not image:
+            encoded.close()
+    return {"source": output_filename, "processed": str(processed_path), "steps": processor.steps}
+
 
 def pdf_to_png(
     pdf_path: str,
@@ -17,16 +186,22 @@ def pdf_to_png(
     preprocess: list[str] | None = None,
     binarize_threshold: int = 128,
     denoise_filter_size: int = 3,
+    options: RenderOptions | None = None,
+    save_raw: bool = True,
 ) -> None:
     """
     Converts each page of a PDF file to a PNG image with zero-padded page numbers.
 
+    Pages are rendered and saved one at a time, so peak memory does not grow with the page count.
+
     Args:
         pdf_path (str): Path to the input PDF file.
         output_dir (str): Directory to save the output PNG images. Defaults to the current directory.
-        preprocess (list[str] | None): List of preprocessing steps to apply (grayscale, binarize, denoise).
+        preprocess (list[str] | None): List of preprocessing steps to apply (grayscale, binarize, otsu, sauvola, denoise).
         binarize_threshold (int): Threshold for binarization (0-255, default: 128).
         denoise_filter_size (int): Filter size for denoising (odd integer, default: 3).
+        options (RenderOptions | None): DPI, color mode and PNG compression (default: 200 DPI RGB, level 6).
+        save_raw (bool): Whether to save the unprocessed pages when preprocessing (default: True).
     """
     if not os.path.exists(pdf_path):
         print(f"Error: PDF file not found at {pdf_path}")
@@ -37,21 +212,18 @@ def pdf_to_png(
         print(f"Created output directory: {output_dir}")
 
     try:
-        # PDFを画像オブジェクトのリストに変換
+        # ページ数だけを先に取得し、1ページずつ変換・保存する
         # poppler_path は環境に合わせて設定が必要な場合があります
         print(f"Converting PDF: {pdf_path} ...")
-        images = convert_from_path(pdf_path)  # poppler_path=poppler_path
-        print(f"Found {len(images)} pages.")
+        total_pages = int(pdfinfo_from_path(pdf_path)["Pages"])  # poppler_path=poppler_path
+        print(f"Found {total_pages} pages.")
 
-        if not images:
+        if total_pages == 0:
             print("No pages found in the PDF.")
             return
 
-        base_filename = os.path.splitext(os.path.basename(pdf_path))[0]
-
         # ページ番号の桁数を計算 (例: 100ページなら3桁)
-        total_pages = len(images)
-        num_digits = math.ceil(math.log10(total_pages + 1)) if total_pages > 0 else 1  # 0ページや1ページの場合も考慮
+        num_digits = math.ceil(math.log10(total_pages + 1))
 
         print(f"Saving images with {num_digits}-digit zero-padded page numbers...")
         processor = (
@@ -64,36 +236,335 @@ def pdf_to_png(
         processed_dir = Path(output_dir) / "processed"
         log_entries: list[dict] = []
 
-        for i, image in enumerate(images):
-            page_num = i + 1
+        for page_num, image in iter_pages(pdf_path, 1, total_pages, options):
             # ページ番号をゼロ埋めしてファイル名を生成
-            output_filename = os.path.join(output_dir, f"{base_filename}_page_{page_num:0{num_digits}d}.png")
-            image.save(output_filename, "PNG")
-            # print(f"Saved: {output_filename}") # 毎回表示すると冗長なのでコメントアウト
-
-            if processor:
-                processed_path = processor.process_file(Path(output_filename), processed_dir)
-                log_entries.append(
-                    {
-                        "source": output_filename,
-                        "processed": str(processed_path),
-                        "steps": processor.steps,
-                    }
-                )
+            output_filename = page_output_path(output_dir, pdf_path, page_num, total_pages)
+            entry = save_page(image, output_filename, processor, processed_dir, options, save_raw)
+            if entry:
+                log_entries.append(entry)
 
         if processor:
             save_log(processed_dir / "preprocess_log.json", log_entries)
 
-        print(f"Conversion complete. {total_pages} images saved in {output_dir}")
+        saved_dir = output_dir if save_raw or not processor else processed_dir
+        print(f"Conversion complete. {total_pages} images saved in {saved_dir}")
 
     except Exception as e:
         print(f"An error occurred during conversion: {e}")
         print("Please ensure poppler is installed and in your PATH, or specify poppler_path if needed.")
 
 
+@dataclass(frozen=True)
+class RenderTask:
+    """A contiguous page range of one PDF, rendered by a single worker."""
+
+    pdf_path: str
+    first_page: int
+    last_page: int
+    total_pages: int
+
+    @property
+    def page_count(self) -> int:
+        return self.last_page - self.first_page + 1
+
+
+def find_pdfs(source: str) -> list[str]:
+    """
+    Collects the PDFs to convert from a PDF file, a directory, or the downloader's metadata.json.
+
+    Args:
+        source (str): A PDF file, a directory searched recursively for *.pdf (except the downloader's
+            object store), or a metadata.json written by the downloader (only successfully downloaded
+            or skipped files are used).
+
+    Returns:
+        list[str]: Sorted paths of existing PDF files.
+    """
+    path = Path(source)
+    if path.is_dir():
+        return sorted(str(p) for p in path.rglob("*.pdf") if p.relative_to(path).parts[0] != OBJECT_STORE_DIR)
+    if path.suffix.lower() == ".json":
+        with path.open(encoding="utf-8") as f:
+            metadata = json.load(f)
+        # metadata.jsonのファイル名は出力ディレクトリからの相対パス
+        pdfs = [
+            path.parent / entry["filename"]
+            for entry in metadata.get("files", [])
+            if entry.get("download_status") in DOWNLOADED_STATUSES
+        ]
+        return sorted(str(p) for p in pdfs if p.exists())
+    return [str(path)] if path.exists() else []
+
+
+def find_duplicate_names(pdf_paths: list[str]) -> dict[str, list[str]]:
+    """
+    Finds PDFs whose page images would overwrite each other.
+
+    Page images are named after the PDF file name only (see page_output_path), so PDFs with the same
+    name in different subdirectories cannot be rendered into one output directory.
+
+    Args:
+        pdf_paths (list[str]): Paths of the PDFs to convert.
+
+    Returns:
+        dict[str, list[str]]: The PDF paths for each file name used more than once.
+    """
+    paths_by_name: dict[str, list[str]] = {}
+    for pdf_path in pdf_paths:
+        paths_by_name.setdefault(os.path.splitext(os.path.basename(pdf_path))[0], []).append(pdf_path)
+    return {name: paths for name, paths in paths_by_name.items() if len(paths) > 1}
+
+
+def count_pages(pdf_path: str) -> int:
+    """Returns the number of pages in a PDF (0 if pdfinfo fails)."""
+    try:
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+    except Exception as e:
+        print(f"Error: failed to read page count of {pdf_path}: {e}")
+        return 0
+
+
+def plan_tasks(page_counts: dict[str, int], output_dir: str, pages_per_task: int) -> list[RenderTask]:
+    """
+    Splits the pages that have not been rendered yet into page-range tasks.
+
+    Already rendered pages are skipped, so an interrupted batch resumes where it stopped.
+    Tasks are ordered largest first so that long ranges do not end up last on a single worker.
+
+    Args:
+        page_counts (dict[str, int]): Number of pages per PDF path.
+        output_dir (str): Directory for the output PNG images.
+        pages_per_task (int): Maximum number of pages in one task.
+
+    Returns:
+        list[RenderTask]: Tasks covering every missing page.
+    """
+    tasks: list[RenderTask] = []
+    for pdf_path, total_pages in page_counts.items():
+        missing = [
+            page_num
+            for page_num in range(1, total_pages + 1)
+            if not os.path.exists(page_output_path(output_dir, pdf_path, page_num, total_pages))
+        ]
+        # 連続した未変換ページをpages_per_task以下の範囲にまとめる
+        start = 0
+        while start < len(missing):
+            end = start
+            while end + 1 < len(missing) and missing[end + 1] == missing[end] + 1 and end + 1 - start < pages_per_task:
+                end += 1
+            tasks.append(RenderTask(pdf_path, missing[start], missing[end], total_pages))
+            start = end + 1
+    return sorted(tasks, key=lambda task: task.page_count, reverse=True)
+
+
+def render_task(
+    task: RenderTask,
+    output_dir: str,
+    preprocess: list[str] | None = None,
+    binarize_threshold: int = 128,
+    denoise_filter_size: int = 3,
+    options: RenderOptions | None = None,
+    save_raw: bool = True,
+) -> list[dict] | None:
+    """
+    Renders one page range and saves each page as PNG (runs in a worker process).
+
+    Pages are rendered one at a time, so a worker holds at most one page image in memory.
+
+    Returns:
+        list[dict] | None: Preprocessing log entries for the rendered pages (empty without preprocessing),
+            or None if the conversion failed.
+    """
+    processor = (
+        ImagePreprocessor(preprocess, binarize_threshold=binarize_threshold, denoise_filter_size=denoise_filter_size)
+        if preprocess
+        else None
+    )
+    processed_dir = Path(output_dir) / "processed"
+    log_entries: list[dict] = []
+
+    try:
+        for page_num, image in iter_pages(task.pdf_path, task.first_page, task.last_page, options):
+            output_filename = page_output_path(output_dir, task.pdf_path, page_num, task.total_pages)
+            entry = save_page(image, output_filename, processor, processed_dir, options, save_raw)
+            if entry:
+                log_entries.append(entry)
+    except Exception as e:
+        print(f"An error occurred while converting {task.pdf_path} pages {task.first_page}-{task.last_page}: {e}")
+        return None
+    return log_entries
+
+
+class _InlineExecutor(Executor):
+    """Runs tasks in the current process (used when workers is 1)."""
+
+    def map(self, fn, *iterables, timeout=None, chunksize=1):  # type: ignore[override]
+        return map(fn, *iterables)
+
+
+def _create_executor(workers: int) -> Executor:
+    """Returns a process pool, or an in-process executor when workers is 1."""
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else _InlineExecutor()
+
+
+def pdf_to_png_batch(
+    source: str,
+    output_dir: str = "output_images",
+    workers: int | None = None,
+    pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+    preprocess: list[str] | None = None,
+    binarize_threshold: int = 128,
+    denoise_filter_size: int = 3,
+    options: RenderOptions | None = None,
+    save_raw: bool = True,
+) -> None:
+    """
+    Converts many PDFs to PNG images across a process pool.
+
+    Every page is saved directly in output_dir with the same names as pdf_to_png,
+    so the result can be passed to ``analyze_image.py -i output_dir``.
+
+    Args:
+        source (str): A directory of PDFs, the downloader's metadata.json, or a single PDF.
+        output_dir (str): Directory to save the output PNG images.
+        workers (int | None): Number of worker processes (default: number of CPUs).
+        pages_per_task (int): Maximum number of pages rendered by one task.
+        preprocess (list[str] | None): List of preprocessing steps to apply (grayscale, binarize, otsu, sauvola, denoise).
+        binarize_threshold (int): Threshold for binarization (0-255, default: 128).
+        denoise_filter_size (int): Filter size for denoising (odd integer, default: 3).
+        options (RenderOptions | None): DPI, color mode and PNG compression (default: 200 DPI RGB, level 6).
+        save_raw (bool): Whether to save the unprocessed pages when preprocessing (default: True).
+    """
+    pdf_paths = find_pdfs(source)
+    if not pdf_paths:
+        print(f"Error: no PDF files found in {source}")
+        return
+
+    # 同じ名前のPDFは画像のファイル名が重複し、後のPDFが変換済みとして扱われてしまうため変換しない
+    duplicates = find_duplicate_names(pdf_paths)
+    if duplicates:
+        print("Error: PDFs with the same file name would overwrite each other's images:")
+        for paths in duplicates.values():
+            print("  " + ", ".join(paths))
+        print("Rename them or convert the directories separately.")
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    print(f"Found {len(pdf_paths)} PDF files. Using {workers} worker processes.")
+
+    with _create_executor(workers) as executor:
+        # ページ数の取得(pdfinfo)もワーカーで並列に行う
+        page_counts = dict(zip(pdf_paths, executor.map(count_pages, pdf_paths, chunksize=16)))
+        # 前処理後の画像のみを保存する場合は、processed内の画像の有無で変換済みかを判定する
+        rendered_dir = output_dir if save_raw or not preprocess else os.path.join(output_dir, "processed")
+        tasks = plan_tasks(page_counts, rendered_dir, max(pages_per_task, 1))
+        total_pages = sum(page_counts.values())
+        pending_pages = sum(task.page_count for task in tasks)
+        print(f"{total_pages - pending_pages}/{total_pages} pages already rendered. Rendering {pending_pages} pages.")
+
+        render = partial(
+            render_task,
+            output_dir=output_dir,
+            preprocess=preprocess,
+            binarize_threshold=binarize_threshold,
+            denoise_filter_size=denoise_filter_size,
+            options=options,
+            save_raw=save_raw,
+        )
+        log_entries: list[dict] = []
+        done_pages = 0
+        failed_tasks = 0
+        for task, entries in zip(tasks, executor.map(render, tasks)):
+            done_pages += task.page_count
+            if entries is None:
+                failed_tasks += 1
+                continue
+            log_entries.extend(entries)
+            print(f"[{done_pages}/{pending_pages}] {task.pdf_path} pages {task.first_page}-{task.last_page}")
+
+    if log_entries:
+        # 中断後に再実行した場合も、前回までのログを引き継ぐ
+        log_path = Path(output_dir) / "processed" / "preprocess_log.json"
+        previous = json.loads(log_path.read_text(encoding="utf-8")) if log_path.exists() else []
+        save_log(log_path, previous + log_entries)
+
+    if failed_tasks:
+        print(f"{failed_tasks} tasks failed. Run the same command again to retry the missing pages.")
+    print(f"Batch conversion complete. Images saved in {rendered_dir}")
+
+
+def compare_render_options(
+    source: str,
+    option_sets: tuple[RenderOptions, ...] = COMPARISON_OPTIONS,
+    sample_pages: int = DEFAULT_SAMPLE_PAGES,
+) -> list[dict]:
+    """
+    Renders sample pages with each set of options and reports the output size and time.
+
+    The first pages of every PDF in the source are rendered into a temporary directory,
+    so the tradeoff can be checked on a sample corpus before converting everything.
+
+    Args:
+        source (str): A PDF file, a directory of PDFs, or the downloader's metadata.json.
+        option_sets (tuple[RenderOptions, ...]): Options to compare (the first one is the baseline).
+        sample_pages (int): Maximum number of pages rendered from each PDF.
+
+    Returns:
+        list[dict]: One row per option with the page count, total bytes, and render/encode seconds.
+    """
+    pdf_paths = find_pdfs(source)
+    page_counts = {pdf_path: min(count_pages(pdf_path), sample_pages) for pdf_path in pdf_paths}
+    results: list[dict] = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for options in option_sets:
+            row = {"options": options.label, "pages": 0, "bytes": 0, "render_seconds": 0.0, "encode_seconds": 0.0}
+            for pdf_path, pages in page_counts.items():
+                if pages == 0:
+                    continue
+                # 描画(pdftoppm)と色変換・PNGエンコードの時間を分けて計測する
+                page_start = time.perf_counter()
+                for page_num, image in iter_pages(pdf_path, 1, pages, options):
+                    rendered = time.perf_counter()
+                    output_filename = page_output_path(tmp_dir, pdf_path, page_num, pages)
+                    options.save(image, output_filename)
+                    row["render_seconds"] += rendered - page_start
+                    row["encode_seconds"] += time.perf_counter() - rendered
+                    row["pages"] += 1
+                    row["bytes"] += os.path.getsize(output_filename)
+                    os.remove(output_filename)
+                    page_start = time.perf_counter()
+            results.append(row)
+    return results
+
+
+def print_comparison(results: list[dict]) -> None:
+    """Prints the results of compare_render_options as a table relative to the first (baseline) row."""
+    if not results or not results[0]["pages"]:
+        print("No pages were rendered.")
+        return
+
+    baseline = results[0]
+    print(f"Compared {baseline['pages']} sample pages (size and time per page).")
+    print(f"{'options':<28} {'KB/page':>9} {'size':>7} {'render s':>9} {'encode s':>9} {'total s':>8}")
+    for row in results:
+        pages = row["pages"] or 1
+        kb_per_page = row["bytes"] / pages / 1024
+        size_ratio = row["bytes"] / baseline["bytes"] if baseline["bytes"] else 0.0
+        render = row["render_seconds"] / pages
+        encode = row["encode_seconds"] / pages
+        print(
+            f"{row['options']:<28} {kb_per_page:>9.1f} {size_ratio:>6.0%} {render:>9.3f} {encode:>9.3f} {render + encode:>8.3f}"
+        )
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Convert PDF pages to PNG images with zero-padded filenames.")
-    parser.add_argument("pdf_file", help="Path to the input PDF file.")
+    parser.add_argument(
+        "pdf_file",
+        help="Path to the input PDF file, a directory of PDFs, or the downloader's metadata.json (batch mode).",
+    )
     parser.add_argument(
         "-o",
         "--output",
@@ -103,7 +574,12 @@ if __name__ == "__main__":
     parser.add_argument(
         "--preprocess",
         nargs="*",
-        help="Apply preprocessing steps (grayscale, binarize, denoise) after conversion",
+        help="Apply preprocessing steps (grayscale, binarize, otsu, sauvola, denoise) after conversion",
+    )
+    parser.add_argument(
+        "--processed-only",
+        action="store_true",
+        help="With --preprocess, save only the preprocessed images (in <output>/processed), not the unprocessed pages.",
     )
     parser.add_argument(
         "--binarize-threshold",
@@ -118,18 +594,85 @@ if __name__ == "__main__":
         help="Filter size for denoising (odd integer, default: 3)",
     )
 
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        help="Number of worker processes for batch mode (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--pages-per-task",
+        type=int,
+        default=DEFAULT_PAGES_PER_TASK,
+        help=f"Maximum pages rendered by one batch task (default: {DEFAULT_PAGES_PER_TASK}).",
+    )
+
+    parser.add_argument(
+        "--dpi",
+        type=int,
+        default=200,
+        help="Rendering resolution in DPI (default: 200).",
+    )
+    parser.add_argument(
+        "--color-mode",
+        choices=COLOR_MODES,
+        default="rgb",
+        help="Output color mode: rgb, gray (rendered in grayscale by pdftoppm), palette (8-bit), or 1bit (default: rgb).",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(10),
+        default=6,
+        metavar="{0-9}",
+        help="PNG compression level (0: fastest, 9: smallest, default: 6).",
+    )
+    parser.add_argument(
+        "--compare-options",
+        action="store_true",
+        help="Render sample pages with several DPI/color/compression options and report size and time instead of converting.",
+    )
+    parser.add_argument(
+        "--sample-pages",
+        type=int,
+        default=DEFAULT_SAMPLE_PAGES,
+        help=f"Pages per PDF rendered by --compare-options (default: {DEFAULT_SAMPLE_PAGES}).",
+    )
+
     # parser.add_argument("--poppler_path", help="Path to the poppler installation directory (bin).")
 
     args = parser.parse_args()
+    if args.processed_only and not args.preprocess:
+        parser.error("--processed-only requires --preprocess")
 
     # 出力ディレクトリのデフォルトを 'output_images' に変更
     output_directory = args.output if args.output != "." else "output_images"
+    render_options = RenderOptions(dpi=args.dpi, color_mode=args.color_mode, compress_level=args.compress_level)
 
-    # poppler_path_arg = args.poppler_path if hasattr(args, 'poppler_path') else None
-    pdf_to_png(
-        args.pdf_file,
-        output_directory,
-        preprocess=args.preprocess,
-        binarize_threshold=args.binarize_threshold,
-        denoise_filter_size=args.denoise_filter_size,
-    )
+    # 出力オプションの比較では画像を保存せず、サイズと時間の一覧のみを表示する
+    if args.compare_options:
+        print_comparison(compare_render_options(args.pdf_file, sample_pages=args.sample_pages))
+    # ディレクトリまたはmetadata.jsonを指定した場合は、複数のPDFをプロセスプールで変換する
+    elif os.path.isdir(args.pdf_file) or args.pdf_file.lower().endswith(".json"):
+        pdf_to_png_batch(
+            args.pdf_file,
+            output_directory,
+            workers=args.workers,
+            pages_per_task=args.pages_per_task,
+            preprocess=args.preprocess,
+            binarize_threshold=args.binarize_threshold,
+            denoise_filter_size=args.denoise_filter_size,
+            options=render_options,
+            save_raw=not args.processed_only,
+        )
+    else:
+        # poppler_path_arg = args.poppler_path if hasattr(args, 'poppler_path') else None
+        pdf_to_png(
+            args.pdf_file,
+            output_directory,
+            preprocess=args.preprocess,
+            binarize_threshold=args.binarize_threshold,
+            denoise_filter_size=args.denoise_filter_size,
+            options=render_options,
+            save_raw=not args.processed_only,
+        )
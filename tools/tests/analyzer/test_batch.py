@@ -0,0 +1,360 @@
+# ruff: noqa
+"""バッチAPIのテスト(各プロバイダーのバッチのライフサイクルを模したローカルの代替サーバーを使用)"""
+
+import base64
+import email.parser
+import email.policy
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import Mock, patch
+from urllib.parse import urlparse
+
+import pytest
+from PIL import Image
+
+# analyzerパッケージはLLMクライアントの依存関係を読み込むため、未インストールの環境ではスキップする
+pytest.importorskip("langchain")
+
+from analyzer.batch import BATCH_STATE_FILE, BatchRunner, batch_custom_id, create_batch_backend
+from analyzer.config import LLMConfig, LLMProvider
+from analyzer.image_processor import ImageProcessor
+from analyzer.llm_client import JSON_INSTRUCTION, LangChainLLMClient
+
+# 状態の確認で処理中を返す回数(この回数の後に完了する)
+IN_PROGRESS_POLLS = 2
+
+
+class StandInServer(ThreadingHTTPServer):
+    """バッチの状態を保持する代替サーバー"""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.state: dict = {"batches": {}, "files": {}, "requests": [], "fail": set(), "drop": set()}
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """OpenAI・Anthropic・Geminiのバッチのエンドポイントを模したハンドラ"""
+
+    server: StandInServer
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> dict:
+        return self.server.state
+
+    def _send(self, payload, status: int = 200, headers: dict | None = None) -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _create_batch(self, provider: str, requests: list[dict]) -> str:
+        """リクエストを記録してバッチを作成し、IDを返す"""
+        batch_id = f"{provider}-batch-{len(self.state['batches']) + 1}"
+        self.state["batches"][batch_id] = {"provider": provider, "requests": requests, "polls": 0}
+        self.state["requests"].extend(requests)
+        return batch_id
+
+    def _poll(self, batch_id: str) -> bool:
+        """状態の確認の回数を数え、完了したかどうかを返す"""
+        batch = self.state["batches"][batch_id]
+        batch["polls"] += 1
+        return batch["polls"] > IN_PROGRESS_POLLS
+
+    def _results(self, batch_id: str):
+        """(custom_id, 応答のテキストまたはNone)を返す。failは失敗、dropは結果を返さない"""
+        for request in self.state["batches"][batch_id]["requests"]:
+            custom_id = request["custom_id"]
+            if custom_id in self.state["drop"]:
+                continue
+            if custom_id in self.state["fail"]:
+                yield custom_id, None
+            else:
+                yield custom_id, "```json\n" + json.dumps({"custom_id": custom_id}) + "\n```"
+
+    @staticmethod
+    def _jsonl(lines: list[dict]) -> bytes:
+        return b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        body = self._body()
+
+        # OpenAI: ファイルのアップロードとバッチの作成
+        if url.path == "/v1/files":
+            message = email.parser.BytesParser(policy=email.policy.default).parsebytes(
+                b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body
+            )
+            for part in message.iter_parts():
+                if part.get_filename():
+                    self.state["files"]["file-1"] = part.get_content()
+            return self._send({"id": "file-1"})
+        if url.path == "/v1/batches":
+            payload = json.loads(body)
+            lines = [json.loads(line) for line in self.state["files"][payload["input_file_id"]].decode().splitlines()]
+            requests = [
+                {
+                    "custom_id": line["custom_id"],
+                    "text": line["body"]["messages"][0]["content"][0]["text"],
+                    "image": line["body"]["messages"][0]["content"][1]["image_url"]["url"].split(",", 1)[1],
+                }
+                for line in lines
+            ]
+            return self._send({"id": self._create_batch("openai", requests), "status": "validating"})
+
+        # Anthropic: リクエストをJSONで受け取ってバッチを作成
+        if url.path == "/v1/messages/batches":
+            requests = [
+                {
+                    "custom_id": line["custom_id"],
+                    "text": line["params"]["messages"][0]["content"][1]["text"],
+                    "image": line["params"]["messages"][0]["content"][0]["source"]["data"],
+                }
+                for line in json.loads(body)["requests"]
+            ]
+            return self._send({"id": self._create_batch("anthropic", requests), "processing_status": "in_progress"})
+
+        # Gemini: resumable uploadとbatchGenerateContent
+        if url.path == "/upload/v1beta/files":
+            if self.headers.get("X-Goog-Upload-Command") == "start":
+                upload_url = f"http://{self.headers['Host']}/upload/v1beta/files?upload_id=1"
+                return self._send({}, headers={"X-Goog-Upload-URL": upload_url})
+            self.state["files"]["files/input-1"] = body
+            return self._send({"file": {"name": "files/input-1"}})
+        if url.path.endswith(":batchGenerateContent"):
+            file_name = json.loads(body)["batch"]["input_config"]["file_name"]
+            lines = [json.loads(line) for line in self.state["files"][file_name].decode().splitlines()]
+            requests = [
+                {
+                    "custom_id": line["key"],
+                    "text": line["request"]["contents"][0]["parts"][0]["text"],
+                    "image": line["request"]["contents"][0]["parts"][1]["inline_data"]["data"],
+                }
+                for line in lines
+            ]
+            batch_id = self._create_batch("google", requests)
+            return self._send({"name": f"batches/{batch_id}", "metadata": {"state": "BATCH_STATE_PENDING"}})
+
+        self._send({"error": "not found"}, status=404)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        host = f"http://{self.headers['Host']}"
+        parts = url.path.strip("/").split("/")
+
+        # OpenAI
+        if url.path.startswith("/v1/batches/"):
+            batch_id = parts[-1]
+            if not self._poll(batch_id):
+                return self._send({"id": batch_id, "status": "in_progress"})
+            return self._send(
+                {"id": batch_id, "status": "completed", "output_file_id": f"out-{batch_id}", "error_file_id": None}
+            )
+        if url.path.startswith("/v1/files/out-"):
+            batch_id = parts[2][len("out-") :]
+            lines = []
+            for custom_id, text in self._results(batch_id):
+                if text is None:
+                    response = {"status_code": 400, "body": {"error": {"message": "invalid image"}}}
+                else:
+                    response = {"status_code": 200, "body": {"choices": [{"message": {"content": text}}]}}
+                lines.append({"custom_id": custom_id, "response": response, "error": None})
+            return self._send(self._jsonl(lines))
+
+        # Anthropic
+        if url.path.startswith("/v1/messages/batches/") and not url.path.endswith("/results"):
+            batch_id = parts[-1]
+            if not self._poll(batch_id):
+                return self._send({"id": batch_id, "processing_status": "in_progress"})
+            results_url = f"{host}/v1/messages/batches/{batch_id}/results"
+            return self._send({"id": batch_id, "processing_status": "ended", "results_url": results_url})
+        if url.path.endswith("/results"):
+            lines = []
+            for custom_id, text in self._results(parts[-2]):
+                if text is None:
+                    result = {"type": "errored", "error": {"type": "invalid_request_error"}}
+                else:
+                    result = {"type": "succeeded", "message": {"content": [{"type": "text", "text": text}]}}
+                lines.append({"custom_id": custom_id, "result": result})
+            return self._send(self._jsonl(lines))
+
+        # Gemini
+        if url.path.startswith("/v1beta/batches/"):
+            batch_id = parts[-1]
+            if not self._poll(batch_id):
+                return self._send({"name": f"batches/{batch_id}", "metadata": {"state": "BATCH_STATE_RUNNING"}})
+            return self._send(
+                {
+                    "name": f"batches/{batch_id}",
+                    "metadata": {"state": "BATCH_STATE_SUCCEEDED"},
+                    "done": True,
+                    "response": {"responsesFile": f"files/out-{batch_id}"},
+                }
+            )
+        if url.path.startswith("/download/v1beta/files/out-"):
+            batch_id = url.path.split("files/out-", 1)[1].removesuffix(":download")
+            lines = []
+            for custom_id, text in self._results(batch_id):
+                if text is None:
+                    lines.append({"key": custom_id, "error": {"code": 400, "message": "invalid image"}})
+                else:
+                    lines.append(
+                        {"key": custom_id, "response": {"candidates": [{"content": {"parts": [{"text": text}]}}]}}
+                    )
+            return self._send(self._jsonl(lines))
+
+        self._send({"error": "not found"}, status=404)
+
+
+@pytest.fixture
+def stand_in_server():
+    """ローカルの代替サーバーを起動する"""
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pages(tmp_path: Path) -> list[Path]:
+    """日本語のファイル名のページ画像を3枚作成する"""
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    paths = []
+    for page in range(1, 4):
+        path = image_dir / f"2023_定期公表_テスト団体_page_{page:02d}.png"
+        Image.new("RGB", (40, 30), (page * 60, 255, 255)).save(path)
+        paths.append(path)
+    return paths
+
+
+def make_runner(provider: str, server, output_dir: Path, **kwargs) -> BatchRunner:
+    """代替サーバーに接続するBatchRunnerを作成する"""
+    config = LLMConfig(
+        provider=LLMProvider(provider),
+        GOOGLE_API_KEY="test",
+        ANTHROPIC_API_KEY="test",
+        OPENAI_API_KEY="test",
+    )
+    with patch.object(LangChainLLMClient, "_create_model", return_value=Mock()):
+        client = LangChainLLMClient(config)
+    base_url = server.url + ("" if provider == "google" else "/v1")
+    backend = create_batch_backend(config, base_url=base_url)
+    output_dir.mkdir(exist_ok=True)
+    return BatchRunner(ImageProcessor(client), backend, output_dir, sleep_func=Mock(), **kwargs)
+
+
+def test_batch_custom_id() -> None:
+    """日本語のファイル名からAnthropicの制約を満たすIDを作成し、同じファイル名からは同じIDになることのテスト"""
+    custom_id = batch_custom_id("2023_定期公表_テスト団体_page_01.png")
+    assert custom_id == batch_custom_id("2023_定期公表_テスト団体_page_01.png")
+    assert custom_id != batch_custom_id("2023_定期公表_テスト団体_page_02.png")
+    assert len(custom_id) <= 64
+    assert custom_id.replace("-", "").isalnum() and custom_id.isascii()
+
+
+@pytest.mark.parametrize("provider", ["openai", "anthropic", "google"])
+def test_batch_round_trip(provider: str, stand_in_server, pages: list[Path], tmp_path: Path) -> None:
+    """バッチを送信し、完了まで状態を確認して、結果を各ページのJSONファイルに保存することのテスト"""
+    runner = make_runner(provider, stand_in_server, tmp_path / "output")
+
+    batch_ids = runner.run(pages)
+
+    assert len(batch_ids) == 1
+    assert runner.sleep_func.call_count == IN_PROGRESS_POLLS
+    assert (runner.success_count, runner.failed_count) == (3, 0)
+    for page in pages:
+        # コードブロックは_process_llm_responseで取り除かれる
+        result = json.loads((tmp_path / "output" / f"{page.stem}.json").read_text(encoding="utf-8"))
+        assert result == {"custom_id": batch_custom_id(page.name)}
+
+    # 送信したリクエストにはJSON出力の指示とPNG画像が含まれる
+    requests = stand_in_server.state["requests"]
+    assert len(requests) == 3
+    for request in requests:
+        assert request["text"].endswith(JSON_INSTRUCTION)
+        assert Image.open(io.BytesIO(base64.b64decode(request["image"]))).size == (40, 30)
+
+    jobs = json.loads((tmp_path / "output" / BATCH_STATE_FILE).read_text(encoding="utf-8"))
+    assert jobs[batch_ids[0]]["collected"] is True
+    assert sorted(jobs[batch_ids[0]]["pages"].values()) == sorted(str(page) for page in pages)
+
+
+def test_batch_split_by_request_count(stand_in_server, pages: list[Path], tmp_path: Path) -> None:
+    """リクエスト数の上限を超えた場合は複数のバッチに分けて送信することのテスト"""
+    runner = make_runner("openai", stand_in_server, tmp_path / "output", max_batch_requests=2)
+
+    batch_ids = runner.run(pages)
+
+    assert len(batch_ids) == 2
+    assert [len(batch["requests"]) for batch in stand_in_server.state["batches"].values()] == [2, 1]
+    assert runner.success_count == 3
+
+
+def test_resume_without_resubmitting(stand_in_server, pages: list[Path], tmp_path: Path) -> None:
+    """送信だけして終了した後、再実行すると同じバッチの結果を取得し、新たに送信しないことのテスト"""
+    output_dir = tmp_path / "output"
+    submitted = make_runner("anthropic", stand_in_server, output_dir).run(pages, wait=False)
+    assert not list(output_dir.glob("*_page_*.json"))
+
+    runner = make_runner("anthropic", stand_in_server, output_dir)
+    assert runner.pending_batch_ids() == submitted
+    assert runner.run(pages) == submitted
+
+    assert len(stand_in_server.state["batches"]) == 1
+    assert runner.success_count == 3
+    assert runner.pending_batch_ids() == []
+
+
+def test_resume_by_batch_id(stand_in_server, pages: list[Path], tmp_path: Path) -> None:
+    """記録にないバッチのIDを指定した場合も、ファイル名から結果のページを特定して保存することのテスト"""
+    batch_id = make_runner("google", stand_in_server, tmp_path / "submitted").run(pages, wait=False)[0]
+
+    runner = make_runner("google", stand_in_server, tmp_path / "output")
+    runner.run(pages, batch_ids=[batch_id])
+
+    assert len(stand_in_server.state["batches"]) == 1
+    assert runner.success_count == 3
+    assert len(list((tmp_path / "output").glob("*_page_*.json"))) == 3
+
+
+def test_failed_and_missing_requests(stand_in_server, pages: list[Path], tmp_path: Path) -> None:
+    """失敗したリクエストと結果に含まれないリクエストをエラーとして記録することのテスト"""
+    stand_in_server.state["fail"].add(batch_custom_id(pages[1].name))
+    stand_in_server.state["drop"].add(batch_custom_id(pages[2].name))
+    runner = make_runner("openai", stand_in_server, tmp_path / "output")
+
+    runner.run(pages)
+
+    assert (runner.success_count, runner.failed_count) == (1, 2)
+    errors = {item["file"]: item["error_type"] for item in runner.llm_client.error_items}
+    assert errors == {pages[1].name: "BatchRequestError", pages[2].name: "BatchResultMissing"}
+    assert not (tmp_path / "output" / f"{pages[1].stem}.json").exists()
+
+
+def test_skip_existing_pages(stand_in_server, pages: list[Path], tmp_path: Path) -> None:
+    """出力済みのページはバッチに含めないことのテスト"""
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    (output_dir / f"{pages[0].stem}.json").write_text("{}", encoding="utf-8")
+    runner = make_runner("openai", stand_in_server, output_dir)
+    runner.image_processor.skip_if_exists = True
+
+    runner.run(pages)
+
+    assert len(stand_in_server.state["requests"]) == 2
+    assert runner.success_count == 3
@@ -0,0 +1,158 @@
+# ruff: noqa
+"""LLMに送る画像のエンコードのテスト"""
+
+import asyncio
+import base64
+import io
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+import numpy as np
+import pytest
+from PIL import Image
+from tenacity import wait_none
+
+# analyzerパッケージはLLMクライアントの依存関係を読み込むため、未インストールの環境ではスキップする
+pytest.importorskip("langchain")
+
+import analyzer.llm_client as llm_client_module
+from analyzer.config import LLMConfig, LLMProvider
+from analyzer.image_payload import encode_image_payload
+from analyzer.llm_client import LangChainLLMClient
+
+
+def decode(payload) -> Image.Image:
+    """ペイロードを画像に戻す"""
+    return Image.open(io.BytesIO(base64.b64decode(payload.data)))
+
+
+def noise_image(width: int, height: int) -> Image.Image:
+    """圧縮しにくいノイズの画像を作成する"""
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize(("image_format", "media_type"), [("PNG", "image/png"), ("JPEG", "image/jpeg")])
+def test_passthrough_original_bytes(tmp_path: Path, image_format: str, media_type: str) -> None:
+    """ファイルから開いた画像は、再エンコードせずに元のファイルのバイト列を送ることのテスト"""
+    path = tmp_path / f"page.{image_format.lower()}"
+    Image.new("RGB", (64, 48), "white").save(path, format=image_format)
+
+    with Image.open(path) as image:
+        payload = encode_image_payload(image)
+
+    assert payload.passthrough
+    assert payload.media_type == media_type
+    assert base64.b64decode(payload.data) == path.read_bytes()
+    assert (payload.width, payload.height) == (64, 48)
+    assert payload.data_url.startswith(f"data:{media_type};base64,")
+
+
+def test_in_memory_and_converted_images_are_encoded_as_png(tmp_path: Path) -> None:
+    """元のファイルがない画像・変換した画像は、従来どおり可逆のPNGにエンコードすることのテスト"""
+    path = tmp_path / "page.png"
+    Image.new("RGB", (32, 32), "white").save(path)
+
+    with Image.open(path) as image:
+        converted = image.convert("L")
+    for image in (Image.new("RGB", (32, 32), "red"), converted):
+        payload = encode_image_payload(image)
+        assert not payload.passthrough
+        assert payload.media_type == "image/png"
+        assert np.array_equal(np.asarray(decode(payload)), np.asarray(image))
+
+
+def test_downscale_to_max_pixels(tmp_path: Path) -> None:
+    """画素数の上限を超える画像は、縦横比を保って縮小し再圧縮することのテスト"""
+    path = tmp_path / "page.png"
+    Image.new("RGB", (2000, 1000), "white").save(path)
+
+    with Image.open(path) as image:
+        payload = encode_image_payload(image, max_pixels=500_000, image_format="jpeg")
+
+    assert not payload.passthrough
+    assert payload.media_type == "image/jpeg"
+    assert payload.width * payload.height <= 500_000
+    assert payload.width == pytest.approx(2 * payload.height, abs=2)
+    assert decode(payload).size == (payload.width, payload.height)
+
+
+@pytest.mark.parametrize("image_format", ["jpeg", "webp", "png"])
+def test_recompress_to_byte_budget(tmp_path: Path, image_format: str) -> None:
+    """バイト数の上限を超える画像は、上限に収まるまで品質・サイズを下げて再圧縮することのテスト"""
+    path = tmp_path / "page.png"
+    noise_image(400, 300).save(path)
+    max_bytes = 40_000
+    assert path.stat().st_size > max_bytes
+
+    with Image.open(path) as image:
+        payload = encode_image_payload(image, max_bytes=max_bytes, image_format=image_format)
+
+    assert not payload.passthrough
+    assert payload.media_type == f"image/{image_format}"
+    assert payload.byte_size <= max_bytes
+    assert len(base64.b64decode(payload.data)) == payload.byte_size
+
+
+def test_small_file_within_budget_is_passed_through(tmp_path: Path) -> None:
+    """上限を指定しても、上限以下の画像は元のファイルのまま送ることのテスト"""
+    path = tmp_path / "page.png"
+    Image.new("1", (100, 100), 1).save(path)
+
+    with Image.open(path) as image:
+        payload = encode_image_payload(image, max_pixels=1_000_000, max_bytes=100_000)
+
+    assert payload.passthrough
+
+
+def test_unknown_format() -> None:
+    """不明な再圧縮の形式を指定した場合はエラーになることのテスト"""
+    with pytest.raises(ValueError):
+        encode_image_payload(Image.new("RGB", (8, 8)), image_format="gif")
+
+
+@pytest.fixture
+def client() -> LangChainLLMClient:
+    """モデルをモックしたLLMクライアント"""
+    config = LLMConfig(provider=LLMProvider.GOOGLE, GOOGLE_API_KEY="test")
+    with patch.object(LangChainLLMClient, "_create_model", return_value=Mock()):
+        return LangChainLLMClient(config)
+
+
+@pytest.fixture
+def page(tmp_path: Path) -> Path:
+    """ページの画像ファイル"""
+    path = tmp_path / "doc_page_02.png"
+    Image.new("RGB", (64, 48), "white").save(path)
+    return path
+
+
+def test_payload_is_encoded_once_across_retries(client, page: Path, monkeypatch) -> None:
+    """APIの呼び出しをリトライしても、画像のエンコードは1回だけ行うことのテスト"""
+    monkeypatch.setattr(LangChainLLMClient._generate_content_with_retry.retry, "wait", wait_none())
+    client.model.invoke.side_effect = [RuntimeError("timeout"), RuntimeError("timeout"), Mock(content='{"ok": 1}')]
+
+    with patch.object(llm_client_module, "encode_image_payload", wraps=encode_image_payload) as encode:
+        result = client.analyze_image_with_llm(page)
+
+    assert result == '{"ok": 1}'
+    assert client.model.invoke.call_count == 3
+    assert encode.call_count == 1
+    # 3回とも同じ(元のファイルの)画像が送られる
+    urls = {call.args[0][0].content[1]["image_url"]["url"] for call in client.model.invoke.call_args_list}
+    assert urls == {"data:image/png;base64," + base64.b64encode(page.read_bytes()).decode()}
+
+
+def test_payload_is_encoded_once_across_async_retries(client, page: Path, monkeypatch) -> None:
+    """非同期の場合も、リトライ時に画像を再エンコードしないことのテスト"""
+    monkeypatch.setattr(LangChainLLMClient._agenerate_content_with_retry.retry, "wait", wait_none())
+    client.model.ainvoke = AsyncMock(
+        side_effect=[RuntimeError("timeout"), Mock(content='{"ok": 1}', usage_metadata=None)]
+    )
+
+    with patch.object(llm_client_module, "encode_image_payload", wraps=encode_image_payload) as encode:
+        result = asyncio.run(client.aanalyze_image_with_llm(page))
+
+    assert result == '{"ok": 1}'
+    assert client.model.ainvoke.call_count == 2
+    assert encode.call_count == 1
@@ -0,0 +1,87 @@
+# ruff: noqa
+"""ページ分類のテスト"""
+
+import json
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageDraw
+
+# analyzerパッケージはLLMクライアントの依存関係を読み込むため、未インストールの環境ではスキップする
+pytest.importorskip("langchain")
+
+from analyzer.page_classifier import PageClassifier, PageType
+
+
+def make_table_page(bottom: int = 500) -> Image.Image:
+    """罫線で区切られた表のページ画像を作成(表の下端をbottomで指定)"""
+    image = Image.new("RGB", (400, 560), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(60, bottom + 20, 40):
+        draw.line((20, y, 380, y), fill="black", width=2)
+    for x in (20, 140, 260, 380):
+        draw.line((x, 60, x, bottom), fill="black", width=2)
+    for y in range(70, bottom, 40):
+        draw.text((30, y), "1,000", fill="black")
+    return image
+
+
+def make_letter_page(rows: int) -> Image.Image:
+    """罫線のない文章のページ画像を作成"""
+    image = Image.new("L", (400, 560), 255)
+    draw = ImageDraw.Draw(image)
+    for row in range(rows):
+        # 文字の並びを模した、間隔の空いた短い線
+        for x in range(40, 360, 24):
+            draw.rectangle((x, 40 + row * 16, x + 10, 48 + row * 16), fill=0)
+    return image
+
+
+def test_classify_page_types() -> None:
+    """空白・表・表紙・文章のページの判定のテスト"""
+    classifier = PageClassifier()
+
+    assert classifier.classify(Image.new("RGB", (400, 560), "white")).page_type == PageType.EMPTY
+    table = classifier.classify(make_table_page())
+    assert table.page_type == PageType.TABLE
+    assert table.horizontal_lines >= 10
+    assert table.vertical_lines == 4
+    assert classifier.classify(make_letter_page(5)).page_type == PageType.COVER
+    assert classifier.classify(make_letter_page(30)).page_type == PageType.TEXT
+
+    with pytest.raises(ValueError):
+        PageClassifier(["table"])
+
+
+@pytest.mark.parametrize("bottom", [140, 220, 300])
+def test_short_table_is_classified_as_table(bottom: int) -> None:
+    """ページの高さの半分に満たない表も、表のページと判定することのテスト"""
+    classifier = PageClassifier(["empty", "cover", "text"])
+
+    table = classifier.classify(make_table_page(bottom))
+
+    assert table.page_type == PageType.TABLE
+    assert table.vertical_lines == 4
+
+
+def test_should_skip_and_save_log(tmp_path: Path) -> None:
+    """スキップ対象のページのみをスキップし、1ページ目は常に解析することのテスト"""
+    blank = Image.new("RGB", (400, 560), "white")
+    blank.save(tmp_path / "report_page_01.png")
+    blank.save(tmp_path / "report_page_02.png")
+    make_table_page().save(tmp_path / "report_page_03.png")
+    classifier = PageClassifier(["empty", "cover"])
+
+    assert classifier.should_skip(tmp_path / "report_page_01.png") is False
+    assert classifier.should_skip(tmp_path / "report_page_02.png") is True
+    assert classifier.should_skip(tmp_path / "report_page_03.png") is False
+
+    classifier.save_log(tmp_path)
+    log = json.loads((tmp_path / "page_classification.json").read_text(encoding="utf-8"))
+    assert log["skip_types"] == ["cover", "empty"]
+    assert log["skipped"] == 1
+    assert [(page["file"], page["page_type"], page["skipped"]) for page in log["pages"]] == [
+        ("report_page_01.png", "empty", False),
+        ("report_page_02.png", "empty", True),
+        ("report_page_03.png", "table", False),
+    ]
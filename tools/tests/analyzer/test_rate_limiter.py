@@ -0,0 +1,147 @@
+# ruff: noqa
+"""レート制限のテスト"""
+
+import asyncio
+import time
+
+import pytest
+
+# analyzerパッケージはLLMクライアントの依存関係を読み込むため、未インストールの環境ではスキップする
+pytest.importorskip("langchain")
+
+from analyzer.rate_limiter import AdaptiveConcurrency, RateLimiter, TokenBucket, is_rate_limit_error
+
+
+class RateLimitError(Exception):
+    """プロバイダーのSDKのレート制限エラーを模した例外"""
+
+
+def test_is_rate_limit_error() -> None:
+    """例外の型名とメッセージからレート制限エラーを判定することのテスト"""
+    assert is_rate_limit_error(RateLimitError("too many requests"))
+    assert is_rate_limit_error(RuntimeError("Error code: 429"))
+    assert is_rate_limit_error(RuntimeError("ResourceExhausted: quota exceeded"))
+    assert not is_rate_limit_error(ValueError("invalid image"))
+
+
+def test_token_bucket_waits_for_refill() -> None:
+    """容量を使い切った後は、補充されるまで待機することのテスト"""
+    bucket = TokenBucket(2, period=0.2)
+
+    async def run() -> list[float]:
+        return [await bucket.acquire() for _ in range(3)]
+
+    waits = asyncio.run(run())
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+
+
+def test_token_bucket_adjust_returns_unused_tokens() -> None:
+    """見積もりより少なかった分を返却し、多かった分を追加で消費することのテスト"""
+    now = [0.0]
+    bucket = TokenBucket(100, clock=lambda: now[0])
+
+    asyncio.run(bucket.acquire(80))
+    bucket.adjust(-50)
+    assert bucket.tokens == 70
+    bucket.adjust(30)
+    assert bucket.tokens == 40
+
+
+def test_adaptive_concurrency() -> None:
+    """レイテンシが安定していれば上限を増やし、遅くなった場合とレート制限エラーで減らすことのテスト"""
+    concurrency = AdaptiveConcurrency(max_limit=8, initial_limit=4)
+
+    for _ in range(40):
+        concurrency.on_success(latency=1.0, tokens=1000)
+    assert concurrency.limit == 8
+
+    concurrency.on_success(latency=10.0, tokens=1000)
+    assert concurrency.limit < 8
+
+    concurrency.on_rate_limit()
+    assert concurrency.limit < 4
+    for _ in range(10):
+        concurrency.on_rate_limit()
+    assert concurrency.limit == concurrency.min_limit
+
+
+def test_rate_limiter_limits_requests_in_flight() -> None:
+    """同時に実行するリクエストが同時実行数の上限を超えないことのテスト"""
+    limiter = RateLimiter(1000, 1_000_000, max_concurrency=2)
+    in_flight = 0
+    peak = 0
+
+    async def call() -> None:
+        nonlocal in_flight, peak
+        async with limiter.request(100):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def run() -> None:
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert limiter.stats()["requests"] == 6
+
+
+def test_rate_limit_error_pauses_all_requests() -> None:
+    """レート制限エラーを受けると全リクエスト共通で待機し、同時実行数を半分にすることのテスト"""
+    limiter = RateLimiter(1000, 1_000_000, max_concurrency=4, base_backoff=0.1)
+
+    async def run() -> float:
+        with pytest.raises(RateLimitError):
+            async with limiter.request(100):
+                raise RateLimitError("429 Too Many Requests")
+        assert limiter.concurrency.limit == 2
+        started = time.monotonic()
+        async with limiter.request(100):
+            pass
+        return time.monotonic() - started
+
+    waited = asyncio.run(run())
+    assert waited >= 0.1
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_rate_limit_errors_during_pause_do_not_extend_backoff() -> None:
+    """待機中に届いた他のリクエストのエラーは待機時間を延ばさず、解除後に連続した場合は倍にすることのテスト"""
+    limiter = RateLimiter(1000, 1_000_000, max_concurrency=4, base_backoff=10)
+
+    limiter.report_rate_limit()
+    resume_at = limiter._resume_at
+    limiter.report_rate_limit()
+    assert limiter._resume_at == resume_at
+    assert limiter.stats()["rate_limited"] == 2
+
+    limiter._resume_at = 0.0
+    limiter.report_rate_limit()
+    assert limiter._resume_at - time.monotonic() == pytest.approx(20, abs=1)
+
+
+def test_waiters_are_released_at_different_times(monkeypatch) -> None:
+    """待機中だった複数のリクエストは、解除後に一斉に再送されず、それぞれずれた時刻に再開することのテスト"""
+    limiter = RateLimiter(1000, 1_000_000, max_concurrency=4, base_backoff=0.2)
+    # ずらす時間の上限(0.2秒の25%)を、1件目は0、2件目は最大で引いたものとする
+    jitters = iter([0.0, 1.0])
+    monkeypatch.setattr("analyzer.rate_limiter.random.uniform", lambda low, high: low + next(jitters) * (high - low))
+
+    async def run() -> list[float]:
+        limiter.report_rate_limit()
+        started = time.monotonic()
+        resumed: list[float] = []
+
+        async def worker() -> None:
+            async with limiter.request(100):
+                resumed.append(time.monotonic() - started)
+
+        await asyncio.gather(*(worker() for _ in range(2)))
+        return resumed
+
+    resumed = asyncio.run(run())
+    assert len(resumed) == 2
+    assert resumed[0] >= 0.2
+    assert resumed[1] - resumed[0] >= 0.04
@@ -0,0 +1,90 @@
+# ruff: noqa
+"""LLM応答キャッシュのテスト"""
+
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from PIL import Image
+
+# analyzerパッケージはLLMクライアントの依存関係を読み込むため、未インストールの環境ではスキップする
+pytest.importorskip("langchain")
+
+from analyzer.config import LLMConfig, LLMProvider
+from analyzer.llm_client import LangChainLLMClient, PreparedPage
+from analyzer.response_cache import ResponseCache, cache_key, image_content_hash
+
+
+def make_client(cache: ResponseCache, **image_settings) -> LangChainLLMClient:
+    """モデルをモックし、応答キャッシュを使用するLLMクライアントを作成する"""
+    config = LLMConfig(provider=LLMProvider.GOOGLE, GOOGLE_API_KEY="test", **image_settings)
+    with patch.object(LangChainLLMClient, "_create_model", return_value=Mock()):
+        return LangChainLLMClient(config, response_cache=cache)
+
+
+def test_cache_key_depends_on_content_and_settings(tmp_path: Path) -> None:
+    """画素が同じ画像は圧縮レベルが違っても同じキーになり、プロンプトやモデルが違えば別のキーになることのテスト"""
+    image = Image.new("RGB", (8, 8), "white")
+    image.save(tmp_path / "a.png", compress_level=1)
+    image.save(tmp_path / "b.png", compress_level=9)
+    with Image.open(tmp_path / "a.png") as a, Image.open(tmp_path / "b.png") as b:
+        assert image_content_hash(a) == image_content_hash(b)
+
+    image_hash = image_content_hash(image)
+    key = cache_key(image_hash, "prompt", "google", "gemini", None)
+    assert key == cache_key(image_hash, "prompt", "google", "gemini", None)
+    assert key != cache_key(image_hash, "prompt2", "google", "gemini", None)
+    assert key != cache_key(image_hash, "prompt", "openai", "gemini", None)
+    assert key != cache_key(image_hash, "prompt", "google", "gemini", 0.5)
+
+
+def test_get_put_and_lru_eviction(tmp_path: Path) -> None:
+    """ヒット・ミスの集計と、上限を超えた場合に最後の使用が古い応答から削除することのテスト"""
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_bytes=20)
+
+    assert cache.get("a") is None
+    cache.put("a", "x" * 8)
+    cache.put("b", "y" * 8)
+    assert cache.get("a") == "x" * 8  # aを使用したので、bが最も古くなる
+    cache.put("c", "z" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "z" * 8
+    assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 1, "entries": 2, "bytes": 16}
+    cache.close()
+
+    # 再度開いても保存済みの応答を取得できる
+    reopened = ResponseCache(tmp_path / "cache.sqlite3", max_bytes=20)
+    assert reopened.get("a") == "x" * 8
+    reopened.close()
+
+
+def test_saved_response_is_returned_by_prepare_page(tmp_path: Path) -> None:
+    """save_responseで保存した応答は、同じページのprepare_pageでキャッシュ済みの応答として返ることのテスト"""
+    page_path = tmp_path / "doc_page_02.png"
+    Image.new("RGB", (64, 48), "white").save(page_path)
+    client = make_client(ResponseCache(tmp_path / "cache.sqlite3"))
+
+    page = client.prepare_page(page_path)
+    assert isinstance(page, PreparedPage)
+    assert page.payload.passthrough
+
+    assert client.save_response(page_path, '```json\n{"ok": 1}\n```') == '{"ok": 1}'
+    assert client.prepare_page(page_path) == '{"ok": 1}'
+
+
+def test_image_encoding_settings_change_cache_key(tmp_path: Path) -> None:
+    """画像の縮小・再圧縮の設定を変えた場合は、前の設定で送った画像の応答を使用しないことのテスト"""
+    page_path = tmp_path / "doc_page_02.png"
+    Image.new("RGB", (64, 48), "white").save(page_path)
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+
+    make_client(cache).save_response(page_path, '{"default": 1}')
+    make_client(cache, image_max_pixels=1000).save_response(page_path, '{"small": 1}')
+
+    assert make_client(cache).prepare_page(page_path) == '{"default": 1}'
+    assert make_client(cache, image_max_pixels=1000).prepare_page(page_path) == '{"small": 1}'
+    assert isinstance(make_client(cache, image_max_pixels=2000).prepare_page(page_path), PreparedPage)
+    assert isinstance(
+        make_client(cache, image_max_pixels=1000, image_format="webp").prepare_page(page_path), PreparedPage
+    )
@@ -0,0 +1,69 @@
+# ruff: noqa
+"""取得済みファイルのインデックスのテスト"""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from downloader.acquired_index import AcquiredFile, AcquiredIndex
+from downloader.config import ACQUIRED_INDEX_FILENAME
+from downloader.metadata import FileMetadata
+from downloader.pdf_downloader import PDFDownloader
+
+
+def test_index_persists_and_reloads(tmp_path: Path) -> None:
+    """記録したファイルが再読み込み後もURLとファイル名で検索できることのテスト"""
+    index = AcquiredIndex(str(tmp_path))
+    index.add(AcquiredFile("https://example.com/a.pdf", "R5_a.pdf", 1000, "ab" * 32))
+    index.add(AcquiredFile("https://example.com/b.pdf", "R5_b.pdf", 2000))
+    assert index.get_size("https://example.com/a.pdf", "R5_a.pdf") == 1000
+
+    reloaded = AcquiredIndex(str(tmp_path))
+    assert len(reloaded) == 2
+    assert reloaded.get_size("https://example.com/b.pdf", "R5_b.pdf") == 2000
+    # ファイル名が異なる場合や未記録のURLは取得済みとみなさない
+    assert reloaded.get_size("https://example.com/b.pdf", "R6_b.pdf") is None
+    assert reloaded.get_size("https://example.com/c.pdf", "R5_c.pdf") is None
+
+
+def test_compact_merges_segments_and_ignores_broken_lines(tmp_path: Path) -> None:
+    """圧縮でシャードのセグメントを統合し、書き込み途中の行を無視することのテスト"""
+    AcquiredIndex(str(tmp_path), segment="shard-1-of-2").add(AcquiredFile("https://example.com/a.pdf", "a.pdf", 1))
+    AcquiredIndex(str(tmp_path), segment="shard-2-of-2").add(AcquiredFile("https://example.com/b.pdf", "b.pdf", 2))
+    index_path = tmp_path / ACQUIRED_INDEX_FILENAME
+    index_path.write_text("https://example.com/a.pdf\ta.pdf\t5\t-\nhttps://example.com/broken", encoding="utf-8")
+
+    index = AcquiredIndex(str(tmp_path))
+    assert index.compact()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [ACQUIRED_INDEX_FILENAME]
+    assert len(index_path.read_text(encoding="utf-8").splitlines()) == 2
+    # セグメントの記録が共有のインデックスより優先される
+    assert index.get_size("https://example.com/a.pdf", "a.pdf") == 1
+    assert index.get_size("https://example.com/b.pdf", "b.pdf") == 2
+
+
+def test_check_existing_file_uses_index_without_stat(tmp_path: Path) -> None:
+    """インデックスに記録がある場合はファイルシステムを確認せずにスキップすることのテスト"""
+    index = AcquiredIndex(str(tmp_path))
+    downloader = PDFDownloader(requests.Session(), str(tmp_path), acquired_index=index)
+    metadata = FileMetadata(
+        filename="R5_a.pdf",
+        original_url="https://example.com/a.pdf",
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+    )
+
+    # 初回はファイルシステムで確認し、インデックスに記録する
+    (tmp_path / "R5_a.pdf").write_bytes(b"x" * 10)
+    assert downloader.check_existing_file(str(tmp_path / "R5_a.pdf"), metadata) is not None
+
+    with patch("pathlib.Path.exists") as mock_exists, patch("pathlib.Path.stat") as mock_stat:
+        result = downloader.check_existing_file(str(tmp_path / "R5_a.pdf"), metadata)
+    assert result is not None
+    assert result.download_status == "skipped"
+    assert result.file_size == 10
+    mock_exists.assert_not_called()
+    mock_stat.assert_not_called()
@@ -0,0 +1,114 @@
+# ruff: noqa
+"""非同期クロールエンジンのテスト"""
+
+import asyncio
+from unittest.mock import Mock
+
+from downloader.async_engine import AsyncPageParser, AsyncPDFDownloader, HostRateLimiter, TokenBucket
+from downloader.metadata import FileMetadata
+from downloader.page_parser import PageParser, ReportListPageLink
+
+
+class FakeClock:
+    """待機すると時刻が進む疑似時計"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_spaces_requests() -> None:
+    """トークンバケットがリクエスト間隔を空けることのテスト"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0.5, clock=clock, sleep_func=clock.sleep)
+
+    async def run() -> list[float]:
+        return [await bucket.acquire() for _ in range(3)]
+
+    waited = asyncio.run(run())
+
+    assert waited == [0.0, 2.0, 2.0]
+    assert clock.now == 4.0
+
+
+def test_token_bucket_refills_while_idle() -> None:
+    """待機中にトークンが補充されることのテスト"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, clock=clock, sleep_func=clock.sleep)
+
+    async def run() -> None:
+        await bucket.acquire()
+        clock.now += 5.0
+        assert await bucket.acquire() == 0.0
+
+    asyncio.run(run())
+    assert clock.sleeps == []
+
+
+def test_token_bucket_without_limit() -> None:
+    """レートが0の場合は待機しないことのテスト"""
+    bucket = TokenBucket(rate=0.0)
+
+    assert asyncio.run(bucket.acquire()) == 0.0
+
+
+def test_host_rate_limiter_uses_separate_buckets() -> None:
+    """ホストごとに別のトークンバケットを使用することのテスト"""
+    clock = FakeClock()
+    interval_func = Mock(return_value=3.0)
+    limiter = HostRateLimiter(interval_func, clock=clock, sleep_func=clock.sleep)
+
+    async def run() -> None:
+        await limiter.acquire("https://a.example.com/1.pdf")
+        await limiter.acquire("https://b.example.com/1.pdf")
+        await limiter.acquire("https://a.example.com/2.pdf")
+
+    asyncio.run(run())
+
+    assert clock.sleeps == [3.0]
+    assert interval_func.call_count == 2
+
+
+def test_async_page_parser_shares_parsing_with_sync_parser(page_parser: PageParser, mock_sleep: Mock) -> None:
+    """非同期版がPageParserと同じ解析処理を使い、sleep_funcを呼ばないことのテスト"""
+    page_parser.fetch_html = Mock(return_value='<a href="000_001.pdf">テスト団体</a>')
+    limiter = HostRateLimiter(lambda _: 0.0)
+    parser = AsyncPageParser(page_parser, limiter)
+    link = ReportListPageLink(url="https://example.com/SL/list.html", text="一覧", year="R5")
+
+    pdf_links = asyncio.run(parser.parse_report_list_page(link))
+
+    assert pdf_links is not None
+    assert [pdf_link.text for pdf_link in pdf_links] == ["テスト団体"]
+    assert pdf_links == page_parser.parse_report_list_page_html('<a href="000_001.pdf">テスト団体</a>', link)
+    mock_sleep.assert_not_called()
+
+
+def test_async_pdf_downloader_skips_limiter_in_dry_run() -> None:
+    """ドライランでは通信しないためトークンを消費しないことのテスト"""
+    downloader = Mock()
+    downloader.dry_run = True
+    downloader.metadata_only = False
+    metadata = FileMetadata(
+        filename="test.pdf",
+        original_url="https://example.com/test.pdf",
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+    )
+    downloader.download_pdf.return_value = metadata
+    limiter = Mock(spec=HostRateLimiter)
+
+    result = asyncio.run(
+        AsyncPDFDownloader(downloader, limiter).download_pdf("https://example.com/test.pdf", "x", metadata)
+    )
+
+    assert result is metadata
+    limiter.acquire.assert_not_called()
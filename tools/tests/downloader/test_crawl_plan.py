@@ -0,0 +1,145 @@
+# ruff: noqa
+"""クロール計画と差分抽出のテスト"""
+
+import hashlib
+from pathlib import Path
+from unittest.mock import Mock
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from downloader.config import BASE_URL
+from downloader.crawl_plan import CrawlPlan, CrawlPlanner
+from downloader.http_cache import HTTPValidatorCache
+from downloader.page_parser import PageParser
+
+YEAR_URL = BASE_URL + "reports/SS20241129/"
+LIST_A = YEAR_URL + "SL/a00001.html"
+LIST_B = YEAR_URL + "SL/b00002.html"
+
+PAGES = {
+    BASE_URL: '<a href="/senkyo/seiji_s/seijishikin/reports/SS20241129/">令和5年分 定期公表</a>',
+    YEAR_URL: f'<a href="{LIST_A}">政党支部A</a>',
+    LIST_A: '<a href="000_001.pdf">団体1</a><a href="000_002.pdf">団体2</a>',
+    LIST_B: '<a href="000_003.pdf">団体3</a>',
+}
+
+
+def make_planner(pages: dict[str, str], fetched: list[str]) -> CrawlPlanner:
+    parser = PageParser(session=Mock(spec=requests.Session), delay=0, sleep_func=Mock())
+
+    def fetch_html(url: str) -> str | None:
+        fetched.append(url)
+        return pages.get(url)
+
+    parser.fetch_html = fetch_html
+    return CrawlPlanner(parser, {"years": []})
+
+
+def test_build_plan_and_round_trip(tmp_path: Path) -> None:
+    """計画の作成と保存・読み込みのテスト"""
+    fetched: list[str] = []
+    plan, changes = make_planner(PAGES, fetched).build()
+
+    assert plan is not None
+    assert changes == []
+    assert fetched == [BASE_URL, YEAR_URL, LIST_A]
+    assert [link.text for link, _ in plan.pdf_links()] == ["団体1", "団体2"]
+    assert plan.year_pages[YEAR_URL].report_list_urls == [LIST_A]
+
+    assert plan.save(str(tmp_path))
+    assert CrawlPlan.load(str(tmp_path)) == plan
+
+
+def make_cached_planner(cache: HTTPValidatorCache, pages: dict[str, str], statuses: list[int]) -> CrawlPlanner:
+    """HTTP検証子キャッシュを使用し、ETagが一致する場合は304を返すサーバーに接続したプランナーを作成する"""
+
+    def get(url: str, headers: dict[str, str] | None = None) -> Mock:
+        body = pages[url].encode("shift_jis")
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        response = Mock(spec=requests.Response)
+        response.status_code = 304 if (headers or {}).get("If-None-Match") == etag else 200
+        response.headers = CaseInsensitiveDict({"ETag": etag})
+        response.content = body
+        response.text = pages[url]
+        statuses.append(response.status_code)
+        return response
+
+    session = Mock(spec=requests.Session)
+    session.get.side_effect = get
+    parser = PageParser(session=session, delay=0, sleep_func=Mock(), http_cache=cache)
+    return CrawlPlanner(parser, {"years": []})
+
+
+def test_unchanged_pages_are_revalidated(tmp_path: Path) -> None:
+    """ページが変わっていない場合は、全てのページを条件付きGETで再検証して前回の計画を引き継ぐことのテスト"""
+    cache = HTTPValidatorCache(str(tmp_path))
+    previous, _ = make_cached_planner(cache, PAGES, []).build()
+    assert previous is not None
+
+    statuses: list[int] = []
+    plan, changes = make_cached_planner(cache, PAGES, statuses).build(previous)
+
+    assert statuses == [304, 304, 304]
+    assert changes == []
+    assert plan is not None
+    assert plan.report_list_pages == previous.report_list_pages
+
+
+def test_changed_report_list_page_emits_new_pdfs(tmp_path: Path) -> None:
+    """親ページが変わらず一覧ページだけが変わった場合も、追加されたPDFが差分になることのテスト"""
+    cache = HTTPValidatorCache(str(tmp_path))
+    previous, _ = make_cached_planner(cache, PAGES, []).build()
+    pages = {**PAGES, LIST_A: PAGES[LIST_A] + '<a href="000_004.pdf">団体4</a>'}
+
+    statuses: list[int] = []
+    plan, changes = make_cached_planner(cache, pages, statuses).build(previous)
+
+    assert statuses == [304, 304, 200]
+    assert [(change.change, change.pdf_link.text, change.year) for change in changes] == [("new", "団体4", "R5")]
+    assert plan is not None
+    assert [link.text for link, _ in plan.pdf_links()] == ["団体1", "団体2", "団体4"]
+
+
+def test_changed_year_page_emits_new_pdfs() -> None:
+    """年度ページが変わった場合に新しい一覧ページのPDFだけが差分になることのテスト"""
+    previous, _ = make_planner(PAGES, []).build()
+    pages = {**PAGES, YEAR_URL: f'<a href="{LIST_A}">政党支部A</a><a href="{LIST_B}">政党支部B</a>'}
+
+    fetched: list[str] = []
+    _, changes = make_planner(pages, fetched).build(previous)
+
+    assert fetched == [BASE_URL, YEAR_URL, LIST_A, LIST_B]
+    assert [(change.change, change.pdf_link.text, change.year) for change in changes] == [("new", "団体3", "R5")]
+
+
+def test_parameter_mismatch_fetches_everything() -> None:
+    """検索条件が異なる場合は全てのページを取得することのテスト"""
+    previous, _ = make_planner(PAGES, []).build()
+    fetched: list[str] = []
+    planner = make_planner(PAGES, fetched)
+    planner.parameters = {"years": ["R4"]}
+
+    planner.build(previous)
+
+    assert LIST_A in fetched
+
+
+def test_discarded_pdf_links_are_emitted_again(tmp_path: Path) -> None:
+    """計画から除いた(ダウンロードに失敗した)PDFは、ページが変わっていなくても次回の差分になることのテスト"""
+    cache = HTTPValidatorCache(str(tmp_path))
+    previous, _ = make_cached_planner(cache, PAGES, []).build()
+    assert previous is not None
+    failed_url = previous.pdf_links()[1][0].url
+
+    previous.discard_pdf_links({failed_url})
+    assert previous.save(str(tmp_path))
+    saved = CrawlPlan.load(str(tmp_path))
+    assert saved is not None
+    assert [link.text for link, _ in saved.pdf_links()] == ["団体1"]
+
+    plan, changes = make_cached_planner(cache, PAGES, []).build(saved)
+
+    assert [(change.change, change.pdf_link.url) for change in changes] == [("new", failed_url)]
+    assert plan is not None
+    assert [link.text for link, _ in plan.pdf_links()] == ["団体1", "団体2"]
@@ -0,0 +1,80 @@
+# ruff: noqa
+"""ダウンロード処理全体のテスト"""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from downloader.config import BASE_URL
+from downloader.crawl_plan import CrawlPlan, CrawlPlanner
+from downloader.downloader import SeijishikinDownloader
+from downloader.main import parse_arguments
+from downloader.page_parser import ReportListPageLink
+
+EMPTY_LIST_URL = "https://www.soumu.go.jp/senkyo/seiji_s/seijishikin/reports/SL20/000.html"
+FAILED_LIST_URL = "https://www.soumu.go.jp/senkyo/seiji_s/seijishikin/reports/SL20/001.html"
+
+
+def make_downloader(output_dir: Path, *options: str) -> SeijishikinDownloader:
+    """ネットワークにアクセスしないダウンローダーを作成する(PDFのない一覧ページと、取得が接続エラーになる一覧ページを返す)"""
+    downloader = SeijishikinDownloader(parse_arguments(["-o", str(output_dir), "-y", "R5", *options]))
+    downloader.robots_checker.can_fetch = Mock(return_value=True)
+    downloader.robots_checker.get_crawl_delay = Mock(return_value=None)
+    downloader.get_host_interval = Mock(return_value=0.0)
+    downloader.page_parser.sleep_func = Mock()
+    downloader.page_parser.parse_top_page_html = Mock(
+        return_value=[
+            ReportListPageLink(url=EMPTY_LIST_URL, year="R5", text="報告書一覧"),
+            ReportListPageLink(url=FAILED_LIST_URL, year="R5", text="報告書一覧"),
+        ]
+    )
+    downloader.session.get = Mock(side_effect=requests.ConnectionError("connection refused"))
+    fetch_html = downloader.page_parser.fetch_html
+    downloader.page_parser.fetch_html = lambda url: (
+        "<html></html>" if url in (BASE_URL, EMPTY_LIST_URL) else fetch_html(url)
+    )
+    return downloader
+
+
+@pytest.mark.parametrize("options", [(), ("--async",)])
+def test_failed_report_list_page_is_fetched_again_after_resume(tmp_path: Path, options: tuple[str, ...]) -> None:
+    """一覧ページの取得に失敗した場合は処理済みとして記録せず、再開時に取得し直すことのテスト"""
+    downloader = make_downloader(tmp_path, *options)
+    # メタデータを保存する前に中断された場合を再現する
+    downloader.metadata_manager.save = Mock()
+
+    assert downloader.download_all()
+
+    journal = (tmp_path / "metadata.journal.jsonl").read_text(encoding="utf-8").splitlines()
+    pages = [record["url"] for record in map(json.loads, journal) if record["type"] == "page"]
+    # PDFのないページは取得できたため処理済み、取得に失敗したページは未処理のまま
+    assert pages == [EMPTY_LIST_URL]
+
+    resumed = make_downloader(tmp_path, *options)
+    assert resumed.metadata_manager.resume()
+    assert resumed.metadata_manager.is_page_completed(EMPTY_LIST_URL)
+    assert not resumed.metadata_manager.is_page_completed(FAILED_LIST_URL)
+
+
+def test_failed_pdf_is_detected_again_by_next_diff(tmp_path: Path) -> None:
+    """--diffでダウンロードに失敗したPDFは計画に記録せず、次回の--diffでも差分になることのテスト"""
+    pages = {BASE_URL: "<html></html>", EMPTY_LIST_URL: "<html></html>"}
+    downloader = make_downloader(tmp_path)
+    downloader.page_parser.fetch_html = lambda url: pages.get(url)
+    assert downloader.build_plan()
+
+    pages[EMPTY_LIST_URL] = '<a href="000_001.pdf">団体1</a>'
+    downloader = make_downloader(tmp_path)
+    downloader.page_parser.fetch_html = lambda url: pages.get(url)
+    downloader.pdf_downloader.delay = 0
+
+    assert not downloader.download_changes()
+
+    plan = CrawlPlan.load(str(tmp_path))
+    assert plan is not None
+    assert plan.pdf_links() == []
+    _, changes = CrawlPlanner(downloader.page_parser, plan.parameters).build(plan)
+    assert [change.pdf_link.text for change in changes] == ["団体1"]
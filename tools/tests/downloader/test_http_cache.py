@@ -0,0 +1,166 @@
+# ruff: noqa
+"""HTTPValidatorCacheクラスと条件付きGETのテスト"""
+
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from downloader.http_cache import CacheEntry, HTTPValidatorCache
+from downloader.metadata import FileMetadata
+from downloader.page_parser import PageParser
+from downloader.pdf_downloader import PDFDownloader
+
+
+def make_metadata() -> FileMetadata:
+    return FileMetadata(
+        filename="test.pdf",
+        original_url="https://example.com/test.pdf",
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+    )
+
+
+def make_response(status_code: int, headers: dict[str, str], body: bytes = b"") -> Mock:
+    response = Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.content = body
+    response.text = body.decode("shift_jis")
+    response.iter_content.return_value = [body]
+    return response
+
+
+def test_cache_entry_conditional_headers() -> None:
+    """CacheEntryの条件付きGETヘッダーのテスト"""
+    entry = CacheEntry(url="https://example.com/", etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+    assert entry.conditional_headers() == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert CacheEntry(url="https://example.com/").conditional_headers() == {}
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    """キャッシュの保存と読み込みのテスト"""
+    cache = HTTPValidatorCache(str(tmp_path))
+    cache.update("https://example.com/a.pdf", {"ETag": '"v1"'}, content_length=3, sha256="deadbeef")
+    cache.store_body("https://example.com/list.html", b"<html></html>")
+    assert cache.save() is True
+
+    reloaded = HTTPValidatorCache(str(tmp_path))
+    entry = reloaded.get("https://example.com/a.pdf")
+    assert entry is not None
+    assert entry.etag == '"v1"'
+    assert entry.content_length == 3
+    assert entry.sha256 == "deadbeef"
+    assert reloaded.load_body("https://example.com/list.html") == b"<html></html>"
+    assert reloaded.load_body("https://example.com/other.html") is None
+
+
+def test_broken_cache_file_is_ignored(tmp_path: Path) -> None:
+    """壊れたキャッシュファイルを無視するテスト"""
+    (tmp_path / "http_cache.json").write_text("{broken", encoding="utf-8")
+
+    cache = HTTPValidatorCache(str(tmp_path))
+
+    assert cache.entries == {}
+
+
+def test_interrupted_save_keeps_previous_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """保存が途中で失敗しても、前回保存したキャッシュが壊れずに残ることのテスト"""
+    cache = HTTPValidatorCache(str(tmp_path))
+    cache.update("https://example.com/a.pdf", {"ETag": '"v1"'})
+    assert cache.save() is True
+
+    def broken_dump(data, f, **kwargs) -> None:
+        f.write('{"entries": {')
+        raise OSError("disk full")
+
+    cache.update("https://example.com/b.pdf", {"ETag": '"v2"'})
+    monkeypatch.setattr("downloader.http_cache.json.dump", broken_dump)
+    assert cache.save() is False
+    monkeypatch.undo()
+
+    reloaded = HTTPValidatorCache(str(tmp_path))
+    assert set(reloaded.entries) == {"https://example.com/a.pdf"}
+
+
+@pytest.fixture
+def cached_pdf(tmp_path: Path) -> tuple[HTTPValidatorCache, Path]:
+    """キャッシュ済みの既存PDFを用意するフィクスチャ"""
+    save_path = tmp_path / "test.pdf"
+    save_path.write_bytes(b"old")
+    cache = HTTPValidatorCache(str(tmp_path))
+    cache.update("https://example.com/test.pdf", {"ETag": '"v1"'}, content_length=3)
+    return cache, save_path
+
+
+def test_download_pdf_not_modified(cached_pdf: tuple[HTTPValidatorCache, Path]) -> None:
+    """304応答の場合に本文を取得せず既存ファイルを使用するテスト"""
+    cache, save_path = cached_pdf
+    session = Mock(spec=requests.Session)
+    session.get.return_value = make_response(304, {"ETag": '"v1"'})
+    downloader = PDFDownloader(session=session, output_dir=str(save_path.parent), force=True, http_cache=cache)
+
+    result = downloader.download_pdf("https://example.com/test.pdf", str(save_path), make_metadata())
+
+    assert result.download_status == "skipped"
+    assert result.file_size == 3
+    assert save_path.read_bytes() == b"old"
+    session.get.assert_called_once_with(
+        "https://example.com/test.pdf",
+        stream=True,
+        headers={"If-None-Match": '"v1"'},
+    )
+
+
+def test_download_pdf_modified_updates_cache(cached_pdf: tuple[HTTPValidatorCache, Path]) -> None:
+    """更新されていた場合に再ダウンロードしてキャッシュを更新するテスト"""
+    cache, save_path = cached_pdf
+    session = Mock(spec=requests.Session)
+    session.get.return_value = make_response(200, {"ETag": '"v2"', "content-length": "5"}, b"newer")
+    downloader = PDFDownloader(session=session, output_dir=str(save_path.parent), force=True, http_cache=cache)
+
+    result = downloader.download_pdf("https://example.com/test.pdf", str(save_path), make_metadata())
+
+    assert result.download_status == "success"
+    assert save_path.read_bytes() == b"newer"
+    entry = cache.get("https://example.com/test.pdf")
+    assert entry is not None
+    assert entry.etag == '"v2"'
+    assert entry.content_length == 5
+    assert entry.sha256 is not None
+
+
+def test_download_pdf_size_mismatch_skips_validation(cached_pdf: tuple[HTTPValidatorCache, Path]) -> None:
+    """既存ファイルのサイズが記録と異なる場合は条件付きGETを行わないテスト"""
+    cache, save_path = cached_pdf
+    save_path.write_bytes(b"truncated")
+    session = Mock(spec=requests.Session)
+    session.get.return_value = make_response(200, {}, b"full")
+    downloader = PDFDownloader(session=session, output_dir=str(save_path.parent), force=True, http_cache=cache)
+
+    downloader.download_pdf("https://example.com/test.pdf", str(save_path), make_metadata())
+
+    session.get.assert_called_once_with("https://example.com/test.pdf", stream=True)
+
+
+def test_page_parser_uses_cached_body_on_not_modified(tmp_path: Path, mock_sleep: Mock) -> None:
+    """ページが304の場合に保存済みのHTMLを使用するテスト"""
+    url = "https://example.com/list.html"
+    cache = HTTPValidatorCache(str(tmp_path))
+    session = Mock(spec=requests.Session)
+    parser = PageParser(session=session, delay=0, sleep_func=mock_sleep, http_cache=cache)
+
+    session.get.return_value = make_response(200, {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, b"<a>first</a>")
+    assert parser._fetch_url(url) == "<a>first</a>"
+    session.get.assert_called_with(url)
+
+    session.get.return_value = make_response(304, {})
+    assert parser._fetch_url(url) == "<a>first</a>"
+    session.get.assert_called_with(url, headers={"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
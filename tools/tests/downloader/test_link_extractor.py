@@ -0,0 +1,58 @@
+# ruff: noqa
+"""リンク抽出バックエンドのテスト"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from downloader.benchmark_links import generate_report_list_html
+from downloader.link_extractor import YEAR_PATTERN_REGEX, Anchor, SoupLinkExtractor, StreamingLinkExtractor
+from downloader.page_parser import PageParser, ReportListPageLink
+
+HTML_CASES = [
+    '<a href="a.pdf">テスト&amp;団体</a>',
+    '<a href="a.pdf"><span>入れ子</span>の<b>テキスト</b></a>',
+    '<a name="top">hrefなし</a><a href="">空のhref</a><a href="b.pdf">B</a>',
+    '<p><a href="a.pdf">閉じていない<a href="b.pdf">次のリンク</a>',
+    '<a href="/reports/SS20241129/">令和5年分 定期公表</a>',
+    "<a href='c.pdf'>&#x653F;&#27835;</a>",
+]
+
+
+@pytest.mark.parametrize("html", HTML_CASES)
+def test_streaming_matches_soup(html: str) -> None:
+    """ストリーミング方式がBeautifulSoupと同じリンクを抽出することのテスト"""
+    assert StreamingLinkExtractor().extract(html) == SoupLinkExtractor(BeautifulSoup).extract(html)
+
+
+def test_streaming_extracts_text_and_entities() -> None:
+    """文字参照の展開と入れ子要素のテキスト結合のテスト"""
+    anchors = StreamingLinkExtractor().extract('<a href="a.pdf?x=1&amp;y=2"><b>政治</b>団体&amp;支部</a>')
+
+    assert anchors == [Anchor(href="a.pdf?x=1&y=2", text="政治団体&支部")]
+
+
+def test_streaming_matches_soup_on_large_page() -> None:
+    """大きなページでも結果が一致することのテスト"""
+    html = generate_report_list_html(200)
+
+    anchors = StreamingLinkExtractor().extract(html)
+
+    assert len(anchors) == 200
+    assert anchors == SoupLinkExtractor(BeautifulSoup).extract(html)
+
+
+def test_year_pattern_regex() -> None:
+    """年度パターンの結合正規表現のテスト"""
+    assert YEAR_PATTERN_REGEX.search("令和5年分 定期公表")
+    assert not YEAR_PATTERN_REGEX.search("お知らせ")
+
+
+def test_page_parser_backends_agree(page_parser: PageParser, soup_factory) -> None:
+    """PageParserのバックエンドによって解析結果が変わらないことのテスト"""
+    html = '<a href="000_001.pdf"> テスト団体 </a><a href="x.html">PDFではない</a>'
+    link = ReportListPageLink(url="https://example.com/SL/list.html", text="一覧", year="R5")
+    soup_parser = PageParser(session=page_parser.session, delay=0, soup_factory=soup_factory)
+
+    assert isinstance(page_parser.link_extractor, StreamingLinkExtractor)
+    assert isinstance(soup_parser.link_extractor, SoupLinkExtractor)
+    assert page_parser.parse_report_list_page_html(html, link) == soup_parser.parse_report_list_page_html(html, link)
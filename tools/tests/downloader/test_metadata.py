@@ -1,6 +1,7 @@
 # ruff: noqa
 """MetadataManagerクラスのテスト"""
 
+import json
 from pathlib import Path
 from unittest.mock import mock_open, patch
 
@@ -247,3 +248,141 @@ def test_get_statistics(metadata_manager: MetadataManager) -> None:
     assert stats.skipped_files == 3
     assert stats.failed_files == 2
     assert stats.total_size == 5000
+
+
+def make_journal_manager(output_dir: Path, years: list[str] | None = None) -> MetadataManager:
+    """ジャーナルを有効にしたMetadataManagerを作成する"""
+    return MetadataManager(
+        output_dir=str(output_dir),
+        years=years or ["R5"],
+        categories=[],
+        name_filter=None,
+        exact_match=False,
+        journal=True,
+    )
+
+
+def make_file(filename: str, status: str = "success", year: str = "R5", category: str = "政党支部") -> FileMetadata:
+    return FileMetadata(
+        filename=filename,
+        original_url=f"https://example.com/{filename}",
+        organization="テスト団体",
+        category=category,
+        year=year,
+        file_size=100,
+        download_status=status,
+    )
+
+
+def test_metadata_files_are_not_duplicated(metadata_manager: MetadataManager) -> None:
+    """metadataのファイル一覧がfilesから生成されることのテスト"""
+    metadata_manager.add_file(make_file("a.pdf"))
+
+    assert metadata_manager.metadata["files"] == [metadata_manager.files[0].to_dict()]
+
+
+def test_journal_is_written_incrementally(tmp_path: Path) -> None:
+    """add_file時にジャーナルへ逐次書き込まれることのテスト"""
+    manager = make_journal_manager(tmp_path)
+    manager.add_file(make_file("a.pdf"))
+    manager.mark_page_completed("https://example.com/list.html")
+
+    lines = (tmp_path / "metadata.journal.jsonl").read_text(encoding="utf-8").splitlines()
+
+    assert len(lines) == 3
+    assert '"type": "start"' in lines[0]
+    assert '"a.pdf"' in lines[1]
+    assert '"https://example.com/list.html"' in lines[2]
+
+
+def test_resume_restores_state(tmp_path: Path) -> None:
+    """中断されたクロールの状態を復元するテスト"""
+    manager = make_journal_manager(tmp_path)
+    manager.add_file(make_file("a.pdf"))
+    manager.add_file(make_file("b.pdf", status="failed"))
+    manager.add_file(make_file("b.pdf"))
+    manager.mark_page_completed("https://example.com/list.html")
+    # 書き込み途中で中断された行
+    with (tmp_path / "metadata.journal.jsonl").open("a", encoding="utf-8") as f:
+        f.write('{"type": "file", "fi')
+
+    resumed = make_journal_manager(tmp_path)
+
+    assert resumed.resume() is True
+    assert [file.filename for file in resumed.files] == ["a.pdf", "b.pdf"]
+    assert resumed.statistics.downloaded_files == 2
+    assert resumed.statistics.failed_files == 0
+    assert resumed.is_page_completed("https://example.com/list.html")
+    assert not resumed.is_page_completed("https://example.com/other.html")
+
+
+def test_resume_then_rewalk_does_not_duplicate_files(tmp_path: Path) -> None:
+    """再開後に未完了の一覧ページを取得し直しても、ファイルの記録と統計情報が重複しないことのテスト"""
+    # 1ページ目はb.pdfの失敗で未完了のまま中断、2ページ目は完了
+    manager = make_journal_manager(tmp_path)
+    manager.add_file(make_file("a.pdf"))
+    manager.add_file(make_file("b.pdf", status="failed"))
+    manager.add_file(make_file("c.pdf"))
+    manager.mark_page_completed("https://example.com/list2.html")
+
+    resumed = make_journal_manager(tmp_path)
+    assert resumed.resume() is True
+    # 1ページ目を取得し直す(a.pdfは既存ファイルとしてスキップ、b.pdfは再取得に成功)
+    resumed.add_file(make_file("a.pdf", status="skipped"))
+    resumed.add_file(make_file("b.pdf"))
+    resumed.mark_page_completed("https://example.com/list1.html")
+
+    assert [file.filename for file in resumed.files] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert resumed.statistics == Statistics(
+        total_files=3, downloaded_files=2, skipped_files=1, failed_files=0, total_size=200
+    )
+    assert resumed.save() is True
+    saved = json.loads((tmp_path / "metadata.json").read_text(encoding="utf-8"))
+    assert [file["filename"] for file in saved["files"]] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert saved["statistics"]["failed_files"] == 0
+
+
+def test_resume_with_different_parameters(tmp_path: Path) -> None:
+    """パラメータが異なる場合は再開しないテスト"""
+    manager = make_journal_manager(tmp_path, years=["R5"])
+    manager.add_file(make_file("a.pdf"))
+
+    other = make_journal_manager(tmp_path, years=["R4"])
+
+    assert other.resume() is False
+    assert other.files == []
+
+
+def test_save_removes_journal(tmp_path: Path) -> None:
+    """保存後にジャーナルが削除されることのテスト"""
+    manager = make_journal_manager(tmp_path)
+    manager.add_file(make_file("a.pdf"))
+
+    assert manager.save() is True
+    assert (tmp_path / "metadata.json").exists()
+    assert not (tmp_path / "metadata.journal.jsonl").exists()
+
+
+def test_compact(tmp_path: Path) -> None:
+    """ジャーナルの圧縮のテスト"""
+    manager = make_journal_manager(tmp_path)
+    manager.add_file(make_file("a.pdf", status="failed"))
+    manager.add_file(make_file("a.pdf"))
+
+    assert manager.compact() is True
+    manager.add_file(make_file("b.pdf"))
+
+    lines = (tmp_path / "metadata.journal.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+    assert '"failed"' not in "".join(lines)
+
+
+def test_query(metadata_manager: MetadataManager) -> None:
+    """queryメソッドのテスト"""
+    metadata_manager.add_file(make_file("a.pdf", year="R5", category="政党支部"))
+    metadata_manager.add_file(make_file("b.pdf", year="R4", category="政党支部", status="failed"))
+    metadata_manager.add_file(make_file("c.pdf", year="R5", category="政党本部"))
+
+    assert [f.filename for f in metadata_manager.query(year="R5")] == ["a.pdf", "c.pdf"]
+    assert [f.filename for f in metadata_manager.query(category="政党支部", status="failed")] == ["b.pdf"]
+    assert len(metadata_manager.query()) == 3
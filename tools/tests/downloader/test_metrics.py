@@ -0,0 +1,67 @@
+# ruff: noqa
+"""メトリクスのテスト"""
+
+import json
+from pathlib import Path
+
+import requests
+
+from downloader.metrics import Metrics
+from downloader.scheduler import PoliteScheduler
+
+
+class FakeClock:
+    """手動で進める時計"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_metrics_aggregate_by_host_and_export(tmp_path: Path) -> None:
+    """ホストごとの集計とPrometheus形式・JSON形式の出力のテスト"""
+    clock = FakeClock()
+    metrics = Metrics(clock=clock, cpu_clock=lambda: 0.0)
+
+    with metrics.time("download", "https://example.com/a.pdf"):
+        clock.now += 2.0
+    metrics.add_bytes("https://example.com/a.pdf", 1000)
+    metrics.add_bytes("https://example.com/b.pdf", 3000)
+    metrics.count_retry("https://example.com/a.pdf", requests.ConnectionError())
+    metrics.add_sleep("https://example.com/", 1.5)
+    metrics.add_sleep("https://example.com/", 4.0, reason="backoff")
+    metrics.set_queue_depth("https://example.com/", 3)
+    metrics.set_queue_depth("https://example.com/", 1)
+
+    assert metrics.value("bytes_total", host="https://example.com") == 4000
+    assert metrics.value("sleep_seconds_total") == 5.5
+    assert metrics.value("sleep_seconds_total", reason="politeness") == 1.5
+    assert metrics.value("queue_depth_max") == 3
+
+    text = metrics.to_prometheus()
+    assert "# TYPE seijishikin_downloader_retries_total counter" in text
+    assert 'seijishikin_downloader_retries_total{host="https://example.com",exception="ConnectionError"} 1' in text
+    assert 'seijishikin_downloader_bytes_per_second{host="https://example.com"} 2000' in text
+    assert "seijishikin_downloader_elapsed_seconds 2" in text
+
+    assert metrics.save(str(tmp_path / "metrics.json"))
+    data = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))
+    assert data["phase_seconds_total"] == [
+        {"labels": {"phase": "download", "host": "https://example.com"}, "value": 2.0},
+    ]
+    assert metrics.save(str(tmp_path / "metrics.prom"))
+    assert (tmp_path / "metrics.prom").read_text(encoding="utf-8") == metrics.to_prometheus()
+
+
+def test_scheduler_records_politeness_wait() -> None:
+    """スケジューラがホストの待機時間と待ち行列の長さを記録することのテスト"""
+    metrics = Metrics()
+    with PoliteScheduler(2, lambda url: 0.05, metrics=metrics) as scheduler:
+        for i in range(3):
+            scheduler.submit(f"https://example.com/{i}.pdf", lambda: None)
+
+    # 2件目以降は前のタスクの完了から0.05秒待機する
+    assert metrics.value("sleep_seconds_total", host="https://example.com") >= 0.08
+    assert metrics.value("queue_depth_max", host="https://example.com") >= 1
@@ -0,0 +1,75 @@
+# ruff: noqa
+"""団体名インデックスのテスト"""
+
+from pathlib import Path
+
+from downloader.name_index import IndexedPdf, NameIndex, normalize_name
+
+REPORT_LIST_URL = "https://www.soumu.go.jp/senkyo/seiji_s/seijishikin/reports/SS20231124/SL/000001.html"
+
+
+def make_index() -> NameIndex:
+    """テスト用のインデックスを作成"""
+    names = [
+        ("R5", "自由民主党東京都支部連合会"),
+        ("R4", "自由民主党東京都支部連合会"),
+        ("R5", "立憲民主党東京都総支部連合会"),
+        ("R5", "ＡＢＣ政策研究会"),
+        ("R4", "みらいネットワーク"),
+    ]
+    entries = [
+        IndexedPdf(
+            url=f"https://example.com/{year}/{i:03d}.pdf",
+            text=text,
+            report_list_url=REPORT_LIST_URL,
+            year=year,
+            category="政党支部",
+        )
+        for i, (year, text) in enumerate(names)
+    ]
+    return NameIndex(entries, "2024-01-01T00:00:00+00:00", {})
+
+
+def test_normalize_name() -> None:
+    """全角英数字・カタカナ・空白の正規化のテスト"""
+    assert normalize_name("ＡＢＣ 政策・研究会") == "abc政策研究会"
+    assert normalize_name("ミライﾈｯﾄﾜｰｸ") == normalize_name("みらいネットワーク")
+
+
+def test_search_partial_across_years() -> None:
+    """部分一致で全年度の報告書を検索できることのテスト"""
+    index = make_index()
+
+    matches = index.search("自由民主党東京")
+    assert [(match.year, match.text) for match in matches] == [
+        ("R5", "自由民主党東京都支部連合会"),
+        ("R4", "自由民主党東京都支部連合会"),
+    ]
+    assert len(index.search("東京都")) == 3
+    assert [match.text for match in index.search("abc")] == ["ＡＢＣ政策研究会"]
+    assert [match.text for match in index.search("ミライネット")] == ["みらいネットワーク"]
+    assert index.search("大阪") == []
+
+
+def test_search_exact_and_fuzzy() -> None:
+    """完全一致とあいまい検索のテスト"""
+    index = make_index()
+
+    assert index.search("自由民主党東京都", exact=True) == []
+    assert len(index.search("自由民主党 東京都支部連合会", exact=True)) == 2
+
+    # 誤記を含む検索語でも、一致率の高い団体名が先頭に来る
+    matches = index.search("自由民主党東京都支部聯合会", fuzzy=True)
+    assert matches[0].text == "自由民主党東京都支部連合会"
+    assert "ＡＢＣ政策研究会" not in [match.text for match in matches]
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    """保存したインデックスを読み込んで検索できることのテスト"""
+    make_index().save(str(tmp_path))
+
+    loaded = NameIndex.load(str(tmp_path))
+    assert loaded is not None
+    assert len(loaded) == 5
+    assert loaded.search("立憲")[0].pdf_link().report_list_url == REPORT_LIST_URL
+    assert NameIndex.load(str(tmp_path / "missing")) is None
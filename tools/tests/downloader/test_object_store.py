@@ -0,0 +1,92 @@
+# ruff: noqa
+"""ObjectStoreクラスとコンテンツアドレス方式の保存のテスト"""
+
+import hashlib
+from pathlib import Path
+from unittest.mock import Mock
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from downloader.http_cache import HTTPValidatorCache
+from downloader.metadata import FileMetadata
+from downloader.object_store import ObjectStore
+from downloader.pdf_downloader import PDFDownloader
+
+BODY = b"%PDF-1.4 test"
+SHA256 = hashlib.sha256(BODY).hexdigest()
+
+
+def make_metadata(url: str) -> FileMetadata:
+    return FileMetadata(
+        filename=url.rsplit("/", 1)[-1],
+        original_url=url,
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+    )
+
+
+def make_response(etag: str = '"v1"') -> Mock:
+    response = Mock(spec=requests.Response)
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({"ETag": etag, "content-length": str(len(BODY))})
+    response.iter_content.return_value = [BODY]
+    return response
+
+
+def test_object_path(tmp_path: Path) -> None:
+    """オブジェクトのパスがSHA-256の先頭2文字で分割されることのテスト"""
+    store = ObjectStore(str(tmp_path))
+
+    assert store.object_path(SHA256) == tmp_path / "objects" / SHA256[:2] / f"{SHA256[2:]}.pdf"
+
+
+def test_add_deduplicates(tmp_path: Path) -> None:
+    """同じ内容のファイルを1つだけ保存することのテスト"""
+    store = ObjectStore(str(tmp_path))
+    for name in ("a.part", "b.part"):
+        path = tmp_path / name
+        path.write_bytes(BODY)
+        store.add(path, SHA256)
+        store.link(SHA256, str(tmp_path / name.replace(".part", ".pdf")))
+
+    assert list((tmp_path / "objects").rglob("*.pdf")) == [store.object_path(SHA256)]
+    assert (tmp_path / "a.pdf").stat().st_ino == (tmp_path / "b.pdf").stat().st_ino
+    assert not (tmp_path / "a.part").exists()
+
+
+def test_find_ignores_weak_etag_and_missing_object(tmp_path: Path) -> None:
+    """弱いETagや実体のないオブジェクトは重複とみなさないことのテスト"""
+    store = ObjectStore(str(tmp_path))
+    store.register('W/"v1"', len(BODY), SHA256)
+    store.register('"v2"', len(BODY), SHA256)
+
+    assert store.find('W/"v1"', len(BODY)) is None
+    assert store.find('"v2"', len(BODY)) is None
+
+
+def test_duplicate_is_linked_without_transfer(tmp_path: Path) -> None:
+    """ETagとサイズが一致する場合に本文を取得せずにリンクすることのテスト"""
+    cache = HTTPValidatorCache(str(tmp_path))
+    store = ObjectStore(str(tmp_path), cache)
+    session = Mock(spec=requests.Session)
+    downloader = PDFDownloader(session=session, output_dir=str(tmp_path), http_cache=cache, object_store=store)
+
+    session.get.return_value = make_response()
+    first = downloader.download_pdf("https://example.com/a.pdf", str(tmp_path / "R5_a.pdf"), make_metadata("a"))
+
+    duplicate = make_response()
+    session.get.return_value = duplicate
+    second = downloader.download_pdf("https://example.com/b.pdf", str(tmp_path / "R5_b.pdf"), make_metadata("b"))
+
+    assert first.download_status == "success"
+    assert first.sha256 == SHA256
+    assert second.download_status == "skipped"
+    assert second.sha256 == SHA256
+    duplicate.iter_content.assert_not_called()
+    assert (tmp_path / "R5_b.pdf").read_bytes() == BODY
+    assert (tmp_path / "R5_a.pdf").stat().st_ino == store.object_path(SHA256).stat().st_ino
+
+    # 次回の実行でもHTTPキャッシュから重複を検出できる
+    assert ObjectStore(str(tmp_path), cache).find('"v1"', len(BODY)) == SHA256
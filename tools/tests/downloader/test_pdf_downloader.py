@@ -1,15 +1,19 @@
 # ruff: noqa
 """PDFDownloaderクラスのテスト"""
 
+import gzip
+import io
 from pathlib import Path
 from unittest.mock import Mock, mock_open, patch
 
 import pytest
 import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
 
 from downloader.metadata import FileMetadata
 from downloader.page_parser import PdfLink
-from downloader.pdf_downloader import DownloadPrepareResult, PDFDownloader
+from downloader.pdf_downloader import DownloadPrepareResult, PDFDownloader, chunk_size_for, stream_to_file
 
 
 @pytest.fixture
@@ -218,6 +222,7 @@ def test_download_pdf_success(pdf_downloader: PDFDownloader) -> None:
         patch("pathlib.Path.stat") as mock_stat,
         patch("pathlib.Path.exists") as mock_exists,
         patch("pathlib.Path.is_dir") as mock_is_dir,
+        patch("pathlib.Path.replace") as mock_replace,
         patch("time.strftime") as mock_strftime,
         patch("time.sleep"),  # 使用しないが必要なモック
         patch("tqdm.tqdm") as mock_tqdm,
@@ -265,3 +270,175 @@ def test_download_pdf_success(pdf_downloader: PDFDownloader) -> None:
         )
         # Pathオブジェクトのopenメソッドが呼ばれることを確認
         assert mock_file.called
+        # 一時ファイルから保存先へ置き換えられることを確認
+        mock_replace.assert_called_once_with("test_output/test.pdf")
+
+
+def _make_response(status_code: int, headers: dict[str, str], chunks: list) -> Mock:
+    """ストリーミングレスポンスのモックを作成する"""
+    response = Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+
+    def iter_content(chunk_size: int):
+        for chunk in chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    response.iter_content.side_effect = iter_content
+    return response
+
+
+def test_download_pdf_resumes_with_range(tmp_path: Path) -> None:
+    """接続が切れた場合にRangeリクエストで続きから再開するテスト"""
+    session = Mock(spec=requests.Session)
+    session.get.side_effect = [
+        _make_response(
+            200,
+            {"content-length": "10", "etag": '"v1"'},
+            [b"abcd", requests.ConnectionError("切断")],
+        ),
+        _make_response(
+            206,
+            {"content-length": "6", "content-range": "bytes 4-9/10", "etag": '"v1"'},
+            [b"efghij"],
+        ),
+    ]
+    downloader = PDFDownloader(session=session, output_dir=str(tmp_path), delay=0)
+    save_path = tmp_path / "test.pdf"
+
+    metadata = FileMetadata(
+        filename="test.pdf",
+        original_url="https://example.com/test.pdf",
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+    )
+    result = downloader.download_pdf("https://example.com/test.pdf", str(save_path), metadata)
+
+    assert result.download_status == "success"
+    assert save_path.read_bytes() == b"abcdefghij"
+    assert not (tmp_path / "test.pdf.part").exists()
+    session.get.assert_called_with(
+        "https://example.com/test.pdf",
+        stream=True,
+        headers={"Range": "bytes=4-", "If-Range": '"v1"', "Accept-Encoding": "identity"},
+    )
+
+
+def test_download_pdf_truncated_is_not_committed(tmp_path: Path) -> None:
+    """Content-Lengthに満たないダウンロードが保存先に置かれないテスト"""
+    session = Mock(spec=requests.Session)
+    session.get.side_effect = [_make_response(200, {"content-length": "10"}, [b"abcd"]) for _ in range(3)]
+    downloader = PDFDownloader(session=session, output_dir=str(tmp_path), delay=0)
+    save_path = tmp_path / "test.pdf"
+
+    metadata = FileMetadata(
+        filename="test.pdf",
+        original_url="https://example.com/test.pdf",
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+    )
+    result = downloader.download_pdf("https://example.com/test.pdf", str(save_path), metadata)
+
+    assert result.download_status == "failed"
+    assert not save_path.exists()
+    assert not (tmp_path / "test.pdf.part").exists()
+
+
+def _make_raw_response(status_code: int, headers: dict[str, str], body: bytes) -> Mock:
+    """urllib3のレスポンスを持つストリーミングレスポンスのモックを作成する"""
+    response = Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.raw = urllib3.HTTPResponse(body=io.BytesIO(body), headers=headers, preload_content=False)
+    return response
+
+
+def test_download_pdf_gzip_encoded(tmp_path: Path) -> None:
+    """Content-Encodingで圧縮された応答を、Content-Lengthと比較せずに展開して保存するテスト"""
+    body = b"%PDF-1.4 " + b"0123456789" * 1000
+    compressed = gzip.compress(body)
+    session = Mock(spec=requests.Session)
+    session.get.return_value = _make_raw_response(
+        200,
+        {"content-length": str(len(compressed)), "content-encoding": "gzip", "etag": '"v1"'},
+        compressed,
+    )
+    downloader = PDFDownloader(session=session, output_dir=str(tmp_path), delay=0)
+    save_path = tmp_path / "test.pdf"
+
+    metadata = FileMetadata(
+        filename="test.pdf",
+        original_url="https://example.com/test.pdf",
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+    )
+    result = downloader.download_pdf("https://example.com/test.pdf", str(save_path), metadata)
+
+    assert result.download_status == "success"
+    assert save_path.read_bytes() == body
+    assert session.get.call_count == 1
+
+
+def test_download_pdf_gzip_encoded_is_not_resumed(tmp_path: Path) -> None:
+    """圧縮された応答が途中で切れた場合は、Rangeで再開せずに先頭から取得し直すテスト"""
+    session = Mock(spec=requests.Session)
+    session.get.side_effect = [
+        _make_response(
+            200,
+            {"content-length": "10", "content-encoding": "gzip", "etag": '"v1"'},
+            [b"abcd", requests.ConnectionError("切断")],
+        ),
+        _make_response(200, {"content-length": "10", "etag": '"v1"'}, [b"abcdefghij"]),
+    ]
+    downloader = PDFDownloader(session=session, output_dir=str(tmp_path), delay=0)
+    save_path = tmp_path / "test.pdf"
+
+    metadata = FileMetadata(
+        filename="test.pdf",
+        original_url="https://example.com/test.pdf",
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+    )
+    result = downloader.download_pdf("https://example.com/test.pdf", str(save_path), metadata)
+
+    assert result.download_status == "success"
+    assert save_path.read_bytes() == b"abcdefghij"
+    session.get.assert_called_with("https://example.com/test.pdf", stream=True)
+
+
+def test_chunk_size_for() -> None:
+    """Content-Lengthに応じた読み込みサイズのテスト"""
+    assert chunk_size_for(None) == 1024 * 1024
+    assert chunk_size_for(10_000) == 256 * 1024
+    assert chunk_size_for(16 * 1024 * 1024) == 1024 * 1024
+    assert chunk_size_for(1024 * 1024 * 1024) == 4 * 1024 * 1024
+
+
+def test_stream_to_file_uses_readinto() -> None:
+    """urllib3のレスポンスからバッファに直接読み込むテスト"""
+    body = bytes(range(256)) * 100
+    response = Mock(spec=requests.Response)
+    response.raw = urllib3.HTTPResponse(body=io.BytesIO(body), preload_content=False)
+    output = io.BytesIO()
+
+    sizes = list(stream_to_file(response, output, 4096))
+
+    assert output.getvalue() == body
+    assert sizes[:-1] == [4096] * (len(sizes) - 1)
+    response.iter_content.assert_not_called()
+
+
+def test_stream_to_file_maps_urllib3_errors() -> None:
+    """受信中のurllib3の例外がリトライ対象のrequestsの例外に変換されるテスト"""
+    response = Mock(spec=requests.Response)
+    response.raw = Mock()
+    response.raw.readinto.side_effect = urllib3.exceptions.ProtocolError("connection broken")
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        list(stream_to_file(response, io.BytesIO(), 4096))
@@ -0,0 +1,68 @@
+# ruff: noqa
+"""TransferProgressクラスのテスト"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from downloader.progress import TransferProgress
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_progress(clock: FakeClock) -> tuple[TransferProgress, Mock]:
+    bar = Mock()
+    bar.total = 0
+    return TransferProgress(interval=0.5, clock=clock, bar_factory=Mock(return_value=bar)), bar
+
+
+def test_updates_are_aggregated_and_rate_limited() -> None:
+    """複数ファイルの転送量が1本の進捗バーにまとめられ、一定間隔でのみ再描画されるテスト"""
+    clock = FakeClock()
+    progress, bar = make_progress(clock)
+    clock.now = 1.0
+
+    with progress.track(100) as update_a, progress.track(50) as update_b:
+        update_a(10)
+        update_b(10)
+        update_a(10)
+        assert bar.update.call_count == 1
+        clock.now = 2.0
+        update_b(5)
+
+    assert progress.transferred == 35
+    assert bar.update.call_args_list[1].args == (25,)
+    assert progress.finished_files == 2
+    progress.close()
+    bar.close.assert_called_once()
+
+
+def test_incomplete_transfer_is_removed_from_total() -> None:
+    """途中で終わった転送の残りが合計から差し引かれるテスト"""
+    progress, _ = make_progress(FakeClock())
+
+    with pytest.raises(OSError), progress.track(100) as update:
+        update(30)
+        raise OSError
+
+    with progress.track(100, initial=30) as update:
+        update(70)
+
+    assert progress.total == 100
+    assert progress.transferred == 100
+
+
+def test_unknown_size_is_counted_when_finished() -> None:
+    """サイズ不明のファイルは受信した分を合計に加えるテスト"""
+    progress, _ = make_progress(FakeClock())
+
+    with progress.track(None) as update:
+        update(42)
+
+    assert progress.total == 42
@@ -0,0 +1,65 @@
+# ruff: noqa
+"""オフライン再生とベンチマークのテスト"""
+
+from pathlib import Path
+
+import pytest
+import requests
+
+from downloader.benchmark import run_benchmark
+from downloader.config import BASE_URL
+from downloader.replay import CassetteServer, cassette_path, generate_cassette, install
+
+
+@pytest.fixture
+def cassette(tmp_path: Path) -> Path:
+    """小さな合成カセットを提供するフィクスチャ"""
+    cassette_dir = tmp_path / "cassette"
+    generate_cassette(str(cassette_dir), years=1, pages_per_year=2, pdfs_per_page=3, pdf_size=1000)
+    return cassette_dir
+
+
+def test_cassette_path() -> None:
+    """URLとカセット内のパスの対応のテスト"""
+    assert cassette_path(Path("c"), "https://example.com/a/") == Path("c/example.com/a/index.html")
+    assert cassette_path(Path("c"), "https://example.com/a/b.pdf?x=1") == Path("c/example.com/a/b.pdf")
+
+
+def test_server_supports_validators_and_ranges(cassette: Path) -> None:
+    """カセットサーバーが条件付きGETとRangeリクエストに対応することのテスト"""
+    pdf_path = next(cassette.rglob("*.pdf"))
+    pdf_url = "https://" + pdf_path.relative_to(cassette).as_posix()
+
+    with CassetteServer(cassette) as server, requests.Session() as session:
+        install(session, server)
+
+        response = session.get(BASE_URL)
+        assert response.status_code == 200
+        assert "令和5年分" in response.content.decode("shift_jis")
+        assert response.url == BASE_URL
+
+        etag = session.get(pdf_url).headers["ETag"]
+        assert session.get(pdf_url, headers={"If-None-Match": etag}).status_code == 304
+
+        partial = session.get(pdf_url, headers={"Range": "bytes=900-", "If-Range": etag})
+        assert partial.status_code == 206
+        assert partial.content == pdf_path.read_bytes()[900:]
+
+        assert session.get(BASE_URL + "missing.html").status_code == 404
+
+    assert server.requests["html_200"] == 1
+    assert server.requests["pdf_304"] == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_benchmark_runs_download_all_offline(cassette: Path, use_async: bool) -> None:
+    """カセットを使用してダウンロード処理全体を実行できることのテスト"""
+    result = run_benchmark(str(cassette), workers=2, use_async=use_async)
+
+    assert result.pdfs == 6
+    assert result.downloaded_files == 6
+    assert result.failed_files == 0
+    assert result.pdf_bytes == 6000
+    # トップページ・年度ページ・一覧ページ2件(robots.txtは404として数えない)
+    assert result.pages == 4
+    assert result.parse_cpu > 0
@@ -0,0 +1,78 @@
+# ruff: noqa
+"""RobotsCheckerクラスのテスト"""
+
+from pathlib import Path
+from unittest.mock import Mock
+
+import requests
+
+from downloader.robotparser import RobotsChecker
+
+ROBOTS_TXT = "User-agent: *\nCrawl-delay: 5\nDisallow: /private/\n"
+
+
+def make_session(status_code: int = 200, text: str = ROBOTS_TXT) -> Mock:
+    session = Mock(spec=requests.Session)
+    response = Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.text = text
+    session.get.return_value = response
+    return session
+
+
+def test_fetches_through_session(tmp_path: Path) -> None:
+    """robots.txtをHTTPセッションで1回だけ取得することのテスト"""
+    session = make_session()
+    checker = RobotsChecker("TestBot", session=session, cache_dir=str(tmp_path))
+
+    assert checker.get_crawl_delay("https://example.com/a.pdf") == 5.0
+    assert checker.parsers["https://example.com"].can_fetch("TestBot", "https://example.com/private/x") is False
+    assert checker.can_fetch("https://example.com/b.pdf") is True
+
+    session.get.assert_called_once_with("https://example.com/robots.txt")
+
+
+def test_cache_is_shared_between_checkers(tmp_path: Path) -> None:
+    """別のインスタンス(プロセス)がディスクのキャッシュを使用することのテスト"""
+    RobotsChecker("TestBot", session=make_session(), cache_dir=str(tmp_path)).get_crawl_delay("https://example.com/")
+
+    other_session = make_session()
+    checker = RobotsChecker("TestBot", session=other_session, cache_dir=str(tmp_path))
+
+    assert checker.get_crawl_delay("https://example.com/") == 5.0
+    other_session.get.assert_not_called()
+
+
+def test_expired_cache_is_refetched(tmp_path: Path) -> None:
+    """check_intervalを過ぎたキャッシュは再取得することのテスト"""
+    now = [1000.0]
+    RobotsChecker("TestBot", session=make_session(), cache_dir=str(tmp_path), clock=lambda: now[0]).get_crawl_delay(
+        "https://example.com/"
+    )
+
+    now[0] += 86400 + 1
+    session = make_session(text="User-agent: *\nCrawl-delay: 10\n")
+    checker = RobotsChecker("TestBot", session=session, cache_dir=str(tmp_path), clock=lambda: now[0])
+
+    assert checker.get_crawl_delay("https://example.com/") == 10.0
+    session.get.assert_called_once()
+
+
+def test_status_handling(tmp_path: Path) -> None:
+    """ステータスコードの扱いがurllib.robotparserと同じであることのテスト"""
+    forbidden = RobotsChecker("TestBot", session=make_session(403, ""), cache_dir=str(tmp_path / "a"))
+    forbidden.can_fetch("https://example.com/")
+    assert forbidden.parsers["https://example.com"].can_fetch("TestBot", "https://example.com/x") is False
+
+    missing = RobotsChecker("TestBot", session=make_session(404, ""), cache_dir=str(tmp_path / "b"))
+    assert missing.get_crawl_delay("https://example.com/") is None
+    assert missing.parsers["https://example.com"].can_fetch("TestBot", "https://example.com/x") is True
+
+
+def test_server_error_is_not_cached(tmp_path: Path) -> None:
+    """取得に失敗した場合はキャッシュしないことのテスト"""
+    checker = RobotsChecker("TestBot", session=make_session(503, ""), cache_dir=str(tmp_path))
+
+    assert checker.get_crawl_delay("https://example.com/") is None
+    assert not list((tmp_path / ".robots_cache").glob("*.json"))
@@ -0,0 +1,144 @@
+# ruff: noqa
+"""PoliteSchedulerクラスのテスト"""
+
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from downloader.page_parser import PageParser
+from downloader.scheduler import PoliteScheduler, host_key
+
+
+def test_host_key() -> None:
+    """host_key関数のテスト"""
+    assert host_key("https://example.com/a/b.pdf") == "https://example.com"
+    assert host_key("http://example.com:8080/x") == "http://example.com:8080"
+
+
+def test_invalid_workers() -> None:
+    """ワーカー数が0以下の場合のテスト"""
+    with pytest.raises(ValueError):
+        PoliteScheduler(0, lambda _: 0.0)
+
+
+def test_submit_returns_results() -> None:
+    """タスクの結果がFutureで返されることのテスト"""
+    with PoliteScheduler(2, lambda _: 0.0) as scheduler:
+        futures = [scheduler.submit(f"https://example.com/{i}.pdf", lambda i=i: i * 2) for i in range(5)]
+
+    assert [f.result() for f in futures] == [0, 2, 4, 6, 8]
+
+
+def test_exception_is_propagated() -> None:
+    """タスク内の例外がFutureに設定されることのテスト"""
+
+    def fail() -> None:
+        raise RuntimeError("テストエラー")
+
+    with PoliteScheduler(1, lambda _: 0.0) as scheduler:
+        future = scheduler.submit("https://example.com/a.pdf", fail)
+        ok = scheduler.submit("https://example.com/b.pdf", lambda: "ok")
+
+    assert isinstance(future.exception(), RuntimeError)
+    assert ok.result() == "ok"
+
+
+def test_same_host_is_serialized_with_interval() -> None:
+    """同一ホストのタスクが待機時間を空けて1件ずつ実行されることのテスト"""
+    interval = 0.05
+    started: list[float] = []
+    finished: list[float] = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def task() -> None:
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+            started.append(time.monotonic())
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+            finished.append(time.monotonic())
+
+    with PoliteScheduler(4, lambda _: interval) as scheduler:
+        for i in range(3):
+            scheduler.submit(f"https://example.com/{i}.pdf", task)
+
+    assert max_active == 1
+    for previous_end, next_start in zip(finished, started[1:]):
+        assert next_start - previous_end >= interval * 0.9
+
+
+def test_other_hosts_are_not_blocked() -> None:
+    """待機中のホストがあっても他のホストのタスクが実行されることのテスト"""
+    order: list[str] = []
+    lock = threading.Lock()
+
+    def record(name: str) -> None:
+        with lock:
+            order.append(name)
+
+    def interval_for(url: str) -> float:
+        return 10.0 if "slow" in url else 0.0
+
+    scheduler = PoliteScheduler(2, interval_for)
+    scheduler.submit("https://slow.example.com/1.pdf", lambda: record("slow-1"))
+    slow_second = scheduler.submit("https://slow.example.com/2.pdf", lambda: record("slow-2"))
+    fast = [scheduler.submit(f"https://fast.example.com/{i}.pdf", lambda i=i: record(f"fast-{i}")) for i in range(3)]
+
+    for future in fast:
+        future.result(timeout=5)
+
+    assert "slow-2" not in order
+    assert order.count("slow-1") == 1
+    slow_second.cancel()
+    scheduler.close()
+
+
+def test_interval_is_computed_once_per_host() -> None:
+    """待機時間の計算がホストごとに1回だけ行われることのテスト"""
+    calls: list[str] = []
+
+    def interval_for(url: str) -> float:
+        calls.append(url)
+        return 0.0
+
+    with PoliteScheduler(1, interval_for) as scheduler:
+        scheduler.submit("https://example.com/a.pdf", lambda: None)
+        scheduler.submit("https://example.com/b.pdf", lambda: None)
+        scheduler.submit("https://other.example.com/c.pdf", lambda: None)
+
+    assert len(calls) == 2
+
+
+def test_page_fetches_share_host_interval_with_downloads(page_parser: PageParser, mock_sleep: Mock) -> None:
+    """スケジューラを設定したページの取得が、同じホストのダウンロードと待機時間を空けて実行されることのテスト"""
+    interval = 0.05
+    events: list[tuple[str, float, float]] = []
+    lock = threading.Lock()
+
+    def fetch(name: str) -> str:
+        start = time.monotonic()
+        time.sleep(0.01)
+        with lock:
+            events.append((name, start, time.monotonic()))
+        return "<html></html>"
+
+    page_parser.fetch_html = Mock(side_effect=lambda url: fetch("page"))
+
+    with PoliteScheduler(4, lambda _: interval) as scheduler:
+        page_parser.scheduler = scheduler
+        download = scheduler.submit("https://example.com/a.pdf", lambda: fetch("pdf"))
+        html = page_parser._fetch_url("https://example.com/list.html")
+        download.result(timeout=5)
+
+    assert html == "<html></html>"
+    assert [name for name, _, _ in events] == ["pdf", "page"]
+    assert events[1][1] - events[0][2] >= interval * 0.9
+    # 待機はスケジューラが行うため、PageParser自身は待機しない
+    mock_sleep.assert_not_called()
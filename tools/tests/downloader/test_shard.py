@@ -0,0 +1,93 @@
+# ruff: noqa
+"""シャード分割と統合のテスト"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from downloader.http_cache import HTTPValidatorCache
+from downloader.metadata import FileMetadata, MetadataManager
+from downloader.shard import ShardSpec, merge_shards
+
+
+def make_metadata(url: str, status: str = "success", size: int = 10) -> FileMetadata:
+    return FileMetadata(
+        filename=url.rsplit("/", 1)[-1],
+        original_url=url,
+        organization="テスト団体",
+        category="政党支部",
+        year="R5",
+        file_size=size,
+        download_status=status,
+    )
+
+
+def make_manager(output_dir: Path, shard: ShardSpec | None) -> MetadataManager:
+    return MetadataManager(str(output_dir), ["R5"], [], None, exact_match=False, shard=shard)
+
+
+def test_shard_spec_validation() -> None:
+    """不正なシャード指定のテスト"""
+    with pytest.raises(ValueError):
+        ShardSpec(count=0, index=0)
+    with pytest.raises(ValueError):
+        ShardSpec(count=2, index=2)
+    with pytest.raises(ValueError):
+        ShardSpec(count=2, index=0, key="year")
+
+
+def test_each_key_is_owned_by_exactly_one_shard() -> None:
+    """全てのキーがちょうど1つのシャードに割り当てられることのテスト"""
+    shards = [ShardSpec(count=3, index=i) for i in range(3)]
+    urls = [f"https://example.com/reports/SL/{i:04d}.html" for i in range(300)]
+
+    owners = [[shard.index for shard in shards if shard.owns(url)] for url in urls]
+
+    assert all(len(owner) == 1 for owner in owners)
+    # 偏りなく分割されること
+    assert all(sum(owner == [i] for owner in owners) > 50 for i in range(3))
+
+
+def test_metadata_manager_writes_segment(tmp_path: Path) -> None:
+    """シャードを指定した場合にセグメントに保存されることのテスト"""
+    manager = make_manager(tmp_path, ShardSpec(count=2, index=1))
+    manager.add_file(make_metadata("https://example.com/a.pdf"))
+
+    assert manager.save()
+
+    data = json.loads((tmp_path / "metadata.shard-1-of-2.json").read_text(encoding="utf-8"))
+    assert data["shard"] == {"count": 2, "index": 1, "key": "page"}
+    assert not (tmp_path / "metadata.json").exists()
+
+
+def test_merge_shards(tmp_path: Path) -> None:
+    """セグメントを統合して統計情報を再計算するテスト"""
+    for index, files in enumerate(
+        [
+            [make_metadata("https://example.com/a.pdf"), make_metadata("https://example.com/b.pdf", "failed", 0)],
+            [make_metadata("https://example.com/c.pdf", "skipped", 5)],
+        ]
+    ):
+        shard = ShardSpec(count=2, index=index)
+        manager = make_manager(tmp_path, shard)
+        for file in files:
+            manager.add_file(file)
+        manager.save()
+        cache = HTTPValidatorCache(str(tmp_path), segment=shard.name)
+        cache.update(f"https://example.com/{index}.pdf", {"ETag": f'"{index}"'})
+        cache.save()
+
+    stats = merge_shards(str(tmp_path))
+
+    assert stats is not None
+    assert (stats.total_files, stats.downloaded_files, stats.skipped_files, stats.failed_files) == (3, 1, 1, 1)
+    merged = json.loads((tmp_path / "metadata.json").read_text(encoding="utf-8"))
+    assert [file["filename"] for file in merged["files"]] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert set(HTTPValidatorCache(str(tmp_path)).entries) == {"https://example.com/0.pdf", "https://example.com/1.pdf"}
+    assert not list(tmp_path.glob("http_cache.shard-*.json"))
+
+
+def test_merge_shards_without_segments(tmp_path: Path) -> None:
+    """セグメントがない場合のテスト"""
+    assert merge_shards(str(tmp_path)) is None
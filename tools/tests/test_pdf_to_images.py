@@ -0,0 +1,219 @@
+# ruff: noqa
+"""pdf_to_images.pyのバッチ変換のテスト"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# toolsディレクトリをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_to_images
+from pdf_to_images import (
+    RenderOptions,
+    RenderTask,
+    compare_render_options,
+    find_pdfs,
+    page_output_path,
+    pdf_to_png,
+    pdf_to_png_batch,
+    plan_tasks,
+)
+
+
+@pytest.fixture
+def fake_poppler(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, int, int]]:
+    """pdfinfo_from_pathとconvert_from_pathを置き換え、変換したページ範囲を記録するフィクスチャ"""
+    calls: list[tuple[str, int, int]] = []
+    page_counts = {"a.pdf": 20, "b.pdf": 3}
+
+    def fake_pdfinfo(pdf_path: str) -> dict:
+        return {"Pages": page_counts[os.path.basename(pdf_path)]}
+
+    def fake_convert(pdf_path: str, first_page: int, last_page: int, **kwargs) -> list[Image.Image]:
+        calls.append((os.path.basename(pdf_path), first_page, last_page))
+        mode = "L" if kwargs.get("grayscale") else "RGB"
+        return [Image.new(mode, (4, 4), "white") for _ in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(pdf_to_images, "pdfinfo_from_path", fake_pdfinfo)
+    monkeypatch.setattr(pdf_to_images, "convert_from_path", fake_convert)
+    return calls
+
+
+def test_find_pdfs_from_metadata(tmp_path: Path) -> None:
+    """ダウンローダーのmetadata.jsonからダウンロード済みのPDFを取得するテスト"""
+    (tmp_path / "a.pdf").write_bytes(b"%PDF")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF")
+    metadata = {
+        "files": [
+            {"filename": "a.pdf", "download_status": "success"},
+            {"filename": "b.pdf", "download_status": "failed"},
+            {"filename": "missing.pdf", "download_status": "skipped"},
+        ]
+    }
+    (tmp_path / "metadata.json").write_text(json.dumps(metadata), encoding="utf-8")
+
+    assert find_pdfs(str(tmp_path / "metadata.json")) == [str(tmp_path / "a.pdf")]
+    assert find_pdfs(str(tmp_path)) == [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")]
+
+
+def test_find_pdfs_skips_object_store(tmp_path: Path) -> None:
+    """ダウンローダーのオブジェクトストア内のPDFを対象外にするテスト"""
+    (tmp_path / "a.pdf").write_bytes(b"%PDF")
+    (tmp_path / "R5").mkdir()
+    (tmp_path / "R5" / "b.pdf").write_bytes(b"%PDF")
+    (tmp_path / "objects" / "ab").mkdir(parents=True)
+    (tmp_path / "objects" / "ab" / ("ab" * 32 + ".pdf")).write_bytes(b"%PDF")
+
+    assert find_pdfs(str(tmp_path)) == [str(tmp_path / "R5" / "b.pdf"), str(tmp_path / "a.pdf")]
+
+
+def test_batch_rejects_duplicate_file_names(
+    tmp_path: Path, fake_poppler: list[tuple[str, int, int]], capsys: pytest.CaptureFixture[str]
+) -> None:
+    """別のディレクトリにある同じ名前のPDFは、画像が上書きされるため変換しないことのテスト"""
+    source = tmp_path / "pdfs"
+    for subdir in ("R4", "R5"):
+        (source / subdir).mkdir(parents=True)
+        (source / subdir / "a.pdf").write_bytes(b"%PDF")
+    (source / "b.pdf").write_bytes(b"%PDF")
+    output_dir = tmp_path / "images"
+
+    pdf_to_png_batch(str(source), str(output_dir), workers=1)
+
+    assert fake_poppler == []
+    assert not output_dir.exists()
+    assert "R4/a.pdf" in capsys.readouterr().out
+
+
+def test_plan_tasks_splits_by_page_count_and_skips_rendered(tmp_path: Path) -> None:
+    """ページ数に応じてタスクを分割し、変換済みのページを除外するテスト"""
+    output_dir = str(tmp_path)
+    for page_num in (1, 2, 3, 10):
+        Path(page_output_path(output_dir, "a.pdf", page_num, 20)).touch()
+
+    tasks = plan_tasks({"a.pdf": 20, "b.pdf": 3}, output_dir, pages_per_task=6)
+
+    assert tasks == [
+        RenderTask("a.pdf", 4, 9, 20),
+        RenderTask("a.pdf", 11, 16, 20),
+        RenderTask("a.pdf", 17, 20, 20),
+        RenderTask("b.pdf", 1, 3, 3),
+    ]
+    assert page_output_path(output_dir, "a.pdf", 4, 20).endswith("a_page_04.png")
+
+
+def test_batch_renders_missing_pages_only(tmp_path: Path, fake_poppler: list[tuple[str, int, int]]) -> None:
+    """バッチ変換で全ページを保存し、再実行時は変換しないことのテスト"""
+    source = tmp_path / "pdfs"
+    source.mkdir()
+    (source / "a.pdf").write_bytes(b"%PDF")
+    (source / "b.pdf").write_bytes(b"%PDF")
+    output_dir = tmp_path / "images"
+
+    pdf_to_png_batch(str(source), str(output_dir), workers=1, pages_per_task=8)
+
+    assert len(list(output_dir.glob("*.png"))) == 23
+    # タスクの範囲内でも1ページずつ変換する
+    assert sorted(fake_poppler) == [("a.pdf", n, n) for n in range(1, 21)] + [("b.pdf", n, n) for n in range(1, 4)]
+
+    fake_poppler.clear()
+    pdf_to_png_batch(str(source), str(output_dir), workers=1)
+    assert fake_poppler == []
+
+
+def test_pdf_to_png_renders_one_page_at_a_time(tmp_path: Path, fake_poppler: list[tuple[str, int, int]]) -> None:
+    """単一PDFの変換で1ページずつ変換・保存することのテスト"""
+    pdf_path = tmp_path / "b.pdf"
+    pdf_path.write_bytes(b"%PDF")
+    output_dir = tmp_path / "images"
+
+    pdf_to_png(str(pdf_path), str(output_dir))
+
+    assert fake_poppler == [("b.pdf", 1, 1), ("b.pdf", 2, 2), ("b.pdf", 3, 3)]
+    assert sorted(p.name for p in output_dir.glob("*.png")) == ["b_page_1.png", "b_page_2.png", "b_page_3.png"]
+
+
+def test_render_options_encode_and_forward_to_pdftoppm(
+    tmp_path: Path, fake_poppler: list[tuple[str, int, int]], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """DPIとグレースケール描画をpdftoppmに渡し、指定した色形式で保存することのテスト"""
+    kwargs_seen: list[dict] = []
+    fake_convert = pdf_to_images.convert_from_path
+
+    def recording_convert(pdf_path: str, **kwargs) -> list[Image.Image]:
+        kwargs_seen.append(kwargs)
+        return fake_convert(pdf_path, **kwargs)
+
+    monkeypatch.setattr(pdf_to_images, "convert_from_path", recording_convert)
+    pdf_path = tmp_path / "b.pdf"
+    pdf_path.write_bytes(b"%PDF")
+
+    for color_mode, expected_mode in [("gray", "L"), ("palette", "P"), ("1bit", "1")]:
+        output_dir = tmp_path / color_mode
+        pdf_to_png(str(pdf_path), str(output_dir), options=RenderOptions(dpi=100, color_mode=color_mode))
+        with Image.open(output_dir / "b_page_1.png") as image:
+            assert image.mode == expected_mode
+
+    assert kwargs_seen[0]["dpi"] == 100
+    assert kwargs_seen[0]["grayscale"] is True
+    assert kwargs_seen[3]["grayscale"] is False
+    with pytest.raises(ValueError):
+        RenderOptions(color_mode="cmyk")
+
+
+def test_compare_render_options(tmp_path: Path, fake_poppler: list[tuple[str, int, int]]) -> None:
+    """サンプルページを各オプションで変換し、サイズと時間を集計することのテスト"""
+    (tmp_path / "a.pdf").write_bytes(b"%PDF")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF")
+    options = (RenderOptions(), RenderOptions(color_mode="1bit"))
+
+    results = compare_render_options(str(tmp_path), options, sample_pages=2)
+
+    assert [row["options"] for row in results] == ["200dpi rgb level=6", "200dpi 1bit level=6"]
+    assert [row["pages"] for row in results] == [4, 4]
+    assert all(row["bytes"] > 0 for row in results)
+    assert list(tmp_path.glob("*.png")) == []
+
+
+def test_preprocess_in_memory_saves_requested_outputs(tmp_path: Path, fake_poppler: list[tuple[str, int, int]]) -> None:
+    """前処理を描画した画像に直接適用し、指定した出力のみを保存することのテスト"""
+    pdf_path = tmp_path / "b.pdf"
+    pdf_path.write_bytes(b"%PDF")
+
+    both_dir = tmp_path / "both"
+    pdf_to_png(str(pdf_path), str(both_dir), preprocess=["grayscale", "binarize"])
+    assert len(list(both_dir.glob("*.png"))) == 3
+    log = json.loads((both_dir / "processed" / "preprocess_log.json").read_text(encoding="utf-8"))
+    assert log[0] == {
+        "source": str(both_dir / "b_page_1.png"),
+        "processed": str(both_dir / "processed" / "b_page_1.png"),
+        "steps": ["grayscale", "binarize"],
+    }
+    with Image.open(both_dir / "processed" / "b_page_1.png") as image:
+        assert image.mode == "1"
+
+    processed_only_dir = tmp_path / "processed_only"
+    pdf_to_png(str(pdf_path), str(processed_only_dir), preprocess=["grayscale"], save_raw=False)
+    assert list(processed_only_dir.glob("*.png")) == []
+    assert len(list((processed_only_dir / "processed").glob("*.png"))) == 3
+
+
+def test_batch_processed_only_skips_processed_pages(tmp_path: Path, fake_poppler: list[tuple[str, int, int]]) -> None:
+    """前処理後の画像のみを保存するバッチ変換で、再実行時に変換済みのページをスキップすることのテスト"""
+    source = tmp_path / "pdfs"
+    source.mkdir()
+    (source / "b.pdf").write_bytes(b"%PDF")
+    output_dir = tmp_path / "images"
+
+    pdf_to_png_batch(str(source), str(output_dir), workers=1, preprocess=["grayscale"], save_raw=False)
+    assert len(list((output_dir / "processed").glob("*.png"))) == 3
+    assert list(output_dir.glob("*.png")) == []
+
+    fake_poppler.clear()
+    pdf_to_png_batch(str(source), str(output_dir), workers=1, preprocess=["grayscale"], save_raw=False)
+    assert fake_poppler == []
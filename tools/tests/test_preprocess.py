@@ -0,0 +1,84 @@
+# ruff: noqa
+"""preprocess.pyのNumPy実装のテスト"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+# toolsディレクトリをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocess import ImagePreprocessor, benchmark, otsu_threshold
+
+
+def make_page(seed: int = 0) -> Image.Image:
+    """ノイズと文字のような線を含むテスト用のページ画像を作成"""
+    rng = np.random.default_rng(seed)
+    array = rng.integers(180, 256, (61, 47, 3), dtype=np.uint8)
+    array[rng.random((61, 47)) < 0.05] = 0
+    image = Image.fromarray(array)
+    draw = ImageDraw.Draw(image)
+    for y in range(5, 60, 8):
+        draw.line((3, y, 43, y), fill=(20, 30, 40), width=2)
+    return image
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        ["grayscale"],
+        ["binarize"],
+        ["grayscale", "binarize"],
+        ["grayscale", "binarize", "denoise"],
+        ["grayscale", "denoise"],
+        ["denoise"],
+        ["denoise", "binarize"],
+    ],
+)
+@pytest.mark.parametrize("denoise_filter_size", [3, 5])
+def test_numpy_backend_matches_pil(steps: list[str], denoise_filter_size: int) -> None:
+    """NumPy実装がPIL実装と画素単位で一致することのテスト"""
+    image = make_page()
+    options = {"binarize_threshold": 150, "denoise_filter_size": denoise_filter_size}
+
+    expected = ImagePreprocessor(steps, backend="pil", **options).apply(image)
+    actual = ImagePreprocessor(steps, backend="numpy", **options).apply(image)
+
+    assert actual.mode == expected.mode
+    assert np.array_equal(np.asarray(actual), np.asarray(expected))
+
+
+def test_adaptive_thresholds() -> None:
+    """大津の二値化とSauvolaの二値化のテスト"""
+    gray = np.array([[10] * 6 + [200] * 10], dtype=np.uint8)
+    threshold = otsu_threshold(gray)
+    assert 10 <= threshold < 200
+
+    # 左から右へ明るくなる背景の上の暗い線は、固定閾値では消えるがSauvolaでは残る
+    background = np.tile(np.linspace(40, 255, 80).astype(np.uint8), (40, 1))
+    background[20:22, :] = (background[20:22, :] * 0.5).astype(np.uint8)
+    image = Image.fromarray(background)
+    sauvola = np.asarray(ImagePreprocessor(["sauvola"], sauvola_window_size=15).apply(image))
+    assert not sauvola[20:22, 10:70].any()
+    assert sauvola[10, 10:70].all()
+
+    otsu = ImagePreprocessor(["otsu"]).apply(make_page())
+    assert otsu.mode == "1"
+
+    with pytest.raises(ValueError):
+        ImagePreprocessor(["grayscale"], backend="opencv")
+
+
+def test_benchmark_reports_identical_outputs(tmp_path) -> None:
+    """ベンチマークが両方の実装の時間と出力の一致を報告することのテスト"""
+    path = tmp_path / "page.png"
+    make_page().save(path)
+
+    [row] = benchmark([path], ["grayscale", "binarize", "denoise"], repeat=1)
+
+    assert row["identical"] is True
+    assert row["pil_seconds"] > 0
+    assert row["numpy_seconds"] > 0